@@ -26,6 +26,42 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 5000
     
+    # Nachbestellung (automatische Bestellentwürfe)
+    NACHBESTELLUNG_INTERVALL_MINUTEN: int = 0  # 0 = nur auf Anfrage, sonst periodisch
+    NACHBESTELLUNG_ZIELFAKTOR: float = 2.0  # Auffüllen bis Mindestbestand × Faktor
+    
+    # Bedarfsprognose (dynamischer Mindestbestand)
+    PROGNOSE_INTERVALL_MINUTEN: int = 0  # 0 = nur Vorschläge per API, sonst automatisch setzen
+    PROGNOSE_HISTORIE_TAGE: int = 730  # Verbrauchshistorie (2 Jahre für Saisonalität)
+    PROGNOSE_SERVICEGRAD: float = 0.95  # Wahrscheinlichkeit, in der Lieferzeit nicht leer zu laufen
+    PROGNOSE_LIEFERZEIT_TAGE: int = 7  # Falls beim Lieferanten keine Lieferzeit hinterlegt ist
+    
+    # Leihrad-Status (verliehen/verfuegbar aus den Vermietungen)
+    LEIHRAD_STATUS_INTERVALL_MINUTEN: int = 15  # 0 = nur per POST /api/leihraeder/sync-status
+    
+    # Leihrad-Wartung (kontrollstatus, Wartungsaufträge)
+    LEIHRAD_WARTUNG_INTERVALL_MINUTEN: int = 0  # 0 = nur per POST /api/leihraeder/wartung-pruefen (z.B. 360 = alle 6 h)
+    LEIHRAD_WARTUNG_ABSTAND_TAGE: int = 180  # Wartung spätestens so lange nach der letzten
+    LEIHRAD_WARTUNG_MIETTAGE: int = 60  # ... oder nach so vielen Miettagen seit der letzten
+    LEIHRAD_WARTUNG_VORLAUF_TAGE: int = 14  # So viele (Miet-)Tage vorher: faellig
+    LEIHRAD_WARTUNG_LANGMIETE_TAGE: int = 5  # Mieten ab so vielen Tagen nur mit Rädern ohne fällige Wartung (0 = aus)
+    
+    # Öffentliche Verfügbarkeit (Website-Widget, GET /api/oeffentlich/verfuegbarkeit)
+    OEFFENTLICH_VERFUEGBARKEIT_TAGE: int = 14  # Tage ab heute
+    OEFFENTLICH_CACHE_SEKUNDEN: int = 300  # Cache-Control max-age für Browser/Proxies
+    OEFFENTLICH_AUSGEBLENDETE_TYPEN: str = "Werkstatt"  # Kommagetrennt, nicht öffentlich
+    OEFFENTLICH_SNAPSHOT_INTERVALL_MINUTEN: int = 5  # Neuaufbau des Snapshots (Tageswechsel), 0 = nur nach Änderungen
+    
+    # Werkstattplanung (Kapazität für fertig_bis-Vorschläge)
+    WERKSTATT_MECHANIKER: str = ""  # Kommagetrennt; leer = aus zugewiesenen Aufträgen
+    WERKSTATT_STUNDEN_PRO_TAG: float = 8.0  # Arbeitsstunden pro Mechaniker und Tag
+    WERKSTATT_BEGINN_STUNDE: int = 9  # Arbeitsbeginn (Uhr)
+    WERKSTATT_ARBEITSTAGE: str = "0,1,2,3,4,5"  # 0 = Montag ... 6 = Sonntag
+    WERKSTATT_STANDARD_STUNDEN: float = 1.0  # Schätzung, solange keine Historie existiert
+    
+    # PDF-Erzeugung
+    PDF_PROZESSE: int = 2  # Render-Prozesse (0 = im API-Thread rendern)
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
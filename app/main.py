@@ -2,12 +2,36 @@
 Radstation v2 - Main Application
 FastAPI Server
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 from .config import settings
-from .routers import artikel, lieferanten, kategorien, bestellungen, reparaturen, leihraeder, dashboard, kunden, varianten, lagerorte
+from .routers import artikel, lieferanten, kategorien, bestellungen, reparaturen, leihraeder, dashboard, kunden, varianten, lagerorte, oeffentlich
+from .utils import scheduler, pdf_service
+from .utils.nachbestellung import nachbestellung_job
+from .utils.prognose import prognose_job
+from .utils.leihrad_status import leihrad_status_job
+from .utils.leihrad_wartung import leihrad_wartung_job
+from .utils.verfuegbarkeit_oeffentlich import initialisiere_snapshot, oeffentlich_snapshot_job
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Hintergrund-Jobs beim Start registrieren (inkl. öffentlichem Snapshot), beim Beenden stoppen (inkl. PDF-Prozesse)"""
+    scheduler.registriere_job("nachbestellung", settings.NACHBESTELLUNG_INTERVALL_MINUTEN, nachbestellung_job)
+    scheduler.registriere_job("prognose", settings.PROGNOSE_INTERVALL_MINUTEN, prognose_job)
+    scheduler.registriere_job("leihrad_status", settings.LEIHRAD_STATUS_INTERVALL_MINUTEN, leihrad_status_job)
+    scheduler.registriere_job("leihrad_wartung", settings.LEIHRAD_WARTUNG_INTERVALL_MINUTEN, leihrad_wartung_job)
+    scheduler.registriere_job("oeffentlich_snapshot", settings.OEFFENTLICH_SNAPSHOT_INTERVALL_MINUTEN, oeffentlich_snapshot_job)
+    scheduler.starte_jobs()
+    # Öffentlichen Snapshot vorab bauen - Website-Anfragen lesen nur den Speicher
+    initialisiere_snapshot()
+    yield
+    scheduler.stoppe_jobs()
+    pdf_service.stoppe_pool()
+
 
 # FastAPI App
 app = FastAPI(
@@ -15,6 +39,7 @@ app = FastAPI(
     version=settings.APP_VERSION,
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS Middleware
@@ -38,6 +63,7 @@ app.include_router(leihraeder.router)
 app.include_router(leihraeder.router_vermietung)
 app.include_router(dashboard.router)  # <- Dashboard!
 app.include_router(kunden.router)  # <- KUNDENKARTEI!
+app.include_router(oeffentlich.router)  # Website-Widget (ohne Kundendaten)
 # Static Files (Uploads)
 files_dir = Path(settings.FILES_DIR)
 files_dir.mkdir(exist_ok=True)
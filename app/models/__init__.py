@@ -9,10 +9,12 @@ from .artikel_variante import ArtikelVariante
 from .artikel_lieferant import ArtikelLieferant
 from .bestand_historie import BestandHistorie, BestandArt, BestandOrt
 from .bestellung import Bestellung, BestellPosition
-from .reparatur import Reparatur, ReparaturPosition
+from .reparatur import Reparatur, ReparaturPosition, ReparaturStatusWechsel
 from .leihrad import Leihrad, LeihradStatus
 from .vermietung import Vermietung, VermietungStatus
 from .vermietung_position import VermietungPosition  # ✨ Phase 5
+from .vermietung_zuweisung import VermietungRadZuweisung
+from .leihrad_belegung import LeihradTagesbelegung
 from .kunde import Kunde, KundenWarnung  # Kunden-System
 from app.models.lagerort import Lagerort
 
@@ -29,11 +31,14 @@ __all__ = [
     "BestellPosition",
     "Reparatur",
     "ReparaturPosition",
+    "ReparaturStatusWechsel",
     "Leihrad",
     "LeihradStatus",
     "Vermietung",
     "VermietungStatus",
     "VermietungPosition",  # ✨ Phase 5
+    "VermietungRadZuweisung",
+    "LeihradTagesbelegung",
     "Kunde",  # Kunden-System
     "KundenWarnung",
 ]
\ No newline at end of file
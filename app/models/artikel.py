@@ -39,6 +39,7 @@ class Artikel(Base):
     # Bestand (Lager + Werkstatt getrennt!)
     bestand_lager = Column(Integer, default=0, nullable=False)
     bestand_werkstatt = Column(Integer, default=0, nullable=False)
+    bestand_reserviert = Column(Integer, default=0, server_default="0", nullable=False)  # Für offene Reparaturen
     mindestbestand = Column(Integer, default=0)
     
     # Varianten-Support (NEU!)
@@ -80,10 +81,15 @@ class Artikel(Base):
         """Gesamtbestand (Lager + Werkstatt)"""
         return self.bestand_lager + self.bestand_werkstatt
     
+    @property
+    def bestand_verfuegbar(self) -> int:
+        """Gesamtbestand abzüglich Reservierungen offener Reparaturen"""
+        return self.bestand_gesamt - (self.bestand_reserviert or 0)
+    
     @property
     def ist_mindestbestand(self) -> bool:
         """Prüft ob Mindestbestand unterschritten - nur bei Material!"""
         # Dienstleistungen und Werkzeuge haben keinen Bestand
         if self.typ in (ArtikelTyp.dienstleistung, ArtikelTyp.werkzeug):
             return False
-        return self.bestand_gesamt <= self.mindestbestand
\ No newline at end of file
+        return self.bestand_verfuegbar <= self.mindestbestand
\ No newline at end of file
@@ -87,7 +87,8 @@ class BestellPosition(Base):
     bestellung_id = Column(Integer, ForeignKey("bestellungen.id", ondelete="CASCADE"), nullable=False)
     
     # Artikel (optional - kann aus Inventar kommen ODER manuell eingegeben werden)
-    artikel_id = Column(Integer, ForeignKey("artikel.id"), nullable=True)
+    artikel_id = Column(Integer, ForeignKey("artikel.id"), nullable=True, index=True)
+    variante_id = Column(Integer, ForeignKey("artikel_varianten.id"), nullable=True, index=True)  # Bei Artikeln mit Varianten
     
     # Artikel-Daten (Pflicht - entweder aus Inventar kopiert ODER manuell)
     artikelnummer = Column(String(100), nullable=False)  # Lieferanten-Artikelnummer
@@ -123,6 +124,7 @@ class BestellPosition(Base):
     # Relationships
     bestellung = relationship("Bestellung", back_populates="positionen")
     artikel = relationship("Artikel")
+    variante = relationship("ArtikelVariante")
     
     def __repr__(self):
         return f"<BestellPosition {self.artikelnummer}: {self.menge_geliefert}/{self.menge_bestellt}>"
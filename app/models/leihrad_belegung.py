@@ -0,0 +1,21 @@
+"""
+Tagesbelegung pro Rad-Typ
+Abgeleitete Tabelle: wieviele Räder eines Typs an einem Tag durch aktive/reservierte
+Vermietungen belegt sind. Wird bei jeder Vermietungs-Änderung inkrementell gepflegt
+(app/utils/verfuegbarkeit.py), damit Verfügbarkeiten mit einer Query beantwortet werden.
+"""
+
+from sqlalchemy import Column, Integer, String, Date
+from app.database import Base
+
+
+class LeihradTagesbelegung(Base):
+    __tablename__ = "leihrad_tagesbelegung"
+
+    # Schlüssel (datum, rad_typ): Zeitraum-Abfragen über alle Typen laufen über den PK-Index
+    datum = Column(Date, primary_key=True)
+    rad_typ = Column(String(50), primary_key=True)
+    belegt = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<LeihradTagesbelegung {self.datum} {self.rad_typ}: {self.belegt}>"
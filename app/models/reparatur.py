@@ -1,9 +1,10 @@
 """
 Reparatur Models
 """
-from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, Boolean, ForeignKey
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, Boolean, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.sql import func, text
 from app.database import Base
 
 
@@ -31,6 +32,9 @@ class Reparatur(Base):
     kunde_telefon_legacy = Column(String(50), nullable=True)
     kunde_email_legacy = Column(String(200), nullable=True)
     
+    # Wartungsauftrag für ein Leihrad (siehe utils/leihrad_wartung)
+    leihrad_id = Column(Integer, ForeignKey("leihraeder.id", ondelete="SET NULL"), nullable=True)
+    
     # Reparatur-Details
     maengelbeschreibung = Column(Text, nullable=False)  # Was ist kaputt?
     status = Column(String(50), nullable=False, default='angenommen', index=True)
@@ -61,9 +65,18 @@ class Reparatur(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
+    # Volltextsuche (wird per DB-Trigger gepflegt, inkl. Name/Telefon des verknüpften Kunden)
+    suchvektor = deferred(Column(TSVECTOR, nullable=True))
+    
     # Beziehungen
     positionen = relationship("ReparaturPosition", back_populates="reparatur", cascade="all, delete-orphan")
     kunde = relationship("Kunde", foreign_keys=[kunde_id])  # Verknüpfung zur Kundendatenbank
+    leihrad = relationship("Leihrad")
+    
+    __table_args__ = (
+        Index("ix_reparaturen_suchvektor", "suchvektor", postgresql_using="gin"),
+        Index("ix_reparaturen_leihrad_id", "leihrad_id", postgresql_where=text("leihrad_id IS NOT NULL")),
+    )
     
     def __repr__(self):
         return f"<Reparatur {self.auftragsnummer}: {self.fahrradmarke} - {self.status}>"
@@ -74,7 +87,7 @@ class ReparaturPosition(Base):
     __tablename__ = "reparatur_positionen"
     
     id = Column(Integer, primary_key=True, index=True)
-    reparatur_id = Column(Integer, ForeignKey("reparaturen.id", ondelete="CASCADE"), nullable=False)
+    reparatur_id = Column(Integer, ForeignKey("reparaturen.id", ondelete="CASCADE"), nullable=False, index=True)
     
     # Position-Typ
     typ = Column(String(20), nullable=False)  # 'arbeit' oder 'teil'
@@ -91,6 +104,9 @@ class ReparaturPosition(Base):
     einzelpreis = Column(Numeric(10, 2), nullable=False)
     gesamtpreis = Column(Numeric(10, 2), nullable=False)
     
+    # Lager (nur Teile mit Artikel): 'reserviert' bis zur Abholung, dann 'verbraucht'
+    lager_status = Column(String(20), nullable=True)
+    
     # Timestamps
     created_at = Column(DateTime, server_default=func.now())
     
@@ -98,5 +114,39 @@ class ReparaturPosition(Base):
     reparatur = relationship("Reparatur", back_populates="positionen")
     artikel = relationship("Artikel")
     
+    __table_args__ = (
+        Index(
+            "ix_reparatur_positionen_reserviert", "artikel_id",
+            postgresql_where=text("lager_status = 'reserviert'"),
+        ),
+    )
+    
     def __repr__(self):
         return f"<ReparaturPosition {self.typ}: {self.bezeichnung} ({self.menge}x {self.einzelpreis}€)>"
+
+
+class ReparaturStatusWechsel(Base):
+    """
+    Statuswechsel einer Reparatur (append-only, wird nie geändert)
+    Grundlage für Durchlaufzeiten pro Phase/Mechaniker/Monat
+    """
+    __tablename__ = "reparatur_statuswechsel"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    reparatur_id = Column(Integer, ForeignKey("reparaturen.id", ondelete="CASCADE"), nullable=False)
+    
+    von_status = Column(String(50), nullable=True)  # None = Auftrag angelegt
+    nach_status = Column(String(50), nullable=False)
+    zeitpunkt = Column(DateTime, nullable=False, server_default=func.now())
+    
+    meister = Column(String(100), nullable=True)  # Zugewiesener Mechaniker zum Zeitpunkt des Wechsels
+    
+    reparatur = relationship("Reparatur")
+    
+    __table_args__ = (
+        Index("ix_reparatur_statuswechsel_reparatur_zeitpunkt", "reparatur_id", "zeitpunkt"),
+        Index("ix_reparatur_statuswechsel_zeitpunkt", "zeitpunkt"),
+    )
+    
+    def __repr__(self):
+        return f"<ReparaturStatusWechsel {self.reparatur_id}: {self.von_status} → {self.nach_status}>"
@@ -33,6 +33,7 @@ class Vermietung(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     leihrad_id = Column(Integer, ForeignKey("leihraeder.id"), nullable=True)  # ✅ KALENDER V2: Optional für Gruppenbuchungen
+    # Doppelbuchung eines Rads verhindert der Exclusion-Constraint vermietungen_leihrad_zeitraum_excl (Migration)
     
     # Kunde-Beziehung (NEU - Kundenkartei)
     kunde_id = Column(Integer, ForeignKey("kunden.id"), nullable=True)  # nullable=True für Migration
@@ -86,4 +87,5 @@ class Vermietung(Base):
     # Beziehungen
     leihrad = relationship("Leihrad", back_populates="vermietungen")
     kunde = relationship("Kunde", back_populates="vermietungen")  # NEU
-    positionen = relationship("VermietungPosition", back_populates="vermietung", cascade="all, delete-orphan")  # ✨ Phase 5
\ No newline at end of file
+    positionen = relationship("VermietungPosition", back_populates="vermietung", cascade="all, delete-orphan")  # ✨ Phase 5
+    rad_zuweisungen = relationship("VermietungRadZuweisung", back_populates="vermietung", cascade="all, delete-orphan")
\ No newline at end of file
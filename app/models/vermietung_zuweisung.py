@@ -0,0 +1,38 @@
+"""
+Rad-Zuweisung für typ-basierte Buchungen
+Jede Zeile = ein konkretes Leihrad für eine Einheit einer Position (2× E-Bike → 2 Zeilen).
+Zeitraum und Typ sind von Vermietung/Position kopiert, damit Überschneidungen pro Rad
+ohne Join gefunden werden. Gepflegt von app/utils/radzuweisung.py.
+"""
+
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+
+class VermietungRadZuweisung(Base):
+    __tablename__ = "vermietung_rad_zuweisungen"
+
+    id = Column(Integer, primary_key=True, index=True)
+    vermietung_id = Column(Integer, ForeignKey("vermietungen.id", ondelete="CASCADE"), nullable=False, index=True)
+    position_id = Column(Integer, ForeignKey("vermietung_positionen.id", ondelete="CASCADE"), nullable=False)
+    leihrad_id = Column(Integer, ForeignKey("leihraeder.id", ondelete="CASCADE"), nullable=False)
+
+    rad_typ = Column(String(50), nullable=False)
+    von_datum = Column(Date, nullable=False)
+    bis_datum = Column(Date, nullable=False)
+
+    vermietung = relationship("Vermietung", back_populates="rad_zuweisungen")
+    leihrad = relationship("Leihrad")
+
+    __table_args__ = (
+        Index("ix_vermietung_rad_zuweisungen_rad_zeitraum", "leihrad_id", "von_datum"),
+        Index("ix_vermietung_rad_zuweisungen_typ_zeitraum", "rad_typ", "von_datum"),
+    )
+
+    @property
+    def inventarnummer(self):
+        return self.leihrad.inventarnummer if self.leihrad else None
+
+    def __repr__(self):
+        return f"<VermietungRadZuweisung Vermietung {self.vermietung_id} → Rad {self.leihrad_id}>"
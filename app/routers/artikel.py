@@ -13,6 +13,8 @@ from ..models.artikel import Artikel
 from ..models.artikel_lieferant import ArtikelLieferant
 from ..models.bestand_historie import BestandHistorie
 from ..schemas import artikel as schemas
+from ..utils.prognose import berechne_mindestbestand_vorschlaege, uebernehme_mindestbestaende
+from ..utils.teilereservierung import verfuegbarer_bestand
 
 
 router = APIRouter(prefix="/api/artikel", tags=["Artikel"])
@@ -66,7 +68,7 @@ def get_artikel_liste(
     # Filter: Unter Mindestbestand
     if unter_mindestbestand:
         query = query.filter(
-            (Artikel.bestand_lager + Artikel.bestand_werkstatt) < Artikel.mindestbestand
+            verfuegbarer_bestand() < Artikel.mindestbestand
         )
     
     # Total count
@@ -101,6 +103,54 @@ def get_artikel_liste(
     )
 
 
+# ═══════════════════════════════════════════════════════════
+# GET /api/artikel/prognose/mindestbestand - Vorschläge prüfen
+# ═══════════════════════════════════════════════════════════
+
+@router.get("/prognose/mindestbestand", response_model=List[schemas.MindestbestandVorschlag])
+def get_mindestbestand_vorschlaege(
+    db: Session = Depends(get_db),
+    servicegrad: Optional[float] = Query(None, gt=0.5, lt=1, description="z.B. 0.95 (Default aus Settings)"),
+    nur_abweichungen: bool = Query(True, description="Nur Artikel, deren Vorschlag vom aktuellen Wert abweicht"),
+):
+    """
+    Mindestbestand-Vorschläge aus der Verbrauchsprognose
+    - Verbrauch: Reparatur-Teile + Abgänge aus der Bestandshistorie
+    - Saisonal (Monatsfaktoren) + Lieferzeit des bevorzugten Lieferanten
+    """
+    vorschlaege = berechne_mindestbestand_vorschlaege(db, servicegrad=servicegrad)
+    
+    if nur_abweichungen:
+        vorschlaege = [
+            v for v in vorschlaege
+            if v["mindestbestand_vorschlag"] != v["mindestbestand_aktuell"]
+        ]
+    
+    return vorschlaege
+
+
+# ═══════════════════════════════════════════════════════════
+# POST /api/artikel/prognose/mindestbestand - Vorschläge übernehmen
+# ═══════════════════════════════════════════════════════════
+
+@router.post("/prognose/mindestbestand", response_model=schemas.MindestbestandUebernehmenResponse)
+def uebernehme_mindestbestand_vorschlaege(
+    daten: schemas.MindestbestandUebernehmen,
+    db: Session = Depends(get_db)
+):
+    """Setzt Mindestbestände aus der Prognose (alle oder ausgewählte Artikel)"""
+    vorschlaege = berechne_mindestbestand_vorschlaege(db, servicegrad=daten.servicegrad)
+    
+    if daten.artikel_ids is not None:
+        ausgewaehlt = set(daten.artikel_ids)
+        vorschlaege = [v for v in vorschlaege if v["artikel_id"] in ausgewaehlt]
+    
+    aktualisiert = uebernehme_mindestbestaende(db, vorschlaege)
+    db.commit()
+    
+    return {"aktualisiert": aktualisiert}
+
+
 # ═══════════════════════════════════════════════════════════
 # GET /api/artikel/{id} - Einzelner Artikel
 # ═══════════════════════════════════════════════════════════
@@ -2,17 +2,21 @@
 Bestellungen Router
 FastAPI Endpoints für Sammelbestellungen
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.orm import Session, contains_eager, joinedload, selectinload
+from typing import Dict, List, Optional
+from collections import defaultdict
 from datetime import datetime
 from decimal import Decimal
-from io import BytesIO
 
 from app.database import get_db
 from app.models.bestellung import Bestellung, BestellPosition
 from app.models.artikel import Artikel
+from app.models.artikel_variante import ArtikelVariante
+from app.models.bestand_historie import BestandHistorie, BestandArt, BestandOrt
 from app.models.lieferant import Lieferant
 from app.schemas.bestellung import (
     BestellungCreate,
@@ -22,11 +26,23 @@ from app.schemas.bestellung import (
     BestellungStatusUpdate,
     BestellPositionCreate,
     BestellPositionCreateFromArtikel,  # NEU!
+    BestellPositionenBulkCreate,
     BestellPositionUpdate,
     BestellPositionResponse,
     WareneingangCreate,
+    WareneingangBulkCreate,
+    NachbestellVorschlagResponse,
+    BestellungExport,
+)
+from app.utils import pdf_service
+from app.utils.pdf_bestellung import generate_bestellung_pdf, bestellung_daten
+from app.utils.bestellsummen import buche_summen_delta
+from app.utils.lieferzeiten import invalidiere_lieferzeiten
+from app.utils.nachbestellung import (
+    naechste_bestellnummern,
+    ermittle_nachbestellbedarf,
+    erstelle_bestellentwuerfe,
 )
-from app.utils.pdf_bestellung import generate_bestellung_pdf
 
 router = APIRouter(
     prefix="/api/bestellungen",
@@ -40,19 +56,7 @@ router = APIRouter(
 
 def generate_bestellnummer(db: Session) -> str:
     """Generiert nächste Bestellnummer (BES-00001, BES-00002, ...)"""
-    last = db.query(Bestellung).order_by(Bestellung.id.desc()).first()
-    if not last:
-        return "BES-00001"
-    
-    # Extract number from last bestellnummer
-    try:
-        last_num = int(last.bestellnummer.split("-")[1])
-        new_num = last_num + 1
-        return f"BES-{new_num:05d}"
-    except (IndexError, ValueError):
-        # Fallback
-        count = db.query(Bestellung).count()
-        return f"BES-{count + 1:05d}"
+    return naechste_bestellnummern(db, 1)[0]
 
 
 def calculate_position_summen(position: BestellPosition) -> None:
@@ -61,16 +65,6 @@ def calculate_position_summen(position: BestellPosition) -> None:
     position.summe_vk = position.menge_bestellt * position.verkaufspreis
 
 
-def calculate_bestellung_summen(bestellung: Bestellung) -> None:
-    """Berechnet Gesamtsummen für Bestellung"""
-    bestellung.gesamtsumme_ek = sum(
-        pos.summe_ek or Decimal(0) for pos in bestellung.positionen
-    )
-    bestellung.gesamtsumme_vk = sum(
-        pos.summe_vk or Decimal(0) for pos in bestellung.positionen
-    )
-
-
 def update_bestellung_status(bestellung: Bestellung) -> None:
     """Aktualisiert Status basierend auf Lieferungen (Auto-Status)"""
     if bestellung.status == "offen":
@@ -96,6 +90,182 @@ def update_bestellung_status(bestellung: Bestellung) -> None:
         bestellung.status = "teilweise_geliefert"
 
 
+def buche_wareneingang(
+    db: Session,
+    bestellung_id: int,
+    mengen: Dict[int, int],
+    inventar_aktualisieren: bool = True,
+    erfasst_von: Optional[str] = None,
+) -> Bestellung:
+    """
+    Bucht gelieferte Mengen für mehrere Positionen einer Bestellung (kein Commit)
+
+    - Bestellung + Positionen werden mit einem SELECT ... FOR UPDATE gesperrt
+    - Bestände werden per Bulk-UPDATE (bestand_lager + Menge) erhöht, der neue
+      Bestand kommt per RETURNING zurück → Historie ohne erneutes Lesen
+    - Status wird einmal am Ende neu berechnet
+
+    Args:
+        mengen: position_id → gelieferte Menge
+    """
+    bestellung = db.execute(
+        select(Bestellung)
+        .join(Bestellung.positionen)
+        .options(contains_eager(Bestellung.positionen))
+        .where(Bestellung.id == bestellung_id)
+        .with_for_update(of=(Bestellung, BestellPosition))
+    ).unique().scalars().first()
+
+    if not bestellung:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Bestellung {bestellung_id} nicht gefunden oder ohne Positionen"
+        )
+
+    positionen = {pos.id: pos for pos in bestellung.positionen}
+    unbekannt = sorted(set(mengen) - set(positionen))
+    if unbekannt:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Positionen {unbekannt} gehören nicht zu Bestellung {bestellung_id}"
+        )
+
+    # Erst alles prüfen, dann buchen (ganz oder gar nicht)
+    zu_viel = [
+        f"Position {pos_id}: Bestellt={positionen[pos_id].menge_bestellt}, "
+        f"bereits geliefert={positionen[pos_id].menge_geliefert}, neu={menge}"
+        for pos_id, menge in mengen.items()
+        if positionen[pos_id].menge_geliefert + menge > positionen[pos_id].menge_bestellt
+    ]
+    if zu_viel:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Zu viel geliefert: " + "; ".join(zu_viel)
+        )
+
+    jetzt = datetime.utcnow()
+    artikel_zugang: Dict[int, int] = defaultdict(int)
+    varianten_zugang: Dict[int, int] = defaultdict(int)
+
+    for pos_id, menge in mengen.items():
+        position = positionen[pos_id]
+        position.menge_geliefert += menge
+        position.zuletzt_geliefert_am = jetzt
+        position.vollstaendig_geliefert = position.menge_geliefert >= position.menge_bestellt
+
+        if position.variante_id:
+            varianten_zugang[position.variante_id] += menge
+        elif position.artikel_id:
+            artikel_zugang[position.artikel_id] += menge
+
+    update_bestellung_status(bestellung)
+
+    if inventar_aktualisieren:
+        historie = []
+        grund = f"Wareneingang {bestellung.bestellnummer}"
+
+        if artikel_zugang:
+            erhoehung = case(artikel_zugang, value=Artikel.id, else_=0)
+            for artikel_id, bestand in db.execute(
+                update(Artikel)
+                .where(Artikel.id.in_(artikel_zugang))
+                .values(bestand_lager=Artikel.bestand_lager + erhoehung)
+                .returning(Artikel.id, Artikel.bestand_lager)
+                .execution_options(synchronize_session=False)
+            ):
+                menge = artikel_zugang[artikel_id]
+                historie.append({
+                    "artikel_id": artikel_id,
+                    "art": BestandArt.ZUGANG,
+                    "ort": BestandOrt.LAGER,
+                    "menge": menge,
+                    "bestand_vorher": bestand - menge,
+                    "bestand_nachher": bestand,
+                    "grund": grund,
+                    "referenz_typ": "bestellung",
+                    "referenz_id": bestellung.id,
+                    "erfasst_von": erfasst_von,
+                })
+
+        if varianten_zugang:
+            erhoehung = case(varianten_zugang, value=ArtikelVariante.id, else_=0)
+            for variante_id, artikel_id, artikelnummer, bestand in db.execute(
+                update(ArtikelVariante)
+                .where(ArtikelVariante.id.in_(varianten_zugang))
+                .values(bestand_lager=ArtikelVariante.bestand_lager + erhoehung)
+                .returning(
+                    ArtikelVariante.id,
+                    ArtikelVariante.artikel_id,
+                    ArtikelVariante.artikelnummer,
+                    ArtikelVariante.bestand_lager,
+                )
+                .execution_options(synchronize_session=False)
+            ):
+                # Historie hängt am Artikel, Bestand vorher/nachher ist der der Variante
+                menge = varianten_zugang[variante_id]
+                historie.append({
+                    "artikel_id": artikel_id,
+                    "art": BestandArt.ZUGANG,
+                    "ort": BestandOrt.LAGER,
+                    "menge": menge,
+                    "bestand_vorher": bestand - menge,
+                    "bestand_nachher": bestand,
+                    "grund": f"{grund} (Variante {artikelnummer})",
+                    "referenz_typ": "bestellung",
+                    "referenz_id": bestellung.id,
+                    "erfasst_von": erfasst_von,
+                })
+
+        if historie:
+            db.execute(insert(BestandHistorie), historie)
+
+    return bestellung
+
+
+# ============================================================================
+# Nachbestellung (automatische Bestellentwürfe)
+# ============================================================================
+
+@router.get("/nachbestellung/vorschlag", response_model=NachbestellVorschlagResponse)
+def get_nachbestellung_vorschlag(db: Session = Depends(get_db)):
+    """
+    Vorschau: Alle Artikel und Varianten unter Mindestbestand
+    
+    - Bereits bestellte, offene Mengen werden abgezogen
+    - Gruppiert nach bevorzugtem Lieferant
+    """
+    vorschlaege = ermittle_nachbestellbedarf(db)
+    lieferanten = {v["lieferant_id"] for v in vorschlaege if v["lieferant_id"] is not None}
+    
+    return {
+        "vorschlaege": vorschlaege,
+        "anzahl_lieferanten": len(lieferanten),
+        "ohne_lieferant": sum(1 for v in vorschlaege if v["lieferant_id"] is None),
+    }
+
+
+@router.post("/nachbestellung", response_model=List[BestellungListItem], status_code=status.HTTP_201_CREATED)
+def create_nachbestellung(erstellt_von: str = "Nachbestellung", db: Session = Depends(get_db)):
+    """
+    Bestellentwürfe erstellen (eine Bestellung pro Lieferant, Status "offen")
+    
+    Läuft optional auch periodisch (NACHBESTELLUNG_INTERVALL_MINUTEN)
+    """
+    vorschlaege = ermittle_nachbestellbedarf(db)
+    bestellungen = erstelle_bestellentwuerfe(db, vorschlaege, erstellt_von=erstellt_von)
+    db.commit()
+    
+    if not bestellungen:
+        return []
+    
+    return db.query(Bestellung).options(
+        joinedload(Bestellung.lieferant),
+        selectinload(Bestellung.positionen)
+    ).filter(
+        Bestellung.id.in_([b.id for b in bestellungen])
+    ).order_by(Bestellung.id).all()
+
+
 # ============================================================================
 # Bestellungen CRUD
 # ============================================================================
@@ -177,17 +347,19 @@ def create_bestellung(bestellung_data: BestellungCreate, db: Session = Depends(g
     db.flush()  # ID generieren
     
     # Initiale Positionen (falls vorhanden)
+    positionen = []
     for pos_data in bestellung_data.positionen:
         position = BestellPosition(
             bestellung_id=bestellung.id,
             **pos_data.model_dump()
         )
         calculate_position_summen(position)
-        db.add(position)
+        positionen.append(position)
+    db.add_all(positionen)
     
-    # Summen berechnen
-    db.flush()
-    calculate_bestellung_summen(bestellung)
+    # Summen aus den neuen Positionen (Collection muss nicht geladen werden)
+    bestellung.gesamtsumme_ek = sum((pos.summe_ek for pos in positionen), Decimal(0))
+    bestellung.gesamtsumme_vk = sum((pos.summe_vk for pos in positionen), Decimal(0))
     
     db.commit()
     db.refresh(bestellung)
@@ -259,6 +431,8 @@ def update_bestellung_status_endpoint(
     db.commit()
     db.refresh(bestellung)
     
+    invalidiere_lieferzeiten()
+    
     return bestellung
 
 
@@ -343,10 +517,9 @@ def add_position(
     calculate_position_summen(position)
     
     db.add(position)
-    db.flush()
     
-    # Summen neu berechnen
-    calculate_bestellung_summen(bestellung)
+    # Summen: nur Delta buchen
+    buche_summen_delta(db, bestellung_id, position.summe_ek, position.summe_vk)
     
     db.commit()
     db.refresh(position)
@@ -354,6 +527,82 @@ def add_position(
     return position
 
 
+@router.post("/{bestellung_id}/positionen/bulk", response_model=List[BestellPositionResponse], status_code=status.HTTP_201_CREATED)
+def add_positionen_bulk(
+    bestellung_id: int,
+    bulk_data: BestellPositionenBulkCreate,
+    db: Session = Depends(get_db)
+):
+    """
+    Mehrere Positionen auf einmal hinzufügen (wie POST /positionen, aber als Liste)
+    
+    - Alle Artikel werden mit einer Query geladen
+    - Positionen per Bulk-Insert, Summen mit einem Delta-Update
+    """
+    bestellung = db.query(Bestellung).filter(Bestellung.id == bestellung_id).first()
+    
+    if not bestellung:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Bestellung {bestellung_id} nicht gefunden"
+        )
+    
+    if bestellung.status not in ["offen", "bestellt"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Positionen können nur bei offenen oder bestellten Bestellungen hinzugefügt werden"
+        )
+    
+    artikel_ids = {pos.artikel_id for pos in bulk_data.positionen}
+    artikel_map = {
+        artikel.id: artikel
+        for artikel in db.query(Artikel).filter(Artikel.id.in_(artikel_ids))
+    }
+    fehlend = sorted(artikel_ids - set(artikel_map))
+    if fehlend:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Artikel {fehlend} nicht gefunden"
+        )
+    
+    zeilen = []
+    for pos_data in bulk_data.positionen:
+        artikel = artikel_map[pos_data.artikel_id]
+        einkaufspreis = pos_data.einkaufspreis or artikel.einkaufspreis or Decimal(0)
+        verkaufspreis = pos_data.verkaufspreis or artikel.verkaufspreis or Decimal(0)
+        zeilen.append({
+            "bestellung_id": bestellung_id,
+            "artikel_id": artikel.id,
+            "artikelnummer": artikel.artikelnummer,
+            "beschreibung": artikel.bezeichnung,
+            "etrto": getattr(artikel, 'etrto', None),
+            "zoll_info": getattr(artikel, 'zoll_info', None),
+            "menge_bestellt": pos_data.menge_bestellt,
+            "menge_geliefert": 0,
+            "einkaufspreis": einkaufspreis,
+            "verkaufspreis": verkaufspreis,
+            "summe_ek": pos_data.menge_bestellt * einkaufspreis,
+            "summe_vk": pos_data.menge_bestellt * verkaufspreis,
+            "vollstaendig_geliefert": False,
+            "notizen": pos_data.notizen,
+        })
+    
+    position_ids = db.scalars(insert(BestellPosition).returning(BestellPosition.id), zeilen).all()
+    
+    buche_summen_delta(
+        db,
+        bestellung_id,
+        sum((z["summe_ek"] for z in zeilen), Decimal(0)),
+        sum((z["summe_vk"] for z in zeilen), Decimal(0)),
+    )
+    
+    db.commit()
+    
+    return db.query(BestellPosition).options(
+        joinedload(BestellPosition.artikel)
+    ).filter(BestellPosition.id.in_(position_ids)).order_by(BestellPosition.id).all()
+
+
 @router.patch("/positionen/{position_id}", response_model=BestellPositionResponse)
 def update_position(
     position_id: int,
@@ -369,16 +618,22 @@ def update_position(
             detail=f"Position {position_id} nicht gefunden"
         )
     
+    alt_ek = position.summe_ek or Decimal(0)
+    alt_vk = position.summe_vk or Decimal(0)
+    
     # Update
     update_data = position_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(position, field, value)
     
-    # Summen neu berechnen
+    # Summen: nur Delta buchen
     calculate_position_summen(position)
-    db.flush()
-    
-    calculate_bestellung_summen(position.bestellung)
+    buche_summen_delta(
+        db,
+        position.bestellung_id,
+        position.summe_ek - alt_ek,
+        position.summe_vk - alt_vk,
+    )
     
     db.commit()
     db.refresh(position)
@@ -397,14 +652,15 @@ def delete_position(position_id: int, db: Session = Depends(get_db)):
             detail=f"Position {position_id} nicht gefunden"
         )
     
-    bestellung = position.bestellung
+    # Summen: Position abziehen
+    buche_summen_delta(
+        db,
+        position.bestellung_id,
+        -(position.summe_ek or Decimal(0)),
+        -(position.summe_vk or Decimal(0)),
+    )
     
     db.delete(position)
-    db.flush()
-    
-    # Summen neu berechnen
-    calculate_bestellung_summen(bestellung)
-    
     db.commit()
 
 
@@ -412,6 +668,39 @@ def delete_position(position_id: int, db: Session = Depends(get_db)):
 # Wareneingang
 # ============================================================================
 
+@router.post("/{bestellung_id}/wareneingang", response_model=BestellungResponse)
+def erfasse_wareneingang_bestellung(
+    bestellung_id: int,
+    wareneingang: WareneingangBulkCreate,
+    inventar_aktualisieren: bool = True,
+    db: Session = Depends(get_db)
+):
+    """
+    Wareneingang für einen ganzen Lieferschein erfassen (eine Transaktion)
+    
+    - Erhöht menge_geliefert aller übergebenen Positionen
+    - Optional: Aktualisiert Inventar (Artikel/Variante bestand_lager) + Bestandshistorie
+    - Aktualisiert Bestellungs-Status einmal am Ende
+    - Zu viel geliefert → 400, nichts wird gebucht
+    """
+    mengen: Dict[int, int] = defaultdict(int)
+    for zeile in wareneingang.positionen:
+        mengen[zeile.position_id] += zeile.menge
+    
+    buche_wareneingang(
+        db,
+        bestellung_id,
+        mengen,
+        inventar_aktualisieren=inventar_aktualisieren,
+        erfasst_von=wareneingang.erfasst_von,
+    )
+    
+    db.commit()
+    invalidiere_lieferzeiten()
+    
+    return get_bestellung(bestellung_id, db)
+
+
 @router.post("/positionen/{position_id}/wareneingang", response_model=BestellPositionResponse)
 def erfasse_wareneingang(
     position_id: int,
@@ -420,53 +709,38 @@ def erfasse_wareneingang(
     db: Session = Depends(get_db)
 ):
     """
-    Wareneingang erfassen
+    Wareneingang erfassen (einzelne Position)
     
     - Erhöht menge_geliefert
     - Setzt vollstaendig_geliefert wenn alles da
     - Optional: Aktualisiert Inventar (artikel.bestand_lager)
     - Aktualisiert Bestellungs-Status automatisch
+    
+    Für ganze Lieferscheine: POST /api/bestellungen/{id}/wareneingang
     """
-    position = db.query(BestellPosition).options(
-        joinedload(BestellPosition.bestellung),
-        joinedload(BestellPosition.artikel)
-    ).filter(BestellPosition.id == position_id).first()
+    bestellung_id = db.query(BestellPosition.bestellung_id).filter(
+        BestellPosition.id == position_id
+    ).scalar()
     
-    if not position:
+    if not bestellung_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Position {position_id} nicht gefunden"
         )
     
-    # Prüfen: Nicht mehr liefern als bestellt
-    neue_menge = position.menge_geliefert + wareneingang.menge
-    if neue_menge > position.menge_bestellt:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Zu viel geliefert: Bestellt={position.menge_bestellt}, bereits geliefert={position.menge_geliefert}, neu={wareneingang.menge}"
-        )
-    
-    # Menge erhöhen
-    position.menge_geliefert = neue_menge
-    position.zuletzt_geliefert_am = datetime.utcnow()
-    
-    # Vollständig geliefert?
-    if position.menge_geliefert >= position.menge_bestellt:
-        position.vollstaendig_geliefert = True
-    
-    # Inventar aktualisieren (wenn artikel_id vorhanden UND gewünscht)
-    if inventar_aktualisieren and position.artikel_id:
-        artikel = position.artikel
-        if artikel:
-            artikel.bestand_lager += wareneingang.menge
-    
-    # Bestellungs-Status aktualisieren
-    update_bestellung_status(position.bestellung)
+    buche_wareneingang(
+        db,
+        bestellung_id,
+        {position_id: wareneingang.menge},
+        inventar_aktualisieren=inventar_aktualisieren,
+    )
     
     db.commit()
-    db.refresh(position)
+    invalidiere_lieferzeiten()
     
-    return position
+    return db.query(BestellPosition).options(
+        joinedload(BestellPosition.artikel)
+    ).filter(BestellPosition.id == position_id).first()
 
 
 @router.post("/{bestellung_id}/abschliessen", response_model=BestellungResponse)
@@ -520,7 +794,11 @@ def bestellung_abschliessen(
 # ============================================================================
 
 @router.get("/{bestellung_id}/pdf")
-def download_bestellung_pdf(bestellung_id: int, db: Session = Depends(get_db)):
+async def download_bestellung_pdf(
+    bestellung_id: int,
+    request: Request,
+    db: Session = Depends(get_db)
+):
     """
     PDF-Download für Bestellung
     
@@ -528,28 +806,88 @@ def download_bestellung_pdf(bestellung_id: int, db: Session = Depends(get_db)):
     - Lieferanten-Info
     - Alle Positionen mit ETRTO
     - Summen (EK)
+    
+    Gerendert im PDF-Prozesspool, unveränderte Bestellungen kommen aus dem Cache (ETag).
     """
-    bestellung = db.query(Bestellung).options(
-        joinedload(Bestellung.lieferant),
-        joinedload(Bestellung.positionen)
-    ).filter(Bestellung.id == bestellung_id).first()
+    def lade_daten():
+        bestellung = db.query(Bestellung).options(
+            joinedload(Bestellung.lieferant),
+            selectinload(Bestellung.positionen)
+        ).filter(Bestellung.id == bestellung_id).first()
+        return bestellung_daten(bestellung) if bestellung else None
     
-    if not bestellung:
+    daten = await run_in_threadpool(lade_daten)
+    
+    if not daten:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Bestellung {bestellung_id} nicht gefunden"
         )
     
-    # PDF generieren
-    pdf_bytes = generate_bestellung_pdf(bestellung)
+    pfad, etag = await pdf_service.hole_pdf("bestellung", bestellung_id, daten, generate_bestellung_pdf)
     
     # Filename
-    filename = f"Bestellung_{bestellung.bestellnummer}_{datetime.now().strftime('%Y%m%d')}.pdf"
+    filename = f"Bestellung_{daten.bestellnummer}_{datetime.now().strftime('%Y%m%d')}.pdf"
+    
+    return pdf_service.pdf_response(request, pfad, etag, filename, disposition="attachment")
+
+
+@router.post("/export")
+async def export_bestellungen_zip(
+    export: BestellungExport,
+    db: Session = Depends(get_db)
+):
+    """
+    Bestell-PDFs als ZIP (z.B. alle Bestellungen einer Woche)
     
+    - Alle Bestellungen mit Lieferant + Positionen in einer Query
+    - PDFs parallel im PDF-Prozesspool (unveränderte aus dem Cache)
+    - ZIP wird gestreamt: jede Datei geht raus, sobald sie fertig ist
+    """
+    def lade_daten():
+        query = db.query(Bestellung).options(
+            joinedload(Bestellung.lieferant),
+            joinedload(Bestellung.positionen)
+        )
+        if export.ids:
+            query = query.filter(Bestellung.id.in_(export.ids))
+        else:
+            query = query.filter(func.date(Bestellung.erstellt_am) >= export.von)
+            if export.bis:
+                query = query.filter(func.date(Bestellung.erstellt_am) <= export.bis)
+        return [bestellung_daten(b) for b in query.order_by(Bestellung.erstellt_am).all()]
+    
+    daten = await run_in_threadpool(lade_daten)
+    
+    if export.ids:
+        gefunden = {d.id for d in daten}
+        fehlend = [bid for bid in export.ids if bid not in gefunden]
+        if fehlend:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Bestellungen nicht gefunden: {fehlend}"
+            )
+    if not daten:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Keine Bestellungen im Zeitraum"
+        )
+    
+    aufgaben = pdf_service.starte_renders(
+        "bestellung",
+        [(d.id, d) for d in daten],
+        generate_bestellung_pdf,
+    )
+    dateien = [
+        (f"Bestellung_{d.bestellnummer}.pdf", aufgabe)
+        for d, aufgabe in zip(daten, aufgaben)
+    ]
+    
+    filename = f"Bestellungen_{datetime.now().strftime('%Y%m%d')}.zip"
     return StreamingResponse(
-        BytesIO(pdf_bytes),
-        media_type="application/pdf",
+        pdf_service.zip_stream(dateien),
+        media_type="application/zip",
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
         }
-    )
\ No newline at end of file
+    )
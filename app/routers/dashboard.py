@@ -13,6 +13,7 @@ from ..models.reparatur import Reparatur, ReparaturPosition
 from ..models.bestellung import Bestellung, BestellPosition
 from ..models.leihrad import Leihrad, LeihradStatus
 from ..models.vermietung import Vermietung, VermietungStatus
+from ..utils.teilereservierung import verfuegbarer_bestand
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
@@ -147,7 +148,7 @@ def get_dashboard_stats(db: Session = Depends(get_db)) -> Dict[str, Any]:
         and_(
             Artikel.aktiv == True,
             Artikel.typ == ArtikelTyp.material,
-            (Artikel.bestand_lager + Artikel.bestand_werkstatt) == 0
+            verfuegbarer_bestand() <= 0
         )
     ).count()
     
@@ -156,8 +157,8 @@ def get_dashboard_stats(db: Session = Depends(get_db)) -> Dict[str, Any]:
         and_(
             Artikel.aktiv == True,
             Artikel.typ == ArtikelTyp.material,
-            (Artikel.bestand_lager + Artikel.bestand_werkstatt) > 0,
-            (Artikel.bestand_lager + Artikel.bestand_werkstatt) <= Artikel.mindestbestand
+            verfuegbarer_bestand() > 0,
+            verfuegbarer_bestand() <= Artikel.mindestbestand
         )
     ).count()
     
@@ -166,8 +167,8 @@ def get_dashboard_stats(db: Session = Depends(get_db)) -> Dict[str, Any]:
         and_(
             Artikel.aktiv == True,
             Artikel.typ == ArtikelTyp.material,
-            (Artikel.bestand_lager + Artikel.bestand_werkstatt) > Artikel.mindestbestand,
-            (Artikel.bestand_lager + Artikel.bestand_werkstatt) <= (Artikel.mindestbestand * 1.2)
+            verfuegbarer_bestand() > Artikel.mindestbestand,
+            verfuegbarer_bestand() <= (Artikel.mindestbestand * 1.2)
         )
     ).count()
     
@@ -258,10 +259,10 @@ def get_low_stock_items(db: Session = Depends(get_db)) -> List[Dict[str, Any]]:
         and_(
             Artikel.aktiv == True,
             Artikel.typ == ArtikelTyp.material,  # Nur Material!
-            (Artikel.bestand_lager + Artikel.bestand_werkstatt) <= Artikel.mindestbestand
+            verfuegbarer_bestand() <= Artikel.mindestbestand
         )
     ).order_by(
-        (Artikel.bestand_lager + Artikel.bestand_werkstatt).asc()
+        verfuegbarer_bestand().asc()
     ).limit(10).all()
     
     return [
@@ -270,9 +271,10 @@ def get_low_stock_items(db: Session = Depends(get_db)) -> List[Dict[str, Any]]:
             "artikelnummer": a.artikelnummer,
             "bezeichnung": a.bezeichnung,
             "typ": a.typ,
-            "bestand_aktuell": a.bestand_lager + a.bestand_werkstatt,
+            "bestand_aktuell": a.bestand_gesamt,
+            "bestand_verfuegbar": a.bestand_verfuegbar,  # ohne für Reparaturen reservierte Teile
             "mindestbestand": a.mindestbestand,
-            "ist_ausverkauft": (a.bestand_lager + a.bestand_werkstatt) == 0
+            "ist_ausverkauft": a.bestand_verfuegbar <= 0
         }
         for a in artikel
     ]
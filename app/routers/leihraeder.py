@@ -10,19 +10,26 @@ FIXES:
 5. ✅ Status-Tracking verbessert
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.exc import IntegrityError
 from typing import Optional, List
 from datetime import date, datetime
 from decimal import Decimal
 
 from app.database import get_db
-from app.models import Leihrad, LeihradStatus, Vermietung, VermietungStatus, VermietungPosition
+from app.models import Leihrad, LeihradStatus, Vermietung, VermietungStatus, VermietungPosition, VermietungRadZuweisung
+from app.utils import auslastung, buchungspruefung, radzuweisung, tarife, verfuegbarkeit
+from app.utils.belegungsmatrix import MAX_TAGE, belegungsmatrix
+from app.utils.leihrad_status import synchronisiere_status
+from app.utils.leihrad_wartung import pruefe_wartung
+from app.utils.verfuegbarkeit_oeffentlich import aktualisiere_snapshot
 from app.schemas.leihrad import (
     LeihradCreate, LeihradUpdate, LeihradResponse, LeihradListResponse,
     VermietungCreate, VermietungUpdate, VermietungResponse, VermietungListResponse,
-    VermietungPositionCreate  # ✨ NEU für Phase 6
+    VermietungPositionCreate,  # ✨ NEU für Phase 6
+    BelegungMatrix, ZuweisungPlanung,
+    AngebotAnfrage, AngebotAntwort, AuslastungReport, AuditBericht,
 )
 
 router = APIRouter(prefix="/api/leihraeder", tags=["Leihräder"])
@@ -42,18 +49,46 @@ def get_staffelpreis(typ_preise: dict, anzahl_tage: int) -> Decimal:
     Returns:
         Decimal: Tagespreis für die gegebene Anzahl Tage
     """
-    if anzahl_tage >= 5:
-        return Decimal(str(typ_preise.get('preis_5tage', typ_preise['preis_1tag'])))
-    elif anzahl_tage >= 3:
-        return Decimal(str(typ_preise.get('preis_3tage', typ_preise['preis_1tag'])))
-    else:
-        return Decimal(str(typ_preise['preis_1tag']))
+    return tarife.staffelpreis(typ_preise, anzahl_tage)
 
 
 def calculate_anzahl_tage(von_datum: date, bis_datum: date) -> int:
     """Berechnet Anzahl Tage (mindestens 1)"""
-    diff = (bis_datum - von_datum).days + 1
-    return max(1, diff)
+    return tarife.anzahl_tage(von_datum, bis_datum)
+
+
+def buche_belegung(db: Session, vermietung: Vermietung) -> None:
+    """
+    Vermietung schreiben und Kapazität buchen - Überbuchung → 409 (Transaktion zurückgerollt)
+    
+    Doppelbuchung eines Rads verhindert der Exclusion-Constraint beim Flush,
+    die Typ-Kapazität die Tagesbelegung (gesperrte Zeilen, bedingtes Hochzählen).
+    Ist das Rad typ-basierten Buchungen zugewiesen, bekommen diese ein anderes.
+    """
+    try:
+        db.flush()
+    except IntegrityError as e:
+        db.rollback()
+        if verfuegbarkeit.ist_doppelbuchung(e):
+            raise HTTPException(status_code=409, detail="Leihrad ist im Zeitraum bereits gebucht")
+        raise
+    
+    ueberbucht = verfuegbarkeit.belege(db, vermietung)
+    if ueberbucht:
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail=f"Nicht genug Räder frei im Zeitraum: {', '.join(ueberbucht)}"
+        )
+    
+    if not radzuweisung.mache_platz(db, vermietung):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Leihrad ist im Zeitraum bereits gebucht")
+
+
+def mit_zuweisungen():
+    """Ladeoption: zugewiesene Räder samt Inventarnummer"""
+    return selectinload(Vermietung.rad_zuweisungen).joinedload(VermietungRadZuweisung.leihrad)
 
 
 # ========== LEIHRÄDER ENDPOINTS ==========
@@ -98,6 +133,8 @@ def create_leihrad(leihrad: LeihradCreate, db: Session = Depends(get_db)):
     db.add(db_leihrad)
     db.commit()
     db.refresh(db_leihrad)
+    tarife.invalidiere_tarife()
+    aktualisiere_snapshot()
     return db_leihrad
 
 
@@ -118,11 +155,42 @@ def update_leihrad(leihrad_id: int, leihrad_update: LeihradUpdate, db: Session =
         raise HTTPException(status_code=404, detail="Leihrad nicht gefunden")
     
     update_data = leihrad_update.model_dump(exclude_unset=True)
+
+    # Typ-Wechsel: Einzel-Rad-Buchungen belegen ab jetzt den neuen Typ
+    typ_wechsel = 'typ' in update_data and update_data['typ'] != db_leihrad.typ
+    betroffen = [v for v in db_leihrad.vermietungen if verfuegbarkeit.belegt_raeder(v)] if typ_wechsel else []
+    for v in betroffen:
+        verfuegbarkeit.gib_frei(db, v)
+
+    # Typ-Wechsel, Wartung oder defekt: zugewiesene Buchungen bekommen ein anderes Rad
+    faellt_weg = typ_wechsel or (
+        'status' in update_data
+        and update_data['status'] not in verfuegbarkeit.VERMIETBARE_STATUS
+        and db_leihrad.status in verfuegbarkeit.VERMIETBARE_STATUS
+    )
+    neu_zuweisen = radzuweisung.loese_rad(db, leihrad_id) if faellt_weg else {}
+
     for field, value in update_data.items():
         setattr(db_leihrad, field, value)
+
+    for v in betroffen:
+        verfuegbarkeit.belege(db, v, pruefen=False)
+    
+    if neu_zuweisen:
+        db.flush()
+        radzuweisung.verteile_neu(db, neu_zuweisen)
+    
+    # Wartungsdaten geändert: kontrollstatus sofort neu berechnen
+    if update_data.keys() & {'letzte_wartung', 'naechste_wartung'}:
+        db.flush()
+        pruefe_wartung(db, rad_ids=[leihrad_id])
     
     db.commit()
     db.refresh(db_leihrad)
+    if update_data.keys() & {'typ', 'preis_1tag', 'preis_3tage', 'preis_5tage'}:
+        tarife.invalidiere_tarife()
+    if update_data.keys() & {'typ', 'status', 'preis_1tag', 'preis_3tage', 'preis_5tage'}:
+        aktualisiere_snapshot()
     return db_leihrad
 
 
@@ -140,54 +208,62 @@ def delete_leihrad(leihrad_id: int, db: Session = Depends(get_db)):
     if aktive_vermietungen > 0:
         raise HTTPException(status_code=400, detail="Leihrad hat aktive Vermietungen")
     
+    # Vermietungen werden mitgelöscht (cascade) → Reservierungen austragen
+    for v in db_leihrad.vermietungen:
+        verfuegbarkeit.gib_frei(db, v)
+    neu_zuweisen = radzuweisung.loese_rad(db, leihrad_id)
+    
     db.delete(db_leihrad)
+    db.flush()
+    radzuweisung.verteile_neu(db, neu_zuweisen)
     db.commit()
+    tarife.invalidiere_tarife()
+    aktualisiere_snapshot()
     return {"message": "Leihrad gelöscht"}
 
 
 @router.post("/sync-status")
 def sync_leihraeder_status(db: Session = Depends(get_db)):
     """
-    Synchronisiert den Status aller Leihräder
+    Synchronisiert den Status aller Leihräder (ein UPDATE, läuft auch periodisch im Hintergrund)
     
     Logik:
-    - Rad mit aktiver Vermietung → Status "verliehen"
-    - Rad ohne aktive Vermietung → Status "verfuegbar" (falls nicht wartung/defekt)
+    - Rad mit laufender Vermietung → Status "verliehen"
+    - Rad ohne laufende Vermietung → Status "verfuegbar" (falls nicht wartung/defekt)
+    
+    Returns:
+        synced = Anzahl geänderter Räder, aenderungen = [{id, inventarnummer, von, nach}]
     """
-    synced_count = 0
+    aenderungen = synchronisiere_status(db)
+    db.commit()
     
-    # Hole alle Leihräder
-    alle_raeder = db.query(Leihrad).all()
+    return {
+        "message": "Status synchronisiert",
+        "synced": len(aenderungen),
+        "aenderungen": aenderungen
+    }
+
+
+@router.post("/wartung-pruefen")
+def wartung_pruefen(db: Session = Depends(get_db)):
+    """
+    Prüft die Wartung aller Leihräder (läuft auch periodisch im Hintergrund)
     
-    for rad in alle_raeder:
-        # Prüfe ob aktive Vermietung existiert
-        hat_aktive_vermietung = db.query(Vermietung).filter(
-            Vermietung.leihrad_id == rad.id,
-            Vermietung.status.in_(['aktiv', 'reserviert'])
-        ).first() is not None
-        
-        # Status setzen
-        neuer_status = None
-        
-        if hat_aktive_vermietung:
-            # Hat aktive Vermietung → verliehen
-            if rad.status != LeihradStatus.verliehen:
-                neuer_status = LeihradStatus.verliehen
-        else:
-            # Keine aktive Vermietung → verfügbar (außer wartung/defekt)
-            if rad.status == LeihradStatus.verliehen:
-                neuer_status = LeihradStatus.verfuegbar
-        
-        if neuer_status:
-            rad.status = neuer_status
-            synced_count += 1
+    Logik:
+    - kontrollstatus nach Datum und Miettagen seit der letzten Wartung (ein UPDATE)
+    - Räder mit fälliger Wartung: noch nicht begonnene Langmieten auf andere Räder
+    - Wartungsauftrag für jedes fällige Rad ohne offenen Auftrag
     
+    Returns:
+        aenderungen = [{id, inventarnummer, kontrollstatus}], verlegt = Anzahl Einheiten,
+        auftraege = [{id, auftragsnummer, leihrad_id, inventarnummer}]
+    """
+    ergebnis = pruefe_wartung(db)
     db.commit()
     
     return {
-        "message": "Status synchronisiert",
-        "synced": synced_count,
-        "total": len(alle_raeder)
+        "message": "Wartung geprüft",
+        **ergebnis
     }
 
 
@@ -207,7 +283,8 @@ def get_vermietungen(
     query = db.query(Vermietung).options(
         joinedload(Vermietung.leihrad),
         joinedload(Vermietung.kunde),
-        joinedload(Vermietung.positionen)  # ✨ NEU: Positionen laden
+        joinedload(Vermietung.positionen),  # ✨ NEU: Positionen laden
+        mit_zuweisungen(),
     )
     
     if status:
@@ -227,6 +304,115 @@ def get_vermietungen(
     return {"items": items, "total": total, "skip": skip, "limit": limit}
 
 
+@router_vermietung.get("/belegung", response_model=BelegungMatrix)
+def get_belegung(
+    von: date = Query(..., description="Erster Tag"),
+    bis: date = Query(..., description="Letzter Tag (inklusive)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Belegungsmatrix für Kalender und Timeline
+    
+    - raeder: jedes Rad mit Segmenten [start, tage, buchung_id]
+    - typen: Belegung pro Rad-Typ als Segmente [start, tage, belegt]
+    - buchungen: alle Buchungen im Zeitraum (ohne storniert), nur Anzeige-Felder
+    
+    start ist der Tag-Index ab von. Details einer Buchung: GET /api/vermietungen/{id}
+    """
+    if bis < von:
+        raise HTTPException(status_code=400, detail="bis liegt vor von")
+    if (bis - von).days + 1 > MAX_TAGE:
+        raise HTTPException(status_code=400, detail=f"Maximal {MAX_TAGE} Tage")
+    
+    matrix = BelegungMatrix(**belegungsmatrix(db, von, bis))
+    return Response(content=matrix.model_dump_json(exclude_none=True), media_type="application/json")
+
+
+@router_vermietung.get("/auswertung/auslastung", response_model=AuslastungReport)
+def get_auslastung(
+    von: Optional[date] = Query(None, description="Erster Tag (Standard: vor 364 Tagen)"),
+    bis: Optional[date] = Query(None, description="Letzter Tag inklusive (Standard: heute)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Auslastung der Flotte im Zeitraum
+    
+    - Belegungsquote, Umsatz pro Rad-Tag gesamt, pro Typ und pro Monat
+    - pro Rad zusätzlich längste und aktuelle Standzeit
+    - Gecacht pro Tag
+    """
+    standard_von, standard_bis = auslastung.standard_zeitraum()
+    von = von or (bis - (standard_bis - standard_von) if bis else standard_von)
+    bis = bis or max(standard_bis, von)
+    if bis < von:
+        raise HTTPException(status_code=400, detail="bis liegt vor von")
+    if (bis - von).days + 1 > auslastung.MAX_TAGE:
+        raise HTTPException(status_code=400, detail=f"Maximal {auslastung.MAX_TAGE} Tage")
+    
+    return auslastung.auslastung_report(db, von, bis)
+
+
+@router_vermietung.get("/audit", response_model=AuditBericht)
+def get_audit(db: Session = Depends(get_db)):
+    """
+    Konsistenzprüfung aller aktiven/reservierten Vermietungen (nur lesend)
+    
+    - Räder in zwei Buchungen/Zuweisungen gleichzeitig
+    - Tage, an denen ein Typ über seiner Kapazität belegt ist
+    - Räder, deren Status nicht zu den laufenden Vermietungen passt
+    - Abweichungen der Tagesbelegung (leihrad_tagesbelegung) von den Buchungen
+    """
+    return buchungspruefung.pruefe_buchungen(db)
+
+
+@router_vermietung.post("/zuweisung/neu-planen", response_model=ZuweisungPlanung)
+def zuweisung_neu_planen(
+    von: date = Query(..., description="Erster Tag"),
+    bis: date = Query(..., description="Letzter Tag (inklusive)"),
+    rad_typ: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Rad-Zuweisung typ-basierter Buchungen im Zeitraum neu planen
+    
+    Normalerweise nicht nötig (Zuweisung läuft bei jeder Buchungs-Änderung mit) -
+    für bestehende Buchungen nach der Migration und für Importe.
+    Bisherige Räder werden bevorzugt, ausgegebene Räder bleiben fest.
+    """
+    if bis < von:
+        raise HTTPException(status_code=400, detail="bis liegt vor von")
+    
+    typen = radzuweisung.neu_planen(db, von, bis, rad_typ)
+    db.commit()
+    return {"von": von, "bis": bis, "typen": typen}
+
+
+@router_vermietung.post("/angebot", response_model=AngebotAntwort)
+def create_angebot(anfrage: AngebotAnfrage, db: Session = Depends(get_db)):
+    """
+    Preise für viele Kombinationen (rad_typ, anzahl, von, bis) in einem Aufruf
+    
+    Rechnet mit der gecachten Tariftabelle - gleiche Preise wie beim Buchen,
+    ohne Verfügbarkeitsprüfung. Für Live-Preise im Buchungsdialog.
+    """
+    tariftabelle = tarife.tariftabelle(db)
+    angebote = []
+    for position in anfrage.positionen:
+        angebot = position.model_dump()
+        if position.bis_datum < position.von_datum:
+            angebot["fehler"] = "bis liegt vor von"
+        else:
+            preise = tarife.angebot(
+                tariftabelle, position.rad_typ, position.anzahl, position.von_datum, position.bis_datum
+            )
+            if preise is None:
+                angebot["fehler"] = f"Keine Preise für Rad-Typ '{position.rad_typ}'"
+            else:
+                angebot.update(preise)
+        angebote.append(angebot)
+    return {"angebote": angebote}
+
+
 @router_vermietung.post("/", response_model=VermietungResponse)
 def create_vermietung(vermietung: VermietungCreate, db: Session = Depends(get_db)):
     """
@@ -247,34 +433,17 @@ def create_vermietung(vermietung: VermietungCreate, db: Session = Depends(get_db
         anzahl_raeder_gesamt = 0
         positionen_data = []
         
-        # Für jede Position: Preis berechnen
+        # Für jede Position: Preis aus der Tariftabelle (gecacht)
+        tariftabelle = tarife.tariftabelle(db)
         for pos in vermietung.positionen:
-            # Hole Typ-Preise vom Backend
-            typ_info = db.query(
-                func.min(Leihrad.preis_1tag).label('preis_1tag'),
-                func.min(Leihrad.preis_3tage).label('preis_3tage'),
-                func.min(Leihrad.preis_5tage).label('preis_5tage')
-            ).filter(
-                Leihrad.typ == pos.rad_typ,
-                Leihrad.status == LeihradStatus.verfuegbar
-            ).first()
-            
-            if not typ_info or typ_info.preis_1tag is None:
+            preise = tarife.angebot(tariftabelle, pos.rad_typ, pos.anzahl, vermietung.von_datum, vermietung.bis_datum)
+            if preise is None:
                 raise HTTPException(
                     status_code=400, 
                     detail=f"Rad-Typ '{pos.rad_typ}' nicht verfügbar oder keine Preise hinterlegt"
                 )
-            
-            # Staffelpreis berechnen
-            typ_preise = {
-                'preis_1tag': typ_info.preis_1tag,
-                'preis_3tage': typ_info.preis_3tage or typ_info.preis_1tag,
-                'preis_5tage': typ_info.preis_5tage or typ_info.preis_1tag
-            }
-            tagespreis = get_staffelpreis(typ_preise, anzahl_tage)
-            
-            # Gesamtpreis für diese Position
-            pos_gesamtpreis = Decimal(str(pos.anzahl)) * tagespreis * Decimal(str(anzahl_tage))
+            tagespreis = preise['tagespreis']
+            pos_gesamtpreis = preise['gesamtpreis']
             
             positionen_data.append({
                 'rad_typ': pos.rad_typ,
@@ -309,8 +478,12 @@ def create_vermietung(vermietung: VermietungCreate, db: Session = Depends(get_db
             )
             db.add(pos)
         
+        buche_belegung(db, db_vermietung)
+        radzuweisung.weise_zu(db, db_vermietung)
+        
         db.commit()
         db.refresh(db_vermietung)
+        aktualisiere_snapshot()
         return db_vermietung
     
     # ALT: Klassische Einzel-Rad Buchung
@@ -324,7 +497,9 @@ def create_vermietung(vermietung: VermietungCreate, db: Session = Depends(get_db
         leihrad = db.query(Leihrad).filter(Leihrad.id == vermietung.leihrad_id).first()
         if not leihrad:
             raise HTTPException(status_code=404, detail="Leihrad nicht gefunden")
-        if leihrad.status != LeihradStatus.verfuegbar:
+        # Belegung im Zeitraum prüft buche_belegung (Exclusion-Constraint),
+        # ein gerade verliehenes Rad kann für später reserviert werden
+        if leihrad.status in (LeihradStatus.wartung, LeihradStatus.defekt):
             raise HTTPException(status_code=400, detail="Leihrad nicht verfügbar")
         
         # Staffelpreis berechnen
@@ -347,11 +522,13 @@ def create_vermietung(vermietung: VermietungCreate, db: Session = Depends(get_db
         db_vermietung = Vermietung(**vermietung_data)
         db.add(db_vermietung)
         
-        # Rad-Status ändern
-        leihrad.status = LeihradStatus.verliehen
+        buche_belegung(db, db_vermietung)
+        # Rad-Status: verliehen nur, wenn die Vermietung heute läuft (nicht bei Reservierung für später)
+        synchronisiere_status(db, rad_ids=[leihrad.id])
         
         db.commit()
         db.refresh(db_vermietung)
+        aktualisiere_snapshot()
         return db_vermietung
 
 
@@ -361,7 +538,8 @@ def get_vermietung(vermietung_id: int, db: Session = Depends(get_db)):
     vermietung = db.query(Vermietung).options(
         joinedload(Vermietung.leihrad),
         joinedload(Vermietung.kunde),
-        joinedload(Vermietung.positionen)
+        joinedload(Vermietung.positionen),
+        mit_zuweisungen(),
     ).filter(Vermietung.id == vermietung_id).first()
     
     if not vermietung:
@@ -382,18 +560,33 @@ def update_vermietung(
     
     update_data = vermietung_update.model_dump(exclude_unset=True)
     
-    # Status-Änderung: Rad wieder freigeben
-    if 'status' in update_data and update_data['status'] == 'abgeschlossen':
-        if db_vermietung.leihrad_id:
-            leihrad = db.query(Leihrad).filter(Leihrad.id == db_vermietung.leihrad_id).first()
-            if leihrad:
-                leihrad.status = LeihradStatus.verfuegbar
+    # Zeitraum/Status ändern die Belegung: alte austragen, neue eintragen
+    belegung_aendert = 'status' in update_data or 'bis_datum' in update_data
+    # Ausgegebene Räder bleiben bei der Buchung (Stand vor der Änderung)
+    ausgegeben = radzuweisung.ist_ausgegeben(db_vermietung)
+    bisherige_raeder = {}
+    if belegung_aendert:
+        verfuegbarkeit.gib_frei(db, db_vermietung)
+        bisherige_raeder = radzuweisung.gib_frei(db, db_vermietung)
     
     for field, value in update_data.items():
         setattr(db_vermietung, field, value)
     
+    if belegung_aendert:
+        buche_belegung(db, db_vermietung)
+        if ausgegeben:
+            radzuweisung.behalte_ausgegebene(db, db_vermietung)
+        else:
+            # Möglichst dieselben Räder wieder (kein Tausch bei Verlängerung)
+            radzuweisung.weise_zu(db, db_vermietung, bevorzugt=bisherige_raeder)
+        # Rad-Status neu ableiten - bei Abschluss nur verfügbar, wenn keine andere Vermietung läuft
+        if db_vermietung.leihrad_id:
+            synchronisiere_status(db, rad_ids=[db_vermietung.leihrad_id])
+    
     db.commit()
     db.refresh(db_vermietung)
+    if belegung_aendert:
+        aktualisiere_snapshot()
     return db_vermietung
 
 
@@ -404,14 +597,15 @@ def delete_vermietung(vermietung_id: int, db: Session = Depends(get_db)):
     if not db_vermietung:
         raise HTTPException(status_code=404, detail="Vermietung nicht gefunden")
     
-    # Rad wieder freigeben
-    if db_vermietung.leihrad_id:
-        leihrad = db.query(Leihrad).filter(Leihrad.id == db_vermietung.leihrad_id).first()
-        if leihrad and leihrad.status == LeihradStatus.verliehen:
-            leihrad.status = LeihradStatus.verfuegbar
-    
+    leihrad_id = db_vermietung.leihrad_id
+    verfuegbarkeit.gib_frei(db, db_vermietung)
     db.delete(db_vermietung)
+    # Rad wieder freigeben, sofern keine andere Vermietung läuft
+    if leihrad_id:
+        db.flush()
+        synchronisiere_status(db, rad_ids=[leihrad_id])
     db.commit()
+    aktualisiere_snapshot()
     return {"message": "Vermietung gelöscht"}
 
 
@@ -431,88 +625,41 @@ def check_verfuegbarkeit_pro_typ(
     2. Werkstatt = vermietbar (Notfall-Räder, GRATIS)
     3. Verfügbar = Gesamt - Belegt
     4. MIN-Preis statt AVG
+    5. Belegt = höchste Tagesbelegung im Zeitraum (aus leihrad_tagesbelegung, eine Query)
+    6. Langmiete: Verfügbar = Räder ohne fällige Wartung - Belegt
+    7. Räder in Wartung oder defekt zählen nicht als verfügbar (nur in Gesamt)
     
     Returns:
         Dict mit Rad-Typen als Keys und Verfügbarkeits-Infos als Values
     """
-    
-    # 1. Alle Rad-Typen mit MIN-Preisen (func.min statt func.avg!)
-    typen_query = db.query(
-        Leihrad.typ,
-        func.count(Leihrad.id).label('gesamt'),
-        func.min(Leihrad.preis_1tag).label('preis_1tag'),
-        func.min(Leihrad.preis_3tage).label('preis_3tage'),
-        func.min(Leihrad.preis_5tage).label('preis_5tage')
-    ).filter(
-        Leihrad.typ.isnot(None)
-    ).group_by(Leihrad.typ).all()
-    
     result = {}
+    langmiete = von_datum is not None and bis_datum is not None and verfuegbarkeit.ist_langmiete(von_datum, bis_datum)
     
-    for typ_row in typen_query:
+    for typ_row in verfuegbarkeit.verfuegbarkeit_pro_typ(db, von_datum, bis_datum):
         typ = typ_row.typ
         gesamt = typ_row.gesamt
+        belegt = int(typ_row.belegt or 0)
         
-        # 2. Belegte Räder im Zeitraum (falls Datum angegeben)
-        belegt = 0
-        if von_datum and bis_datum:
-            # ✅ FIX: Finde ALLE Vermietungen (nicht nur mit leihrad_id!)
-            # Alte Buchungen: haben leihrad_id
-            # Neue Buchungen: haben nur positionen (leihrad_id = NULL)
-            
-            # ALTE: mit leihrad_id
-            raeder_ids = [lr.id for lr in db.query(Leihrad).filter(Leihrad.typ == typ).all()]
-            overlapping_alt = db.query(Vermietung).filter(
-                Vermietung.leihrad_id.in_(raeder_ids),
-                Vermietung.status.in_(['aktiv', 'reserviert']),
-                Vermietung.von_datum <= bis_datum,
-                Vermietung.bis_datum >= von_datum
-            ).all()
-            
-            # NEUE: ohne leihrad_id (typ-basiert)
-            overlapping_neu = db.query(Vermietung).options(
-                joinedload(Vermietung.positionen)
-            ).filter(
-                Vermietung.leihrad_id.is_(None),
-                Vermietung.status.in_(['aktiv', 'reserviert']),
-                Vermietung.von_datum <= bis_datum,
-                Vermietung.bis_datum >= von_datum
-            ).all()
-            
-            # Zähle alte Buchungen
-            for v in overlapping_alt:
-                if v.positionen and len(v.positionen) > 0:
-                    # Hat Positionen → Nutze die
-                    belegt += sum(p.anzahl for p in v.positionen if p.rad_typ == typ)
-                else:
-                    # Keine Positionen → Fallback
-                    belegt += v.anzahl_raeder or 1
-            
-            # Zähle neue Buchungen (typ-basiert)
-            for v in overlapping_neu:
-                if v.positionen and len(v.positionen) > 0:
-                    # Nur Positionen dieses Typs zählen
-                    belegt += sum(p.anzahl for p in v.positionen if p.rad_typ == typ)
-        
-        # 3. ✅ FIX: Verfügbar = Gesamt - Belegt (nicht nur status=verfuegbar!)
-        verfuegbar = max(0, gesamt - belegt)
+        # Verfügbar = Vermietbar - Belegt (verliehene zählen mit, Wartung/defekt nicht)
+        # Langmiete: Räder mit fälliger Wartung zählen nicht mit
+        verfuegbar = max(0, (typ_row.einsatzbereit if langmiete else typ_row.vermietbar) - belegt)
         
-        # 4. ✅ FIX: Werkstatt = vermietbar (Notfall-Räder!)
+        # Werkstatt = vermietbar (Notfall-Räder!)
         # Nur "defekt" ist NICHT vermietbar
         vermietbar = typ.lower() not in ['defekt']
         
-        # 5. Erstelle Response
         typ_info = {
             "verfuegbar": verfuegbar,
             "gesamt": gesamt,
             "belegt": belegt,
+            "wartung_faellig": typ_row.vermietbar - typ_row.einsatzbereit,
             "preis_1tag": float(typ_row.preis_1tag or 0),
             "preis_3tage": float(typ_row.preis_3tage or 0),
             "preis_5tage": float(typ_row.preis_5tage or 0),
             "vermietbar": vermietbar
         }
         
-        # 6. Spezielle Labels
+        # Spezielle Labels
         if typ.lower() == 'lastenrad':
             typ_info["special"] = "GRATIS - Georg! 🎉"
         elif typ.lower() == 'werkstatt':
@@ -538,39 +685,17 @@ def check_verfuegbarkeit(
     """
     ✅ FIXED: Gesamt-Verfügbarkeit (dynamisch!)
     
-    NICHT MEHR hardcoded 21!
-    Berechnet dynamisch aus ALLEN vermietbaren Rädern
+    Gesamt = alle Räder mit Typ (inkl. Werkstatt), belegt = höchste
+    Tagesbelegung über alle Typen im Zeitraum; Räder in Wartung oder defekt
+    und bei Langmiete Räder mit fälliger Wartung zählen nicht als verfügbar
     """
-    
-    # ✅ FIX: ALLE Räder zählen (inkl. Werkstatt)
-    # "defekt" ist ein STATUS, kein TYP!
-    gesamt_raeder = db.query(Leihrad).filter(
-        Leihrad.typ.isnot(None)  # Nur Räder mit Typ
-    ).count()
-    
-    # Aktive Vermietungen im Zeitraum
-    overlapping = db.query(Vermietung).filter(
-        Vermietung.status.in_(['aktiv', 'reserviert']),
-        Vermietung.von_datum <= bis_datum,
-        Vermietung.bis_datum >= von_datum
-    ).all()
-    
-    # ✅ FIX: Positionen berücksichtigen (Timeline V6)
-    belegt = 0
-    for v in overlapping:
-        if v.positionen and len(v.positionen) > 0:
-            # Summe aller Positionen
-            belegt += sum(p.anzahl for p in v.positionen)
-        else:
-            # Fallback: anzahl_raeder verwenden
-            belegt += v.anzahl_raeder or 1
-    
-    verfuegbar = max(0, gesamt_raeder - belegt)
+    zahlen = verfuegbarkeit.verfuegbarkeit_gesamt(db, von_datum, bis_datum)
+    basis = zahlen["einsatzbereit"] if verfuegbarkeit.ist_langmiete(von_datum, bis_datum) else zahlen["vermietbar"]
     
     return {
-        "verfuegbar": verfuegbar,
-        "gesamt": gesamt_raeder,
-        "belegt": belegt,
+        "verfuegbar": max(0, basis - zahlen["belegt"]),
+        "gesamt": zahlen["gesamt"],
+        "belegt": zahlen["belegt"],
         "von_datum": von_datum,
         "bis_datum": bis_datum
-    }
\ No newline at end of file
+    }
@@ -13,8 +13,10 @@ from app.schemas.lieferant import (
     LieferantCreate,
     LieferantUpdate,
     LieferantResponse,
-    LieferantListItem
+    LieferantListItem,
+    LieferzeitStatistik
 )
+from app.utils.lieferzeiten import lieferzeiten_report
 
 router = APIRouter(prefix="/api/lieferanten", tags=["Lieferanten"])
 
@@ -61,6 +63,20 @@ def get_lieferanten(
     return lieferanten
 
 
+@router.get("/lieferzeiten", response_model=List[LieferzeitStatistik])
+def get_lieferzeiten_report(
+    db: Session = Depends(get_db)
+):
+    """
+    Lieferzeiten-Report aller Lieferanten
+    
+    - p50/p90 Lieferzeit (bestellt → vollständig geliefert)
+    - Erfüllungsquote und Häufigkeit von Teillieferungen
+    - Gecacht bis zum nächsten Wareneingang
+    """
+    return list(lieferzeiten_report(db).values())
+
+
 @router.post("", response_model=LieferantResponse, status_code=201)
 def create_lieferant(
     lieferant_data: LieferantCreate,
@@ -111,6 +127,30 @@ def get_lieferant(
     return lieferant
 
 
+@router.get("/{lieferant_id}/lieferzeiten", response_model=LieferzeitStatistik)
+def get_lieferant_lieferzeiten(
+    lieferant_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    Lieferzeiten eines Lieferanten (p50/p90, Erfüllungsquote, Teillieferungen)
+    """
+    statistik = lieferzeiten_report(db).get(lieferant_id)
+    if statistik:
+        return statistik
+    
+    lieferant = db.query(Lieferant).filter(Lieferant.id == lieferant_id).first()
+    
+    if not lieferant:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Lieferant mit ID {lieferant_id} nicht gefunden"
+        )
+    
+    # Noch keine Bestellungen → leere Statistik
+    return {"lieferant_id": lieferant.id, "lieferant_name": lieferant.name}
+
+
 @router.put("/{lieferant_id}", response_model=LieferantResponse)
 def update_lieferant(
     lieferant_id: int,
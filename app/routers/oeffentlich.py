@@ -0,0 +1,32 @@
+"""
+Öffentliche API (Website)
+Nur lesend, ohne Kundendaten, aus vorberechneten Snapshots - kein Datenbankzugriff
+pro Anfrage.
+"""
+from fastapi import APIRouter, Request, Response
+
+from app.config import settings
+from app.utils.verfuegbarkeit_oeffentlich import snapshot
+
+router = APIRouter(prefix="/api/oeffentlich", tags=["Öffentlich"])
+
+
+@router.get("/verfuegbarkeit")
+def get_oeffentliche_verfuegbarkeit(request: Request):
+    """
+    Freie Leihräder pro Typ für die nächsten Tage (Website-Widget)
+
+    Antwort: {von, bis, typen: [{typ, preis_1tag, frei: [Anzahl pro Tag ab von]}]}
+
+    - Cache-Control/ETag: Browser und Proxies dürfen zwischenspeichern,
+      If-None-Match mit aktuellem ETag → 304 ohne Inhalt
+    """
+    daten = snapshot()
+    headers = {
+        "ETag": daten["etag"],
+        "Cache-Control": f"public, max-age={settings.OEFFENTLICH_CACHE_SEKUNDEN}",
+    }
+    angefragt = request.headers.get("if-none-match", "")
+    if daten["etag"] in (tag.strip().removeprefix("W/") for tag in angefragt.split(",")) or angefragt.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=daten["inhalt"], media_type="application/json", headers=headers)
@@ -1,27 +1,48 @@
 """
 Reparaturen API Endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func
 from sqlalchemy.orm import Session, joinedload
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from decimal import Decimal
 
 from app.database import get_db
 from app.models.reparatur import Reparatur, ReparaturPosition
 from app.models.artikel import Artikel
+from app.models.kunde import Kunde
 from app.schemas.reparatur import (
     ReparaturCreate,
     ReparaturUpdate,
     ReparaturResponse,
-    ReparaturListItem,
+    ReparaturListe,
+    ReparaturBoard,
+    BoardStatusAntwort,
+    WerkstattPlan,
+    FertigBisVorschlag,
+    DurchlaufzeitenReport,
+    ArtikelReservierung,
+    Pickliste,
     ReparaturStatusUpdate,
     ReparaturPositionCreate,
-    ReparaturPositionUpdate
+    ReparaturPositionUpdate,
+    ReparaturPrintBatch,
+)
+from app.utils import pdf_service, teilereservierung, werkstattplanung
+from app.utils.pickliste import lade_pickliste
+from app.utils.pdf_pickliste import render_pickliste
+from app.utils.durchlaufzeiten import durchlaufzeiten_report
+from app.utils.leihrad_wartung import sperre_auftragsnummern
+from app.utils.reparatur_status import setze_reparatur_status, protokolliere_statuswechsel
+from app.utils.reparatur_suche import reparatur_suchquery, reparatur_suchfilter, reparatur_suchrang
+from app.utils.pdf_generator import (
+    lade_reparatur_fuer_druck,
+    auftragszettel_daten,
+    render_auftragszettel,
 )
-from app.utils.pdf_generator import generate_auftragszettel_pdf
 
 router = APIRouter(prefix="/api/reparaturen", tags=["Reparaturen"])
 
@@ -31,7 +52,10 @@ def generate_auftragsnummer(db: Session, manual_number: Optional[str] = None) ->
     Generiert Auftragsnummer
     - Wenn manual_number gegeben: Verwende diese (z.B. "8272" für Migration)
     - Sonst: Nehme höchste existierende Nummer + 1
+    
+    Sperrt die Vergabe bis zum Commit (Wartungs-Job vergibt parallel Nummern)
     """
+    sperre_auftragsnummern(db)
     if manual_number:
         # Prüfe ob Nummer schon existiert
         exists = db.query(Reparatur).filter(
@@ -58,6 +82,28 @@ def generate_auftragsnummer(db: Session, manual_number: Optional[str] = None) ->
         return str(count + 1)
 
 
+def reserviere_teil(db: Session, artikel_id: int, menge: int) -> None:
+    """Reserviert Bestand für eine Teile-Position oder bricht mit 404/400 ab"""
+    if teilereservierung.reserviere(db, artikel_id, menge):
+        return
+    bestand = teilereservierung.verfuegbarkeit(db, artikel_id)
+    if bestand is None:
+        raise HTTPException(status_code=404, detail=f"Artikel mit ID {artikel_id} nicht gefunden")
+    gesamt, reserviert = bestand
+    raise HTTPException(
+        status_code=400,
+        detail=f"Nicht genügend Bestand! Verfügbar: {gesamt - reserviert} (Bestand: {gesamt}, reserviert: {reserviert})"
+    )
+
+
+def setze_status(db: Session, db_reparatur: Reparatur, status: str) -> None:
+    """Statuswechsel oder 400 (z.B. Wiederaufnahme ohne ausreichenden Bestand)"""
+    try:
+        setze_reparatur_status(db, db_reparatur, status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("", status_code=201)
 def create_reparatur(
     reparatur: ReparaturCreate,
@@ -105,18 +151,70 @@ def create_reparatur(
             einzelpreis=pos.einzelpreis,
             gesamtpreis=pos_gesamtpreis
         )
+        # Ersatzteil mit Artikel: Bestand reservieren
+        if teilereservierung.ist_lagerteil(db_position):
+            reserviere_teil(db, db_position.artikel_id, teilereservierung.stueck(pos.menge))
+            db_position.lager_status = teilereservierung.RESERVIERT
         db_reparatur.positionen.append(db_position)
     
     db_reparatur.endbetrag = gesamtpreis
     
     db.add(db_reparatur)
+    db.flush()
+    protokolliere_statuswechsel(db, db_reparatur, None, db_reparatur.status)
+    if db_reparatur.status == 'abgeholt':
+        teilereservierung.verbrauche_reservierungen(db, db_reparatur)
     db.commit()
     db.refresh(db_reparatur)
     
     return jsonable_encoder(db_reparatur)
 
 
-@router.get("")
+# Spalten der Listenansicht: Feldname → SQL-Ausdruck (Kunde per OUTER JOIN)
+MAENGEL_KURZ_ZEICHEN = 120
+
+LISTEN_SPALTEN = {
+    "id": Reparatur.id,
+    "auftragsnummer": Reparatur.auftragsnummer,
+    "status": Reparatur.status,
+    "reparaturdatum": Reparatur.reparaturdatum,
+    "created_at": Reparatur.created_at,
+    "fahrradmarke": Reparatur.fahrradmarke,
+    "fahrradmodell": Reparatur.fahrradmodell,
+    "fahrrad_anwesend": Reparatur.fahrrad_anwesend,
+    "kunde_id": Reparatur.kunde_id,
+    "kundennummer": Kunde.kundennummer,
+    "kunde_name": func.coalesce(
+        func.nullif(func.trim(func.coalesce(Kunde.vorname, "") + " " + func.coalesce(Kunde.nachname, "")), ""),
+        Reparatur.kunde_name_legacy,
+    ),
+    "kunde_telefon": func.coalesce(Kunde.telefon, Reparatur.kunde_telefon_legacy),
+    "maengel_kurz": func.substr(Reparatur.maengelbeschreibung, 1, MAENGEL_KURZ_ZEICHEN),
+    "fertig_bis": Reparatur.fertig_bis,
+    "fertig_am": Reparatur.fertig_am,
+    "kostenvoranschlag": Reparatur.kostenvoranschlag,
+    "endbetrag": Reparatur.endbetrag,
+    "bezahlt": Reparatur.bezahlt,
+}
+KUNDEN_FELDER = {"kundennummer", "kunde_name", "kunde_telefon"}
+
+
+def parse_listen_felder(fields: Optional[str]) -> List[str]:
+    """?fields=auftragsnummer,status → gültige Feldnamen (id immer dabei)"""
+    if not fields:
+        return list(LISTEN_SPALTEN)
+    
+    felder = [f.strip() for f in fields.split(",") if f.strip()]
+    unbekannt = [f for f in felder if f not in LISTEN_SPALTEN]
+    if unbekannt:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unbekannte Felder: {', '.join(unbekannt)} (erlaubt: {', '.join(LISTEN_SPALTEN)})"
+        )
+    return ["id"] + [f for f in dict.fromkeys(felder) if f != "id"]
+
+
+@router.get("", response_model=ReparaturListe)
 def get_reparaturen(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
@@ -124,25 +222,34 @@ def get_reparaturen(
     search: Optional[str] = None,
     sort_by: Optional[str] = Query(None, regex="^(auftragsnummer|reparaturdatum|fahrradmarke|status|endbetrag)$"),
     sort_order: Optional[str] = Query("desc", regex="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Kommagetrennte Feldauswahl, z.B. auftragsnummer,status,kunde_name"),
     db: Session = Depends(get_db)
 ):
-    """Liste aller Reparaturen mit Filter und Suche"""
-    # WICHTIG: joinedload lädt Kunde mit (Eager Loading)
-    query = db.query(Reparatur).options(joinedload(Reparatur.kunde))
+    """
+    Liste aller Reparaturen mit Filter und Suche
+    
+    Lädt nur die Listen-Spalten (keine ORM-Objekte, keine langen Texte) und
+    serialisiert direkt über das Pydantic-Schema.
+    """
+    felder = parse_listen_felder(fields)
+    
+    bedingungen = []
     
     # Status Filter
     if status:
-        query = query.filter(Reparatur.status == status)
-    
-    # Suchfunktion
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Reparatur.auftragsnummer.ilike(search_term)) |
-            (Reparatur.fahrradmarke.ilike(search_term)) |
-            (Reparatur.kunde_name_legacy.ilike(search_term)) |  # Legacy statt kunde_name
-            (Reparatur.maengelbeschreibung.ilike(search_term))
-        )
+        bedingungen.append(Reparatur.status == status)
+    
+    # Suchfunktion (Volltext: Auftragsnr., Rahmennr., Kunde inkl. Telefon, Fahrrad, Mängel)
+    tsquery = reparatur_suchquery(search) if search else None
+    if tsquery is not None:
+        bedingungen.append(reparatur_suchfilter(tsquery))
+    
+    total = db.query(func.count(Reparatur.id)).filter(*bedingungen).scalar()
+    
+    query = db.query(*[LISTEN_SPALTEN[f].label(f) for f in felder]).select_from(Reparatur)
+    if KUNDEN_FELDER.intersection(felder):
+        query = query.outerjoin(Kunde, Kunde.id == Reparatur.kunde_id)
+    query = query.filter(*bedingungen)
     
     # Sortierung
     if sort_by:
@@ -151,19 +258,282 @@ def get_reparaturen(
             query = query.order_by(sort_column.asc())
         else:
             query = query.order_by(sort_column.desc())
+    elif tsquery is not None:
+        # Bei Suche: beste Treffer zuerst
+        query = query.order_by(reparatur_suchrang(tsquery).desc(), Reparatur.reparaturdatum.desc())
     else:
         # Default: neueste zuerst
         query = query.order_by(Reparatur.reparaturdatum.desc())
     
-    total = query.count()
-    reparaturen = query.offset(skip).limit(limit).all()
+    zeilen = query.offset(skip).limit(limit).all()
+    
+    liste = ReparaturListe(
+        items=[dict(zeile._mapping) for zeile in zeilen],
+        total=total,
+        skip=skip,
+        limit=limit,
+    )
+    # Nicht geladene Felder weglassen (exclude_unset) statt sie als null zu senden
+    return Response(
+        content=liste.model_dump_json(exclude_unset=True),
+        media_type="application/json",
+    )
+
+
+# ============================================================================
+# Werkstatt-Board (Kanban)
+# ============================================================================
+
+BOARD_STATUS = ["angenommen", "in_arbeit", "wartet_auf_teile", "fertig"]
+
+BOARD_SPALTEN = {
+    feld: LISTEN_SPALTEN[feld]
+    for feld in (
+        "id", "auftragsnummer", "status", "fahrradmarke", "fahrradmodell",
+        "fahrrad_anwesend", "kunde_name", "maengel_kurz", "reparaturdatum", "fertig_bis",
+    )
+}
+BOARD_SPALTEN["prioritaet"] = Reparatur.prioritaet
+BOARD_SPALTEN["meister_zugewiesen"] = Reparatur.meister_zugewiesen
+
+
+def board_anzahl(db: Session) -> Dict[str, int]:
+    """Aufträge pro Board-Spalte (leere Spalten mit 0)"""
+    anzahl = dict(
+        db.query(Reparatur.status, func.count(Reparatur.id))
+        .filter(Reparatur.status.in_(BOARD_STATUS))
+        .group_by(Reparatur.status)
+        .all()
+    )
+    return {status: anzahl.get(status, 0) for status in BOARD_STATUS}
+
+
+@router.get("/board", response_model=ReparaturBoard)
+def get_board(
+    pro_spalte: int = Query(25, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    """
+    Werkstatt-Board: die ersten N Karten pro Status-Spalte + Anzahl pro Spalte
+    
+    Eine Abfrage: ROW_NUMBER() / COUNT(*) OVER (PARTITION BY status).
+    Reihenfolge in der Spalte: Priorität, dann Fertig-bis, dann älteste zuerst.
+    """
+    rang = func.row_number().over(
+        partition_by=Reparatur.status,
+        order_by=(
+            Reparatur.prioritaet.asc().nullslast(),
+            Reparatur.fertig_bis.asc().nullslast(),
+            Reparatur.reparaturdatum.asc(),
+            Reparatur.id.asc(),
+        ),
+    )
+    anzahl = func.count(Reparatur.id).over(partition_by=Reparatur.status)
+    
+    board = (
+        db.query(
+            *[spalte.label(feld) for feld, spalte in BOARD_SPALTEN.items()],
+            rang.label("rang"),
+            anzahl.label("anzahl"),
+        )
+        .select_from(Reparatur)
+        .outerjoin(Kunde, Kunde.id == Reparatur.kunde_id)
+        .filter(Reparatur.status.in_(BOARD_STATUS))
+        .subquery()
+    )
+    zeilen = db.query(board).filter(board.c.rang <= pro_spalte).order_by(board.c.rang).all()
+    
+    spalten = {status: {"status": status, "anzahl": 0, "karten": []} for status in BOARD_STATUS}
+    for zeile in zeilen:
+        spalte = spalten[zeile.status]
+        spalte["anzahl"] = zeile.anzahl
+        spalte["karten"].append({feld: getattr(zeile, feld) for feld in BOARD_SPALTEN})
+    
+    return Response(
+        content=ReparaturBoard(spalten=list(spalten.values())).model_dump_json(),
+        media_type="application/json",
+    )
+
+
+@router.patch("/board/{reparatur_id}", response_model=BoardStatusAntwort)
+def board_status_aendern(
+    reparatur_id: int,
+    status_update: ReparaturStatusUpdate,
+    db: Session = Depends(get_db)
+):
+    """
+    Drag & Drop auf dem Board: Status ändern (gleiche Datums-Logik wie PATCH /{id}/status)
+    
+    Liefert nur die geänderte Karte und die neuen Spaltenzahlen, nicht die ganze Reparatur.
+    """
+    db_reparatur = db.query(Reparatur).filter(Reparatur.id == reparatur_id).first()
+    
+    if not db_reparatur:
+        raise HTTPException(status_code=404, detail="Reparatur nicht gefunden")
+    
+    alter_status = db_reparatur.status
+    setze_status(db, db_reparatur, status_update.status)
+    db.commit()
+    
+    karte = (
+        db.query(*[spalte.label(feld) for feld, spalte in BOARD_SPALTEN.items()])
+        .select_from(Reparatur)
+        .outerjoin(Kunde, Kunde.id == Reparatur.kunde_id)
+        .filter(Reparatur.id == reparatur_id)
+        .one()
+    )
+    
+    antwort = BoardStatusAntwort(
+        karte=dict(karte._mapping),
+        alter_status=alter_status,
+        anzahl=board_anzahl(db),
+    )
+    return Response(content=antwort.model_dump_json(), media_type="application/json")
+
+
+# ============================================================================
+# Werkstattplanung
+# ============================================================================
+
+@router.get("/planung", response_model=WerkstattPlan)
+def get_werkstattplanung(
+    nur_nicht_haltbar: bool = Query(False, description="Nur Aufträge mit nicht haltbarem fertig_bis"),
+    db: Session = Depends(get_db)
+):
+    """
+    Plant den gesamten offenen Bestand neu
     
-    return {
-        "items": jsonable_encoder(reparaturen),
-        "total": total,
-        "skip": skip,
-        "limit": limit
-    }
+    - Dauer: erfasste Arbeitspositionen, sonst Median aus der Historie
+    - Verteilung per Prioritäts-Heap auf die Mechaniker (Kapazität aus den Settings)
+    - nicht_haltbar: zugesagtes fertig_bis ist mit der aktuellen Last nicht zu schaffen
+    """
+    plan = werkstattplanung.plane(db)
+    if nur_nicht_haltbar:
+        plan["auftraege"] = [e for e in plan["auftraege"] if e["nicht_haltbar"]]
+    return plan
+
+
+@router.get("/planung/vorschlag", response_model=FertigBisVorschlag)
+def get_fertig_bis_vorschlag(
+    prioritaet: int = Query(3, ge=1, le=5),
+    meister: Optional[str] = Query(None, description="Zugewiesener Mechaniker (sonst der am frühesten freie)"),
+    stunden: Optional[float] = Query(None, gt=0, description="Geschätzte Arbeitszeit (sonst aus der Historie)"),
+    db: Session = Depends(get_db)
+):
+    """Realistischer fertig_bis-Termin für die Auftragsannahme"""
+    return werkstattplanung.fertig_bis_vorschlag(db, prioritaet=prioritaet, meister=meister, stunden=stunden)
+
+
+@router.get("/auswertung/durchlaufzeiten", response_model=DurchlaufzeitenReport)
+def get_durchlaufzeiten(
+    monate: int = Query(12, ge=1, le=60),
+    db: Session = Depends(get_db)
+):
+    """
+    Durchlaufzeiten aus dem Statuswechsel-Protokoll
+    
+    - Verweildauer pro Status und Gesamtdurchlauf (angenommen → fertig)
+    - p50/p90 gesamt, pro Mechaniker und pro Monat
+    - Gecacht pro Tag
+    """
+    return durchlaufzeiten_report(db, monate)
+
+
+@router.get("/reservierungen", response_model=List[ArtikelReservierung])
+def get_reservierungen(
+    artikel_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Für offene Reparaturen reservierte Teile, pro Artikel mit den Aufträgen
+    
+    Verfügbar = Lager + Werkstatt - reserviert (Verbrauch erst bei Abholung)
+    """
+    query = (
+        db.query(
+            Artikel.id,
+            Artikel.artikelnummer,
+            Artikel.bezeichnung,
+            Artikel.bestand_lager,
+            Artikel.bestand_werkstatt,
+            Artikel.bestand_reserviert,
+            Reparatur.id.label("reparatur_id"),
+            Reparatur.auftragsnummer,
+            Reparatur.status,
+            ReparaturPosition.menge,
+        )
+        .join(ReparaturPosition, ReparaturPosition.artikel_id == Artikel.id)
+        .join(Reparatur, Reparatur.id == ReparaturPosition.reparatur_id)
+        .filter(ReparaturPosition.lager_status == teilereservierung.RESERVIERT)
+        .order_by(Artikel.artikelnummer, Reparatur.reparaturdatum)
+    )
+    if artikel_id is not None:
+        query = query.filter(Artikel.id == artikel_id)
+    
+    artikel = {}
+    for zeile in query.all():
+        eintrag = artikel.get(zeile.id)
+        if eintrag is None:
+            gesamt = zeile.bestand_lager + zeile.bestand_werkstatt
+            eintrag = artikel[zeile.id] = {
+                "artikel_id": zeile.id,
+                "artikelnummer": zeile.artikelnummer,
+                "bezeichnung": zeile.bezeichnung,
+                "bestand_gesamt": gesamt,
+                "bestand_reserviert": zeile.bestand_reserviert,
+                "bestand_verfuegbar": gesamt - zeile.bestand_reserviert,
+                "auftraege": [],
+            }
+        eintrag["auftraege"].append({
+            "reparatur_id": zeile.reparatur_id,
+            "auftragsnummer": zeile.auftragsnummer,
+            "status": zeile.status,
+            "menge": teilereservierung.stueck(zeile.menge),
+        })
+    return list(artikel.values())
+
+
+# ============================================================================
+# Pickliste
+# ============================================================================
+
+def parse_ids(ids: Optional[str]) -> Optional[List[int]]:
+    """?ids=12,15,18 → [12, 15, 18] (leer → None)"""
+    if not ids:
+        return None
+    try:
+        return [int(i) for i in ids.split(",") if i.strip()] or None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids muss eine kommagetrennte Liste von Zahlen sein")
+
+
+@router.get("/pickliste", response_model=Pickliste)
+def get_pickliste(
+    ids: Optional[str] = Query(None, description="Reparatur-IDs kommagetrennt (leer = alle 'angenommen')"),
+    db: Session = Depends(get_db)
+):
+    """
+    Benötigte Teile mehrerer Aufträge, zusammengefasst pro Artikel
+    
+    Sortiert nach Lagerort (Lagerort.sortierung) für einen Rundgang.
+    """
+    return lade_pickliste(db, parse_ids(ids))
+
+
+@router.get("/pickliste/pdf")
+async def get_pickliste_pdf(
+    ids: Optional[str] = Query(None, description="Reparatur-IDs kommagetrennt (leer = alle 'angenommen')"),
+    db: Session = Depends(get_db)
+):
+    """Pickliste als kompaktes PDF zum Abhaken"""
+    reparatur_ids = parse_ids(ids)
+    daten = await run_in_threadpool(lade_pickliste, db, reparatur_ids)
+    pdf_bytes = await pdf_service.rendere(render_pickliste, daten)
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"inline; filename=pickliste_{daten['erstellt_am']:%Y%m%d_%H%M}.pdf"},
+    )
 
 
 @router.get("/{reparatur_id}")
@@ -198,10 +568,15 @@ def update_reparatur(
     
     # Update nur gesetzte Felder
     update_data = reparatur_update.dict(exclude_unset=True)
+    neuer_status = update_data.pop("status", None)
     
     for field, value in update_data.items():
         setattr(db_reparatur, field, value)
     
+    # Statuswechsel immer über das Protokoll
+    if neuer_status:
+        setze_status(db, db_reparatur, neuer_status)
+    
     db.commit()
     db.refresh(db_reparatur)
     
@@ -220,18 +595,7 @@ def update_reparatur_status(
     if not db_reparatur:
         raise HTTPException(status_code=404, detail="Reparatur nicht gefunden")
     
-    db_reparatur.status = status_update.status
-    
-    # Auto-Datums-Logik
-    if status_update.status == 'fertig' and not db_reparatur.fertig_am:
-        db_reparatur.fertig_am = datetime.now()
-    
-    if status_update.status == 'abgeholt':
-        if not db_reparatur.abgeholt_am:
-            db_reparatur.abgeholt_am = datetime.now()
-        if not db_reparatur.bezahlt:
-            # Optional: Auto-Bezahlt bei Abholung
-            pass
+    setze_status(db, db_reparatur, status_update.status)
     
     db.commit()
     db.refresh(db_reparatur)
@@ -250,6 +614,9 @@ def delete_reparatur(
     if not db_reparatur:
         raise HTTPException(status_code=404, detail="Reparatur nicht gefunden")
     
+    # Reservierte Teile wieder freigeben
+    teilereservierung.gib_reservierungen_frei(db, db_reparatur)
+    
     db.delete(db_reparatur)
     db.commit()
     
@@ -257,8 +624,9 @@ def delete_reparatur(
 
 
 @router.get("/{reparatur_id}/print")
-def print_auftragszettel(
+async def print_auftragszettel(
     reparatur_id: int,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
@@ -268,37 +636,72 @@ def print_auftragszettel(
     - Vorderseite: 2x Auftragsdetails
     - Rückseite: Notizen-Linien
     
+    Gerendert im PDF-Prozesspool, unveränderte Aufträge kommen aus dem Cache (ETag).
+    
     Args:
         reparatur_id: ID der Reparatur
         
     Returns:
-        PDF als StreamingResponse
+        PDF als FileResponse (304 wenn unverändert)
         
     Raises:
         404: Wenn Reparatur nicht gefunden
         500: Bei PDF-Generierungs-Fehler
     """
+    def lade_daten():
+        rep = lade_reparatur_fuer_druck(reparatur_id, db)
+        return auftragszettel_daten(rep) if rep else None
+    
+    daten = await run_in_threadpool(lade_daten)
+    if not daten:
+        raise HTTPException(status_code=404, detail=f"Reparatur mit ID {reparatur_id} nicht gefunden")
+    
     try:
-        pdf_buffer = generate_auftragszettel_pdf(reparatur_id, db)
-        
-        # Dateiname mit Auftragsnummer
-        rep = db.query(Reparatur).filter(Reparatur.id == reparatur_id).first()
-        filename = f"Auftrag_{rep.auftragsnummer if rep else reparatur_id}.pdf"
-        
-        return StreamingResponse(
-            pdf_buffer,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"inline; filename={filename}"
-            }
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+        pfad, etag = await pdf_service.hole_pdf("auftragszettel", reparatur_id, daten, render_auftragszettel)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Fehler beim Erstellen des PDFs: {str(e)}"
         )
+    
+    # Dateiname mit Auftragsnummer
+    filename = f"Auftrag_{daten.auftragsnummer}.pdf"
+    return pdf_service.pdf_response(request, pfad, etag, filename)
+
+
+@router.post("/print-batch")
+async def print_auftragszettel_batch(
+    batch: ReparaturPrintBatch,
+    db: Session = Depends(get_db)
+):
+    """
+    Mehrere Auftragszettel als ein PDF (z.B. alle Annahmen des Vormittags)
+    
+    - Alle Reparaturen + Kunden mit einer Query
+    - Zettel parallel im PDF-Prozesspool (bereits gedruckte kommen aus dem Cache)
+    - Reihenfolge wie in ids übergeben
+    """
+    def lade_daten():
+        reparaturen = db.query(Reparatur).options(
+            joinedload(Reparatur.kunde)
+        ).filter(Reparatur.id.in_(batch.ids)).all()
+        return {rep.id: auftragszettel_daten(rep) for rep in reparaturen}
+    
+    daten = await run_in_threadpool(lade_daten)
+    
+    fehlend = [rid for rid in batch.ids if rid not in daten]
+    if fehlend:
+        raise HTTPException(status_code=404, detail=f"Reparaturen nicht gefunden: {fehlend}")
+    
+    ids = list(dict.fromkeys(batch.ids))  # Doppelte nur einmal drucken
+    aufgaben = pdf_service.starte_renders(
+        "auftragszettel",
+        [(rid, daten[rid]) for rid in ids],
+        render_auftragszettel,
+    )
+    
+    filename = f"Auftraege_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
+    return await pdf_service.sammel_pdf_response(aufgaben, filename)
 
 
 # ============================================================================
@@ -317,37 +720,11 @@ def add_position(
     if not db_reparatur:
         raise HTTPException(status_code=404, detail="Reparatur nicht gefunden")
     
-    # Wenn Ersatzteil mit Artikel-ID: Bestand prüfen & reduzieren
-    if position.typ == 'teil' and position.artikel_id:
-        artikel = db.query(Artikel).filter(Artikel.id == position.artikel_id).first()
-        
-        if not artikel:
-            raise HTTPException(status_code=404, detail=f"Artikel mit ID {position.artikel_id} nicht gefunden")
-        
-        # Bestand prüfen (Werkstatt hat Priorität)
-        verfuegbar_werkstatt = artikel.bestand_werkstatt or 0
-        verfuegbar_lager = artikel.bestand_lager or 0
-        verfuegbar_gesamt = verfuegbar_werkstatt + verfuegbar_lager
-        
-        if verfuegbar_gesamt < position.menge:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Nicht genügend Bestand! Verfügbar: {verfuegbar_gesamt} (Werkstatt: {verfuegbar_werkstatt}, Lager: {verfuegbar_lager})"
-            )
-        
-        # Bestand reduzieren (erst Werkstatt, dann Lager)
-        menge_abzug = position.menge
-        
-        if verfuegbar_werkstatt >= menge_abzug:
-            # Alles aus Werkstatt
-            artikel.bestand_werkstatt -= menge_abzug
-        else:
-            # Werkstatt leeren, Rest aus Lager
-            artikel.bestand_werkstatt = 0
-            rest = menge_abzug - verfuegbar_werkstatt
-            artikel.bestand_lager -= rest
-        
-        # bestand_gesamt wird automatisch berechnet (ist eine Property)
+    # Wenn Ersatzteil mit Artikel-ID: Bestand reservieren (Verbrauch erst bei Abholung),
+    # nicht für stornierte Reparaturen - dort reserviert erst die Wiederaufnahme
+    lagerteil = position.typ == 'teil' and position.artikel_id and db_reparatur.status != 'storniert'
+    if lagerteil:
+        reserviere_teil(db, position.artikel_id, teilereservierung.stueck(position.menge))
     
     # Position erstellen
     pos_gesamtpreis = Decimal(str(position.menge)) * position.einzelpreis
@@ -360,11 +737,17 @@ def add_position(
         beschreibung=position.beschreibung,
         menge=position.menge,
         einzelpreis=position.einzelpreis,
-        gesamtpreis=pos_gesamtpreis
+        gesamtpreis=pos_gesamtpreis,
+        lager_status=teilereservierung.RESERVIERT if lagerteil else None
     )
     
     db.add(db_position)
     
+    # Reparatur schon abgeholt: Teil sofort verbrauchen
+    if db_reparatur.status == 'abgeholt' and db_position.lager_status:
+        db.flush()
+        teilereservierung.verbrauche_reservierungen(db, db_reparatur)
+    
     # Endbetrag neu berechnen
     db_reparatur.endbetrag = (db_reparatur.endbetrag or Decimal("0")) + pos_gesamtpreis
     
@@ -375,6 +758,61 @@ def add_position(
     return jsonable_encoder(db_position)
 
 
+def passe_lager_an(
+    db: Session,
+    db_position: ReparaturPosition,
+    war_lagerteil: bool,
+    alter_artikel_id: Optional[int],
+    alte_stueck: int,
+) -> None:
+    """
+    Lager nach Änderung einer Position nachziehen (bricht bei fehlendem Bestand mit 400 ab)
+
+    - gleicher Artikel: nur die Differenz reservieren/freigeben bzw. verbrauchen/zurücklegen
+    - Typ- oder Artikelwechsel: alte Reservierung bzw. Verbrauch komplett rückgängig,
+      danach wie eine neue Position
+    - lager_status None (stornierte Reparatur): kein Lager - die Wiederaufnahme
+      reserviert die dann aktuelle Menge (teilereservierung.reserviere_wieder)
+    """
+    reparatur = db_position.reparatur
+    status = db_position.lager_status
+    ist_lagerteil = teilereservierung.ist_lagerteil(db_position)
+    neue_stueck = teilereservierung.stueck(db_position.menge) if ist_lagerteil else 0
+    
+    if war_lagerteil and ist_lagerteil and alter_artikel_id == db_position.artikel_id:
+        differenz = neue_stueck - alte_stueck
+        if status is None or differenz == 0:
+            return
+        if differenz > 0:
+            # Mehr benötigt: zusätzlich reservieren (bereits verbraucht → sofort verbrauchen)
+            reserviere_teil(db, db_position.artikel_id, differenz)
+            if status == teilereservierung.VERBRAUCHT:
+                teilereservierung.buche_abgang(db, {db_position.artikel_id: differenz}, reparatur)
+        elif status == teilereservierung.RESERVIERT:
+            # Weniger benötigt: Reservierung freigeben
+            teilereservierung.freigeben(db, {db_position.artikel_id: -differenz})
+        else:
+            # Weniger benötigt: Teile zurücklegen
+            teilereservierung.zuruecklegen(db, db_position.artikel_id, -differenz, reparatur)
+        return
+    
+    # Alten Stand rückgängig machen
+    if war_lagerteil and status == teilereservierung.RESERVIERT:
+        teilereservierung.freigeben(db, {alter_artikel_id: alte_stueck})
+    elif war_lagerteil and status == teilereservierung.VERBRAUCHT:
+        teilereservierung.zuruecklegen(db, alter_artikel_id, alte_stueck, reparatur)
+    db_position.lager_status = None
+    
+    # Neu reservieren (wie add_position)
+    if not ist_lagerteil or reparatur.status == 'storniert':
+        return
+    reserviere_teil(db, db_position.artikel_id, neue_stueck)
+    db_position.lager_status = teilereservierung.RESERVIERT
+    if reparatur.status == 'abgeholt':
+        teilereservierung.buche_abgang(db, {db_position.artikel_id: neue_stueck}, reparatur)
+        db_position.lager_status = teilereservierung.VERBRAUCHT
+
+
 @router.put("/{reparatur_id}/positionen/{position_id}")
 def update_position(
     reparatur_id: int,
@@ -391,47 +829,21 @@ def update_position(
     if not db_position:
         raise HTTPException(status_code=404, detail="Position nicht gefunden")
     
-    # Alten Gesamtpreis & Menge merken
+    # Alten Gesamtpreis & Lager-Stand merken
     alter_gesamtpreis = db_position.gesamtpreis
-    alte_menge = db_position.menge
-    
-    # Bei Ersatzteil mit Artikel: Bestand anpassen wenn Menge sich ändert
-    if db_position.typ == 'teil' and db_position.artikel_id and 'menge' in position_update.dict(exclude_unset=True):
-        neue_menge = position_update.menge
-        differenz = neue_menge - alte_menge
-        
-        if differenz != 0:
-            artikel = db.query(Artikel).filter(Artikel.id == db_position.artikel_id).first()
-            
-            if artikel:
-                if differenz > 0:
-                    # Mehr benötigt: Bestand reduzieren
-                    verfuegbar = (artikel.bestand_werkstatt or 0) + (artikel.bestand_lager or 0)
-                    
-                    if verfuegbar < differenz:
-                        raise HTTPException(
-                            status_code=400,
-                            detail=f"Nicht genügend Bestand! Benötigt: {differenz}, Verfügbar: {verfuegbar}"
-                        )
-                    
-                    # Bestand reduzieren
-                    if artikel.bestand_werkstatt >= differenz:
-                        artikel.bestand_werkstatt -= differenz
-                    else:
-                        rest = differenz - (artikel.bestand_werkstatt or 0)
-                        artikel.bestand_werkstatt = 0
-                        artikel.bestand_lager -= rest
-                else:
-                    # Weniger benötigt: Bestand erhöhen
-                    artikel.bestand_werkstatt = (artikel.bestand_werkstatt or 0) + abs(differenz)
-                
-                # bestand_gesamt wird automatisch berechnet
+    war_lagerteil = teilereservierung.ist_lagerteil(db_position)
+    alter_artikel_id = db_position.artikel_id
+    alte_stueck = teilereservierung.stueck(db_position.menge)
     
     # Update
     update_data = position_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_position, field, value)
     
+    # Reservierung/Verbrauch an Typ, Artikel und Menge anpassen
+    if war_lagerteil or teilereservierung.ist_lagerteil(db_position):
+        passe_lager_an(db, db_position, war_lagerteil, alter_artikel_id, alte_stueck)
+    
     # Gesamtpreis neu berechnen
     db_position.gesamtpreis = db_position.menge * db_position.einzelpreis
     
@@ -460,14 +872,13 @@ def delete_position(
     if not db_position:
         raise HTTPException(status_code=404, detail="Position nicht gefunden")
     
-    # Wenn Ersatzteil mit Artikel: Bestand zurückgeben
-    if db_position.typ == 'teil' and db_position.artikel_id:
-        artikel = db.query(Artikel).filter(Artikel.id == db_position.artikel_id).first()
-        
-        if artikel:
-            # Bestand zur Werkstatt zurückgeben
-            artikel.bestand_werkstatt = (artikel.bestand_werkstatt or 0) + db_position.menge
-            # bestand_gesamt wird automatisch berechnet
+    # Wenn Ersatzteil mit Artikel: Reservierung freigeben bzw. Teile zurücklegen
+    if teilereservierung.ist_lagerteil(db_position):
+        menge = teilereservierung.stueck(db_position.menge)
+        if db_position.lager_status == teilereservierung.RESERVIERT:
+            teilereservierung.freigeben(db, {db_position.artikel_id: menge})
+        elif db_position.lager_status == teilereservierung.VERBRAUCHT:
+            teilereservierung.zuruecklegen(db, db_position.artikel_id, menge, db_position.reparatur)
     
     # Endbetrag anpassen
     db_reparatur = db_position.reparatur
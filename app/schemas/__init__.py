@@ -34,6 +34,16 @@ from .reparatur import (
     ReparaturResponse,
     ReparaturStatusUpdate,
     ReparaturListItem,
+    ReparaturListe,
+    BoardKarte,
+    BoardSpalte,
+    ReparaturBoard,
+    BoardStatusAntwort,
+    WerkstattPlan,
+    FertigBisVorschlag,
+    DurchlaufzeitenReport,
+    ArtikelReservierung,
+    Pickliste,
     ReparaturPositionBase,
     ReparaturPositionCreate,
     ReparaturPositionResponse,
@@ -116,6 +126,16 @@ __all__ = [
     "ReparaturResponse",
     "ReparaturStatusUpdate",
     "ReparaturListItem",
+    "ReparaturListe",
+    "BoardKarte",
+    "BoardSpalte",
+    "ReparaturBoard",
+    "BoardStatusAntwort",
+    "WerkstattPlan",
+    "FertigBisVorschlag",
+    "DurchlaufzeitenReport",
+    "ArtikelReservierung",
+    "Pickliste",
     "ReparaturPositionBase",
     "ReparaturPositionCreate",
     "ReparaturPositionResponse",
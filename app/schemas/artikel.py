@@ -119,6 +119,8 @@ class ArtikelResponse(ArtikelBase):
     """Schema für Artikel-Antwort (mit ID und Relationships)"""
     id: int
     bestand_gesamt: int  # Computed: lager + werkstatt
+    bestand_reserviert: int = 0  # Für offene Reparaturen
+    bestand_verfuegbar: int  # Computed: gesamt - reserviert
     
     # Relationships
     kategorie: Optional[KategorieBase] = None
@@ -169,4 +171,33 @@ class BestandAendern(BaseModel):
 class NextNummerResponse(BaseModel):
     """Schema für nächste Artikelnummer"""
     artikelnummer: str
-    naechste_nummer: int
\ No newline at end of file
+    naechste_nummer: int
+
+
+# ═══════════════════════════════════════════════════════════
+# BEDARFSPROGNOSE (dynamischer Mindestbestand)
+# ═══════════════════════════════════════════════════════════
+
+class MindestbestandVorschlag(BaseModel):
+    """Vorschlag für den Mindestbestand aus der Verbrauchsprognose"""
+    artikel_id: int
+    artikelnummer: str
+    bezeichnung: str
+    mindestbestand_aktuell: int
+    mindestbestand_vorschlag: int
+    verbrauch_pro_tag: float  # Entsaisonalisiertes Niveau
+    saisonfaktor: float  # Faktor des aktuellen Monats (1.0 = Durchschnitt)
+    lieferzeit_tage: int
+    erwarteter_verbrauch: float  # In der Lieferzeit
+    sicherheitsbestand: float
+
+
+class MindestbestandUebernehmen(BaseModel):
+    """Vorschläge übernehmen (alle oder nur ausgewählte Artikel)"""
+    artikel_ids: Optional[List[int]] = Field(None, description="None = alle Vorschläge übernehmen")
+    servicegrad: Optional[float] = Field(None, gt=0.5, lt=1, description="z.B. 0.95")
+
+
+class MindestbestandUebernehmenResponse(BaseModel):
+    """Ergebnis der Übernahme"""
+    aktualisiert: int
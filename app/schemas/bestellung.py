@@ -2,9 +2,9 @@
 Bestellung Schemas
 Pydantic Models für API-Validierung
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 
 
@@ -32,6 +32,7 @@ class ArtikelInBestellung(BaseModel):
 class BestellPositionBase(BaseModel):
     """Basis-Daten für BestellPosition"""
     artikel_id: Optional[int] = Field(None, description="Artikel aus Inventar (optional)")
+    variante_id: Optional[int] = Field(None, description="Variante des Artikels (optional)")
     artikelnummer: str = Field(..., min_length=1, max_length=100, description="Lieferanten-Artikelnummer")
     beschreibung: str = Field(..., min_length=1, description="Was ist es?")
     
@@ -60,6 +61,11 @@ class BestellPositionCreateFromArtikel(BaseModel):
     notizen: Optional[str] = None
 
 
+class BestellPositionenBulkCreate(BaseModel):
+    """Mehrere Positionen aus Inventar-Artikeln auf einmal hinzufügen"""
+    positionen: List[BestellPositionCreateFromArtikel] = Field(..., min_length=1)
+
+
 class BestellPositionCreate(BestellPositionBase):
     """Neue Position erstellen (vollständig, für manuelle Eingabe)"""
     pass
@@ -83,6 +89,18 @@ class WareneingangCreate(BaseModel):
     menge: int = Field(..., ge=1, description="Gelieferte Menge")
 
 
+class WareneingangPosition(BaseModel):
+    """Eine gelieferte Zeile im Sammel-Wareneingang"""
+    position_id: int
+    menge: int = Field(..., ge=1, description="Gelieferte Menge")
+
+
+class WareneingangBulkCreate(BaseModel):
+    """Wareneingang für mehrere Positionen einer Bestellung (ein Lieferschein)"""
+    positionen: List[WareneingangPosition] = Field(..., min_length=1)
+    erfasst_von: Optional[str] = Field(None, max_length=100)
+
+
 class BestellPositionResponse(BestellPositionBase):
     """Position mit berechneten Feldern"""
     id: int
@@ -142,6 +160,22 @@ class BestellungStatusUpdate(BaseModel):
     )
 
 
+class BestellungExport(BaseModel):
+    """
+    Bestell-PDFs als ZIP exportieren
+    Entweder explizite IDs oder Zeitraum (erstellt_am von/bis, inklusive)
+    """
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=500)
+    von: Optional[date] = None
+    bis: Optional[date] = None
+    
+    @model_validator(mode="after")
+    def ids_oder_zeitraum(self):
+        if not self.ids and not self.von:
+            raise ValueError("ids oder von (Zeitraum) angeben")
+        return self
+
+
 class BestellungResponse(BestellungBase):
     """Vollständige Bestellung mit allen Details"""
     id: int
@@ -207,4 +241,35 @@ class BestellungListItem(BaseModel):
     bestellt_am: Optional[datetime] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# ============================================================================
+# Nachbestellung Schemas
+# ============================================================================
+
+class NachbestellVorschlag(BaseModel):
+    """Ein Artikel / eine Variante unter Mindestbestand"""
+    artikel_id: int
+    variante_id: Optional[int] = None
+    artikelnummer: str
+    beschreibung: str
+    etrto: Optional[str] = None
+    zoll_info: Optional[str] = None
+    
+    # Mengen
+    bestand: int
+    mindestbestand: int
+    unterwegs: int  # Offen in laufenden Bestellungen
+    menge: int  # Vorgeschlagene Bestellmenge
+    
+    # Lieferant (None = kein aktiver Lieferant hinterlegt)
+    lieferant_id: Optional[int] = None
+    einkaufspreis: Decimal
+    verkaufspreis: Decimal
+
+
+class NachbestellVorschlagResponse(BaseModel):
+    """Vorschau der automatischen Nachbestellung"""
+    vorschlaege: List[NachbestellVorschlag]
+    anzahl_lieferanten: int
+    ohne_lieferant: int  # Vorschläge, die nicht automatisch bestellt werden können
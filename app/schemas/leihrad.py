@@ -9,7 +9,7 @@ ADDITIONS:
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List, TYPE_CHECKING
+from typing import Dict, Optional, List, TYPE_CHECKING
 from datetime import datetime, date, time
 from decimal import Decimal
 
@@ -107,6 +107,17 @@ class VermietungPositionResponse(VermietungPositionBase):
         from_attributes = True
 
 
+class RadZuweisungResponse(BaseModel):
+    """Konkretes Rad für eine Einheit einer Position (automatisch zugewiesen)"""
+    position_id: int
+    leihrad_id: int
+    inventarnummer: Optional[str] = None
+    rad_typ: str
+
+    class Config:
+        from_attributes = True
+
+
 # ========== VERMIETUNG SCHEMAS ==========
 
 class VermietungBase(BaseModel):
@@ -234,6 +245,10 @@ class VermietungResponse(BaseModel):
         default=None,
         description="Positionen für typ-basierte Buchungen"
     )
+    rad_zuweisungen: Optional[List[RadZuweisungResponse]] = Field(
+        default=None,
+        description="Zugewiesene Räder bei typ-basierten Buchungen"
+    )
     
     # Nested Relations
     leihrad: Optional[LeihradResponse] = None
@@ -256,4 +271,165 @@ class VermietungListResponse(BaseModel):
     items: List[VermietungResponse]
     total: int
     skip: int
-    limit: int
\ No newline at end of file
+    limit: int
+
+# ========== ANGEBOT (Preise ohne Buchung) ==========
+
+class AngebotPosition(VermietungPositionBase):
+    von_datum: date
+    bis_datum: date
+
+
+class AngebotAnfrage(BaseModel):
+    positionen: List[AngebotPosition] = Field(..., min_length=1, max_length=1000)
+
+
+class AngebotErgebnis(AngebotPosition):
+    anzahl_tage: Optional[int] = None
+    tagespreis: Optional[Decimal] = None  # Preis pro Tag für EIN Rad
+    gesamtpreis: Optional[Decimal] = None  # anzahl × tagespreis × anzahl_tage
+    fehler: Optional[str] = None  # z.B. Typ ohne Preise
+
+
+class AngebotAntwort(BaseModel):
+    angebote: List[AngebotErgebnis]
+
+
+# ========== AUSLASTUNG (Flotten-Auswertung) ==========
+
+class AuslastungKennzahlen(BaseModel):
+    verfuegbare_radtage: int
+    belegte_radtage: int
+    auslastung: float  # belegte / verfügbare Rad-Tage (0..1)
+    umsatz: float
+    umsatz_pro_radtag: float  # Umsatz / verfügbare Rad-Tage
+
+
+class AuslastungTyp(AuslastungKennzahlen):
+    typ: str
+    raeder: int
+
+
+class AuslastungRad(AuslastungKennzahlen):
+    id: int
+    inventarnummer: str
+    typ: Optional[str] = None
+    laengste_standzeit_tage: int
+    aktuelle_standzeit_tage: int  # leer seit ... bis zum Ende des Zeitraums
+
+
+class AuslastungMonat(AuslastungKennzahlen):
+    monat: str  # "2026-07"
+    typ: str
+
+
+class AuslastungReport(BaseModel):
+    von: date
+    bis: date
+    erstellt_am: datetime
+    gesamt: AuslastungKennzahlen
+    typen: List[AuslastungTyp]
+    raeder: List[AuslastungRad]
+    pro_monat: List[AuslastungMonat]
+
+
+# ========== KONSISTENZPRÜFUNG ==========
+
+class AuditUeberschneidung(BaseModel):
+    leihrad_id: int
+    inventarnummer: Optional[str] = None
+    vermietung_id: int
+    andere_vermietung_id: int
+    von: date
+    bis: date
+    ueberfaellig: bool  # entsteht nur, weil eine aktive Vermietung nicht zurückgegeben ist
+
+
+class AuditUeberbuchung(BaseModel):
+    rad_typ: str
+    von: date
+    bis: date
+    belegt: int  # höchste Tagesbelegung im Zeitraum
+    kapazitaet: int
+
+
+class AuditStatusAbweichung(BaseModel):
+    leihrad_id: int
+    inventarnummer: str
+    status: str
+    erwartet: str
+    vermietung_id: Optional[int] = None  # laufende Vermietung
+
+
+class AuditBelegungAbweichung(BaseModel):
+    rad_typ: str
+    datum: date
+    gespeichert: int  # leihrad_tagesbelegung
+    erwartet: int  # aus den Buchungen
+
+
+class AuditBericht(BaseModel):
+    stichtag: date
+    erstellt_am: datetime
+    buchungen: int  # geprüfte aktive/reservierte Vermietungen
+    raeder: int
+    ok: bool
+    ueberschneidungen: List[AuditUeberschneidung]
+    ueberbuchungen: List[AuditUeberbuchung]
+    status_abweichungen: List[AuditStatusAbweichung]
+    belegung_abweichungen: List[AuditBelegungAbweichung]
+
+
+# ========== BELEGUNGSMATRIX (Kalender / Timeline) ==========
+
+class BelegungBuchung(BaseModel):
+    """Nur was Kalender und Timeline anzeigen - Details per GET /api/vermietungen/{id}"""
+    id: int
+    status: str
+    leihrad_id: Optional[int] = None
+    kunde: str
+    kundennummer: Optional[str] = None
+    von_datum: date
+    bis_datum: date
+    von_zeit: Optional[time] = None
+    bis_zeit: Optional[time] = None
+    anzahl_raeder: int
+    raeder: str  # z.B. "2× E-Bike, 1× Normal"
+    rad_abgeholt: bool = False
+    notizen: Optional[str] = None
+
+
+class BelegungRad(BaseModel):
+    id: int
+    inventarnummer: str
+    typ: Optional[str] = None
+    status: str
+    # Lauflängen [start, tage, buchung_id]; start = Tag-Index ab von
+    segmente: List[List[int]]
+
+
+class BelegungTyp(BaseModel):
+    typ: str
+    gesamt: int
+    # Lauflängen [start, tage, belegt] (nur belegte Tage, aktiv/reserviert)
+    segmente: List[List[int]]
+
+
+class ZuweisungErgebnis(BaseModel):
+    zugewiesen: int
+    offen: int
+
+
+class ZuweisungPlanung(BaseModel):
+    von: date
+    bis: date
+    typen: Dict[str, ZuweisungErgebnis]
+
+
+class BelegungMatrix(BaseModel):
+    von: date
+    bis: date
+    tage: int
+    raeder: List[BelegungRad]
+    typen: List[BelegungTyp]
+    buchungen: List[BelegungBuchung]
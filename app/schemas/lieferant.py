@@ -70,4 +70,17 @@ class LieferantListItem(BaseModel):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Schema für Lieferzeiten-Auswertung
+class LieferzeitStatistik(BaseModel):
+    """Lieferzeiten und Liefertreue eines Lieferanten"""
+    lieferant_id: int
+    lieferant_name: str
+    anzahl_bestellungen: int = 0  # Bestellungen mit bestellt_am
+    anzahl_geliefert: int = 0  # Davon vollständig geliefert (mit Lieferzeit)
+    lieferzeit_mittel_tage: Optional[float] = None
+    lieferzeit_p50_tage: Optional[float] = None
+    lieferzeit_p90_tage: Optional[float] = None
+    erfuellungsquote: Optional[float] = Field(None, description="Gelieferte / bestellte Menge (0-1)")
+    teillieferung_quote: Optional[float] = Field(None, description="Anteil Bestellungen mit Teillieferung (0-1)")
@@ -2,7 +2,7 @@
 Reparatur Schemas
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from decimal import Decimal
 
@@ -26,6 +26,7 @@ class ReparaturPositionCreate(ReparaturPositionBase):
 
 class ReparaturPositionUpdate(BaseModel):
     typ: Optional[str] = Field(None, pattern="^(arbeit|teil)$")
+    artikel_id: Optional[int] = None  # Wechsel gibt die alte Reservierung frei
     bezeichnung: Optional[str] = None
     beschreibung: Optional[str] = None
     menge: Optional[Decimal] = Field(None, ge=0)
@@ -36,6 +37,7 @@ class ReparaturPositionResponse(ReparaturPositionBase):
     id: int
     reparatur_id: int
     gesamtpreis: Decimal
+    lager_status: Optional[str] = None  # reserviert, verbraucht
     created_at: datetime
     artikel: Optional[dict] = None  # Vereinfacht - könnte auch ArtikelResponse sein
     
@@ -118,6 +120,11 @@ class ReparaturStatusUpdate(BaseModel):
     status: str = Field(..., pattern="^(angenommen|in_arbeit|wartet_auf_teile|fertig|abgeholt|storniert)$")
 
 
+class ReparaturPrintBatch(BaseModel):
+    """Mehrere Auftragszettel in einem PDF drucken (Reihenfolge wie übergeben)"""
+    ids: List[int] = Field(..., min_length=1, max_length=500)
+
+
 class ReparaturResponse(ReparaturBase):
     id: int
     auftragsnummer: str
@@ -129,6 +136,8 @@ class ReparaturResponse(ReparaturBase):
     kunde_telefon_legacy: Optional[str] = None
     kunde_email_legacy: Optional[str] = None
     
+    leihrad_id: Optional[int] = None  # Wartungsauftrag für ein Leihrad
+    
     # Zusätzliche Felder für Response
     reparaturdatum: datetime
     fertig_am: Optional[datetime] = None
@@ -148,26 +157,187 @@ class ReparaturResponse(ReparaturBase):
 
 
 class ReparaturListItem(BaseModel):
-    """Vereinfachte Darstellung für Listen"""
+    """
+    Schlanke Listen-Zeile (direkt aus einer Spalten-Projektion, kein ORM-Objekt)
+
+    Alle Felder außer id sind optional: mit ?fields= werden nur die gewählten
+    Spalten geladen und ausgegeben.
+    """
     id: int
-    auftragsnummer: str
-    fahrradmarke: str
+    auftragsnummer: Optional[str] = None
+    status: Optional[str] = None
+    reparaturdatum: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    
+    # Fahrrad
+    fahrradmarke: Optional[str] = None
     fahrradmodell: Optional[str] = None
-    fahrrad_anwesend: bool
+    fahrrad_anwesend: Optional[bool] = None
     
-    # Kunde-Daten (erweitert)
+    # Kunde (aus DB-Kunde, sonst Legacy-Freitext)
     kunde_id: Optional[int] = None
-    kunde: Optional[dict] = None  # Kunde-Objekt (kundennummer, vorname, nachname)
-    kunde_name: Optional[str] = None  # Computed: kunde.nachname ODER kunde_name_legacy
-    kunde_name_legacy: Optional[str] = None
+    kundennummer: Optional[str] = None
+    kunde_name: Optional[str] = None
+    kunde_telefon: Optional[str] = None
     
-    maengelbeschreibung: str
+    # Mängel gekürzt (vollständig über GET /api/reparaturen/{id})
+    maengel_kurz: Optional[str] = None
+    
+    # Termine & Kosten
+    fertig_bis: Optional[datetime] = None
+    fertig_am: Optional[datetime] = None
+    kostenvoranschlag: Optional[float] = None
+    endbetrag: Optional[float] = None
+    bezahlt: Optional[bool] = None
+
+
+class ReparaturListe(BaseModel):
+    """Seite der Reparaturliste"""
+    items: List[ReparaturListItem]
+    total: int
+    skip: int
+    limit: int
+
+
+# ============================================================================
+# Werkstatt-Board (Kanban)
+# ============================================================================
+
+class BoardKarte(BaseModel):
+    """Karte auf dem Werkstatt-Board"""
+    id: int
+    auftragsnummer: str
     status: str
-    reparaturdatum: datetime
+    fahrradmarke: str
+    fahrradmodell: Optional[str] = None
+    fahrrad_anwesend: Optional[bool] = None
+    kunde_name: Optional[str] = None
+    maengel_kurz: Optional[str] = None
+    prioritaet: Optional[int] = None
+    meister_zugewiesen: Optional[str] = None
+    reparaturdatum: Optional[datetime] = None
     fertig_bis: Optional[datetime] = None
-    endbetrag: Optional[Decimal] = None
-    bezahlt: bool
-    created_at: datetime
-    
-    class Config:
-        from_attributes = True
\ No newline at end of file
+
+
+class BoardSpalte(BaseModel):
+    status: str
+    anzahl: int  # Alle Aufträge in der Spalte (nicht nur die gelieferten Karten)
+    karten: List[BoardKarte]
+
+
+class ReparaturBoard(BaseModel):
+    spalten: List[BoardSpalte]
+
+
+class BoardStatusAntwort(BaseModel):
+    """Antwort auf Drag & Drop: nur die verschobene Karte + neue Spaltenzahlen"""
+    karte: BoardKarte
+    alter_status: str
+    anzahl: Dict[str, int]
+
+
+# ============================================================================
+# Werkstattplanung
+# ============================================================================
+
+class PlanEintrag(BaseModel):
+    reparatur_id: Optional[int] = None  # None = virtueller neuer Auftrag
+    auftragsnummer: Optional[str] = None
+    status: str
+    prioritaet: Optional[int] = None
+    mechaniker: str
+    geschaetzte_stunden: float
+    geplant_beginn: datetime
+    geplant_fertig: datetime
+    zugesagt_fertig_bis: Optional[datetime] = None
+    nicht_haltbar: bool  # Zugesagter Termin liegt vor dem geplanten Ende
+    verzug_stunden: float
+
+
+class MechanikerAuslastung(BaseModel):
+    name: str
+    auftraege: int
+    stunden: float
+    frei_ab: datetime
+
+
+class WerkstattPlan(BaseModel):
+    erstellt_am: datetime
+    auftraege: List[PlanEintrag]
+    mechaniker: List[MechanikerAuslastung]
+    wartet_auf_teile: int  # Blockiert, nicht eingeplant
+    nicht_haltbar: int
+
+
+class FertigBisVorschlag(BaseModel):
+    """Realistischer Fertig-Termin für einen neuen Auftrag"""
+    fertig_bis: datetime
+    mechaniker: str
+    geschaetzte_stunden: float
+    auftraege_davor: int
+
+
+# ============================================================================
+# Auswertung Durchlaufzeiten
+# ============================================================================
+
+class DurchlaufKennzahl(BaseModel):
+    phase: str  # Status (Verweildauer) oder "durchlauf" (angenommen → fertig)
+    mechaniker: Optional[str] = None
+    monat: Optional[str] = None  # "2026-09" (Monat, in dem die Phase endete)
+    anzahl: int
+    p50_stunden: float
+    p90_stunden: float
+    mittel_stunden: float
+
+
+class DurchlaufzeitenReport(BaseModel):
+    seit: datetime
+    erstellt_am: datetime
+    phasen: List[DurchlaufKennzahl]
+    pro_mechaniker: List[DurchlaufKennzahl]
+    pro_monat: List[DurchlaufKennzahl]
+
+
+# ============================================================================
+# Teile-Reservierungen
+# ============================================================================
+
+class ReservierungAuftrag(BaseModel):
+    reparatur_id: int
+    auftragsnummer: str
+    status: str
+    menge: int
+
+
+class ArtikelReservierung(BaseModel):
+    """Reservierter Bestand eines Artikels und die offenen Aufträge dahinter"""
+    artikel_id: int
+    artikelnummer: str
+    bezeichnung: str
+    bestand_gesamt: int
+    bestand_reserviert: int
+    bestand_verfuegbar: int
+    auftraege: List[ReservierungAuftrag]
+
+
+# ============================================================================
+# Pickliste
+# ============================================================================
+
+class PicklistePosition(BaseModel):
+    artikel_id: int
+    artikelnummer: str
+    bezeichnung: str
+    einheit: Optional[str] = None
+    lagerort: str
+    menge: float
+    bestand_werkstatt: int
+    bestand_lager: int
+    auftraege: List[str]  # Auftragsnummern, die das Teil brauchen
+
+
+class Pickliste(BaseModel):
+    erstellt_am: datetime
+    anzahl_auftraege: int
+    positionen: List[PicklistePosition]  # In Laufreihenfolge (Lagerort.sortierung)
@@ -0,0 +1,205 @@
+"""
+Auslastung der Leihrad-Flotte
+Belegungsquote, Umsatz pro Rad-Tag und Standzeiten pro Rad, pro Typ und pro Monat
+für einen Zeitraum - Grundlage für Kauf-/Verkaufsentscheidungen.
+
+Drei Queries (Einzel-Rad-Buchungen, Positionen, Rad-Zuweisungen), danach alles als
+Tages-Arrays in NumPy: Differenzen-Arrays (Räder × Tage, Typen × Tage), kumuliert,
+Monate per reduceat. Gecacht pro Tag.
+
+- Gezählt werden alle Buchungen außer storniert (auch abgeschlossene)
+- Umsatz einer Buchung/Position wird gleichmäßig auf ihre Miettage verteilt
+- Verfügbare Rad-Tage: die heutigen Räder über den ganzen Zeitraum (wie die
+  Kapazität beim Buchen; angeschafft_am ist beim Altbestand nur das Erfassungsdatum)
+- Pro Typ aus den Positionen (vollständig); pro Rad aus Einzel-Rad-Buchungen und
+  Rad-Zuweisungen - typ-basierte Buchungen ohne Zuweisung fehlen dort
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import exists, func, select
+from sqlalchemy.orm import Session
+
+from app.models.leihrad import Leihrad
+from app.models.vermietung import Vermietung
+from app.models.vermietung_position import VermietungPosition
+from app.models.vermietung_zuweisung import VermietungRadZuweisung
+from app.utils import cache
+
+CACHE_NAMENSRAUM = "auslastung"
+MAX_CACHE_ZEITRAEUME = 16
+MAX_TAGE = 731
+
+
+def _lade(db: Session, von: date, bis: date) -> Tuple[List[Any], List[Any], List[Any], List[Any]]:
+    v = Vermietung
+    p = VermietungPosition
+    z = VermietungRadZuweisung
+    im_zeitraum = (v.status != "storniert", v.von_datum <= bis, v.bis_datum >= von)
+
+    raeder = db.execute(
+        select(Leihrad.id, Leihrad.inventarnummer, Leihrad.typ)
+        .order_by(Leihrad.typ.nullslast(), Leihrad.inventarnummer)
+    ).all()
+    einzel = db.execute(
+        select(v.leihrad_id, v.von_datum, v.bis_datum, func.coalesce(v.anzahl_raeder, 1), v.gesamtpreis)
+        .where(*im_zeitraum, v.leihrad_id.isnot(None), ~exists().where(p.vermietung_id == v.id))
+    ).all()
+    positionen = db.execute(
+        select(p.rad_typ, v.von_datum, v.bis_datum, p.anzahl, p.gesamtpreis)
+        .join(v, v.id == p.vermietung_id)
+        .where(*im_zeitraum)
+    ).all()
+    zuweisungen = db.execute(
+        select(z.leihrad_id, v.von_datum, v.bis_datum, p.anzahl, p.gesamtpreis)
+        .join(v, v.id == z.vermietung_id)
+        .join(p, p.id == z.position_id)
+        .where(*im_zeitraum)
+    ).all()
+    return raeder, einzel, positionen, zuweisungen
+
+
+def _segmente(zeilen: List[Any], von: date, tage: int) -> Tuple[np.ndarray, ...]:
+    """Zeilen (schluessel, von, bis, ...) → Start/Ende als Tag-Index (gekürzt) und Miettage gesamt"""
+    a = np.array([z[1] for z in zeilen], dtype="datetime64[D]")
+    b = np.array([z[2] for z in zeilen], dtype="datetime64[D]")
+    basis = np.datetime64(von, "D")
+    start = np.clip((a - basis).astype(np.int64), 0, tage - 1)
+    ende = np.clip((b - basis).astype(np.int64), 0, tage - 1)
+    dauer = ((b - a).astype(np.int64) + 1).clip(min=1)
+    return start, ende, dauer
+
+
+def _auftragen(diff: np.ndarray, zeile: np.ndarray, start: np.ndarray, ende: np.ndarray, wert: np.ndarray) -> None:
+    np.add.at(diff, (zeile, start), wert)
+    np.add.at(diff, (zeile, ende + 1), -wert)
+
+
+def _standzeiten(leer: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Pro Zeile: längster Lauf leerer Tage und Lauf bis zum letzten Tag"""
+    zeilen, tage = leer.shape
+    laengste = np.zeros(zeilen, dtype=np.int64)
+    if not zeilen or not tage:
+        return laengste, laengste.copy()
+    gepolstert = np.zeros((zeilen, tage + 2), dtype=np.int8)
+    gepolstert[:, 1:-1] = leer
+    kanten = np.diff(gepolstert, axis=1)
+    s_zeile, s_tag = np.nonzero(kanten == 1)
+    _, e_tag = np.nonzero(kanten == -1)  # gleiche Reihenfolge (zeilenweise, je Lauf)
+    np.maximum.at(laengste, s_zeile, e_tag - s_tag)
+    # Aktuell: Tage seit der letzten Belegung (nur leere Tage am Ende)
+    aktuell = np.zeros(zeilen, dtype=np.int64)
+    am_ende = e_tag == tage
+    aktuell[s_zeile[am_ende]] = tage - s_tag[am_ende]
+    return laengste, aktuell
+
+
+def _kennzahlen(verfuegbar, belegt, umsatz) -> Dict[str, Any]:
+    verfuegbar = int(verfuegbar)
+    belegt = int(belegt)
+    return {
+        "verfuegbare_radtage": verfuegbar,
+        "belegte_radtage": belegt,
+        "auslastung": round(belegt / verfuegbar, 3) if verfuegbar else 0.0,
+        "umsatz": round(float(umsatz), 2),
+        "umsatz_pro_radtag": round(float(umsatz) / verfuegbar, 2) if verfuegbar else 0.0,
+    }
+
+
+def _berechne(db: Session, von: date, bis: date) -> Dict[str, Any]:
+    tage = (bis - von).days + 1
+    raeder, einzel, positionen, zuweisungen = _lade(db, von, bis)
+
+    # --- Räder × Tage ---
+    rad_index = {r.id: i for i, r in enumerate(raeder)}
+    verfuegbar = np.ones((len(raeder), tage), dtype=bool)
+
+    # Einzel-Rad: ganzer Preis aufs Rad; Zuweisung: Positionspreis / anzahl
+    rad_zeilen = [(e[0], e[1], e[2], float(e[4] or 0)) for e in einzel if e[0] in rad_index]
+    rad_zeilen += [(z[0], z[1], z[2], float(z[4] or 0) / (z[3] or 1)) for z in zuweisungen if z[0] in rad_index]
+    rad_belegt = np.zeros((len(raeder), tage + 1), dtype=np.int64)
+    rad_umsatz = np.zeros(len(raeder), dtype=np.float64)
+    if rad_zeilen:
+        idx = np.array([rad_index[z[0]] for z in rad_zeilen], dtype=np.int64)
+        start, ende, dauer = _segmente(rad_zeilen, von, tage)
+        _auftragen(rad_belegt, idx, start, ende, np.ones(idx.size, dtype=np.int64))
+        preis = np.array([z[3] for z in rad_zeilen])
+        np.add.at(rad_umsatz, idx, preis / dauer * (ende - start + 1))
+    belegt = np.cumsum(rad_belegt, axis=1)[:, :tage] > 0
+    standzeit_max, standzeit_aktuell = _standzeiten(verfuegbar & ~belegt)
+
+    # --- Typen × Tage: Kapazität aus den Rädern, Belegung aus Positionen + Einzel-Rad ---
+    rad_typ = {r.id: r.typ for r in raeder}
+    typen = sorted({r.typ for r in raeder if r.typ} | {p[0] for p in positionen if p[0]})
+    typ_index = {t: i for i, t in enumerate(typen)}
+    kapazitaet = np.zeros((len(typen), tage), dtype=np.int64)
+    for i, r in enumerate(raeder):
+        if r.typ:
+            kapazitaet[typ_index[r.typ]] += verfuegbar[i]
+
+    typ_zeilen = [(p[0], p[1], p[2], p[3], p[4]) for p in positionen if p[0]]
+    typ_zeilen += [(rad_typ[e[0]], e[1], e[2], e[3], e[4]) for e in einzel if rad_typ.get(e[0])]
+    typ_belegt = np.zeros((len(typen), tage + 1), dtype=np.int64)
+    typ_umsatz = np.zeros((len(typen), tage + 1), dtype=np.float64)
+    if typ_zeilen:
+        idx = np.array([typ_index[z[0]] for z in typ_zeilen], dtype=np.int64)
+        start, ende, dauer = _segmente(typ_zeilen, von, tage)
+        anzahl = np.array([z[3] or 0 for z in typ_zeilen], dtype=np.int64)
+        _auftragen(typ_belegt, idx, start, ende, anzahl)
+        _auftragen(typ_umsatz, idx, start, ende, np.array([float(z[4] or 0) for z in typ_zeilen]) / dauer)
+    # Mehr belegt als Räder da (z.B. Rad inzwischen verkauft) zählt als voll
+    typ_belegt = np.minimum(np.cumsum(typ_belegt, axis=1)[:, :tage], kapazitaet)
+    typ_umsatz = np.cumsum(typ_umsatz, axis=1)[:, :tage]
+
+    # --- Monate: zusammenhängende Tag-Blöcke ---
+    monate = np.arange(np.datetime64(von, "D"), np.datetime64(bis, "D") + 1).astype("datetime64[M]")
+    monat_start = np.flatnonzero(np.concatenate(([True], monate[1:] != monate[:-1])))
+    monat_namen = np.datetime_as_string(monate[monat_start])
+    if typen:
+        kap_monat = np.add.reduceat(kapazitaet, monat_start, axis=1)
+        bel_monat = np.add.reduceat(typ_belegt, monat_start, axis=1)
+        ums_monat = np.add.reduceat(typ_umsatz, monat_start, axis=1)
+
+    return {
+        "von": von,
+        "bis": bis,
+        "erstellt_am": datetime.now(),
+        "gesamt": _kennzahlen(kapazitaet.sum(), typ_belegt.sum(), typ_umsatz.sum()),
+        "typen": [
+            {"typ": t, "raeder": sum(1 for r in raeder if r.typ == t), **_kennzahlen(
+                kapazitaet[i].sum(), typ_belegt[i].sum(), typ_umsatz[i].sum()
+            )}
+            for t, i in typ_index.items()
+        ],
+        "raeder": [
+            {
+                "id": r.id,
+                "inventarnummer": r.inventarnummer,
+                "typ": r.typ,
+                **_kennzahlen(verfuegbar[i].sum(), belegt[i].sum(), rad_umsatz[i]),
+                "laengste_standzeit_tage": int(standzeit_max[i]),
+                "aktuelle_standzeit_tage": int(standzeit_aktuell[i]),
+            }
+            for i, r in enumerate(raeder)
+        ],
+        "pro_monat": [
+            {"monat": str(monat), "typ": t, **_kennzahlen(kap_monat[i, m], bel_monat[i, m], ums_monat[i, m])}
+            for t, i in typ_index.items()
+            for m, monat in enumerate(monat_namen)
+        ] if typen else [],
+    }
+
+
+def auslastung_report(db: Session, von: date, bis: date) -> Dict[str, Any]:
+    """Auslastung im Zeitraum von..bis (inklusive), gecacht pro Tag (die letzten MAX_CACHE_ZEITRAEUME Zeiträume)"""
+    return cache.hole(
+        CACHE_NAMENSRAUM, (date.today(), von, bis), lambda: _berechne(db, von, bis),
+        max_eintraege=MAX_CACHE_ZEITRAEUME,
+    )
+
+
+def standard_zeitraum(heute: Optional[date] = None) -> Tuple[date, date]:
+    """Letzte 365 Tage bis heute"""
+    heute = heute or date.today()
+    return heute - timedelta(days=364), heute
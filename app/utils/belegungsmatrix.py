@@ -0,0 +1,201 @@
+"""
+Belegungsmatrix für Kalender und Timeline
+Räder × Tage und Rad-Typen × Tage als Lauflängen (Segmente) für einen Zeitraum.
+
+Eine Query: alle Leihräder FULL OUTER JOIN die Vermietungen im Zeitraum (inkl.
+Positionen und Kunde) - Räder ohne Buchung und typ-basierte Buchungen ohne Rad
+kommen beide mit. Die Typ-Belegung pro Tag wird aus denselben Zeilen per
+Differenzen-Array (NumPy) gebildet. Typ-basierte Buchungen erscheinen zusätzlich
+auf den Rädern, die ihnen zugewiesen sind (zweite, kleine Query).
+"""
+from datetime import date, time
+from typing import Any, Dict, List
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.kunde import Kunde
+from app.models.leihrad import Leihrad
+from app.models.vermietung import Vermietung
+from app.models.vermietung_position import VermietungPosition
+from app.models.vermietung_zuweisung import VermietungRadZuweisung
+from app.utils.verfuegbarkeit import BELEGENDE_STATUS
+
+MAX_TAGE = 400
+
+
+def _lade_zeilen(db: Session, von: date, bis: date) -> List[Any]:
+    v = Vermietung
+    p = VermietungPosition
+    buchungen = (
+        select(
+            v.id.label("v_id"),
+            v.leihrad_id,
+            v.status.label("v_status"),
+            v.kunde_name,
+            v.von_datum,
+            v.bis_datum,
+            v.von_zeit,
+            v.bis_zeit,
+            v.anzahl_raeder,
+            v.rad_abgeholt,
+            v.notizen,
+            p.rad_typ,
+            p.anzahl,
+            Kunde.vorname,
+            Kunde.nachname,
+            Kunde.kundennummer,
+        )
+        .outerjoin(p, p.vermietung_id == v.id)
+        .outerjoin(Kunde, Kunde.id == v.kunde_id)
+        .where(v.von_datum <= bis, v.bis_datum >= von, v.status != "storniert")
+        .subquery()
+    )
+    return db.execute(
+        select(
+            Leihrad.id.label("rad_id"),
+            Leihrad.inventarnummer,
+            Leihrad.typ.label("rad_typ_rad"),
+            Leihrad.status.label("rad_status"),
+            buchungen,
+        )
+        .select_from(Leihrad.__table__.join(buchungen, buchungen.c.leihrad_id == Leihrad.id, full=True))
+        .order_by(
+            Leihrad.typ.nullslast(),
+            Leihrad.inventarnummer.nullslast(),
+            buchungen.c.von_datum,
+            buchungen.c.von_zeit,
+            buchungen.c.v_id,
+        )
+    ).all()
+
+
+def _lade_zuweisungen(db: Session, von: date, bis: date) -> List[Any]:
+    z = VermietungRadZuweisung
+    return db.execute(
+        select(z.leihrad_id, z.vermietung_id, z.von_datum, z.bis_datum)
+        .join(Vermietung, Vermietung.id == z.vermietung_id)
+        .where(z.von_datum <= bis, z.bis_datum >= von, Vermietung.status != "storniert")
+    ).all()
+
+
+def _lauflaengen(werte: np.ndarray) -> List[List[int]]:
+    """[start, tage, wert] für jeden Lauf gleicher Werte ≠ 0"""
+    if not werte.size:
+        return []
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(werte)) + 1))
+    laengen = np.diff(np.concatenate((starts, [werte.size])))
+    return [
+        [int(s), int(n), int(werte[s])]
+        for s, n in zip(starts, laengen)
+        if werte[s]
+    ]
+
+
+def belegungsmatrix(db: Session, von: date, bis: date) -> Dict[str, Any]:
+    """
+    Räder, Typen und Buchungen im Zeitraum von..bis (inklusive)
+
+    Segmente sind Tag-Indizes relativ zu von, auf den Zeitraum gekürzt.
+    """
+    tage = (bis - von).days + 1
+    raeder: Dict[int, Dict[str, Any]] = {}
+    buchungen: Dict[int, Dict[str, Any]] = {}
+    anteile: Dict[int, Dict[str, int]] = {}
+
+    for z in _lade_zeilen(db, von, bis):
+        if z.rad_id is not None and z.rad_id not in raeder:
+            raeder[z.rad_id] = {
+                "id": z.rad_id,
+                "inventarnummer": z.inventarnummer,
+                "typ": z.rad_typ_rad,
+                "status": z.rad_status.value if hasattr(z.rad_status, "value") else z.rad_status,
+                "segmente": [],
+            }
+        if z.v_id is None:
+            continue
+
+        if z.v_id not in buchungen:
+            start = max((z.von_datum - von).days, 0)
+            ende = min((z.bis_datum - von).days, tage - 1)
+            kunde = " ".join(t for t in (z.vorname, z.nachname) if t) or z.kunde_name or "Unbekannt"
+            buchungen[z.v_id] = {
+                "id": z.v_id,
+                "status": z.v_status,
+                "leihrad_id": z.leihrad_id,
+                "kunde": kunde,
+                "kundennummer": z.kundennummer,
+                "von_datum": z.von_datum,
+                "bis_datum": z.bis_datum,
+                "von_zeit": z.von_zeit,
+                "bis_zeit": z.bis_zeit,
+                "anzahl_raeder": z.anzahl_raeder or 1,
+                "rad_abgeholt": bool(z.rad_abgeholt),
+                "notizen": z.notizen,
+                "_start": start,
+                "_ende": ende,
+            }
+            anteile[z.v_id] = {}
+            if z.leihrad_id is not None and z.rad_id is not None:
+                raeder[z.rad_id]["segmente"].append([start, ende - start + 1, z.v_id])
+
+        if z.rad_typ is not None:
+            anteile[z.v_id][z.rad_typ] = anteile[z.v_id].get(z.rad_typ, 0) + (z.anzahl or 0)
+        elif z.rad_typ_rad is not None and not anteile[z.v_id]:
+            # Einzel-Rad ohne Positionen belegt den Typ des Rads
+            anteile[z.v_id][z.rad_typ_rad] = z.anzahl_raeder or 1
+
+    # Zugewiesene Räder typ-basierter Buchungen
+    zugewiesen = False
+    for rad_id, v_id, a, b in _lade_zuweisungen(db, von, bis):
+        if rad_id in raeder and v_id in buchungen:
+            start = max((a - von).days, 0)
+            ende = min((b - von).days, tage - 1)
+            raeder[rad_id]["segmente"].append([start, ende - start + 1, v_id])
+            zugewiesen = True
+    if zugewiesen:
+        for rad in raeder.values():
+            rad["segmente"].sort()
+
+    # Typ-Belegung pro Tag (Differenzen-Array, nur belegende Status)
+    gesamt: Dict[str, int] = {}
+    for rad in raeder.values():
+        if rad["typ"]:
+            gesamt[rad["typ"]] = gesamt.get(rad["typ"], 0) + 1
+    differenzen: Dict[str, np.ndarray] = {}
+    for v_id, buchung in buchungen.items():
+        if buchung["status"] not in BELEGENDE_STATUS:
+            continue
+        for typ, anzahl in anteile[v_id].items():
+            diff = differenzen.setdefault(typ, np.zeros(tage + 1, dtype=np.int64))
+            diff[buchung["_start"]] += anzahl
+            diff[buchung["_ende"] + 1] -= anzahl
+
+    typen = [
+        {
+            "typ": typ,
+            "gesamt": gesamt.get(typ, 0),
+            "segmente": _lauflaengen(np.cumsum(differenzen[typ])[:tage]) if typ in differenzen else [],
+        }
+        for typ in sorted(set(gesamt) | set(differenzen))
+    ]
+
+    liste = []
+    for v_id, buchung in buchungen.items():
+        buchung["raeder"] = (
+            ", ".join(f"{anzahl}× {typ}" for typ, anzahl in anteile[v_id].items())
+            or f"{buchung['anzahl_raeder']}× Rad"
+        )
+        del buchung["_start"], buchung["_ende"]
+        liste.append(buchung)
+    liste.sort(key=lambda b: (b["von_datum"], b["von_zeit"] or time.min, b["id"]))
+
+    return {
+        "von": von,
+        "bis": bis,
+        "tage": tage,
+        "raeder": list(raeder.values()),
+        "typen": typen,
+        "buchungen": liste,
+    }
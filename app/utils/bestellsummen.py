@@ -0,0 +1,82 @@
+"""
+Bestellsummen - Inkrementelle Pflege von gesamtsumme_ek / gesamtsumme_vk
+Positionsänderungen buchen nur das Delta (ein UPDATE), statt alle Positionen zu laden.
+Konsistenzprüfung vergleicht gespeicherte Summen mit den Positionen (eine Query).
+"""
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.bestellung import Bestellung, BestellPosition
+
+
+def buche_summen_delta(db: Session, bestellung_id: int, delta_ek: Decimal, delta_vk: Decimal) -> None:
+    """
+    Addiert ein Delta auf die Gesamtsummen (atomar in der DB, kein Commit)
+
+    Gleichzeitige Änderungen an derselben Bestellung gehen so nicht verloren.
+    """
+    if not delta_ek and not delta_vk:
+        return
+    db.execute(
+        update(Bestellung)
+        .where(Bestellung.id == bestellung_id)
+        .values(
+            gesamtsumme_ek=func.coalesce(Bestellung.gesamtsumme_ek, 0) + delta_ek,
+            gesamtsumme_vk=func.coalesce(Bestellung.gesamtsumme_vk, 0) + delta_vk,
+        )
+        .execution_options(synchronize_session="fetch")
+    )
+
+
+def _soll_summen_subquery():
+    return (
+        select(
+            BestellPosition.bestellung_id,
+            func.coalesce(func.sum(BestellPosition.summe_ek), 0).label("summe_ek"),
+            func.coalesce(func.sum(BestellPosition.summe_vk), 0).label("summe_vk"),
+        )
+        .group_by(BestellPosition.bestellung_id)
+        .subquery("soll")
+    )
+
+
+def finde_summen_abweichungen(db: Session) -> List[Dict[str, Any]]:
+    """
+    Bestellungen, deren gespeicherte Summen nicht zu den Positionen passen
+
+    Returns:
+        Liste mit bestellung_id, bestellnummer, Ist- und Soll-Summen
+    """
+    soll = _soll_summen_subquery()
+    soll_ek = func.coalesce(soll.c.summe_ek, 0)
+    soll_vk = func.coalesce(soll.c.summe_vk, 0)
+    ist_ek = func.coalesce(Bestellung.gesamtsumme_ek, 0)
+    ist_vk = func.coalesce(Bestellung.gesamtsumme_vk, 0)
+
+    rows = db.execute(
+        select(
+            Bestellung.id.label("bestellung_id"),
+            Bestellung.bestellnummer,
+            ist_ek.label("ist_ek"),
+            soll_ek.label("soll_ek"),
+            ist_vk.label("ist_vk"),
+            soll_vk.label("soll_vk"),
+        )
+        .outerjoin(soll, soll.c.bestellung_id == Bestellung.id)
+        .where(or_(ist_ek != soll_ek, ist_vk != soll_vk))
+        .order_by(Bestellung.id)
+    ).mappings()
+    return [dict(row) for row in rows]
+
+
+def korrigiere_summen(db: Session, abweichungen: List[Dict[str, Any]]) -> int:
+    """Setzt die Summen der abweichenden Bestellungen per Bulk-Update (kein Commit)"""
+    if abweichungen:
+        db.execute(update(Bestellung), [
+            {"id": a["bestellung_id"], "gesamtsumme_ek": a["soll_ek"], "gesamtsumme_vk": a["soll_vk"]}
+            for a in abweichungen
+        ])
+    return len(abweichungen)
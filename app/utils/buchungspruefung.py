@@ -0,0 +1,216 @@
+"""
+Konsistenzprüfung der Vermietungen
+Findet, was beim Buchen eigentlich nicht passieren darf - z.B. durch Daten an der
+API vorbei, alte Buchungen von vor dem Überbuchungsschutz oder den Mix aus
+Einzel-Rad-Buchungen (leihrad_id) und typ-basierten Buchungen (Positionen):
+
+- Überschneidungen: ein Rad in zwei Buchungen/Zuweisungen gleichzeitig
+- Überbuchungen: mehr Räder eines Typs belegt als vorhanden (pro Tag, zusammengefasst)
+- Status-Abweichungen: Rad-Status passt nicht zu den laufenden Vermietungen (Räder in
+  Wartung oder defekt ausgenommen - die setzt nur die Werkstatt zurück)
+- Belegung-Abweichungen: leihrad_tagesbelegung weicht von den Buchungen ab
+
+Alle belegenden Buchungen kommen aus einer gestreamten Query (Einzel-Rad, Zuweisungen,
+Positionen); danach pro Rad und pro Typ ein Sweep über die sortierten Zeiträume
+bzw. Start-/Ende-Ereignisse - O(n log n), ohne Tage aufzuzählen (außer für den
+Abgleich mit der Tagesbelegung).
+
+Überfällige Vermietungen (aktiv, bis_datum vorbei) belegen ihr Rad bis heute -
+wie beim Status-Abgleich (leihrad_status.laeuft).
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, exists, func, literal, null, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.leihrad import Leihrad, LeihradStatus
+from app.models.leihrad_belegung import LeihradTagesbelegung
+from app.models.vermietung import Vermietung
+from app.models.vermietung_position import VermietungPosition
+from app.models.vermietung_zuweisung import VermietungRadZuweisung
+from app.utils.verfuegbarkeit import BELEGENDE_STATUS
+
+STREAM_ZEILEN = 5000
+
+# (von, bis, vermietung_id, ueberfaellig)
+RadZeitraum = Tuple[date, date, int, bool]
+
+
+def _buchungen_query():
+    """
+    Alle belegenden Buchungen als Zeilen (vermietung_id, leihrad_id, rad_typ, von, bis, anzahl, status, quelle)
+
+    - einzel: belegt leihrad_id; anzahl > 0 nur ohne Positionen (sonst zählen die Positionen)
+    - zuweisung: belegt leihrad_id, anzahl 0 (die Position zählt schon für den Typ)
+    - position: belegt anzahl Räder von rad_typ
+    """
+    v = Vermietung
+    p = VermietungPosition
+    z = VermietungRadZuweisung
+    hat_positionen = exists().where(p.vermietung_id == v.id)
+    einzel = (
+        select(
+            v.id.label("vermietung_id"),
+            v.leihrad_id.label("leihrad_id"),
+            Leihrad.typ.label("rad_typ"),
+            v.von_datum.label("von"),
+            v.bis_datum.label("bis"),
+            case((hat_positionen, 0), else_=func.coalesce(v.anzahl_raeder, 1)).label("anzahl"),
+            v.status.label("status"),
+            literal("einzel").label("quelle"),
+        )
+        .join(Leihrad, Leihrad.id == v.leihrad_id)
+        .where(v.status.in_(BELEGENDE_STATUS))
+    )
+    zuweisungen = (
+        select(z.vermietung_id, z.leihrad_id, z.rad_typ, z.von_datum, z.bis_datum, literal(0), v.status, literal("zuweisung"))
+        .join(v, v.id == z.vermietung_id)
+        .where(v.status.in_(BELEGENDE_STATUS))
+    )
+    positionen = (
+        select(p.vermietung_id, null(), p.rad_typ, v.von_datum, v.bis_datum, p.anzahl, v.status, literal("position"))
+        .join(v, v.id == p.vermietung_id)
+        .where(v.status.in_(BELEGENDE_STATUS))
+    )
+    return union_all(einzel, zuweisungen, positionen)
+
+
+def _ueberschneidungen(zeitraeume: List[RadZeitraum]) -> List[Tuple[RadZeitraum, RadZeitraum, date, date]]:
+    """Sweep über die nach Beginn sortierten Zeiträume eines Rads → (vorher, danach, von, bis)"""
+    treffer = []
+    laengster: Optional[RadZeitraum] = None  # bisher am weitesten reichender Zeitraum
+    for zeitraum in sorted(zeitraeume):
+        if laengster is not None and zeitraum[0] <= laengster[1]:
+            treffer.append((laengster, zeitraum, zeitraum[0], min(laengster[1], zeitraum[1])))
+        if laengster is None or zeitraum[1] > laengster[1]:
+            laengster = zeitraum
+    return treffer
+
+
+def _stufen(ereignisse: List[Tuple[date, int]]) -> List[Tuple[date, date, int]]:
+    """Start-/Ende-Ereignisse (tag, ±anzahl) → konstante Abschnitte (von, bis, belegt), belegt ≠ 0"""
+    ereignisse.sort()
+    abschnitte = []
+    belegt = 0
+    for i, (tag, delta) in enumerate(ereignisse):
+        belegt += delta
+        if i + 1 < len(ereignisse) and ereignisse[i + 1][0] == tag:
+            continue
+        if belegt and i + 1 < len(ereignisse):
+            abschnitte.append((tag, ereignisse[i + 1][0] - timedelta(days=1), belegt))
+    return abschnitte
+
+
+def _ueberbuchungen(abschnitte: List[Tuple[date, date, int]], kapazitaet: int) -> List[Dict[str, Any]]:
+    """Abschnitte über der Kapazität, direkt aufeinanderfolgende zusammengefasst (belegt = Maximum)"""
+    ergebnis: List[Dict[str, Any]] = []
+    for von, bis, belegt in abschnitte:
+        if belegt <= kapazitaet:
+            continue
+        if ergebnis and ergebnis[-1]["bis"] + timedelta(days=1) == von:
+            ergebnis[-1]["bis"] = bis
+            ergebnis[-1]["belegt"] = max(ergebnis[-1]["belegt"], belegt)
+        else:
+            ergebnis.append({"von": von, "bis": bis, "belegt": belegt, "kapazitaet": kapazitaet})
+    return ergebnis
+
+
+def pruefe_buchungen(db: Session, heute: Optional[date] = None) -> Dict[str, Any]:
+    """Konsistenzbericht über alle belegenden Buchungen (nur lesend)"""
+    heute = heute or date.today()
+
+    raeder = {
+        r.id: r
+        for r in db.execute(select(Leihrad.id, Leihrad.inventarnummer, Leihrad.typ, Leihrad.status))
+    }
+    kapazitaet: Dict[str, int] = defaultdict(int)
+    for r in raeder.values():
+        if r.typ:
+            kapazitaet[r.typ] += 1
+
+    pro_rad: Dict[int, List[RadZeitraum]] = defaultdict(list)
+    pro_typ: Dict[str, List[Tuple[date, int]]] = defaultdict(list)
+    laufend: Dict[int, int] = {}  # rad_id → vermietung_id (Einzel-Rad, läuft heute)
+    vermietungen = set()
+    zeilen = db.execute(_buchungen_query().execution_options(yield_per=STREAM_ZEILEN))
+    for vermietung_id, rad_id, typ, von, bis, anzahl, status, quelle in zeilen:
+        vermietungen.add(vermietung_id)
+        if anzahl and typ:
+            pro_typ[typ] += [(von, anzahl), (bis + timedelta(days=1), -anzahl)]
+        if rad_id is None:
+            continue
+        ueberfaellig = status == "aktiv" and bis < heute
+        pro_rad[rad_id].append((von, heute if ueberfaellig else bis, vermietung_id, ueberfaellig))
+        if quelle == "einzel" and von <= heute and (ueberfaellig or bis >= heute):
+            laufend[rad_id] = vermietung_id
+
+    # --- Pro Rad: Überschneidungen ---
+    ueberschneidungen = []
+    for rad_id, zeitraeume in pro_rad.items():
+        rad = raeder.get(rad_id)
+        for vorher, danach, von, bis in _ueberschneidungen(zeitraeume):
+            ueberschneidungen.append({
+                "leihrad_id": rad_id,
+                "inventarnummer": rad.inventarnummer if rad else None,
+                "vermietung_id": vorher[2],
+                "andere_vermietung_id": danach[2],
+                "von": von,
+                "bis": bis,
+                "ueberfaellig": vorher[3] or danach[3],
+            })
+    ueberschneidungen.sort(key=lambda u: (u["inventarnummer"] or "", u["von"]))
+
+    # --- Pro Rad: Status (wartung/defekt bleibt auch bei laufender Vermietung, wie synchronisiere_status) ---
+    status_abweichungen = []
+    for rad_id, rad in sorted(raeder.items(), key=lambda r: r[1].inventarnummer):
+        if rad.status in (LeihradStatus.wartung, LeihradStatus.defekt):
+            continue
+        if rad_id in laufend and rad.status != LeihradStatus.verliehen:
+            erwartet = LeihradStatus.verliehen
+        elif rad_id not in laufend and rad.status == LeihradStatus.verliehen:
+            erwartet = LeihradStatus.verfuegbar
+        else:
+            continue
+        status_abweichungen.append({
+            "leihrad_id": rad_id,
+            "inventarnummer": rad.inventarnummer,
+            "status": rad.status,
+            "erwartet": erwartet,
+            "vermietung_id": laufend.get(rad_id),
+        })
+
+    # --- Pro Typ: Überbuchungen und Tagesbelegung ---
+    ueberbuchungen = []
+    erwartet_belegt: Dict[Tuple[str, date], int] = {}
+    for typ, ereignisse in sorted(pro_typ.items()):
+        abschnitte = _stufen(ereignisse)
+        ueberbuchungen += [{"rad_typ": typ, **u} for u in _ueberbuchungen(abschnitte, kapazitaet.get(typ, 0))]
+        for von, bis, belegt in abschnitte:
+            for offset in range((bis - von).days + 1):
+                erwartet_belegt[(typ, von + timedelta(days=offset))] = belegt
+
+    t = LeihradTagesbelegung
+    gespeichert = {
+        (typ, datum): belegt
+        for typ, datum, belegt in db.execute(select(t.rad_typ, t.datum, t.belegt).where(t.belegt != 0))
+    }
+    belegung_abweichungen = [
+        {"rad_typ": typ, "datum": datum, "gespeichert": gespeichert.get((typ, datum), 0),
+         "erwartet": erwartet_belegt.get((typ, datum), 0)}
+        for typ, datum in sorted(gespeichert.keys() | erwartet_belegt.keys())
+        if gespeichert.get((typ, datum), 0) != erwartet_belegt.get((typ, datum), 0)
+    ]
+
+    return {
+        "stichtag": heute,
+        "erstellt_am": datetime.now(),
+        "buchungen": len(vermietungen),
+        "raeder": len(raeder),
+        "ok": not (ueberschneidungen or ueberbuchungen or status_abweichungen or belegung_abweichungen),
+        "ueberschneidungen": ueberschneidungen,
+        "ueberbuchungen": ueberbuchungen,
+        "status_abweichungen": status_abweichungen,
+        "belegung_abweichungen": belegung_abweichungen,
+    }
@@ -0,0 +1,62 @@
+"""
+In-Process Cache für berechnete Auswertungen
+Werte liegen pro Namensraum im Speicher, bis der Namensraum invalidiert wird
+(z.B. Lieferzeiten bis zum nächsten Wareneingang). Pro Namensraum werden höchstens
+max_eintraege Werte gehalten, die am längsten nicht abgerufenen fallen zuerst
+heraus - Schlüssel mit Tagesdatum oder frei wählbarem Zeitraum wachsen so nicht
+unbegrenzt.
+
+Hinweis: Gilt pro Prozess - der Server läuft mit einem uvicorn-Worker.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+MAX_EINTRAEGE = 32
+
+_lock = threading.Lock()
+_speicher: Dict[str, "OrderedDict[Hashable, Any]"] = {}
+_generation: Dict[str, int] = {}
+
+
+def hole(
+    namensraum: str,
+    schluessel: Hashable,
+    berechne: Callable[[], Any],
+    max_eintraege: int = MAX_EINTRAEGE,
+) -> Any:
+    """
+    Gibt den gecachten Wert zurück oder berechnet ihn
+
+    Args:
+        namensraum: z.B. "lieferzeiten"
+        schluessel: z.B. Tagesdatum oder Parameter-Tupel
+        berechne: Wird bei Cache-Miss ohne Argumente aufgerufen
+        max_eintraege: Obergrenze für den Namensraum (LRU)
+    """
+    with _lock:
+        eintraege = _speicher.get(namensraum)
+        if eintraege is not None and schluessel in eintraege:
+            eintraege.move_to_end(schluessel)
+            return eintraege[schluessel]
+        generation = _generation.get(namensraum, 0)
+
+    # Außerhalb des Locks berechnen (DB-Zugriff)
+    wert = berechne()
+
+    with _lock:
+        # Während der Berechnung invalidiert? Dann nicht speichern (veraltet)
+        if _generation.get(namensraum, 0) == generation:
+            eintraege = _speicher.setdefault(namensraum, OrderedDict())
+            eintraege[schluessel] = wert
+            eintraege.move_to_end(schluessel)
+            while len(eintraege) > max(1, max_eintraege):
+                eintraege.popitem(last=False)
+    return wert
+
+
+def invalidiere(namensraum: str) -> None:
+    """Verwirft alle Werte eines Namensraums"""
+    with _lock:
+        _speicher.pop(namensraum, None)
+        _generation[namensraum] = _generation.get(namensraum, 0) + 1
@@ -0,0 +1,133 @@
+"""
+Durchlaufzeiten der Werkstatt aus dem Statuswechsel-Protokoll
+Verweildauer pro Status (Phase) und Gesamtdurchlauf angenommen → fertig,
+als p50/p90 gesamt, pro Mechaniker und pro Monat. Vektorisiert mit NumPy,
+gecacht pro Tag.
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.reparatur import ReparaturStatusWechsel
+from app.utils import cache
+
+CACHE_NAMENSRAUM = "durchlaufzeiten"
+
+# Verweildauer in diesen Status (abgeholt/storniert sind Endzustände)
+PHASEN = ["angenommen", "in_arbeit", "wartet_auf_teile", "fertig"]
+DURCHLAUF = "durchlauf"  # angenommen → erstes fertig
+
+
+def _lade_wechsel(db: Session, seit: datetime) -> List[Any]:
+    """
+    Alle Wechsel der Reparaturen mit Aktivität im Zeitraum, jeweils mit dem
+    Zeitpunkt des nächsten Wechsels (LEAD) = Ende der Verweildauer
+    """
+    w = ReparaturStatusWechsel
+    aktiv = select(w.reparatur_id).where(w.zeitpunkt >= seit).distinct()
+    naechster = func.lead(w.zeitpunkt).over(partition_by=w.reparatur_id, order_by=(w.zeitpunkt, w.id))
+    return db.execute(
+        select(
+            w.reparatur_id,
+            w.nach_status,
+            w.zeitpunkt,
+            naechster.label("naechster"),
+            w.meister,
+        )
+        .where(w.reparatur_id.in_(aktiv))
+        .order_by(w.reparatur_id, w.zeitpunkt, w.id)
+    ).all()
+
+
+def _kennzahlen(stunden: np.ndarray) -> Dict[str, Any]:
+    p50, p90 = np.percentile(stunden, [50, 90])
+    return {
+        "anzahl": int(stunden.size),
+        "p50_stunden": round(float(p50), 1),
+        "p90_stunden": round(float(p90), 1),
+        "mittel_stunden": round(float(stunden.mean()), 1),
+    }
+
+
+def _gruppiert(phase: np.ndarray, gruppe: np.ndarray, stunden: np.ndarray, feld: str) -> List[Dict[str, Any]]:
+    """p50/p90 pro (Phase, Gruppe); Gruppen ohne Wert (z.B. kein Mechaniker) entfallen"""
+    ergebnis = []
+    for p in PHASEN + [DURCHLAUF]:
+        maske_phase = (phase == p) & (gruppe != None)  # noqa: E711 (elementweise)
+        for g in sorted(set(gruppe[maske_phase])):
+            maske = maske_phase & (gruppe == g)
+            ergebnis.append({"phase": p, feld: g, **_kennzahlen(stunden[maske])})
+    return ergebnis
+
+
+def _berechne(db: Session, monate: int) -> Dict[str, Any]:
+    seit = datetime.combine(date.today(), datetime.min.time()) - timedelta(days=monate * 31)
+    zeilen = _lade_wechsel(db, seit)
+
+    leer = {"seit": seit, "erstellt_am": datetime.now(), "phasen": [], "pro_mechaniker": [], "pro_monat": []}
+    if not zeilen:
+        return leer
+
+    reparatur = np.array([z.reparatur_id for z in zeilen], dtype=np.int64)
+    status = np.array([z.nach_status for z in zeilen], dtype=object)
+    beginn = np.array([z.zeitpunkt for z in zeilen], dtype="datetime64[s]")
+    ende = np.array([z.naechster if z.naechster is not None else np.datetime64("NaT") for z in zeilen], dtype="datetime64[s]")
+    meister = np.array([z.meister for z in zeilen], dtype=object)
+
+    # --- Verweildauer pro (Reparatur, Status), mehrfache Besuche summiert ---
+    abgeschlossen = ~np.isnat(ende) & np.isin(status, PHASEN)
+    status_code = np.searchsorted(np.array(sorted(PHASEN), dtype=object), status[abgeschlossen])
+    schluessel = reparatur[abgeschlossen] * len(PHASEN) + status_code
+    dauer = (ende[abgeschlossen] - beginn[abgeschlossen]) / np.timedelta64(1, "h")
+
+    eindeutig, erster, inverse = np.unique(schluessel, return_index=True, return_inverse=True)
+    summe = np.bincount(inverse, weights=dauer)
+    # Letzter Besuch je Gruppe bestimmt Monat und Mechaniker (Zeilen sind zeitlich sortiert)
+    letzter = np.zeros(eindeutig.size, dtype=np.int64)
+    np.maximum.at(letzter, inverse, np.arange(inverse.size))
+
+    phase_status = status[abgeschlossen][erster]
+    phase_ende = ende[abgeschlossen][letzter]
+    phase_meister = meister[abgeschlossen][letzter]
+
+    # --- Gesamtdurchlauf: erstes angenommen → erstes fertig ---
+    ist_start = status == "angenommen"
+    ist_fertig = status == "fertig"
+    start_rep, start_idx = np.unique(reparatur[ist_start], return_index=True)
+    fertig_rep, fertig_idx = np.unique(reparatur[ist_fertig], return_index=True)
+    beide, i_start, i_fertig = np.intersect1d(start_rep, fertig_rep, return_indices=True)
+    d_beginn = beginn[ist_start][start_idx][i_start]
+    d_ende = beginn[ist_fertig][fertig_idx][i_fertig]
+    d_meister = meister[ist_fertig][fertig_idx][i_fertig]
+    gueltig = d_ende >= d_beginn
+
+    phase = np.concatenate([phase_status, np.full(int(gueltig.sum()), DURCHLAUF, dtype=object)])
+    stunden = np.concatenate([summe, ((d_ende - d_beginn) / np.timedelta64(1, "h"))[gueltig]])
+    ende_alle = np.concatenate([phase_ende, d_ende[gueltig]])
+    mechaniker = np.concatenate([phase_meister, d_meister[gueltig]])
+
+    # Nur Phasen, die im Zeitraum geendet haben
+    im_zeitraum = ende_alle >= np.datetime64(seit, "s")
+    phase, stunden, ende_alle, mechaniker = (
+        phase[im_zeitraum], stunden[im_zeitraum], ende_alle[im_zeitraum], mechaniker[im_zeitraum]
+    )
+    monat = np.datetime_as_string(ende_alle.astype("datetime64[M]")).astype(object)
+
+    return {
+        **leer,
+        "phasen": [
+            {"phase": p, **_kennzahlen(stunden[phase == p])}
+            for p in PHASEN + [DURCHLAUF]
+            if (phase == p).any()
+        ],
+        "pro_mechaniker": _gruppiert(phase, mechaniker, stunden, "mechaniker"),
+        "pro_monat": _gruppiert(phase, monat, stunden, "monat"),
+    }
+
+
+def durchlaufzeiten_report(db: Session, monate: int = 12) -> Dict[str, Any]:
+    """Durchlaufzeiten der letzten `monate` Monate (gecacht pro Tag)"""
+    return cache.hole(CACHE_NAMENSRAUM, (date.today(), monate), lambda: _berechne(db, monate))
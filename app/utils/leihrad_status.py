@@ -0,0 +1,109 @@
+"""
+Leihrad-Status aus den Vermietungen ableiten
+Ein UPDATE ... FROM für alle Räder: verliehen, solange eine Vermietung läuft,
+sonst wieder verfügbar. wartung/defekt bleiben unangetastet.
+
+Läuft als periodischer Hintergrund-Job (LEIHRAD_STATUS_INTERVALL_MINUTEN) und auf
+Knopfdruck über POST /api/leihraeder/sync-status.
+"""
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, case, cast, exists, or_, select, update
+from sqlalchemy.orm import Session, aliased
+
+from app.database import SessionLocal
+from app.models.leihrad import Leihrad, LeihradStatus
+from app.models.vermietung import Vermietung
+
+logger = logging.getLogger(__name__)
+
+
+def laeuft(heute: date):
+    """
+    Vermietung belegt das Rad heute: aktiv (ausgegeben, auch überfällig) ab von_datum,
+    reserviert nur innerhalb von von_datum..bis_datum
+    """
+    return and_(
+        Vermietung.status.in_(("aktiv", "reserviert")),
+        Vermietung.von_datum <= heute,
+        or_(Vermietung.bis_datum >= heute, Vermietung.status == "aktiv"),
+    )
+
+
+def synchronisiere_status(
+    db: Session,
+    heute: Optional[date] = None,
+    rad_ids: Optional[List[int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Setzt verliehen/verfuegbar für alle Räder (oder nur rad_ids) in einem Statement
+
+    Auch nach Schreibzugriffen auf Vermietungen (ohne Commit), damit dort
+    dieselbe Regel gilt wie im Job.
+
+    Returns:
+        Geänderte Räder: [{"id", "inventarnummer", "von", "nach"}]
+    """
+    heute = heute or date.today()
+    rad = aliased(Leihrad)
+
+    ist = (
+        select(
+            rad.id.label("id"),
+            rad.status.label("alt"),
+            exists().where(Vermietung.leihrad_id == rad.id, laeuft(heute)).label("belegt"),
+        )
+        .where(rad.status.in_((LeihradStatus.verfuegbar, LeihradStatus.verliehen)))
+    )
+    if rad_ids is not None:
+        ist = ist.where(rad.id.in_(rad_ids))
+    ist = ist.subquery()
+    zeilen = db.execute(
+        update(Leihrad)
+        .where(
+            Leihrad.id == ist.c.id,
+            or_(
+                and_(ist.c.belegt, ist.c.alt == LeihradStatus.verfuegbar),
+                and_(~ist.c.belegt, ist.c.alt == LeihradStatus.verliehen),
+            ),
+        )
+        # CAST: CASE über zwei Literale wäre sonst text, Spalte ist ein Enum
+        .values(status=cast(
+            case((ist.c.belegt, LeihradStatus.verliehen.value), else_=LeihradStatus.verfuegbar.value),
+            Leihrad.status.type,
+        ))
+        .returning(Leihrad.id, Leihrad.inventarnummer, Leihrad.status)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    # Es gibt nur die beiden Wechsel - der alte Status ist jeweils der andere
+    return [
+        {
+            "id": rad_id,
+            "inventarnummer": nummer,
+            "von": LeihradStatus.verfuegbar if neu == LeihradStatus.verliehen else LeihradStatus.verliehen,
+            "nach": neu,
+        }
+        for rad_id, nummer, neu in sorted(zeilen, key=lambda z: z[1])
+    ]
+
+
+def leihrad_status_job() -> None:
+    """Periodischer Job: Leihrad-Status mit den Vermietungen abgleichen"""
+    db = SessionLocal()
+    try:
+        aenderungen = synchronisiere_status(db)
+        db.commit()
+        if aenderungen:
+            logger.info(
+                "Leihrad-Status: %d Räder angepasst (%s)",
+                len(aenderungen),
+                ", ".join(f"{a['inventarnummer']} → {a['nach'].value}" for a in aenderungen),
+            )
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,319 @@
+"""
+Wartung der Leihräder
+Setzt kontrollstatus (ok/faellig/ueberfaellig) für die ganze Flotte in einem
+UPDATE ... FROM und legt für fällige Räder Wartungsaufträge an (ein INSERT).
+
+Fällig ist ein Rad nach Datum oder nach Nutzung - was zuerst kommt:
+- Datum: naechste_wartung, sonst letzte_wartung (bzw. angeschafft_am) +
+  LEIHRAD_WARTUNG_ABSTAND_TAGE
+- Nutzung: Miettage seit der letzten Wartung (Einzel-Rad-Buchungen und
+  Rad-Zuweisungen, ohne Stornos, bis heute) ≥ LEIHRAD_WARTUNG_MIETTAGE
+ueberfaellig ab Erreichen, faellig LEIHRAD_WARTUNG_VORLAUF_TAGE (Miet-)Tage vorher.
+
+Räder mit fälliger Wartung bekommen keine Langmieten mehr (siehe verfuegbarkeit):
+bereits zugewiesene, noch nicht begonnene Langmieten werden auf andere Räder verteilt.
+Ist der Wartungsauftrag fertig, gilt das Rad wieder als gewartet (wartung_erledigt).
+
+Läuft als periodischer Hintergrund-Job (LEIHRAD_WARTUNG_INTERVALL_MINUTEN) und auf
+Knopfdruck über POST /api/leihraeder/wartung-pruefen.
+"""
+import logging
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, and_, case, cast, func, insert, or_, select, union_all, update
+from sqlalchemy.orm import Session, aliased
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.leihrad import Kontrollstatus, Leihrad, LeihradStatus
+from app.models.reparatur import Reparatur, ReparaturStatusWechsel
+from app.models.vermietung import Vermietung
+from app.models.vermietung_zuweisung import VermietungRadZuweisung
+from app.utils import radzuweisung
+from app.utils.verfuegbarkeit import einsatzbereit, ist_langmiete
+
+logger = logging.getLogger(__name__)
+
+# Aufträge in diesen Status sind erledigt - danach darf ein neuer angelegt werden
+ERLEDIGTE_STATUS = ("fertig", "abgeholt", "storniert")
+
+# Schlüssel für pg_advisory_xact_lock: Vergabe von Auftragsnummern (API und Job)
+AUFTRAGSNUMMER_LOCK = 0x41756674  # "Auft"
+
+
+def _miettage_seit_wartung(heute: date):
+    """Subquery: id, miettage = gemietete Tage seit der letzten Wartung bis heute"""
+    v = Vermietung
+    z = VermietungRadZuweisung
+    buchungen = union_all(
+        select(v.leihrad_id.label("leihrad_id"), v.von_datum.label("von"), v.bis_datum.label("bis"))
+        .where(v.leihrad_id.isnot(None), v.status != "storniert"),
+        select(z.leihrad_id, z.von_datum, z.bis_datum)
+        .join(v, v.id == z.vermietung_id)
+        .where(v.status != "storniert"),
+    ).subquery()
+    rad = aliased(Leihrad)
+    seit = cast(func.coalesce(rad.letzte_wartung, rad.angeschafft_am), Date)
+    beginn = case((buchungen.c.von < seit, seit), else_=buchungen.c.von)
+    ende = case((buchungen.c.bis > heute, heute), else_=buchungen.c.bis)
+    return (
+        select(rad.id.label("id"), func.sum(ende - beginn + 1).label("miettage"))
+        .join(buchungen, buchungen.c.leihrad_id == rad.id)
+        .where(buchungen.c.von <= heute, buchungen.c.bis >= seit)
+        .group_by(rad.id)
+        .subquery()
+    )
+
+
+def _faellig(rad, miettage, heute: date, vorlauf: int):
+    """Bedingung: Wartung spätestens vorlauf Tage nach heute fällig (Datum oder Miettage)"""
+    grenze = datetime.combine(heute, time.min) + timedelta(days=vorlauf)
+    basis = func.coalesce(rad.letzte_wartung, rad.angeschafft_am)
+    bedingungen = [
+        rad.naechste_wartung < grenze,
+        and_(
+            rad.naechste_wartung.is_(None),
+            basis < grenze - timedelta(days=settings.LEIHRAD_WARTUNG_ABSTAND_TAGE),
+        ),
+    ]
+    if settings.LEIHRAD_WARTUNG_MIETTAGE > 0:
+        bedingungen.append(miettage >= settings.LEIHRAD_WARTUNG_MIETTAGE - vorlauf)
+    return or_(*bedingungen)
+
+
+def setze_kontrollstatus(
+    db: Session,
+    heute: Optional[date] = None,
+    rad_ids: Optional[List[int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Berechnet kontrollstatus für alle Räder (oder nur rad_ids) in einem Statement
+
+    Returns:
+        Geänderte Räder: [{"id", "inventarnummer", "kontrollstatus"}]
+    """
+    heute = heute or date.today()
+    rad = aliased(Leihrad)
+    miettage_sub = _miettage_seit_wartung(heute)
+    miettage = func.coalesce(miettage_sub.c.miettage, 0)
+
+    soll = (
+        select(
+            rad.id.label("id"),
+            # CAST: CASE über Literale wäre sonst text, Spalte ist ein Enum
+            cast(
+                case(
+                    (_faellig(rad, miettage, heute, 0), Kontrollstatus.ueberfaellig.value),
+                    (_faellig(rad, miettage, heute, settings.LEIHRAD_WARTUNG_VORLAUF_TAGE), Kontrollstatus.faellig.value),
+                    else_=Kontrollstatus.ok.value,
+                ),
+                Leihrad.kontrollstatus.type,
+            ).label("neu"),
+        )
+        .outerjoin(miettage_sub, miettage_sub.c.id == rad.id)
+    )
+    if rad_ids is not None:
+        soll = soll.where(rad.id.in_(rad_ids))
+    soll = soll.subquery()
+
+    zeilen = db.execute(
+        update(Leihrad)
+        .where(Leihrad.id == soll.c.id, Leihrad.kontrollstatus.is_distinct_from(soll.c.neu))
+        .values(kontrollstatus=soll.c.neu)
+        .returning(Leihrad.id, Leihrad.inventarnummer, Leihrad.kontrollstatus)
+        .execution_options(synchronize_session=False)
+    ).all()
+    return [
+        {"id": rad_id, "inventarnummer": nummer, "kontrollstatus": status}
+        for rad_id, nummer, status in sorted(zeilen, key=lambda z: z[1])
+    ]
+
+
+def sperre_auftragsnummern(db: Session) -> None:
+    """
+    Auftragsnummern bis zum Ende der Transaktion exklusiv vergeben
+
+    "Höchste Nummer + 1" ist sonst ein Race zwischen Job und API (gleiche Nummer,
+    Unique-Verletzung beim Commit). Wer danach sperrt, wartet auf den Commit
+    und sieht die neue Nummer.
+    """
+    db.execute(select(func.pg_advisory_xact_lock(AUFTRAGSNUMMER_LOCK)))
+
+
+def naechste_auftragsnummern(db: Session, anzahl: int) -> List[str]:
+    """
+    Die nächsten `anzahl` Auftragsnummern (höchste Nummer + 1, wie beim Anlegen per API)
+
+    Sperrt die Vergabe bis zum Commit (sperre_auftragsnummern).
+    """
+    sperre_auftragsnummern(db)
+    last = db.query(Reparatur.auftragsnummer).order_by(Reparatur.auftragsnummer.desc()).first()
+    if not last:
+        start = 1
+    else:
+        try:
+            start = int(last.auftragsnummer) + 1
+        except ValueError:
+            start = db.query(Reparatur).count() + 1
+    return [str(nr) for nr in range(start, start + anzahl)]
+
+
+def faellig_am(rad: Leihrad) -> Optional[datetime]:
+    """Fälligkeit nach Datum (ohne Miettage)"""
+    if rad.naechste_wartung is not None:
+        return rad.naechste_wartung
+    basis = rad.letzte_wartung or rad.angeschafft_am
+    return basis + timedelta(days=settings.LEIHRAD_WARTUNG_ABSTAND_TAGE) if basis else None
+
+
+def erstelle_wartungsauftraege(db: Session) -> List[Dict[str, Any]]:
+    """
+    Wartungsauftrag für jedes Rad mit fälliger Wartung ohne offenen Auftrag (ein INSERT)
+
+    Returns:
+        Neue Aufträge: [{"id", "auftragsnummer", "leihrad_id", "inventarnummer"}]
+    """
+    offen = (
+        select(Reparatur.id)
+        .where(Reparatur.leihrad_id == Leihrad.id, Reparatur.status.not_in(ERLEDIGTE_STATUS))
+        .exists()
+    )
+    raeder = (
+        db.query(Leihrad)
+        .filter(~einsatzbereit(), ~offen)
+        .order_by(Leihrad.inventarnummer)
+        .populate_existing()  # kontrollstatus kommt aus dem UPDATE ohne Session-Abgleich
+        .all()
+    )
+    if not raeder:
+        return []
+
+    jetzt = datetime.now()
+    nummern = naechste_auftragsnummern(db, len(raeder))
+    zeilen = []
+    for nummer, rad in zip(nummern, raeder):
+        ueberfaellig = rad.kontrollstatus == Kontrollstatus.ueberfaellig
+        letzte = f"{rad.letzte_wartung:%d.%m.%Y}" if rad.letzte_wartung else "keine"
+        zeilen.append({
+            "auftragsnummer": nummer,
+            "leihrad_id": rad.id,
+            "fahrradmarke": rad.marke,
+            "fahrradmodell": rad.modell,
+            "rahmennummer": rad.rahmennummer,
+            "fahrrad_anwesend": rad.status != LeihradStatus.verliehen,
+            "kunde_name_legacy": "Leihrad-Flotte",
+            "maengelbeschreibung": (
+                f"Wartung Leihrad {rad.inventarnummer} "
+                f"({'überfällig' if ueberfaellig else 'fällig'}, letzte Wartung: {letzte})"
+            ),
+            "status": "angenommen",
+            "prioritaet": 2 if ueberfaellig else 3,
+            "reparaturdatum": jetzt,
+            "fertig_bis": faellig_am(rad),
+            "endbetrag": Decimal("0.0"),
+            "notizen": "Automatisch angelegt (Wartungsprüfung)",
+        })
+    neu = db.execute(
+        insert(Reparatur).returning(Reparatur.id, Reparatur.auftragsnummer, Reparatur.leihrad_id),
+        zeilen,
+    ).all()
+    db.execute(insert(ReparaturStatusWechsel), [
+        {"reparatur_id": rep_id, "von_status": None, "nach_status": "angenommen", "zeitpunkt": jetzt}
+        for rep_id, _, _ in neu
+    ])
+    inventar = {rad.id: rad.inventarnummer for rad in raeder}
+    return [
+        {"id": rep_id, "auftragsnummer": nummer, "leihrad_id": rad_id, "inventarnummer": inventar[rad_id]}
+        for rep_id, nummer, rad_id in sorted(neu, key=lambda z: inventar[z[2]])
+    ]
+
+
+def verlege_langmieten(db: Session, rad_ids: List[int], heute: Optional[date] = None) -> int:
+    """
+    Noch nicht begonnene Langmieten von Rädern mit fälliger Wartung auf andere Räder verteilen
+
+    Returns:
+        Anzahl verlegter Einheiten
+    """
+    if not rad_ids:
+        return 0
+    heute = heute or date.today()
+    z = VermietungRadZuweisung
+    zeilen = [
+        zeile
+        for zeile in db.query(z.id, z.rad_typ, z.von_datum, z.bis_datum)
+        .join(Vermietung, Vermietung.id == z.vermietung_id)
+        .filter(z.leihrad_id.in_(rad_ids), Vermietung.status == "reserviert", z.von_datum > heute)
+        if ist_langmiete(zeile.von_datum, zeile.bis_datum)
+    ]
+    if not zeilen:
+        return 0
+    db.query(z).filter(z.id.in_([zeile.id for zeile in zeilen])).delete(synchronize_session=False)
+
+    fenster: Dict[str, Tuple[date, date]] = {}
+    for _, typ, a, b in zeilen:
+        alt = fenster.get(typ, (a, b))
+        fenster[typ] = (min(alt[0], a), max(alt[1], b))
+    radzuweisung.verteile_neu(db, fenster)
+    return len(zeilen)
+
+
+def pruefe_wartung(
+    db: Session,
+    heute: Optional[date] = None,
+    rad_ids: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """
+    kontrollstatus neu berechnen, Langmieten fälliger Räder verlegen, Wartungsaufträge anlegen
+    (ohne Commit)
+
+    Returns:
+        {"aenderungen", "verlegt", "auftraege"}
+    """
+    heute = heute or date.today()
+    aenderungen = setze_kontrollstatus(db, heute, rad_ids)
+    neu_faellig = [a["id"] for a in aenderungen if a["kontrollstatus"] != Kontrollstatus.ok]
+    return {
+        "aenderungen": aenderungen,
+        "verlegt": verlege_langmieten(db, neu_faellig, heute),
+        "auftraege": erstelle_wartungsauftraege(db),
+    }
+
+
+def wartung_erledigt(db: Session, reparatur: Reparatur, zeitpunkt: datetime) -> None:
+    """Wartungsauftrag fertig: Rad gilt ab zeitpunkt als gewartet (ohne Commit)"""
+    rad = db.get(Leihrad, reparatur.leihrad_id) if reparatur.leihrad_id else None
+    if rad is None:
+        return
+    rad.letzte_wartung = zeitpunkt
+    rad.naechste_wartung = zeitpunkt + timedelta(days=settings.LEIHRAD_WARTUNG_ABSTAND_TAGE)
+    rad.kontrollstatus = Kontrollstatus.ok
+
+
+def leihrad_wartung_job() -> None:
+    """Periodischer Job: kontrollstatus der Flotte prüfen, Wartungsaufträge anlegen"""
+    db = SessionLocal()
+    try:
+        ergebnis = pruefe_wartung(db)
+        db.commit()
+        if ergebnis["aenderungen"]:
+            logger.info(
+                "Leihrad-Wartung: %d Räder geändert (%s)",
+                len(ergebnis["aenderungen"]),
+                ", ".join(f"{a['inventarnummer']} → {a['kontrollstatus'].value}" for a in ergebnis["aenderungen"]),
+            )
+        if ergebnis["verlegt"]:
+            logger.info("Leihrad-Wartung: %d Langmieten auf andere Räder verlegt", ergebnis["verlegt"])
+        if ergebnis["auftraege"]:
+            logger.info(
+                "Leihrad-Wartung: %d Wartungsaufträge angelegt (%s)",
+                len(ergebnis["auftraege"]),
+                ", ".join(f"{a['auftragsnummer']}: {a['inventarnummer']}" for a in ergebnis["auftraege"]),
+            )
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
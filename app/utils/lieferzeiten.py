@@ -0,0 +1,101 @@
+"""
+Lieferzeiten-Auswertung pro Lieferant
+Aus Bestellung.bestellt_am / geliefert_am und den Wareneingängen der Positionen
+"""
+from typing import Any, Dict
+
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.bestellung import Bestellung, BestellPosition
+from app.models.lieferant import Lieferant
+from app.utils import cache
+
+CACHE_NAMENSRAUM = "lieferzeiten"
+
+
+def _lieferzeiten_query():
+    """
+    Eine gruppierte Query: erst pro Bestellung, dann pro Lieferant mit Perzentilen
+
+    - Lieferzeit: bestellt_am → geliefert_am (nur vollständig gelieferte Bestellungen)
+    - Erfüllungsquote: gelieferte / bestellte Menge
+    - Teillieferung: mehrere Liefertage oder Positionen nur teilweise geliefert
+    """
+    lieferzeit = func.extract("epoch", Bestellung.geliefert_am - Bestellung.bestellt_am) / 86400.0
+
+    pro_bestellung = (
+        select(
+            Bestellung.id.label("bestellung_id"),
+            Bestellung.lieferant_id.label("lieferant_id"),
+            lieferzeit.label("lieferzeit_tage"),
+            func.sum(BestellPosition.menge_bestellt).label("bestellt"),
+            func.sum(BestellPosition.menge_geliefert).label("geliefert"),
+            func.count(func.distinct(func.date(BestellPosition.zuletzt_geliefert_am))).label("liefertage"),
+            func.count(BestellPosition.id).filter(
+                BestellPosition.menge_geliefert > 0,
+                BestellPosition.menge_geliefert < BestellPosition.menge_bestellt,
+            ).label("teilweise_positionen"),
+        )
+        .join(BestellPosition, BestellPosition.bestellung_id == Bestellung.id)
+        .where(Bestellung.bestellt_am.isnot(None))
+        .group_by(Bestellung.id)
+        .subquery("pro_bestellung")
+    )
+
+    ist_teillieferung = or_(pro_bestellung.c.liefertage > 1, pro_bestellung.c.teilweise_positionen > 0)
+
+    return (
+        select(
+            pro_bestellung.c.lieferant_id,
+            Lieferant.name.label("lieferant_name"),
+            func.count().label("anzahl_bestellungen"),
+            func.count(pro_bestellung.c.lieferzeit_tage).label("anzahl_geliefert"),
+            func.avg(pro_bestellung.c.lieferzeit_tage).label("lieferzeit_mittel_tage"),
+            func.percentile_cont(0.5).within_group(pro_bestellung.c.lieferzeit_tage).label("lieferzeit_p50_tage"),
+            func.percentile_cont(0.9).within_group(pro_bestellung.c.lieferzeit_tage).label("lieferzeit_p90_tage"),
+            (
+                func.sum(pro_bestellung.c.geliefert) * 1.0
+                / func.nullif(func.sum(pro_bestellung.c.bestellt), 0)
+            ).label("erfuellungsquote"),
+            func.avg(case((ist_teillieferung, 1.0), else_=0.0)).label("teillieferung_quote"),
+        )
+        .join(Lieferant, Lieferant.id == pro_bestellung.c.lieferant_id)
+        .group_by(pro_bestellung.c.lieferant_id, Lieferant.name)
+        .order_by(Lieferant.name)
+    )
+
+
+def _runde(wert, stellen: int = 2):
+    return round(float(wert), stellen) if wert is not None else None
+
+
+def _berechne_report(db: Session) -> Dict[int, Dict[str, Any]]:
+    report = {}
+    for row in db.execute(_lieferzeiten_query()).mappings():
+        report[row["lieferant_id"]] = {
+            "lieferant_id": row["lieferant_id"],
+            "lieferant_name": row["lieferant_name"],
+            "anzahl_bestellungen": row["anzahl_bestellungen"],
+            "anzahl_geliefert": row["anzahl_geliefert"],
+            "lieferzeit_mittel_tage": _runde(row["lieferzeit_mittel_tage"], 1),
+            "lieferzeit_p50_tage": _runde(row["lieferzeit_p50_tage"], 1),
+            "lieferzeit_p90_tage": _runde(row["lieferzeit_p90_tage"], 1),
+            "erfuellungsquote": _runde(row["erfuellungsquote"], 3),
+            "teillieferung_quote": _runde(row["teillieferung_quote"], 3),
+        }
+    return report
+
+
+def lieferzeiten_report(db: Session) -> Dict[int, Dict[str, Any]]:
+    """
+    Lieferzeiten aller Lieferanten (lieferant_id → Kennzahlen)
+
+    Gecacht bis zum nächsten Wareneingang bzw. Statuswechsel einer Bestellung
+    """
+    return cache.hole(CACHE_NAMENSRAUM, "report", lambda: _berechne_report(db))
+
+
+def invalidiere_lieferzeiten() -> None:
+    """Nach Wareneingang / Statusänderung aufrufen"""
+    cache.invalidiere(CACHE_NAMENSRAUM)
@@ -0,0 +1,274 @@
+"""
+Nachbestellung - Automatische Bestellvorschläge
+Ermittelt Artikel/Varianten unter Mindestbestand und erstellt Bestellentwürfe pro Lieferant
+"""
+import logging
+import math
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from sqlalchemy import func, insert, literal, null, select, union_all
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.artikel import Artikel, ArtikelTyp
+from app.models.artikel_lieferant import ArtikelLieferant
+from app.models.artikel_variante import ArtikelVariante
+from app.models.bestellung import Bestellung, BestellPosition
+from app.models.lieferant import Lieferant
+from app.utils.teilereservierung import verfuegbarer_bestand
+
+logger = logging.getLogger(__name__)
+
+# Bestellungen in diesen Status zählen als "unterwegs" (noch nicht eingebucht)
+OFFENE_BESTELL_STATUS = ("offen", "bestellt", "teilweise_geliefert")
+
+
+def naechste_bestellnummern(db: Session, anzahl: int) -> List[str]:
+    """Generiert die nächsten `anzahl` Bestellnummern (BES-00001, BES-00002, ...)"""
+    last = db.query(Bestellung).order_by(Bestellung.id.desc()).first()
+    if not last:
+        start = 1
+    else:
+        try:
+            start = int(last.bestellnummer.split("-")[1]) + 1
+        except (IndexError, ValueError):
+            # Fallback
+            start = db.query(Bestellung).count() + 1
+    return [f"BES-{nr:05d}" for nr in range(start, start + anzahl)]
+
+
+def bevorzugter_lieferant_subquery():
+    """
+    Lieferanten pro Artikel mit Rang (rang == 1: bevorzugt, sonst günstigster aktiver Lieferant)
+    """
+    return (
+        select(
+            ArtikelLieferant.artikel_id,
+            ArtikelLieferant.lieferant_id,
+            ArtikelLieferant.lieferanten_artikelnummer,
+            ArtikelLieferant.einkaufspreis,
+            ArtikelLieferant.lieferzeit_tage,
+            func.row_number().over(
+                partition_by=ArtikelLieferant.artikel_id,
+                order_by=(
+                    ArtikelLieferant.bevorzugt.desc().nulls_last(),
+                    ArtikelLieferant.einkaufspreis.asc().nulls_last(),
+                    ArtikelLieferant.id,
+                ),
+            ).label("rang"),
+        )
+        .join(Lieferant, Lieferant.id == ArtikelLieferant.lieferant_id)
+        .where(Lieferant.aktiv == True)
+        .subquery("lieferant_rang")
+    )
+
+
+def _bedarf_query():
+    """
+    Eine Query über Artikel UND Varianten unter Mindestbestand
+
+    - Offene Mengen aus laufenden Bestellungen werden abgezogen
+    - Lieferant: bevorzugter (sonst günstigster) aktiver Lieferant des Artikels
+    """
+    unterwegs = (
+        select(
+            BestellPosition.artikel_id,
+            BestellPosition.variante_id,
+            func.sum(BestellPosition.menge_bestellt - BestellPosition.menge_geliefert).label("menge"),
+        )
+        .join(Bestellung, Bestellung.id == BestellPosition.bestellung_id)
+        .where(
+            Bestellung.status.in_(OFFENE_BESTELL_STATUS),
+            BestellPosition.artikel_id.isnot(None),
+        )
+        .group_by(BestellPosition.artikel_id, BestellPosition.variante_id)
+        .subquery("unterwegs")
+    )
+
+    lieferant_rang = bevorzugter_lieferant_subquery()
+
+    # Artikel ohne Varianten
+    # Für offene Reparaturen reservierte Teile sind nicht mehr verfügbar
+    artikel_bestand = verfuegbarer_bestand()
+    artikel_unterwegs = func.coalesce(unterwegs.c.menge, 0)
+    artikel_sel = (
+        select(
+            Artikel.id.label("artikel_id"),
+            null().label("variante_id"),
+            func.coalesce(lieferant_rang.c.lieferanten_artikelnummer, Artikel.artikelnummer).label("artikelnummer"),
+            Artikel.bezeichnung.label("beschreibung"),
+            null().label("etrto"),
+            null().label("zoll_info"),
+            artikel_bestand.label("bestand"),
+            Artikel.mindestbestand.label("mindestbestand"),
+            artikel_unterwegs.label("unterwegs"),
+            lieferant_rang.c.lieferant_id,
+            func.coalesce(lieferant_rang.c.einkaufspreis, Artikel.einkaufspreis, 0).label("einkaufspreis"),
+            func.coalesce(Artikel.verkaufspreis, 0).label("verkaufspreis"),
+        )
+        .outerjoin(
+            unterwegs,
+            (unterwegs.c.artikel_id == Artikel.id) & unterwegs.c.variante_id.is_(None),
+        )
+        .outerjoin(
+            lieferant_rang,
+            (lieferant_rang.c.artikel_id == Artikel.id) & (lieferant_rang.c.rang == 1),
+        )
+        .where(
+            Artikel.aktiv == True,
+            Artikel.typ == ArtikelTyp.material,
+            Artikel.hat_varianten == False,
+            Artikel.mindestbestand > 0,
+            artikel_bestand + artikel_unterwegs <= Artikel.mindestbestand,
+        )
+    )
+
+    # Varianten (Reservierungen gibt es nur auf Artikel-Ebene)
+    varianten_bestand = ArtikelVariante.bestand_lager + ArtikelVariante.bestand_werkstatt
+    varianten_unterwegs = func.coalesce(unterwegs.c.menge, 0)
+    varianten_sel = (
+        select(
+            ArtikelVariante.artikel_id.label("artikel_id"),
+            ArtikelVariante.id.label("variante_id"),
+            ArtikelVariante.artikelnummer.label("artikelnummer"),
+            (
+                Artikel.bezeichnung
+                + func.coalesce(literal(" ") + ArtikelVariante.spezifikation, literal(""))
+            ).label("beschreibung"),
+            ArtikelVariante.etrto.label("etrto"),
+            ArtikelVariante.zoll_info.label("zoll_info"),
+            varianten_bestand.label("bestand"),
+            ArtikelVariante.mindestbestand.label("mindestbestand"),
+            varianten_unterwegs.label("unterwegs"),
+            lieferant_rang.c.lieferant_id,
+            func.coalesce(ArtikelVariante.preis_ek_rabattiert, ArtikelVariante.preis_ek).label("einkaufspreis"),
+            ArtikelVariante.preis_uvp.label("verkaufspreis"),
+        )
+        .join(Artikel, Artikel.id == ArtikelVariante.artikel_id)
+        .outerjoin(unterwegs, unterwegs.c.variante_id == ArtikelVariante.id)
+        .outerjoin(
+            lieferant_rang,
+            (lieferant_rang.c.artikel_id == ArtikelVariante.artikel_id) & (lieferant_rang.c.rang == 1),
+        )
+        .where(
+            Artikel.aktiv == True,
+            ArtikelVariante.aktiv == True,
+            ArtikelVariante.mindestbestand > 0,
+            varianten_bestand + varianten_unterwegs <= ArtikelVariante.mindestbestand,
+        )
+    )
+
+    bedarf = union_all(artikel_sel, varianten_sel).subquery("bedarf")
+    return select(bedarf).order_by(bedarf.c.lieferant_id, bedarf.c.artikelnummer)
+
+
+def ermittle_nachbestellbedarf(db: Session) -> List[Dict[str, Any]]:
+    """
+    Nachbestellbedarf für den gesamten Katalog (eine Query)
+
+    Bestellmenge = Mindestbestand × NACHBESTELLUNG_ZIELFAKTOR - (Bestand + unterwegs), mindestens 1
+
+    Returns:
+        Liste von Vorschlägen (Dicts), sortiert nach Lieferant
+    """
+    vorschlaege = []
+    for row in db.execute(_bedarf_query()).mappings():
+        zielbestand = math.ceil(row["mindestbestand"] * settings.NACHBESTELLUNG_ZIELFAKTOR)
+        menge = max(1, zielbestand - row["bestand"] - int(row["unterwegs"]))
+        vorschlag = dict(row)
+        vorschlag["unterwegs"] = int(row["unterwegs"])
+        vorschlag["menge"] = menge
+        vorschlaege.append(vorschlag)
+    return vorschlaege
+
+
+def erstelle_bestellentwuerfe(
+    db: Session,
+    vorschlaege: List[Dict[str, Any]],
+    erstellt_von: str = "Nachbestellung",
+) -> List[Bestellung]:
+    """
+    Erstellt pro Lieferant eine Bestellung (Status "offen") mit allen Positionen
+
+    - Vorschläge ohne Lieferant werden übersprungen
+    - Positionen werden per Bulk-Insert angelegt
+    - Kein Commit (macht der Aufrufer)
+    """
+    pro_lieferant = defaultdict(list)
+    for vorschlag in vorschlaege:
+        if vorschlag["lieferant_id"] is not None:
+            pro_lieferant[vorschlag["lieferant_id"]].append(vorschlag)
+
+    if not pro_lieferant:
+        return []
+
+    nummern = naechste_bestellnummern(db, len(pro_lieferant))
+    bestellungen = []
+    positionen = []
+
+    for bestellnummer, (lieferant_id, eintraege) in zip(nummern, pro_lieferant.items()):
+        zeilen = []
+        for v in eintraege:
+            einkaufspreis = Decimal(v["einkaufspreis"] or 0)
+            verkaufspreis = Decimal(v["verkaufspreis"] or 0)
+            zeilen.append({
+                "artikel_id": v["artikel_id"],
+                "variante_id": v["variante_id"],
+                "artikelnummer": v["artikelnummer"],
+                "beschreibung": v["beschreibung"],
+                "etrto": v["etrto"],
+                "zoll_info": v["zoll_info"],
+                "menge_bestellt": v["menge"],
+                "menge_geliefert": 0,
+                "einkaufspreis": einkaufspreis,
+                "verkaufspreis": verkaufspreis,
+                "summe_ek": v["menge"] * einkaufspreis,
+                "summe_vk": v["menge"] * verkaufspreis,
+                "vollstaendig_geliefert": False,
+            })
+
+        bestellung = Bestellung(
+            bestellnummer=bestellnummer,
+            lieferant_id=lieferant_id,
+            status="offen",
+            notizen="Automatischer Nachbestellvorschlag",
+            erstellt_von=erstellt_von,
+            gesamtsumme_ek=sum((z["summe_ek"] for z in zeilen), Decimal(0)),
+            gesamtsumme_vk=sum((z["summe_vk"] for z in zeilen), Decimal(0)),
+        )
+        db.add(bestellung)
+        bestellungen.append((bestellung, zeilen))
+
+    db.flush()  # IDs für alle Bestellungen auf einmal
+
+    for bestellung, zeilen in bestellungen:
+        for zeile in zeilen:
+            zeile["bestellung_id"] = bestellung.id
+            positionen.append(zeile)
+
+    db.execute(insert(BestellPosition), positionen)
+
+    return [bestellung for bestellung, _ in bestellungen]
+
+
+def nachbestellung_job() -> None:
+    """Periodischer Job: Bestellentwürfe mit eigener Session erstellen"""
+    db = SessionLocal()
+    try:
+        vorschlaege = ermittle_nachbestellbedarf(db)
+        bestellungen = erstelle_bestellentwuerfe(db, vorschlaege)
+        db.commit()
+        if bestellungen:
+            logger.info(
+                "Nachbestellung: %d Bestellentwürfe mit %d Positionen erstellt",
+                len(bestellungen),
+                sum(1 for v in vorschlaege if v["lieferant_id"] is not None),
+            )
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -8,9 +8,10 @@ from reportlab.lib.units import mm
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from io import BytesIO
+from types import SimpleNamespace
 from typing import List
 
 
@@ -73,6 +74,9 @@ def generate_bestellung_pdf(bestellung, output_path: str = None) -> bytes:
         textColor=colors.HexColor('#666666'),
     )
     
+    # Druckdatum: Teil von bestellung_daten (Cache-Schlüssel), sonst heute
+    druckdatum = getattr(bestellung, "druckdatum", None) or date.today()
+    
     # Story (Content)
     story = []
     
@@ -89,7 +93,7 @@ def generate_bestellung_pdf(bestellung, output_path: str = None) -> bytes:
     # Bestellinfo (Links)
     bestellinfo_data = [
         ["Bestellnummer:", bestellung.bestellnummer],
-        ["Datum:", datetime.now().strftime("%d.%m.%Y")],
+        ["Datum:", druckdatum.strftime("%d.%m.%Y")],
         ["Status:", bestellung.status.upper()],
     ]
     
@@ -237,7 +241,7 @@ def generate_bestellung_pdf(bestellung, output_path: str = None) -> bytes:
     
     footer_text = f"""
     <font size=8 color="#666666">
-    Erstellt am: {datetime.now().strftime("%d.%m.%Y %H:%M")} Uhr<br/>
+    Erstellt am: {druckdatum.strftime("%d.%m.%Y")}<br/>
     Anzahl Positionen: {len(bestellung.positionen)}<br/>
     System: Fahrradwerkstatt Dashboard v2.0
     </font>
@@ -261,6 +265,44 @@ def generate_bestellung_pdf(bestellung, output_path: str = None) -> bytes:
     return None
 
 
+def bestellung_daten(bestellung) -> SimpleNamespace:
+    """
+    Alle Felder, die im Bestell-PDF landen, als einfaches Objekt
+    
+    Picklebar (für den Render-Prozess) und Grundlage für den Cache-Schlüssel.
+    Erwartet geladene .lieferant und .positionen. Das Druckdatum gehört dazu,
+    damit ein gecachtes PDF höchstens einen Tag lang ausgeliefert wird.
+    """
+    lieferant = bestellung.lieferant
+    return SimpleNamespace(
+        id=bestellung.id,
+        druckdatum=date.today(),
+        bestellnummer=bestellung.bestellnummer,
+        status=bestellung.status,
+        bestellt_am=bestellung.bestellt_am,
+        notizen=bestellung.notizen,
+        gesamtsumme_ek=bestellung.gesamtsumme_ek,
+        lieferant=SimpleNamespace(
+            name=lieferant.name,
+            kontakt_person=lieferant.kontakt_person,
+            telefon=lieferant.telefon,
+            email=lieferant.email,
+        ),
+        positionen=[
+            SimpleNamespace(
+                artikelnummer=pos.artikelnummer,
+                beschreibung=pos.beschreibung,
+                etrto=pos.etrto,
+                zoll_info=pos.zoll_info,
+                menge_bestellt=pos.menge_bestellt,
+                einkaufspreis=pos.einkaufspreis,
+                summe_ek=pos.summe_ek,
+            )
+            for pos in sorted(bestellung.positionen, key=lambda p: p.id)
+        ],
+    )
+
+
 def generate_bestellung_pdf_response(bestellung):
     """
     Generiert PDF als FastAPI Response
@@ -2,16 +2,23 @@
 PDF Generator für Auftragszettel
 Erstellt 2 identische Zettel auf einer A4-Seite (Querformat)
 """
+import logging
+from functools import lru_cache
 from io import BytesIO
+from types import SimpleNamespace
+from typing import Optional, Tuple
+from pypdf import PdfReader
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
 from reportlab.lib.colors import black, grey
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from app.models.reparatur import Reparatur
 
+logger = logging.getLogger(__name__)
+
 
 def generate_auftragszettel_pdf(reparatur_id: int, db: Session) -> BytesIO:
     """
@@ -33,140 +40,321 @@ def generate_auftragszettel_pdf(reparatur_id: int, db: Session) -> BytesIO:
     Raises:
         ValueError: Wenn Reparatur nicht gefunden
     """
-    
-    # 1. Reparatur-Daten laden
-    rep = db.query(Reparatur).filter(Reparatur.id == reparatur_id).first()
+    rep = lade_reparatur_fuer_druck(reparatur_id, db)
     if not rep:
         raise ValueError(f"Reparatur mit ID {reparatur_id} nicht gefunden")
     
-    # 2. Kunde-Daten holen (DB oder Legacy)
-    kunde_name = get_kunde_display_name(rep)
-    kunde_telefon = get_kunde_telefon(rep)
+    return BytesIO(render_auftragszettel(auftragszettel_daten(rep)))
+
+
+def lade_reparatur_fuer_druck(reparatur_id: int, db: Session):
+    """Reparatur inkl. Kunde mit einer Query laden (None wenn nicht gefunden)"""
+    return db.query(Reparatur).options(
+        joinedload(Reparatur.kunde)
+    ).filter(Reparatur.id == reparatur_id).first()
+
+
+def auftragszettel_daten(rep) -> SimpleNamespace:
+    """
+    Alle Felder, die auf dem Auftragszettel landen, als einfaches Objekt
+    
+    Picklebar (für den Render-Prozess) und Grundlage für den Cache-Schlüssel.
+    """
+    return SimpleNamespace(
+        id=rep.id,
+        auftragsnummer=rep.auftragsnummer,
+        reparaturdatum=rep.reparaturdatum,
+        schluesselnummer=rep.schluesselnummer,
+        fahrrad_anwesend=rep.fahrrad_anwesend,
+        bezahlt=rep.bezahlt,
+        maengelbeschreibung=rep.maengelbeschreibung,
+        status=rep.status,
+        fahrradmarke=rep.fahrradmarke,
+        fahrradmodell=rep.fahrradmodell,
+        abholtermin=rep.abholtermin,
+        kunde_name=get_kunde_display_name(rep),
+        kunde_telefon=get_kunde_telefon(rep),
+    )
+
+
+# Statisches Layout (Überschrift, Beschriftungen, Checkbox-Rahmen, Trennlinie, Rückseite)
+# wird pro Prozess einmal gerendert und als PDF-Operatoren gehalten; pro Auftrag werden
+# nur die Werte gezeichnet und die Vorlage davor eingefügt. Die Felder unter der
+# Mängelbeschreibung rutschen mit deren Zeilenzahl nach oben → eine Vorlage pro
+# Zeilenzahl (1-5).
+
+# Spalte für die Werte (rechts neben den Beschriftungen)
+WERT_X = 42*mm
+
+# Linker und rechter Zettel
+X_OFFSETS = (15*mm, landscape(A4)[0]/2 + 5*mm)
+
+# Mängelbeschreibung: max. 4 Zeilen + "siehe Details"
+MAENGEL_MAX_ZEILEN = 4
+
+# Beschriftungen links (Zeile → Text)
+BESCHRIFTUNGEN = [
+    ("auftragsnummer", "Auftragsnummer:"),
+    ("reparaturdatum", "Reparaturdatum:"),
+    ("schluesselnummer", "Schlüsselnr:"),
+    ("maengel_label", "Mängelbeschreibung:"),
+    ("status", "Status:"),
+    ("fahrradmarke", "Fahrradmarke:"),
+    ("kunde", "Kunde:"),
+    ("abholtermin", "Abholtermin:"),
+    ("telefon", "Telefon:"),
+]
+
+# Alle Fonts des Zettels (Vorlage und Werte), siehe _neuer_canvas
+VORLAGE_FONTS = ("Helvetica", "Helvetica-Bold")
+
+
+def _maengel_text(rep) -> str:
+    return rep.maengelbeschreibung or "Keine Angabe"
+
+
+def _maengel_zeilen(text: str) -> int:
+    """Zeilen, die draw_text_block für den Text belegt"""
+    zeilen = len(text.split("\n"))
+    return min(zeilen, MAENGEL_MAX_ZEILEN) + (1 if zeilen > MAENGEL_MAX_ZEILEN else 0)
+
+
+def _zeilen_y(maengel_zeilen: int) -> dict:
+    """Y-Positionen aller Zeilen eines Zettels (gemeinsam für Vorlage und Werte)"""
+    line_height = 6*mm
+    y = {"header": 185*mm}
+    y["auftragsnummer"] = y["header"] - 12*mm
+    y["reparaturdatum"] = y["auftragsnummer"] - line_height
+    y["schluesselnummer"] = y["reparaturdatum"] - line_height
+    y["checkboxen"] = y["schluesselnummer"] - line_height * 1.8
+    y["maengel_label"] = y["checkboxen"] - line_height * 2.2
+    y["maengel_text"] = y["maengel_label"] - 5*mm
+    y["status"] = y["maengel_text"] - (maengel_zeilen * 5*mm + 3*mm)
+    y["fahrradmarke"] = y["status"] - line_height
+    y["kunde"] = y["fahrradmarke"] - line_height
+    y["abholtermin"] = y["kunde"] - line_height
+    y["telefon"] = y["abholtermin"] - line_height
+    return y
+
+
+def render_auftragszettel(daten: SimpleNamespace, vorlage: bool = True) -> bytes:
+    """
+    Rendert den Auftragszettel aus auftragszettel_daten() (ohne DB-Zugriff)
+    
+    Läuft im PDF-Prozesspool (siehe pdf_service).
+    
+    Args:
+        daten: Snapshot aus auftragszettel_daten()
+        vorlage: Werte auf die vorgerenderte Vorlage stempeln
+            (False = alles direkt zeichnen, nur für Benchmark/Vergleich)
+    """
+    zeilen = _maengel_zeilen(_maengel_text(daten))
+    seiten = _vorlage(zeilen) if vorlage else None
+    if seiten is None:
+        return _render_direkt(daten)
+    vorderseite, rueckseite = seiten
+    y = _zeilen_y(zeilen)
+    
+    buffer = BytesIO()
+    c = _neuer_canvas(buffer)
+    
+    # Vorderseite: Vorlage + Werte beider Zettel
+    c.saveState()
+    c.addLiteral(vorderseite)
+    c.restoreState()
+    for x_offset in X_OFFSETS:
+        c.saveState()
+        c.translate(x_offset, 0)
+        _zeichne_zettel_werte(c, daten, daten.kunde_name, daten.kunde_telefon, y)
+        c.restoreState()
+    c.showPage()
+    
+    # Rückseite: Notizen (komplett aus der Vorlage)
+    c.addLiteral(rueckseite)
+    c.showPage()
     
-    # 3. PDF erstellen
+    c.save()
+    return buffer.getvalue()
+
+
+def _render_direkt(daten: SimpleNamespace) -> bytes:
+    """Alles direkt zeichnen (ohne Vorlage)"""
     buffer = BytesIO()
     c = canvas.Canvas(buffer, pagesize=landscape(A4))
     width, height = landscape(A4)  # 297mm x 210mm
     
-    # 4. Beide Zettel zeichnen
-    draw_auftragszettel(c, rep, kunde_name, kunde_telefon, x_offset=15*mm)  # Links
-    draw_auftragszettel(c, rep, kunde_name, kunde_telefon, x_offset=width/2 + 5*mm)  # Rechts
-    
-    # 5. Trennlinie (gestrichelt)
-    c.setStrokeColor(grey)
-    c.setDash(3, 3)
-    c.line(width/2, 10*mm, width/2, height - 10*mm)
+    # Beide Zettel zeichnen
+    for x_offset in X_OFFSETS:  # Links, Rechts
+        draw_auftragszettel(c, daten, daten.kunde_name, daten.kunde_telefon, x_offset)
+    _zeichne_trennlinie(c, width, height)
     
     c.showPage()  # Seite 1 fertig (Vorderseite)
     
-    # 6. Rückseite: Notizen
+    # Rückseite: Notizen
     draw_notizen_seite(c, width, height)
     
-    # 7. PDF speichern
     c.save()
-    buffer.seek(0)
-    return buffer
+    return buffer.getvalue()
 
 
-def draw_auftragszettel(c, rep, kunde_name, kunde_telefon, x_offset):
+def _neuer_canvas(buffer: BytesIO) -> canvas.Canvas:
     """
-    Zeichnet EINEN Auftragszettel
-    
-    Args:
-        c: ReportLab Canvas
-        rep: Reparatur-Objekt
-        kunde_name: String mit Kundenname
-        kunde_telefon: String mit Telefon
-        x_offset: X-Position (links oder rechts)
+    Canvas mit fester Font-Reihenfolge
+
+    reportlab vergibt die Font-Namen (/F1, /F2, ...) in der Reihenfolge der ersten
+    Verwendung - Vorlage und Auftrag melden alle Fonts vorab in derselben
+    Reihenfolge an, damit die Operatoren der Vorlage im Auftrag dieselben Fonts treffen.
     """
+    c = canvas.Canvas(buffer, pagesize=landscape(A4))
+    for font in VORLAGE_FONTS:
+        c.setFont(font, 10)
+    return c
+
+
+def _font_namen(pdf: bytes) -> list:
+    """[(Font-Name, Font)] pro Seite, z.B. [[("/F1", "/Helvetica"), ...], ...]"""
+    return [
+        sorted((name, font.get_object()["/BaseFont"]) for name, font in seite["/Resources"]["/Font"].items())
+        for seite in PdfReader(BytesIO(pdf)).pages
+    ]
+
+
+@lru_cache(maxsize=None)
+def _vorlage(maengel_zeilen: int) -> Optional[Tuple[str, str]]:
+    """
+    Statisches Layout als PDF-Operatoren (Vorderseite, Rückseite)
+
+    Einmal pro Prozess und Zeilenzahl mit reportlab gerendert und mit pypdf
+    ausgelesen. None (→ direkt zeichnen), wenn die Vorlage Fonts außerhalb von
+    VORLAGE_FONTS braucht - deren Namen wären im Auftrag nicht vergeben.
+    """
+    width, height = landscape(A4)
+    y = _zeilen_y(maengel_zeilen)
     
-    y = 185*mm  # Start oben
-    x = x_offset
-    line_height = 6*mm
-    
+    buffer = BytesIO()
+    c = _neuer_canvas(buffer)
+    for x_offset in X_OFFSETS:
+        c.saveState()
+        c.translate(x_offset, 0)
+        _zeichne_zettel_layout(c, y)
+        c.restoreState()
+    _zeichne_trennlinie(c, width, height)
+    c.showPage()
+    _zeichne_notizen(c, width, height)
+    c.showPage()
+    c.save()
+    pdf = buffer.getvalue()
+    
+    leer = BytesIO()
+    probe = _neuer_canvas(leer)
+    probe.showPage()
+    probe.save()
+    if {tuple(f) for f in _font_namen(pdf)} != {tuple(_font_namen(leer.getvalue())[0])}:
+        logger.warning("Auftragszettel-Vorlage nutzt Fonts außerhalb von VORLAGE_FONTS - zeichne direkt")
+        return None
+    
+    seiten = PdfReader(BytesIO(pdf)).pages
+    return tuple(seite.get_contents().get_data().decode("latin-1") for seite in seiten)
+
+
+def _zeichne_trennlinie(c, width, height):
+    """Gestrichelte Trennlinie zwischen den Zetteln"""
+    c.saveState()
+    c.setStrokeColor(grey)
+    c.setDash(3, 3)
+    c.line(width/2, 10*mm, width/2, height - 10*mm)
+    c.restoreState()
+
+
+def _zeichne_zettel_layout(c, y):
+    """Statischer Teil EINES Zettels (Überschrift, Beschriftungen, Checkbox-Rahmen) bei x=0"""
     c.setStrokeColor(black)
     c.setFillColor(black)
     
     # ===== HEADER =====
     c.setFont("Helvetica-Bold", 16)
-    c.drawString(x, y, "AUFTRAGSPLANER")
-    y -= 12*mm
+    c.drawString(0, y["header"], "AUFTRAGSPLANER")
     
-    # ===== FELDER =====
+    # ===== BESCHRIFTUNGEN =====
     c.setFont("Helvetica", 10)
+    for zeile, text in BESCHRIFTUNGEN:
+        c.drawString(0, y[zeile], text)
+    
+    # Checkboxen (Anwesend & Bezahlt) ohne Häkchen
+    draw_checkbox(c, 0, y["checkboxen"], False, "Anwesend")
+    draw_checkbox(c, 45*mm, y["checkboxen"], False, "Bezahlt")
+
+
+def _zeichne_zettel_werte(c, rep, kunde_name, kunde_telefon, y):
+    """Variabler Teil EINES Zettels (Werte, Häkchen, Mängeltext) bei x=0"""
+    c.setFillColor(black)
     
     # Auftragsnummer
-    c.drawString(x, y, "Auftragsnummer:")
     c.setFont("Helvetica-Bold", 11)
-    c.drawString(x + 42*mm, y, str(rep.auftragsnummer))
-    y -= line_height
+    c.drawString(WERT_X, y["auftragsnummer"], str(rep.auftragsnummer))
     
-    # Reparaturdatum
-    c.setFont("Helvetica", 10)
-    c.drawString(x, y, "Reparaturdatum:")
     c.setFont("Helvetica-Bold", 10)
+    
+    # Reparaturdatum
     datum = rep.reparaturdatum.strftime("%d.%m.%Y %H:%M:%S") if rep.reparaturdatum else "-"
-    c.drawString(x + 42*mm, y, datum)
-    y -= line_height
+    c.drawString(WERT_X, y["reparaturdatum"], datum)
     
     # Schlüsselnr
-    c.setFont("Helvetica", 10)
-    c.drawString(x, y, "Schlüsselnr:")
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(x + 42*mm, y, rep.schluesselnummer or "-")
-    y -= line_height * 1.8
+    c.drawString(WERT_X, y["schluesselnummer"], rep.schluesselnummer or "-")
     
-    # Checkboxen (Anwesend & Bezahlt)
-    draw_checkbox(c, x, y, rep.fahrrad_anwesend, "Anwesend")
-    draw_checkbox(c, x + 45*mm, y, rep.bezahlt, "Bezahlt")
-    y -= line_height * 2.2
-    
-    # Mängelbeschreibung (mehrzeilig!)
-    c.setFont("Helvetica", 10)
-    c.drawString(x, y, "Mängelbeschreibung:")
-    y -= 5*mm
+    # Häkchen (Anwesend & Bezahlt)
+    if rep.fahrrad_anwesend:
+        _zeichne_haekchen(c, 0, y["checkboxen"])
+    if rep.bezahlt:
+        _zeichne_haekchen(c, 45*mm, y["checkboxen"])
     
     # Textblock für Mängel (max 4 Zeilen)
-    maengel = rep.maengelbeschreibung or "Keine Angabe"
-    lines_used = draw_text_block(c, maengel, x + 3*mm, y, width=120*mm, max_lines=4)
-    y -= (lines_used * 5*mm) + 3*mm
+    draw_text_block(c, _maengel_text(rep), 3*mm, y["maengel_text"], width=120*mm, max_lines=MAENGEL_MAX_ZEILEN)
     
-    # Status
-    c.setFont("Helvetica", 10)
-    c.drawString(x, y, "Status:")
     c.setFont("Helvetica-Bold", 10)
-    c.drawString(x + 42*mm, y, rep.status or "-")
-    y -= line_height
+    
+    # Status
+    c.drawString(WERT_X, y["status"], rep.status or "-")
     
     # Fahrradmarke
-    c.setFont("Helvetica", 10)
-    c.drawString(x, y, "Fahrradmarke:")
-    c.setFont("Helvetica-Bold", 10)
     marke = rep.fahrradmarke or "-"
     if rep.fahrradmodell:
         marke += f" ({rep.fahrradmodell})"
-    c.drawString(x + 42*mm, y, marke[:40])  # Max 40 Zeichen
-    y -= line_height
+    c.drawString(WERT_X, y["fahrradmarke"], marke[:40])  # Max 40 Zeichen
     
     # Kunde
-    c.setFont("Helvetica", 10)
-    c.drawString(x, y, "Kunde:")
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(x + 42*mm, y, (kunde_name or "-")[:35])  # Max 35 Zeichen
-    y -= line_height
+    c.drawString(WERT_X, y["kunde"], (kunde_name or "-")[:35])  # Max 35 Zeichen
     
     # Abholtermin
-    c.setFont("Helvetica", 10)
-    c.drawString(x, y, "Abholtermin:")
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(x + 42*mm, y, rep.abholtermin or "-")
-    y -= line_height
+    c.drawString(WERT_X, y["abholtermin"], rep.abholtermin or "-")
     
     # Telefon
-    c.setFont("Helvetica", 10)
-    c.drawString(x, y, "Telefon:")
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(x + 42*mm, y, kunde_telefon or "-")
+    c.drawString(WERT_X, y["telefon"], kunde_telefon or "-")
+
+
+def draw_auftragszettel(c, rep, kunde_name, kunde_telefon, x_offset):
+    """
+    Zeichnet EINEN Auftragszettel (Layout + Werte, ohne Vorlage)
+    
+    Args:
+        c: ReportLab Canvas
+        rep: Reparatur-Objekt
+        kunde_name: String mit Kundenname
+        kunde_telefon: String mit Telefon
+        x_offset: X-Position (links oder rechts)
+    """
+    y = _zeilen_y(_maengel_zeilen(_maengel_text(rep)))
+    c.saveState()
+    c.translate(x_offset, 0)
+    _zeichne_zettel_layout(c, y)
+    _zeichne_zettel_werte(c, rep, kunde_name, kunde_telefon, y)
+    c.restoreState()
+
+
+def _zeichne_haekchen(c, x, y):
+    """Häkchen in eine Checkbox (siehe draw_checkbox)"""
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(x + 0.3*mm, y - 2.5*mm, "✓")
 
 
 def draw_checkbox(c, x, y, checked, label):
@@ -185,8 +373,7 @@ def draw_checkbox(c, x, y, checked, label):
     
     # Häkchen falls aktiviert
     if checked:
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(x + 0.3*mm, y - 2.5*mm, "✓")
+        _zeichne_haekchen(c, x, y)
     
     # Label
     c.setFont("Helvetica", 10)
@@ -238,6 +425,12 @@ def draw_notizen_seite(c, width, height):
         width: Seitenbreite
         height: Seitenhöhe
     """
+    _zeichne_notizen(c, width, height)
+    c.showPage()  # Rückseite fertig
+
+
+def _zeichne_notizen(c, width, height):
+    """Inhalt der Notizen-Rückseite (ohne showPage, auch als Form nutzbar)"""
     c.setStrokeColor(black)
     c.setFillColor(black)
     
@@ -253,8 +446,6 @@ def draw_notizen_seite(c, width, height):
     for i in range(18):  # 18 Linien
         c.line(20*mm, y, width - 20*mm, y)
         y -= 9*mm
-    
-    c.showPage()  # Rückseite fertig
 
 
 def get_kunde_display_name(rep) -> str:
@@ -0,0 +1,99 @@
+"""
+PDF Generator für die Pickliste
+Kompakte Liste pro Lagerort zum Abhaken beim Rundgang
+"""
+from io import BytesIO
+from typing import Any, Dict
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+
+def render_pickliste(daten: Dict[str, Any]) -> bytes:
+    """
+    Rendert die Pickliste (Ergebnis von lade_pickliste) als PDF-Bytes
+
+    Top-Level-Funktion mit picklebaren Daten → läuft im PDF-Prozesspool.
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        topMargin=12*mm,
+        bottomMargin=12*mm,
+        leftMargin=12*mm,
+        rightMargin=12*mm,
+        title="Pickliste",
+    )
+
+    styles = getSampleStyleSheet()
+    titel_style = ParagraphStyle('PickTitel', parent=styles['Heading1'], fontSize=14, spaceAfter=2)
+    klein_style = ParagraphStyle('PickKlein', parent=styles['Normal'], fontSize=8, textColor=colors.HexColor('#666666'))
+    zelle_style = ParagraphStyle('PickZelle', parent=styles['Normal'], fontSize=8, leading=9.5)
+
+    story = [
+        Paragraph("PICKLISTE", titel_style),
+        Paragraph(
+            f"{daten['erstellt_am'].strftime('%d.%m.%Y %H:%M')} Uhr · "
+            f"{daten['anzahl_auftraege']} Aufträge · {len(daten['positionen'])} Artikel",
+            klein_style,
+        ),
+        Spacer(1, 4*mm),
+    ]
+
+    if not daten["positionen"]:
+        story.append(Paragraph("Keine Teile benötigt.", styles['Normal']))
+        doc.build(story)
+        return buffer.getvalue()
+
+    tabelle = [["", "Lagerort", "Art.-Nr.", "Bezeichnung", "Menge", "Werkst./Lager", "Aufträge"]]
+    trenner = []  # Zeilen, ab denen ein neuer Lagerort beginnt
+    letzter_ort = None
+    for position in daten["positionen"]:
+        if position["lagerort"] != letzter_ort:
+            if letzter_ort is not None:
+                trenner.append(len(tabelle))
+            letzter_ort = position["lagerort"]
+            ort = position["lagerort"]
+        else:
+            ort = ""
+        menge = position["menge"]
+        tabelle.append([
+            "[  ]",
+            Paragraph(ort, zelle_style),
+            position["artikelnummer"],
+            Paragraph(position["bezeichnung"], zelle_style),
+            f"{menge:g} {position['einheit'] or ''}".strip(),
+            f"{position['bestand_werkstatt']} / {position['bestand_lager']}",
+            Paragraph(", ".join(position["auftraege"]), zelle_style),
+        ])
+
+    t = Table(
+        tabelle,
+        colWidths=[7*mm, 30*mm, 24*mm, 58*mm, 18*mm, 20*mm, 29*mm],
+        repeatRows=1,
+    )
+    stil = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('ALIGN', (0, 0), (0, -1), 'CENTER'),
+        ('ALIGN', (4, 1), (5, -1), 'RIGHT'),
+        ('TOPPADDING', (0, 0), (-1, -1), 2),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.HexColor('#d1d5db')),
+        ('BOX', (0, 0), (-1, -1), 0.75, colors.HexColor('#1a1a1a')),
+    ]
+    for zeile in trenner:
+        stil.append(('LINEABOVE', (0, zeile), (-1, zeile), 1, colors.HexColor('#1a1a1a')))
+    t.setStyle(TableStyle(stil))
+    story.append(t)
+
+    doc.build(story)
+    return buffer.getvalue()
@@ -0,0 +1,351 @@
+"""
+PDF-Service - Rendern im Prozesspool + Datei-Cache
+PDFs werden außerhalb der API-Threads gerendert und unter FILES_DIR/pdf_cache abgelegt.
+Schlüssel: Entity-ID + Hash aller gedruckten Daten → unveränderte Dokumente kommen
+direkt von der Platte (mit ETag, Browser bekommt 304).
+"""
+import asyncio
+import hashlib
+import os
+import shutil
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from pypdf import PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, PdfObject
+
+from app.config import settings
+
+# Bei Layout-Änderungen erhöhen → alte Cache-Dateien werden nicht mehr getroffen
+RENDER_VERSION = 4
+
+CACHE_ORDNER = "pdf_cache"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> Optional[ProcessPoolExecutor]:
+    """Prozesspool (lazy), None wenn PDF_PROZESSE = 0 (dann im Thread rendern)"""
+    global _pool
+    if settings.PDF_PROZESSE <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.PDF_PROZESSE)
+        return _pool
+
+
+def stoppe_pool() -> None:
+    """Beim Herunterfahren aufrufen"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def berechne_etag(typ: str, daten: Any) -> str:
+    """Hash über alle gedruckten Felder (daten muss ein stabiles repr() haben)"""
+    inhalt = f"{typ}:{RENDER_VERSION}:{daten!r}".encode("utf-8")
+    return hashlib.sha256(inhalt).hexdigest()[:32]
+
+
+def _cache_pfad(typ: str, entity_id: int, etag: str) -> Path:
+    return settings.files_path / CACHE_ORDNER / typ / f"{entity_id}_{etag}.pdf"
+
+
+async def rendere(renderer: Callable[[Any], bytes], daten: Any) -> bytes:
+    """Rendert im Prozesspool (blockiert weder Event-Loop noch API-Threads)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor(), renderer, daten)
+
+
+async def hole_pdf(
+    typ: str,
+    entity_id: int,
+    daten: Any,
+    renderer: Callable[[Any], bytes],
+) -> Tuple[Path, str]:
+    """
+    PDF aus dem Cache oder frisch gerendert
+
+    Args:
+        typ: z.B. "auftragszettel", "bestellung" (Unterordner)
+        entity_id: ID der Reparatur/Bestellung
+        daten: Picklebarer Snapshot (siehe auftragszettel_daten / bestellung_daten)
+        renderer: Top-Level-Funktion daten → PDF-Bytes
+
+    Returns:
+        (Pfad zur PDF-Datei, ETag)
+    """
+    etag = berechne_etag(typ, daten)
+    pfad = _cache_pfad(typ, entity_id, etag)
+    if pfad.exists():
+        return pfad, etag
+
+    pdf_bytes = await rendere(renderer, daten)
+
+    pfad.parent.mkdir(parents=True, exist_ok=True)
+    tmp = pfad.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(pdf_bytes)
+    os.replace(tmp, pfad)
+
+    # Ältere Versionen desselben Dokuments aufräumen - unter Windows schlägt das
+    # fehl, solange eine Datei noch gesendet wird; dann beim nächsten Render
+    for alt in pfad.parent.glob(f"{entity_id}_*.pdf"):
+        if alt != pfad:
+            try:
+                alt.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    return pfad, etag
+
+
+def pdf_response(
+    request: Request,
+    pfad: Path,
+    etag: str,
+    filename: str,
+    disposition: str = "inline",
+) -> Response:
+    """FileResponse mit ETag; 304 wenn der Browser die Version schon hat"""
+    headers = {
+        "ETag": f'"{etag}"',
+        "Cache-Control": "private, no-cache",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if f'"{etag}"' in if_none_match or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Disposition"] = f"{disposition}; filename={filename}"
+    return FileResponse(pfad, media_type="application/pdf", headers=headers)
+
+
+# ============================================================================
+# Sammel-Druck / Export
+# ============================================================================
+
+def starte_renders(
+    typ: str,
+    eintraege: List[Tuple[int, Any]],
+    renderer: Callable[[Any], bytes],
+) -> List["asyncio.Task[Tuple[Path, str]]"]:
+    """
+    Startet alle Renders sofort (parallel im Prozesspool, Cache-Treffer ohne Rendern)
+
+    Args:
+        eintraege: Liste (entity_id, daten)
+
+    Returns:
+        Tasks in derselben Reihenfolge (Ergebnis: (Pfad, ETag))
+    """
+    return [
+        asyncio.ensure_future(hole_pdf(typ, entity_id, daten, renderer))
+        for entity_id, daten in eintraege
+    ]
+
+
+# Feste Objektnummern im Sammel-PDF, die Seiten-Objekte folgen ab 3
+KATALOG_NUMMER = 1
+SEITENBAUM_NUMMER = 2
+
+
+def _seiten_objekte(pfad: Path, erste_nummer: int) -> Tuple[List[Tuple[int, bytes]], List[int]]:
+    """
+    Serialisiert alle Seiten eines PDFs samt referenzierter Objekte (läuft im Thread)
+
+    Die Objekte werden ab erste_nummer neu nummeriert und bekommen den gemeinsamen
+    Seitenbaum als /Parent - so kann das Sammel-PDF Dokument für Dokument
+    geschrieben werden, ohne alles im Speicher zusammenzubauen.
+
+    Returns:
+        (Liste (Objektnummer, Bytes), Objektnummern der Seiten)
+    """
+    reader = PdfReader(str(pfad))
+    nummern: Dict[Tuple[int, int], int] = {}
+    warteschlange: Deque[Tuple[int, PdfObject]] = deque()
+
+    def referenz(indirekt: IndirectObject, obj: Optional[PdfObject] = None) -> IndirectObject:
+        schluessel = (indirekt.idnum, indirekt.generation)
+        if schluessel not in nummern:
+            nummern[schluessel] = erste_nummer + len(nummern)
+            warteschlange.append((nummern[schluessel], obj if obj is not None else indirekt.get_object()))
+        return IndirectObject(nummern[schluessel], 0, None)
+
+    def umnummerieren(obj: PdfObject) -> PdfObject:
+        # Objekte des Readers werden danach verworfen → direkt in place ändern
+        if isinstance(obj, IndirectObject):
+            return referenz(obj)
+        if isinstance(obj, DictionaryObject):
+            for schluessel, wert in list(obj.items()):
+                obj[schluessel] = umnummerieren(wert)
+        elif isinstance(obj, ArrayObject):
+            for i, wert in enumerate(obj):
+                obj[i] = umnummerieren(wert)
+        return obj
+
+    # Seiten zuerst (geerbte Attribute hat pypdf schon auf die Seite kopiert)
+    seiten = [referenz(seite.indirect_reference, seite).idnum for seite in reader.pages]
+    seiten_set = set(seiten)
+
+    objekte: List[Tuple[int, bytes]] = []
+    while warteschlange:
+        nummer, obj = warteschlange.popleft()
+        if nummer in seiten_set:
+            obj.pop(NameObject("/Parent"), None)
+            umnummerieren(obj)
+            obj[NameObject("/Parent")] = IndirectObject(SEITENBAUM_NUMMER, 0, None)
+        else:
+            umnummerieren(obj)
+        ausgabe = BytesIO()
+        ausgabe.write(f"{nummer} 0 obj\n".encode("ascii"))
+        obj.write_to_stream(ausgabe)
+        ausgabe.write(b"\nendobj\n")
+        objekte.append((nummer, ausgabe.getvalue()))
+    return objekte, seiten
+
+
+async def sammel_pdf_stream(
+    aufgaben: List["asyncio.Task[Tuple[Path, str]]"],
+) -> AsyncIterator[bytes]:
+    """
+    Sammel-PDF als Stream: jedes Dokument geht raus, sobald es (in Reihenfolge) fertig ist
+
+    Seitenbaum, Katalog und Xref-Tabelle kommen am Ende - im Speicher liegt
+    immer nur das aktuelle Dokument plus die Offsets.
+    """
+    position = 0
+    offsets: Dict[int, int] = {}
+    seiten: List[int] = []
+    naechste_nummer = SEITENBAUM_NUMMER + 1
+
+    def objekt(nummer: int, inhalt: str) -> bytes:
+        offsets[nummer] = position
+        return f"{nummer} 0 obj\n{inhalt}\nendobj\n".encode("ascii")
+
+    try:
+        kopf = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        position += len(kopf)
+        yield kopf
+
+        for aufgabe in aufgaben:
+            pfad, _ = await aufgabe
+            objekte, dokument_seiten = await run_in_threadpool(
+                _seiten_objekte, pfad, naechste_nummer
+            )
+            teile = []
+            for nummer, daten in objekte:
+                offsets[nummer] = position
+                position += len(daten)
+                teile.append(daten)
+            naechste_nummer += len(objekte)
+            seiten.extend(dokument_seiten)
+            yield b"".join(teile)
+
+        kids = " ".join(f"{nummer} 0 R" for nummer in seiten)
+        teile = [objekt(SEITENBAUM_NUMMER, f"<< /Type /Pages /Kids [ {kids} ] /Count {len(seiten)} >>")]
+        position += len(teile[0])
+        teile.append(objekt(KATALOG_NUMMER, f"<< /Type /Catalog /Pages {SEITENBAUM_NUMMER} 0 R >>"))
+        position += len(teile[1])
+
+        xref = [f"xref\n0 {naechste_nummer}\n", "0000000000 65535 f \n"]
+        xref += [f"{offsets[nummer]:010d} 00000 n \n" for nummer in range(1, naechste_nummer)]
+        xref.append(
+            f"trailer\n<< /Size {naechste_nummer} /Root {KATALOG_NUMMER} 0 R >>\n"
+            f"startxref\n{position}\n%%EOF\n"
+        )
+        teile.append("".join(xref).encode("ascii"))
+        yield b"".join(teile)
+    finally:
+        # Client abgebrochen → restliche Renders nicht mehr abwarten
+        for aufgabe in aufgaben:
+            aufgabe.cancel()
+
+
+async def sammel_pdf_response(
+    aufgaben: List["asyncio.Task[Tuple[Path, str]]"],
+    filename: str,
+) -> StreamingResponse:
+    """
+    Sammel-PDF als StreamingResponse (siehe sammel_pdf_stream)
+
+    Auf das erste Dokument wird noch vor der Antwort gewartet, damit ein
+    Render-Fehler als 500 ankommt statt als abgebrochener Download.
+    """
+    if aufgaben:
+        try:
+            await asyncio.shield(aufgaben[0])
+        except BaseException:
+            for aufgabe in aufgaben:
+                aufgabe.cancel()
+            raise
+    return StreamingResponse(
+        sammel_pdf_stream(aufgaben),
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"inline; filename={filename}"},
+    )
+
+
+class _StreamPuffer:
+    """Nicht-seekbares Ziel für zipfile: sammelt Bytes bis zum nächsten yield"""
+
+    def __init__(self):
+        self._daten = bytearray()
+        self._position = 0
+
+    def write(self, daten) -> int:
+        self._daten += daten
+        self._position += len(daten)
+        return len(daten)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def leeren(self) -> bytes:
+        daten = bytes(self._daten)
+        self._daten.clear()
+        return daten
+
+
+def _zip_eintrag(zf: zipfile.ZipFile, puffer: _StreamPuffer, name: str, pfad: Path) -> bytes:
+    """Kopiert eine Datei ins ZIP (im Thread, Datei-I/O nicht auf dem Event-Loop)"""
+    with zf.open(name, "w") as ziel, open(pfad, "rb") as quelle:
+        shutil.copyfileobj(quelle, ziel, 256 * 1024)
+    return puffer.leeren()
+
+
+async def zip_stream(
+    dateien: List[Tuple[str, Awaitable[Tuple[Path, str]]]],
+) -> AsyncIterator[bytes]:
+    """
+    ZIP-Stream: jede Datei wird hinzugefügt, sobald sie fertig ist, und sofort gesendet
+
+    Args:
+        dateien: Liste (Dateiname im ZIP, Render-Task)
+    """
+    puffer = _StreamPuffer()
+    try:
+        # PDFs sind schon komprimiert → ZIP_STORED, Deflate bringt kaum etwas
+        with zipfile.ZipFile(puffer, "w", compression=zipfile.ZIP_STORED) as zf:
+            for name, aufgabe in dateien:
+                pfad, _ = await aufgabe
+                yield await run_in_threadpool(_zip_eintrag, zf, puffer, name, pfad)
+        yield puffer.leeren()  # Zentralverzeichnis
+    finally:
+        # Client abgebrochen → restliche Renders nicht mehr abwarten
+        for _, aufgabe in dateien:
+            if isinstance(aufgabe, asyncio.Future):
+                aufgabe.cancel()
@@ -0,0 +1,100 @@
+"""
+Pickliste für den Werkstatt-Start
+Alle benötigten Teile mehrerer Aufträge in einer gruppierten Query, sortiert
+nach Lagerort.sortierung → ein Rundgang durchs Lager statt vieler Einzelwege.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.artikel import Artikel
+from app.models.lagerort import Lagerort
+from app.models.reparatur import Reparatur, ReparaturPosition
+from app.utils.teilereservierung import VERBRAUCHT
+
+OHNE_LAGERORT = "Ohne Lagerort"
+
+
+def lade_pickliste(db: Session, ids: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Benötigte Teile (noch nicht verbraucht) pro Artikel, in Laufreihenfolge
+
+    Args:
+        ids: Reparatur-IDs; None = alle Aufträge im Status 'angenommen'
+
+    Returns:
+        {"erstellt_am", "anzahl_auftraege", "positionen": [...]}
+    """
+    auftrag_filter = Reparatur.id.in_(ids) if ids else Reparatur.status == "angenommen"
+
+    # Erst pro (Artikel, Auftrag) summieren, damit jede Auftragsnummer einmal erscheint
+    pro_auftrag = (
+        db.query(
+            ReparaturPosition.artikel_id.label("artikel_id"),
+            Reparatur.auftragsnummer.label("auftragsnummer"),
+            func.sum(ReparaturPosition.menge).label("menge"),
+        )
+        .join(Reparatur, Reparatur.id == ReparaturPosition.reparatur_id)
+        .filter(
+            auftrag_filter,
+            ReparaturPosition.typ == "teil",
+            ReparaturPosition.artikel_id.isnot(None),
+            func.coalesce(ReparaturPosition.lager_status, "") != VERBRAUCHT,
+        )
+        .group_by(ReparaturPosition.artikel_id, Reparatur.auftragsnummer)
+        .subquery()
+    )
+
+    lagerort = func.coalesce(Lagerort.name, Artikel.lagerort, OHNE_LAGERORT)
+    zeilen = (
+        db.query(
+            Artikel.id.label("artikel_id"),
+            Artikel.artikelnummer,
+            Artikel.bezeichnung,
+            Artikel.einheit,
+            Artikel.bestand_werkstatt,
+            Artikel.bestand_lager,
+            lagerort.label("lagerort"),
+            func.sum(pro_auftrag.c.menge).label("menge"),
+            func.count(pro_auftrag.c.auftragsnummer).label("anzahl_auftraege"),
+            func.aggregate_strings(pro_auftrag.c.auftragsnummer, ", ").label("auftraege"),
+        )
+        .join(pro_auftrag, pro_auftrag.c.artikel_id == Artikel.id)
+        .outerjoin(Lagerort, Lagerort.id == Artikel.lagerort_id)
+        .group_by(
+            Artikel.id, Artikel.artikelnummer, Artikel.bezeichnung, Artikel.einheit,
+            Artikel.bestand_werkstatt, Artikel.bestand_lager, Artikel.lagerort,
+            Lagerort.id, Lagerort.name, Lagerort.sortierung,
+        )
+        .order_by(
+            Lagerort.sortierung.asc().nullslast(),
+            lagerort,
+            Artikel.bezeichnung,
+        )
+        .all()
+    )
+
+    auftraege = set()
+    positionen = []
+    for zeile in zeilen:
+        nummern = sorted(zeile.auftraege.split(", "))
+        auftraege.update(nummern)
+        positionen.append({
+            "artikel_id": zeile.artikel_id,
+            "artikelnummer": zeile.artikelnummer,
+            "bezeichnung": zeile.bezeichnung,
+            "einheit": zeile.einheit,
+            "lagerort": zeile.lagerort,
+            "menge": float(zeile.menge),
+            "bestand_werkstatt": zeile.bestand_werkstatt,
+            "bestand_lager": zeile.bestand_lager,
+            "auftraege": nummern,
+        })
+
+    return {
+        "erstellt_am": datetime.now(),
+        "anzahl_auftraege": len(auftraege),
+        "positionen": positionen,
+    }
@@ -0,0 +1,241 @@
+"""
+Bedarfsprognose - Dynamischer Mindestbestand
+Verbrauch aus Reparatur-Positionen (typ 'teil') + Bestandshistorie (Abgänge),
+saisonale Prognose pro Artikel, vektorisiert mit NumPy über den ganzen Katalog
+"""
+import logging
+import math
+from datetime import date, timedelta
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, literal, select, union_all, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.artikel import Artikel, ArtikelTyp
+from app.models.bestand_historie import BestandHistorie, BestandArt
+from app.models.reparatur import Reparatur, ReparaturPosition
+from app.utils.lieferzeiten import lieferzeiten_report
+from app.utils.nachbestellung import bevorzugter_lieferant_subquery
+
+logger = logging.getLogger(__name__)
+
+# Zeitfenster für das aktuelle Verbrauchsniveau (entsaisonalisiert)
+NIVEAU_TAGE = 90
+# Zeitfenster für die Streuung des Tagesverbrauchs
+STREUUNG_TAGE = 365
+
+
+def _verbrauch_query(von: date):
+    """Tagesverbrauch pro Artikel (eine gruppierte Query über beide Quellen)"""
+    reparatur_teile = (
+        select(
+            ReparaturPosition.artikel_id.label("artikel_id"),
+            func.date(Reparatur.reparaturdatum).label("tag"),
+            ReparaturPosition.menge.label("menge"),
+        )
+        .join(Reparatur, Reparatur.id == ReparaturPosition.reparatur_id)
+        .where(
+            ReparaturPosition.typ == "teil",
+            ReparaturPosition.artikel_id.isnot(None),
+            Reparatur.status != "storniert",
+            Reparatur.reparaturdatum >= von,
+        )
+    )
+
+    # Abgänge ohne Reparatur-Bezug (Verkauf, Verbrauch) - Reparaturen sind oben schon gezählt
+    abgaenge = (
+        select(
+            BestandHistorie.artikel_id.label("artikel_id"),
+            func.date(BestandHistorie.created_at).label("tag"),
+            func.abs(BestandHistorie.menge).label("menge"),
+        )
+        .where(
+            BestandHistorie.art == BestandArt.ABGANG,
+            func.coalesce(BestandHistorie.referenz_typ, literal("")) != "reparatur",
+            BestandHistorie.created_at >= von,
+        )
+    )
+
+    verbrauch = union_all(reparatur_teile, abgaenge).subquery("verbrauch")
+    return (
+        select(verbrauch.c.artikel_id, verbrauch.c.tag, func.sum(verbrauch.c.menge).label("menge"))
+        .group_by(verbrauch.c.artikel_id, verbrauch.c.tag)
+    )
+
+
+def _saisonfaktoren(matrix: np.ndarray, monate: np.ndarray) -> np.ndarray:
+    """
+    Saisonfaktor pro Artikel und Kalendermonat (n × 12)
+
+    Faktor = Monatsmittel / Gesamtmittel, geschrumpft Richtung 1 bei wenig Historie
+    """
+    onehot = np.zeros((monate.size, 12))
+    onehot[np.arange(monate.size), monate] = 1.0
+    tage_pro_monat = onehot.sum(axis=0)  # Wie oft kam jeder Monat in der Historie vor
+
+    monatsmittel = (matrix @ onehot) / np.maximum(tage_pro_monat, 1)
+    gesamtmittel = matrix.mean(axis=1, keepdims=True)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roh = np.where(gesamtmittel > 0, monatsmittel / gesamtmittel, 1.0)
+
+    # Ein Jahr Historie (~30 Tage pro Monat) zählt zur Hälfte, zwei Jahre zu 2/3
+    gewicht = tage_pro_monat / (tage_pro_monat + 30)
+    return gewicht * roh + (1 - gewicht)
+
+
+def berechne_mindestbestand_vorschlaege(
+    db: Session,
+    servicegrad: Optional[float] = None,
+    stichtag: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Mindestbestand-Vorschläge für alle Material-Artikel mit Verbrauch
+
+    Mindestbestand = erwarteter Verbrauch in der Lieferzeit + Sicherheitsbestand
+    Sicherheitsbestand = z(Servicegrad) × σ(Tagesverbrauch) × √Lieferzeit
+
+    Args:
+        servicegrad: z.B. 0.95 (Default aus Settings)
+        stichtag: Ende der Historie (Default: heute)
+    """
+    servicegrad = servicegrad or settings.PROGNOSE_SERVICEGRAD
+    stichtag = stichtag or date.today()
+    von = stichtag - timedelta(days=settings.PROGNOSE_HISTORIE_TAGE - 1)
+    anzahl_tage = settings.PROGNOSE_HISTORIE_TAGE
+
+    # 1. Artikel-Stammdaten + Lieferzeit des bevorzugten Lieferanten
+    lieferant_rang = bevorzugter_lieferant_subquery()
+    artikel_rows = db.execute(
+        select(
+            Artikel.id,
+            Artikel.artikelnummer,
+            Artikel.bezeichnung,
+            Artikel.mindestbestand,
+            lieferant_rang.c.lieferant_id,
+            lieferant_rang.c.lieferzeit_tage,
+        )
+        .outerjoin(
+            lieferant_rang,
+            (lieferant_rang.c.artikel_id == Artikel.id) & (lieferant_rang.c.rang == 1),
+        )
+        .where(
+            Artikel.aktiv == True,
+            Artikel.typ == ArtikelTyp.material,
+            Artikel.hat_varianten == False,
+        )
+        .order_by(Artikel.id)
+    ).all()
+    if not artikel_rows:
+        return []
+
+    artikel_ids = np.array([r.id for r in artikel_rows])
+
+    # 2. Verbrauchsmatrix (Artikel × Tage)
+    verbrauch_rows = db.execute(_verbrauch_query(von)).all()
+    matrix = np.zeros((artikel_ids.size, anzahl_tage))
+    if verbrauch_rows:
+        ids = np.array([r.artikel_id for r in verbrauch_rows])
+        tage = np.array([(_als_datum(r.tag) - von).days for r in verbrauch_rows])
+        mengen = np.array([float(r.menge or 0) for r in verbrauch_rows])
+
+        zeilen = np.searchsorted(artikel_ids, ids)
+        gueltig = (
+            (zeilen < artikel_ids.size)
+            & (artikel_ids[np.minimum(zeilen, artikel_ids.size - 1)] == ids)
+            & (tage >= 0) & (tage < anzahl_tage)
+        )
+        np.add.at(matrix, (zeilen[gueltig], tage[gueltig]), mengen[gueltig])
+
+    hat_verbrauch = matrix.sum(axis=1) > 0
+    if not hat_verbrauch.any():
+        return []
+
+    # 3. Saisonalität + entsaisonalisiertes Niveau
+    monate = np.array([(von + timedelta(days=i)).month - 1 for i in range(anzahl_tage)])
+    faktoren = _saisonfaktoren(matrix, monate)
+    faktoren_hist = np.maximum(faktoren[:, monate], 0.1)  # n × Tage
+
+    fenster = slice(-NIVEAU_TAGE, None)
+    niveau = matrix[:, fenster].sum(axis=1) / faktoren_hist[:, fenster].sum(axis=1)
+
+    entsaisonalisiert = matrix[:, -STREUUNG_TAGE:] / faktoren_hist[:, -STREUUNG_TAGE:]
+    sigma = entsaisonalisiert.std(axis=1)
+
+    # 4. Prognose über die Lieferzeit (je Artikel unterschiedlich lang)
+    #    Hinterlegte Lieferzeit, sonst gemessene p50-Lieferzeit des Lieferanten, sonst Default
+    gemessen = {
+        lieferant_id: math.ceil(statistik["lieferzeit_p50_tage"])
+        for lieferant_id, statistik in lieferzeiten_report(db).items()
+        if statistik["lieferzeit_p50_tage"]
+    }
+    lieferzeit = np.array([
+        r.lieferzeit_tage or gemessen.get(r.lieferant_id) or settings.PROGNOSE_LIEFERZEIT_TAGE
+        for r in artikel_rows
+    ])
+    horizont = int(lieferzeit.max())
+    monate_zukunft = np.array([(stichtag + timedelta(days=i)).month - 1 for i in range(1, horizont + 1)])
+    maske = np.arange(horizont)[None, :] < lieferzeit[:, None]
+    erwartet = niveau * (faktoren[:, monate_zukunft] * maske).sum(axis=1)
+
+    z = NormalDist().inv_cdf(servicegrad)
+    sicherheit = z * sigma * np.sqrt(lieferzeit)
+    vorschlag = np.ceil(erwartet + sicherheit).astype(int)
+
+    aktueller_monat = stichtag.month - 1
+    ergebnis = []
+    for i in np.flatnonzero(hat_verbrauch):
+        row = artikel_rows[i]
+        ergebnis.append({
+            "artikel_id": row.id,
+            "artikelnummer": row.artikelnummer,
+            "bezeichnung": row.bezeichnung,
+            "mindestbestand_aktuell": row.mindestbestand or 0,
+            "mindestbestand_vorschlag": int(vorschlag[i]),
+            "verbrauch_pro_tag": round(float(niveau[i]), 3),
+            "saisonfaktor": round(float(faktoren[i, aktueller_monat]), 2),
+            "lieferzeit_tage": int(lieferzeit[i]),
+            "erwarteter_verbrauch": round(float(erwartet[i]), 2),
+            "sicherheitsbestand": round(float(sicherheit[i]), 2),
+        })
+    return ergebnis
+
+
+def _als_datum(tag) -> date:
+    """func.date() liefert je nach DB date oder String"""
+    return tag if isinstance(tag, date) else date.fromisoformat(str(tag))
+
+
+def uebernehme_mindestbestaende(db: Session, vorschlaege: List[Dict[str, Any]]) -> int:
+    """
+    Setzt Mindestbestände per Bulk-Update (nur geänderte Artikel, kein Commit)
+
+    Returns:
+        Anzahl aktualisierter Artikel
+    """
+    aenderungen = [
+        {"id": v["artikel_id"], "mindestbestand": v["mindestbestand_vorschlag"]}
+        for v in vorschlaege
+        if v["mindestbestand_vorschlag"] != v["mindestbestand_aktuell"]
+    ]
+    if aenderungen:
+        db.execute(update(Artikel), aenderungen)
+    return len(aenderungen)
+
+
+def prognose_job() -> None:
+    """Periodischer Job: Mindestbestände automatisch aus der Prognose setzen"""
+    db = SessionLocal()
+    try:
+        anzahl = uebernehme_mindestbestaende(db, berechne_mindestbestand_vorschlaege(db))
+        db.commit()
+        logger.info("Bedarfsprognose: %d Mindestbestände aktualisiert", anzahl)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,504 @@
+"""
+Rad-Zuweisung für typ-basierte Buchungen
+Typ-basierte Buchungen (2× E-Bike) reservieren nur Kapazität - hier bekommt jede
+Einheit ein konkretes Rad (vermietung_rad_zuweisungen), damit bei der Ausgabe
+feststeht, welches Rad rausgeht.
+
+Pro Typ Intervall-Partitionierung: Einheiten nach Beginn sortiert, jede bekommt
+ein Rad, das den ganzen Zeitraum frei ist (kein Radwechsel mitten in der Miete).
+Unter den freien Rädern gewinnt
+1. das bisherige Rad der Einheit (Neuplanung soll nichts umwerfen),
+2. das Rad mit den wenigsten Miettagen (gleichmäßiger Verschleiß).
+Räder mit fälliger Wartung bekommen keine Langmieten (ist_langmiete).
+Belegt sind Räder durch Einzel-Rad-Buchungen und bestehende Zuweisungen
+(aktiv/reserviert); pro Rad eine sortierte Liste, Freiprüfung per bisect.
+
+Inkrementell: nach jeder Buchungs-Änderung werden nur die offenen Einheiten im
+Zeitraum der Buchung verteilt. Passt eine Einheit nicht mehr (Lücken durch
+feste Zuweisungen), wird das Zeitfenster des Typs neu geplant - ausgegebene
+Räder (rad_abgeholt) bleiben dabei wo sie sind, auch wenn die Buchung selbst
+geändert (z.B. verlängert) wird.
+"""
+import logging
+from bisect import bisect_right, insort
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.leihrad import Leihrad
+from app.models.vermietung import Vermietung
+from app.models.vermietung_position import VermietungPosition
+from app.models.vermietung_zuweisung import VermietungRadZuweisung
+from app.utils.verfuegbarkeit import BELEGENDE_STATUS, einsatzbereit, ist_langmiete, vermietbar
+
+logger = logging.getLogger(__name__)
+
+Z = VermietungRadZuweisung
+
+# (von, bis, vermietung_id, position_id) - eine Einheit = ein Rad
+Einheit = Tuple[date, date, int, int]
+
+
+def plane(
+    einheiten: List[Einheit],
+    verschleiss: Dict[int, int],
+    belegung: Dict[int, List[Tuple[date, date]]],
+    bevorzugt: Optional[Dict[int, List[int]]] = None,
+    nur_kurz: Optional[Set[int]] = None,
+) -> Tuple[List[dict], List[Einheit]]:
+    """
+    Verteilt Einheiten auf Räder (ohne Datenbank)
+
+    Args:
+        einheiten: zu verteilende Einheiten
+        verschleiss: rad_id → bisherige Miettage (nur diese Räder kommen in Frage)
+        belegung: rad_id → belegte Zeiträume (disjunkt), wird fortgeschrieben
+        bevorzugt: position_id → bisherige Räder (Stabilität bei Neuplanung)
+        nur_kurz: Räder mit fälliger Wartung - nicht für Langmieten
+
+    Returns:
+        (neue Zuweisungen als Dicts, nicht verteilbare Einheiten)
+    """
+    bevorzugt = {pos: list(raeder) for pos, raeder in (bevorzugt or {}).items()}
+    verschleiss = dict(verschleiss)
+    belegt = {rad: sorted(belegung.get(rad, ())) for rad in verschleiss}
+    reihenfolge = sorted(verschleiss)
+    nur_kurz = nur_kurz or set()
+
+    def frei(rad: int, von: date, bis: date) -> bool:
+        zeitraeume = belegt[rad]
+        i = bisect_right(zeitraeume, (bis, date.max))
+        return i == 0 or zeitraeume[i - 1][1] < von
+
+    zuweisungen: List[dict] = []
+    offen: List[Einheit] = []
+    # Längere zuerst bei gleichem Beginn - die kurzen passen eher noch in Lücken
+    for einheit in sorted(einheiten, key=lambda e: (e[0], -e[1].toordinal(), e[2], e[3])):
+        von, bis, vermietung_id, position_id = einheit
+        gesperrt = nur_kurz if ist_langmiete(von, bis) else ()
+        rad = None
+        wunsch = bevorzugt.get(position_id)
+        while wunsch:
+            kandidat = wunsch.pop(0)
+            if kandidat in belegt and kandidat not in gesperrt and frei(kandidat, von, bis):
+                rad = kandidat
+                break
+        if rad is None:
+            freie = [r for r in reihenfolge if r not in gesperrt and frei(r, von, bis)]
+            if not freie:
+                offen.append(einheit)
+                continue
+            rad = min(freie, key=lambda r: (verschleiss[r], r))
+
+        insort(belegt[rad], (von, bis))
+        verschleiss[rad] += (bis - von).days + 1
+        zuweisungen.append({
+            "vermietung_id": vermietung_id,
+            "position_id": position_id,
+            "leihrad_id": rad,
+        })
+    return zuweisungen, offen
+
+
+# ============================================================================
+# Daten laden
+# ============================================================================
+
+def _verschleiss(db: Session, typ: str) -> Dict[int, int]:
+    """Vermietbare Räder des Typs → Miettage bisher (Einzel-Rad + Zuweisungen, ohne Stornos)"""
+    raeder = {
+        rad_id: 0
+        for (rad_id,) in db.query(Leihrad.id).filter(Leihrad.typ == typ, vermietbar())
+    }
+    if not raeder:
+        return raeder
+    tage = func.sum(Vermietung.bis_datum - Vermietung.von_datum + 1)
+    einzel = (
+        db.query(Vermietung.leihrad_id, tage)
+        .filter(Vermietung.leihrad_id.in_(raeder), Vermietung.status != "storniert")
+        .group_by(Vermietung.leihrad_id)
+    )
+    zugewiesen = (
+        db.query(Z.leihrad_id, func.sum(Z.bis_datum - Z.von_datum + 1))
+        .join(Vermietung, Vermietung.id == Z.vermietung_id)
+        .filter(Z.leihrad_id.in_(raeder), Vermietung.status != "storniert")
+        .group_by(Z.leihrad_id)
+    )
+    for rad_id, summe in einzel.union_all(zugewiesen):
+        raeder[rad_id] += int(summe or 0)
+    return raeder
+
+
+def _wartung_faellig(db: Session, raeder: List[int]) -> Set[int]:
+    """Räder mit fälliger/überfälliger Wartung"""
+    return {
+        rad_id
+        for (rad_id,) in db.query(Leihrad.id).filter(Leihrad.id.in_(raeder), ~einsatzbereit())
+    }
+
+
+def _belegung(db: Session, raeder: List[int], von: date, bis: date) -> Dict[int, List[Tuple[date, date]]]:
+    """Belegte Zeiträume der Räder im Fenster (Einzel-Rad-Buchungen + Zuweisungen)"""
+    einzel = db.query(Vermietung.leihrad_id, Vermietung.von_datum, Vermietung.bis_datum).filter(
+        Vermietung.leihrad_id.in_(raeder),
+        Vermietung.status.in_(BELEGENDE_STATUS),
+        Vermietung.von_datum <= bis,
+        Vermietung.bis_datum >= von,
+    )
+    zugewiesen = (
+        db.query(Z.leihrad_id, Z.von_datum, Z.bis_datum)
+        .join(Vermietung, Vermietung.id == Z.vermietung_id)
+        .filter(
+            Z.leihrad_id.in_(raeder),
+            Vermietung.status.in_(BELEGENDE_STATUS),
+            Z.von_datum <= bis,
+            Z.bis_datum >= von,
+        )
+    )
+    belegung: Dict[int, List[Tuple[date, date]]] = defaultdict(list)
+    for rad_id, a, b in einzel.union_all(zugewiesen):
+        belegung[rad_id].append((a, b))
+    return belegung
+
+
+def _offene_einheiten(db: Session, typ: str, von: date, bis: date) -> List[Einheit]:
+    """Einheiten des Typs aus Buchungen im Zeitraum, die noch kein Rad haben"""
+    zugewiesen = (
+        select(Z.position_id, func.count(Z.id).label("anzahl"))
+        .where(Z.rad_typ == typ, Z.von_datum <= bis, Z.bis_datum >= von)
+        .group_by(Z.position_id)
+        .subquery()
+    )
+    fehlend = VermietungPosition.anzahl - func.coalesce(zugewiesen.c.anzahl, 0)
+    zeilen = (
+        db.query(Vermietung.von_datum, Vermietung.bis_datum, Vermietung.id, VermietungPosition.id, fehlend)
+        .join(VermietungPosition, VermietungPosition.vermietung_id == Vermietung.id)
+        .outerjoin(zugewiesen, zugewiesen.c.position_id == VermietungPosition.id)
+        .filter(
+            VermietungPosition.rad_typ == typ,
+            Vermietung.status.in_(BELEGENDE_STATUS),
+            Vermietung.von_datum <= bis,
+            Vermietung.bis_datum >= von,
+            fehlend > 0,
+        )
+    )
+    return [(a, b, v_id, pos_id) for a, b, v_id, pos_id, n in zeilen for _ in range(n)]
+
+
+def ist_ausgegeben(vermietung: Vermietung) -> bool:
+    """Räder sind beim Kunden - ihre Zuweisungen bleiben fest"""
+    return vermietung.status == "aktiv" and bool(vermietung.rad_abgeholt)
+
+
+def _loese_fenster(db: Session, typ: str, von: date, bis: date) -> Dict[int, List[int]]:
+    """Zuweisungen im Fenster entfernen, außer bei ausgegebenen Rädern → bisherige Räder pro Position"""
+    fest = select(Vermietung.id).where(Vermietung.status == "aktiv", Vermietung.rad_abgeholt.is_(True))
+    zeilen = db.execute(
+        delete(Z)
+        .where(Z.rad_typ == typ, Z.von_datum <= bis, Z.bis_datum >= von, Z.vermietung_id.not_in(fest))
+        .returning(Z.position_id, Z.leihrad_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    bisher: Dict[int, List[int]] = defaultdict(list)
+    for position_id, rad_id in zeilen:
+        bisher[position_id].append(rad_id)
+    return bisher
+
+
+# ============================================================================
+# Planen
+# ============================================================================
+
+def plane_typ(
+    db: Session,
+    typ: str,
+    von: date,
+    bis: date,
+    neu: bool = False,
+    bevorzugt: Optional[Dict[int, List[int]]] = None,
+) -> Dict[str, int]:
+    """
+    Offene Einheiten eines Typs im Zeitraum verteilen
+
+    Args:
+        neu: bestehende Zuweisungen im Zeitraum vorher lösen (ausgegebene bleiben)
+        bevorzugt: position_id → bisherige Räder
+
+    Returns:
+        {"zugewiesen", "offen"}
+    """
+    bevorzugt = dict(bevorzugt or {})
+    if neu:
+        for position_id, raeder in _loese_fenster(db, typ, von, bis).items():
+            bevorzugt.setdefault(position_id, []).extend(raeder)
+
+    einheiten = _offene_einheiten(db, typ, von, bis)
+    if not einheiten:
+        return {"zugewiesen": 0, "offen": 0}
+
+    verschleiss = _verschleiss(db, typ)
+    fenster_von = min(e[0] for e in einheiten)
+    fenster_bis = max(e[1] for e in einheiten)
+    belegung = _belegung(db, list(verschleiss), fenster_von, fenster_bis)
+
+    nur_kurz = _wartung_faellig(db, list(verschleiss))
+    zuweisungen, offen = plane(einheiten, verschleiss, belegung, bevorzugt, nur_kurz)
+    if zuweisungen:
+        zeitraum = {(e[2], e[3]): (e[0], e[1]) for e in einheiten}
+        for z in zuweisungen:
+            z["von_datum"], z["bis_datum"] = zeitraum[(z["vermietung_id"], z["position_id"])]
+            z["rad_typ"] = typ
+        db.execute(Z.__table__.insert(), zuweisungen)
+    return {"zugewiesen": len(zuweisungen), "offen": len(offen)}
+
+
+def _zusammenhaengend(db: Session, typ: str, von: date, bis: date) -> Tuple[date, date]:
+    """Fenster auf alle Buchungen des Typs erweitern, die sich (über Ketten) mit von..bis überschneiden"""
+    while True:
+        a, b = (
+            db.query(func.min(Vermietung.von_datum), func.max(Vermietung.bis_datum))
+            .join(VermietungPosition, VermietungPosition.vermietung_id == Vermietung.id)
+            .filter(
+                VermietungPosition.rad_typ == typ,
+                Vermietung.status.in_(BELEGENDE_STATUS),
+                Vermietung.von_datum <= bis,
+                Vermietung.bis_datum >= von,
+            )
+            .one()
+        )
+        if a is None or (a >= von and b <= bis):
+            return von, bis
+        von, bis = min(a, von), max(b, bis)
+
+
+def verteile(
+    db: Session,
+    typ: str,
+    von: date,
+    bis: date,
+    bevorzugt: Optional[Dict[int, List[int]]] = None,
+) -> int:
+    """
+    Offene Einheiten eines Typs im Zeitraum verteilen - erst inkrementell, bei Lücken
+    die zusammenhängenden Buchungen um den Zeitraum neu planen
+
+    Returns:
+        Anzahl Einheiten ohne Rad
+    """
+    ergebnis = plane_typ(db, typ, von, bis, bevorzugt=bevorzugt)
+    if ergebnis["offen"]:
+        fenster_von, fenster_bis = _zusammenhaengend(db, typ, von, bis)
+        ergebnis = plane_typ(db, typ, fenster_von, fenster_bis, neu=True, bevorzugt=bevorzugt)
+    if ergebnis["offen"]:
+        logger.warning(
+            "%d× %s ohne Rad zwischen %s und %s (Räder nicht durchgehend frei)",
+            ergebnis["offen"], typ, von, bis,
+        )
+    return ergebnis["offen"]
+
+
+def weise_zu(db: Session, vermietung: Vermietung, bevorzugt: Optional[Dict[int, List[int]]] = None) -> int:
+    """
+    Räder für eine Buchung zuweisen (nach Anlegen bzw. Ändern, nach buche_belegung)
+
+    Abgeschlossene Buchungen behalten ihre bisherigen Räder (Verschleiß-Historie).
+
+    Returns:
+        Anzahl Einheiten ohne Rad
+    """
+    if vermietung.status == "abgeschlossen" and bevorzugt:
+        _schreibe_zurueck(db, vermietung, bevorzugt)
+        return 0
+    if vermietung.status not in BELEGENDE_STATUS or not vermietung.positionen:
+        return 0
+
+    offen = sum(
+        verteile(db, typ, vermietung.von_datum, vermietung.bis_datum, bevorzugt)
+        for typ in sorted({p.rad_typ for p in vermietung.positionen})
+    )
+    db.expire(vermietung, ["rad_zuweisungen"])
+    return offen
+
+
+def _schreibe_zurueck(db: Session, vermietung: Vermietung, bisher: Dict[int, List[int]]) -> None:
+    typen = {p.id: p.rad_typ for p in vermietung.positionen}
+    zeilen = [
+        {
+            "vermietung_id": vermietung.id,
+            "position_id": position_id,
+            "leihrad_id": rad_id,
+            "rad_typ": typen[position_id],
+            "von_datum": vermietung.von_datum,
+            "bis_datum": vermietung.bis_datum,
+        }
+        for position_id, raeder in bisher.items() if position_id in typen
+        for rad_id in raeder
+    ]
+    if zeilen:
+        db.execute(Z.__table__.insert(), zeilen)
+    db.expire(vermietung, ["rad_zuweisungen"])
+
+
+def gib_frei(db: Session, vermietung: Vermietung) -> Dict[int, List[int]]:
+    """
+    Zuweisungen der Buchung entfernen (vor einer Änderung)
+
+    Ausgegebene Buchungen (ist_ausgegeben) behalten ihre Räder - nach der Änderung
+    zieht behalte_ausgegebene den Zeitraum nach.
+
+    Returns:
+        position_id → bisherige Räder, für weise_zu(bevorzugt=...)
+    """
+    if ist_ausgegeben(vermietung):
+        return {}
+    zeilen = db.execute(
+        delete(Z)
+        .where(Z.vermietung_id == vermietung.id)
+        .returning(Z.position_id, Z.leihrad_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.expire(vermietung, ["rad_zuweisungen"])
+    bisher: Dict[int, List[int]] = defaultdict(list)
+    for position_id, rad_id in zeilen:
+        bisher[position_id].append(rad_id)
+    return dict(bisher)
+
+
+def behalte_ausgegebene(db: Session, vermietung: Vermietung) -> int:
+    """
+    Nach der Änderung einer ausgegebenen Buchung (statt weise_zu, nach buche_belegung)
+
+    Die Räder bleiben, die Zuweisungen bekommen den neuen Zeitraum. Anderen
+    Buchungen im neuen Zeitraum zugewiesene Räder weichen aus (wie mache_platz).
+    Storniert → Zuweisungen entfernen, abgeschlossen → bleiben (Verschleiß-Historie).
+
+    Returns:
+        Anzahl Einheiten ohne Rad (verdrängte Buchungen)
+    """
+    eigene = Z.vermietung_id == vermietung.id
+    if vermietung.status not in BELEGENDE_STATUS and vermietung.status != "abgeschlossen":
+        db.execute(delete(Z).where(eigene).execution_options(synchronize_session=False))
+        db.expire(vermietung, ["rad_zuweisungen"])
+        return 0
+
+    db.execute(
+        update(Z)
+        .where(eigene)
+        .values(von_datum=vermietung.von_datum, bis_datum=vermietung.bis_datum)
+        .execution_options(synchronize_session=False)
+    )
+    db.expire(vermietung, ["rad_zuweisungen"])
+    if vermietung.status not in BELEGENDE_STATUS:
+        return 0
+
+    raeder = [rad_id for (rad_id,) in db.query(Z.leihrad_id).filter(eigene)]
+    if not raeder:
+        return 0
+    andere = select(Vermietung.id).where(
+        Vermietung.status.in_(BELEGENDE_STATUS), Vermietung.id != vermietung.id
+    )
+    zeilen = db.execute(
+        delete(Z)
+        .where(
+            Z.leihrad_id.in_(raeder),
+            Z.vermietung_id.in_(andere),
+            Z.von_datum <= vermietung.bis_datum,
+            Z.bis_datum >= vermietung.von_datum,
+        )
+        .returning(Z.rad_typ, Z.von_datum, Z.bis_datum)
+        .execution_options(synchronize_session=False)
+    ).all()
+    return verteile_neu(db, _fenster(zeilen))
+
+
+def _fenster(zeilen) -> Dict[str, Tuple[date, date]]:
+    """(rad_typ, von, bis)-Zeilen → rad_typ → umfassender Zeitraum"""
+    fenster: Dict[str, Tuple[date, date]] = {}
+    for typ, a, b in zeilen:
+        alt = fenster.get(typ, (a, b))
+        fenster[typ] = (min(alt[0], a), max(alt[1], b))
+    return fenster
+
+
+def loese_rad(
+    db: Session,
+    leihrad_id: int,
+    von: Optional[date] = None,
+    bis: Optional[date] = None,
+) -> Dict[str, Tuple[date, date]]:
+    """
+    Rad fällt weg (gelöscht, Typ gewechselt, Wartung/defekt - oder nur im Zeitraum von..bis):
+    offene Zuweisungen entfernen
+
+    Returns:
+        rad_typ → betroffener Zeitraum - nach der Änderung mit verteile_neu verteilen
+    """
+    belegend = select(Vermietung.id).where(Vermietung.status.in_(BELEGENDE_STATUS))
+    bedingungen = [Z.leihrad_id == leihrad_id, Z.vermietung_id.in_(belegend)]
+    if von is not None and bis is not None:
+        bedingungen += [Z.von_datum <= bis, Z.bis_datum >= von]
+    zeilen = db.execute(
+        delete(Z)
+        .where(*bedingungen)
+        .returning(Z.rad_typ, Z.von_datum, Z.bis_datum)
+        .execution_options(synchronize_session=False)
+    ).all()
+    return _fenster(zeilen)
+
+
+def verteile_neu(db: Session, fenster: Dict[str, Tuple[date, date]]) -> int:
+    """Nach loese_rad: offene Einheiten der betroffenen Zeiträume verteilen → Anzahl ohne Rad"""
+    return sum(verteile(db, typ, von, bis) for typ, (von, bis) in sorted(fenster.items()))
+
+
+def mache_platz(db: Session, vermietung: Vermietung) -> bool:
+    """
+    Einzel-Rad-Buchung auf einem Rad, das typ-basierten Buchungen zugewiesen ist:
+    diese weichen auf andere Räder aus (Kapazität ist schon geprüft)
+
+    Returns:
+        False wenn das Rad im Zeitraum schon an eine typ-basierte Buchung ausgegeben ist
+    """
+    if vermietung.leihrad_id is None or vermietung.status not in BELEGENDE_STATUS:
+        return True
+    ausgegeben = (
+        db.query(Z.id)
+        .join(Vermietung, Vermietung.id == Z.vermietung_id)
+        .filter(
+            Z.leihrad_id == vermietung.leihrad_id,
+            Z.von_datum <= vermietung.bis_datum,
+            Z.bis_datum >= vermietung.von_datum,
+            Vermietung.status == "aktiv",
+            Vermietung.rad_abgeholt.is_(True),
+        )
+        .first()
+    )
+    if ausgegeben:
+        return False
+    verteile_neu(db, loese_rad(db, vermietung.leihrad_id, vermietung.von_datum, vermietung.bis_datum))
+    return True
+
+
+def neu_planen(db: Session, von: date, bis: date, typ: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Zuweisungen im Zeitraum komplett neu planen (alle Typen oder einer)
+
+    Bisherige Räder werden bevorzugt, ausgegebene bleiben fest.
+
+    Returns:
+        rad_typ → {"zugewiesen", "offen"}
+    """
+    if typ is not None:
+        typen = [typ]
+    else:
+        typen = [
+            t for (t,) in db.query(VermietungPosition.rad_typ)
+            .join(Vermietung, Vermietung.id == VermietungPosition.vermietung_id)
+            .filter(and_(Vermietung.von_datum <= bis, Vermietung.bis_datum >= von))
+            .distinct()
+            .order_by(VermietungPosition.rad_typ)
+        ]
+    return {t: plane_typ(db, t, von, bis, neu=True) for t in typen}
@@ -0,0 +1,78 @@
+"""
+Statuswechsel von Reparaturen
+Einzige Stelle, an der Reparatur.status geändert wird: setzt die Zeitstempel,
+schreibt jeden Wechsel in das Protokoll reparatur_statuswechsel und bucht
+reservierte Teile bei Abholung/Storno/Wiederaufnahme (siehe teilereservierung). Fertige
+Wartungsaufträge setzen die Wartung des Leihrads (siehe leihrad_wartung).
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.reparatur import Reparatur, ReparaturStatusWechsel
+from app.utils import leihrad_wartung, teilereservierung
+
+
+def protokolliere_statuswechsel(
+    db: Session,
+    reparatur: Reparatur,
+    von_status: Optional[str],
+    nach_status: str,
+    zeitpunkt: Optional[datetime] = None,
+) -> None:
+    """Hängt einen Eintrag an das Protokoll an (ohne Commit, auch für neue Reparaturen)"""
+    db.add(ReparaturStatusWechsel(
+        reparatur=reparatur,
+        von_status=von_status,
+        nach_status=nach_status,
+        zeitpunkt=zeitpunkt or datetime.now(),
+        meister=reparatur.meister_zugewiesen,
+    ))
+
+
+def setze_reparatur_status(db: Session, db_reparatur: Reparatur, status: str) -> bool:
+    """
+    Status setzen mit Auto-Datums-Logik und Protokoll (ohne Commit)
+
+    Returns:
+        True wenn sich der Status geändert hat
+
+    Raises:
+        ValueError wenn beim Wiederaufnehmen einer stornierten Reparatur
+        der Bestand für die Teile nicht mehr reicht
+    """
+    alter_status = db_reparatur.status
+    if status == alter_status:
+        return False
+    
+    if alter_status == 'storniert':
+        # Wiederaufnahme: beim Storno freigegebene Teile wieder reservieren,
+        # sonst würde bei Abholung nichts ausgebucht
+        teilereservierung.reserviere_wieder(db, db_reparatur)
+    
+    jetzt = datetime.now()
+    db_reparatur.status = status
+    
+    if status == 'in_arbeit' and not db_reparatur.begonnen_am:
+        db_reparatur.begonnen_am = jetzt
+    
+    if status == 'fertig' and not db_reparatur.fertig_am:
+        db_reparatur.fertig_am = jetzt
+        leihrad_wartung.wartung_erledigt(db, db_reparatur, jetzt)
+    
+    if status == 'abgeholt':
+        if not db_reparatur.abgeholt_am:
+            db_reparatur.abgeholt_am = jetzt
+        if not db_reparatur.bezahlt:
+            # Optional: Auto-Bezahlt bei Abholung
+            pass
+        # Reservierte Teile werden jetzt verbraucht
+        teilereservierung.verbrauche_reservierungen(db, db_reparatur)
+    
+    if status == 'storniert':
+        # Reservierungen freigeben (bei Wiederaufnahme neu reserviert)
+        teilereservierung.gib_reservierungen_frei(db, db_reparatur)
+    
+    protokolliere_statuswechsel(db, db_reparatur, alter_status, status, jetzt)
+    return True
@@ -0,0 +1,46 @@
+"""
+Volltextsuche für Reparaturen
+Sucht im per Trigger gepflegten Reparatur.suchvektor (GIN-Index) mit Präfix-Treffern
+und Ranking (Auftragsnummer > Kunde > Fahrrad > Mängeltext).
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import func
+
+from app.models.reparatur import Reparatur
+
+# Maximal so viele Suchbegriffe (Schutz vor riesigen Queries)
+MAX_BEGRIFFE = 8
+
+
+def reparatur_suchquery(suche: str) -> Optional[object]:
+    """
+    tsquery aus freiem Suchtext, z.B. "blaue gazelle" → (blaue:* | blau:*) & gazelle:*
+
+    Jeder Begriff trifft als Präfix, wörtlich (simple) oder gestemmt (german).
+    Alle Begriffe müssen vorkommen.
+
+    Returns:
+        SQL-Ausdruck oder None, wenn der Text keine suchbaren Begriffe enthält
+    """
+    begriffe = re.findall(r"\w+", suche.lower())[:MAX_BEGRIFFE]
+    if not begriffe:
+        return None
+
+    query = None
+    for begriff in begriffe:
+        praefix = f"{begriff}:*"
+        teil = func.to_tsquery("simple", praefix).op("||")(func.to_tsquery("german", praefix))
+        query = teil if query is None else query.op("&&")(teil)
+    return query
+
+
+def reparatur_suchfilter(tsquery):
+    """WHERE-Bedingung (nutzt den GIN-Index ix_reparaturen_suchvektor)"""
+    return Reparatur.suchvektor.op("@@")(tsquery)
+
+
+def reparatur_suchrang(tsquery):
+    """Relevanz für ORDER BY (höher = besser)"""
+    return func.ts_rank_cd(Reparatur.suchvektor, tsquery)
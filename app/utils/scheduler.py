@@ -0,0 +1,66 @@
+"""
+Hintergrund-Jobs (periodisch)
+Einfacher Thread-basierter Scheduler für Batch-Jobs wie Nachbestellung
+"""
+import logging
+import threading
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class _Job:
+    """Ein periodischer Job mit eigenem Daemon-Thread"""
+
+    def __init__(self, name: str, intervall_sekunden: float, funktion: Callable[[], object]):
+        self.name = name
+        self.intervall_sekunden = intervall_sekunden
+        self.funktion = funktion
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name=f"job-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        # Erster Lauf erst nach einem Intervall (Server soll erst hochfahren)
+        while not self._stop.wait(self.intervall_sekunden):
+            try:
+                self.funktion()
+            except Exception:
+                logger.exception("Hintergrund-Job '%s' fehlgeschlagen", self.name)
+
+
+_jobs: Dict[str, _Job] = {}
+
+
+def registriere_job(name: str, intervall_minuten: float, funktion: Callable[[], object]) -> None:
+    """
+    Registriert einen periodischen Job
+
+    Args:
+        name: Eindeutiger Name (für Logs)
+        intervall_minuten: Abstand zwischen zwei Läufen, <= 0 deaktiviert den Job
+        funktion: Wird ohne Argumente aufgerufen (öffnet eigene DB-Session)
+    """
+    if intervall_minuten <= 0:
+        return
+    _jobs[name] = _Job(name, intervall_minuten * 60, funktion)
+
+
+def starte_jobs() -> None:
+    """Startet alle registrierten Jobs (beim App-Start)"""
+    for job in _jobs.values():
+        job.start()
+        logger.info("Hintergrund-Job '%s' gestartet (alle %.0f s)", job.name, job.intervall_sekunden)
+
+
+def stoppe_jobs() -> None:
+    """Stoppt alle Jobs (beim Herunterfahren)"""
+    for job in _jobs.values():
+        job.stop()
+    _jobs.clear()
@@ -0,0 +1,85 @@
+"""
+Tarife der Leihräder
+Staffelpreise pro Rad-Typ (jeweils das günstigste Rad des Typs) als Tabelle im
+Speicher - Buchungen und Angebote rechnen ohne DB-Aggregat.
+
+Gecacht bis sich Preise, Typen oder der Bestand der Leihräder ändern
+(invalidiere_tarife nach dem Commit).
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.leihrad import Leihrad
+from app.utils import cache
+
+CACHE_NAMENSRAUM = "tarife"
+
+Tarif = Dict[str, Decimal]
+
+
+def _lade_tarife(db: Session) -> Dict[str, Tarif]:
+    tabelle = {}
+    for typ, p1, p3, p5 in (
+        db.query(
+            Leihrad.typ,
+            func.min(Leihrad.preis_1tag),
+            func.min(Leihrad.preis_3tage),
+            func.min(Leihrad.preis_5tage),
+        )
+        .filter(Leihrad.typ.isnot(None))
+        .group_by(Leihrad.typ)
+    ):
+        if p1 is None:
+            continue
+        p1 = Decimal(str(p1))
+        tabelle[typ] = {
+            "preis_1tag": p1,
+            "preis_3tage": Decimal(str(p3)) if p3 is not None else p1,
+            "preis_5tage": Decimal(str(p5)) if p5 is not None else p1,
+        }
+    return tabelle
+
+
+def tariftabelle(db: Session) -> Dict[str, Tarif]:
+    """Rad-Typ → {preis_1tag, preis_3tage, preis_5tage} (fehlende Staffeln = preis_1tag)"""
+    return cache.hole(CACHE_NAMENSRAUM, "tabelle", lambda: _lade_tarife(db))
+
+
+def invalidiere_tarife() -> None:
+    """Nach Anlegen/Ändern/Löschen von Leihrädern aufrufen"""
+    cache.invalidiere(CACHE_NAMENSRAUM)
+
+
+def anzahl_tage(von: date, bis: date) -> int:
+    """Miettage inklusive (mindestens 1)"""
+    return max(1, (bis - von).days + 1)
+
+
+def staffelpreis(tarif: Dict[str, Any], tage: int) -> Decimal:
+    """Tagespreis für ein Rad: ab 5 Tagen preis_5tage, ab 3 Tagen preis_3tage"""
+    if tage >= 5:
+        return Decimal(str(tarif.get('preis_5tage') or tarif['preis_1tag']))
+    if tage >= 3:
+        return Decimal(str(tarif.get('preis_3tage') or tarif['preis_1tag']))
+    return Decimal(str(tarif['preis_1tag']))
+
+
+def preise(tarif: Tarif, anzahl: int, von: date, bis: date) -> Dict[str, Any]:
+    """anzahl_tage, tagespreis (ein Rad) und gesamtpreis einer Position"""
+    tage = anzahl_tage(von, bis)
+    tagespreis = staffelpreis(tarif, tage)
+    return {
+        "anzahl_tage": tage,
+        "tagespreis": tagespreis,
+        "gesamtpreis": tagespreis * tage * anzahl,
+    }
+
+
+def angebot(tabelle: Dict[str, Tarif], rad_typ: str, anzahl: int, von: date, bis: date) -> Optional[Dict[str, Any]]:
+    """Preise einer Position aus der Tariftabelle, None wenn der Typ keinen Tarif hat"""
+    tarif = tabelle.get(rad_typ)
+    return preise(tarif, anzahl, von, bis) if tarif is not None else None
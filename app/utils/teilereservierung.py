@@ -0,0 +1,194 @@
+"""
+Teile-Reservierung für Reparaturen
+Teile-Positionen reservieren Bestand (Artikel.bestand_reserviert), statt ihn sofort
+abzuziehen. Bei Abholung wird die Reservierung zum Verbrauch (Abgang mit Historie),
+bei Storno/Löschen wieder freigegeben.
+
+Jede Buchung ist ein einzelnes UPDATE mit Bedingung im WHERE - gleichzeitige
+Reservierungen können den Bestand nicht überbuchen.
+"""
+import math
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+
+from app.models.artikel import Artikel
+from app.models.bestand_historie import BestandHistorie, BestandArt, BestandOrt
+from app.models.reparatur import Reparatur, ReparaturPosition
+
+RESERVIERT = "reserviert"
+VERBRAUCHT = "verbraucht"
+
+
+def stueck(menge) -> int:
+    """Positionsmenge (Decimal) → ganze Stück für den Bestand"""
+    return int(math.ceil(Decimal(str(menge or 0))))
+
+
+def ist_lagerteil(position: ReparaturPosition) -> bool:
+    return position.typ == "teil" and position.artikel_id is not None
+
+
+def verfuegbarer_bestand():
+    """SQL-Ausdruck: Lager + Werkstatt - reserviert (Grundlage für Mindestbestand/Nachbestellung)"""
+    return Artikel.bestand_lager + Artikel.bestand_werkstatt - Artikel.bestand_reserviert
+
+
+def verfuegbarkeit(db: Session, artikel_id: int) -> Optional[Tuple[int, int]]:
+    """(Gesamtbestand, reserviert) oder None wenn der Artikel nicht existiert"""
+    return (
+        db.query(Artikel.bestand_lager + Artikel.bestand_werkstatt, Artikel.bestand_reserviert)
+        .filter(Artikel.id == artikel_id)
+        .first()
+    )
+
+
+def reserviere(db: Session, artikel_id: int, menge: int) -> bool:
+    """
+    Reserviert menge Stück, wenn genug verfügbar ist (atomar)
+
+    Returns:
+        False wenn nicht genug verfügbar (oder Artikel unbekannt)
+    """
+    if menge <= 0:
+        return True
+    zeile = db.execute(
+        update(Artikel)
+        .where(
+            Artikel.id == artikel_id,
+            verfuegbarer_bestand() >= menge,
+        )
+        .values(bestand_reserviert=Artikel.bestand_reserviert + menge)
+        .returning(Artikel.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    return zeile is not None
+
+
+def _summen(positionen: Iterable[ReparaturPosition]) -> Dict[int, int]:
+    mengen: Dict[int, int] = defaultdict(int)
+    for position in positionen:
+        mengen[position.artikel_id] += stueck(position.menge)
+    return {artikel_id: menge for artikel_id, menge in mengen.items() if menge > 0}
+
+
+def freigeben(db: Session, mengen: Dict[int, int]) -> None:
+    """Gibt Reservierungen frei (artikel_id → Stück), ein UPDATE für alle Artikel"""
+    if not mengen:
+        return
+    db.execute(
+        update(Artikel)
+        .where(Artikel.id.in_(mengen))
+        .values(bestand_reserviert=Artikel.bestand_reserviert - case(mengen, value=Artikel.id, else_=0))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def buche_abgang(
+    db: Session,
+    mengen: Dict[int, int],
+    reparatur: Reparatur,
+    aus_reservierung: bool = True,
+) -> None:
+    """
+    Verbrauch buchen (erst Werkstatt, dann Lager) + Bestandshistorie
+
+    Ein UPDATE für alle Artikel; alle SET-Ausdrücke sehen die alten Werte.
+    """
+    if not mengen:
+        return
+    menge = case(mengen, value=Artikel.id, else_=0)
+    aus_werkstatt = case((Artikel.bestand_werkstatt >= menge, menge), else_=Artikel.bestand_werkstatt)
+    werte = {
+        "bestand_werkstatt": Artikel.bestand_werkstatt - aus_werkstatt,
+        "bestand_lager": Artikel.bestand_lager - (menge - aus_werkstatt),
+    }
+    if aus_reservierung:
+        werte["bestand_reserviert"] = Artikel.bestand_reserviert - menge
+
+    historie = []
+    grund = f"Reparatur {reparatur.auftragsnummer}"
+    for artikel_id, bestand in db.execute(
+        update(Artikel)
+        .where(Artikel.id.in_(mengen))
+        .values(**werte)
+        .returning(Artikel.id, Artikel.bestand_lager + Artikel.bestand_werkstatt)
+        .execution_options(synchronize_session=False)
+    ):
+        historie.append({
+            "artikel_id": artikel_id,
+            "art": BestandArt.ABGANG,
+            "ort": BestandOrt.WERKSTATT,
+            "menge": -mengen[artikel_id],
+            "bestand_vorher": bestand + mengen[artikel_id],
+            "bestand_nachher": bestand,
+            "grund": grund,
+            "referenz_typ": "reparatur",
+            "referenz_id": reparatur.id,
+        })
+    if historie:
+        db.execute(BestandHistorie.__table__.insert(), historie)
+
+
+def zuruecklegen(db: Session, artikel_id: int, menge: int, reparatur: Reparatur) -> None:
+    """Bereits verbrauchte Teile zurück in die Werkstatt (Position gelöscht/verringert)"""
+    if menge <= 0:
+        return
+    zeile = db.execute(
+        update(Artikel)
+        .where(Artikel.id == artikel_id)
+        .values(bestand_werkstatt=Artikel.bestand_werkstatt + menge)
+        .returning(Artikel.bestand_lager + Artikel.bestand_werkstatt)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if zeile is not None:
+        db.add(BestandHistorie(
+            artikel_id=artikel_id,
+            art=BestandArt.ZUGANG,
+            ort=BestandOrt.WERKSTATT,
+            menge=menge,
+            bestand_vorher=zeile[0] - menge,
+            bestand_nachher=zeile[0],
+            grund=f"Rückgabe aus Reparatur {reparatur.auftragsnummer}",
+            referenz_typ="reparatur",
+            referenz_id=reparatur.id,
+        ))
+
+
+def verbrauche_reservierungen(db: Session, reparatur: Reparatur) -> None:
+    """Bei Abholung: alle reservierten Teile der Reparatur als Verbrauch buchen"""
+    positionen = [p for p in reparatur.positionen if ist_lagerteil(p) and p.lager_status == RESERVIERT]
+    buche_abgang(db, _summen(positionen), reparatur)
+    for position in positionen:
+        position.lager_status = VERBRAUCHT
+
+
+def gib_reservierungen_frei(db: Session, reparatur: Reparatur) -> None:
+    """Bei Storno/Löschen: Reservierungen der Reparatur freigeben"""
+    positionen = [p for p in reparatur.positionen if ist_lagerteil(p) and p.lager_status == RESERVIERT]
+    freigeben(db, _summen(positionen))
+    for position in positionen:
+        position.lager_status = None
+
+
+def reserviere_wieder(db: Session, reparatur: Reparatur) -> None:
+    """
+    Bei Wiederaufnahme einer stornierten Reparatur: freigegebene Teile erneut reservieren
+
+    Raises:
+        ValueError wenn für einen Artikel nicht genug Bestand verfügbar ist
+        (bereits reservierte Artikel bleiben in der Session - Aufrufer rollt zurück)
+    """
+    positionen = [p for p in reparatur.positionen if ist_lagerteil(p) and p.lager_status is None]
+    for artikel_id, menge in _summen(positionen).items():
+        if not reserviere(db, artikel_id, menge):
+            bestand = verfuegbarkeit(db, artikel_id)
+            verfuegbar = bestand[0] - bestand[1] if bestand else 0
+            raise ValueError(
+                f"Nicht genügend Bestand für Artikel {artikel_id} (benötigt: {menge}, verfügbar: {verfuegbar})"
+            )
+    for position in positionen:
+        position.lager_status = RESERVIERT
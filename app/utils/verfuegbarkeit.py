@@ -0,0 +1,279 @@
+"""
+Verfügbarkeit der Leihräder
+Pflegt die Tagesbelegung pro Rad-Typ (leihrad_tagesbelegung) inkrementell bei jeder
+Vermietungs-Änderung und beantwortet Verfügbarkeiten für beliebige Zeiträume und
+alle Typen mit einer Query.
+
+Belegt ist ein Typ an einem Tag durch jede aktive/reservierte Vermietung, deren
+Zeitraum (von_datum..bis_datum, inklusive) den Tag enthält:
+- typ-basiert: Summe der Positionen pro rad_typ
+- Einzel-Rad ohne Positionen: anzahl_raeder (mind. 1) auf den Typ des Rads
+
+Für einen Zeitraum zählt die Spitzenbelegung (max. über die Tage) - zwei Buchungen,
+die sich im Zeitraum nicht überschneiden, belegen dasselbe Rad.
+
+Überbuchungsschutz in der Transaktion:
+- pro Typ: Tageszeilen in fester Reihenfolge (rad_typ, datum) sperren, dann nur
+  hochzählen, wenn belegt + anzahl ≤ vermietbare Räder des Typs (nicht in Wartung
+  oder defekt, reserviere_kapazitaet)
+- pro Rad: Exclusion-Constraint auf (leihrad_id, daterange(von_datum, bis_datum))
+Buchungen verschiedener Typen sperren disjunkte Zeilen und warten nicht aufeinander.
+
+Langmieten (ab LEIHRAD_WARTUNG_LANGMIETE_TAGE Miettagen) bekommen nur Räder ohne
+fällige Wartung (kontrollstatus ok, siehe leihrad_wartung) - die Kapazität zählt
+dann nur diese Räder.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.leihrad import Kontrollstatus, Leihrad, LeihradStatus
+from app.models.leihrad_belegung import LeihradTagesbelegung
+from app.models.vermietung import Vermietung
+from app.models.vermietung_position import VermietungPosition
+
+# Diese Status belegen Räder
+BELEGENDE_STATUS = ("aktiv", "reserviert")
+
+# Räder in diesen Status zählen zur Kapazität (wartung/defekt nicht)
+VERMIETBARE_STATUS = (LeihradStatus.verfuegbar, LeihradStatus.verliehen)
+
+# Exclusion-Constraint gegen Doppelbuchung desselben Rads (Migration f2a9d4c7e1b5)
+DOPPELBUCHUNG_CONSTRAINT = "vermietungen_leihrad_zeitraum_excl"
+
+
+def ist_langmiete(von: date, bis: date) -> bool:
+    """Miete lang genug, dass nur Räder ohne fällige Wartung in Frage kommen"""
+    grenze = settings.LEIHRAD_WARTUNG_LANGMIETE_TAGE
+    return grenze > 0 and (bis - von).days + 1 >= grenze
+
+
+def vermietbar():
+    """Filter: Rad kann vermietet werden (nicht in Wartung oder defekt)"""
+    return Leihrad.status.in_(VERMIETBARE_STATUS)
+
+
+def einsatzbereit():
+    """Filter: Rad ohne fällige Wartung"""
+    return or_(Leihrad.kontrollstatus.is_(None), Leihrad.kontrollstatus == Kontrollstatus.ok)
+
+
+def belegt_raeder(vermietung: Vermietung) -> bool:
+    return vermietung.status in BELEGENDE_STATUS
+
+
+def belegungsanteile(vermietung: Vermietung) -> Dict[str, int]:
+    """Rad-Typ → Anzahl Räder, die die Vermietung belegt"""
+    anteile: Dict[str, int] = defaultdict(int)
+    if vermietung.positionen:
+        for position in vermietung.positionen:
+            anteile[position.rad_typ] += position.anzahl or 0
+    elif vermietung.leihrad is not None and vermietung.leihrad.typ:
+        anteile[vermietung.leihrad.typ] += vermietung.anzahl_raeder or 1
+    return {typ: anzahl for typ, anzahl in anteile.items() if anzahl > 0}
+
+
+def _tage(von: date, bis: date) -> Iterable[date]:
+    for offset in range((bis - von).days + 1):
+        yield von + timedelta(days=offset)
+
+
+def aendere_belegung(db: Session, anteile: Dict[str, int], von: date, bis: date, vorzeichen: int = 1) -> None:
+    """
+    Addiert vorzeichen × anteile auf jeden Tag von..bis (ein Upsert für alle Typen/Tage)
+
+    Keine Kapazitätsprüfung (Freigaben, Korrekturen). Zeilen werden sortiert
+    geschrieben (rad_typ, datum) - dieselbe Sperr-Reihenfolge wie reserviere_kapazitaet,
+    gleichzeitige Buchungen können sich nicht verklemmen.
+    """
+    if not anteile or bis < von:
+        return
+    zeilen = [
+        {"datum": tag, "rad_typ": typ, "belegt": vorzeichen * anzahl}
+        for typ, anzahl in sorted(anteile.items())
+        for tag in _tage(von, bis)
+    ]
+    stmt = insert(LeihradTagesbelegung).values(zeilen)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[LeihradTagesbelegung.datum, LeihradTagesbelegung.rad_typ],
+        set_={"belegt": LeihradTagesbelegung.belegt + stmt.excluded.belegt},
+    ))
+
+
+def kapazitaet(db: Session, typen: Iterable[str], langmiete: bool = False) -> Dict[str, int]:
+    """Anzahl vermietbarer Räder pro Typ (bei Langmiete nur Räder ohne fällige Wartung)"""
+    query = db.query(Leihrad.typ, func.count(Leihrad.id)).filter(Leihrad.typ.in_(list(typen)), vermietbar())
+    if langmiete:
+        query = query.filter(einsatzbereit())
+    return dict(query.group_by(Leihrad.typ).all())
+
+
+def reserviere_kapazitaet(db: Session, anteile: Dict[str, int], von: date, bis: date) -> List[str]:
+    """
+    Zählt die Tagesbelegung hoch, wenn an jedem Tag genug Räder des Typs frei sind
+
+    Pro Typ: fehlende Tageszeilen anlegen, Zeilen sortiert sperren (FOR UPDATE),
+    dann ein bedingtes UPDATE - nur wenn alle Tage aktualisiert wurden, reicht die
+    Kapazität. Gleichzeitige Buchungen desselben Typs warten auf die Zeilensperren
+    und prüfen dann gegen den neuen Stand.
+
+    Returns:
+        Typen ohne ausreichende Kapazität (leer = gebucht). Dann ist die Belegung
+        evtl. teilweise erhöht - der Aufrufer muss die Transaktion zurückrollen.
+    """
+    if not anteile or bis < von:
+        return []
+    t = LeihradTagesbelegung
+    raeder = kapazitaet(db, anteile, ist_langmiete(von, bis))
+    tage = (bis - von).days + 1
+
+    stmt = insert(t).values([
+        {"datum": tag, "rad_typ": typ, "belegt": 0}
+        for typ in sorted(anteile)
+        for tag in _tage(von, bis)
+    ])
+    db.execute(stmt.on_conflict_do_nothing(index_elements=[t.datum, t.rad_typ]))
+
+    ueberbucht = []
+    for typ, anzahl in sorted(anteile.items()):
+        im_zeitraum = (t.rad_typ == typ, t.datum >= von, t.datum <= bis)
+        db.execute(select(t.datum).where(*im_zeitraum).order_by(t.datum).with_for_update()).all()
+        gebucht = db.execute(
+            update(t)
+            .where(*im_zeitraum, t.belegt + anzahl <= raeder.get(typ, 0))
+            .values(belegt=t.belegt + anzahl)
+            .returning(t.datum)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if len(gebucht) < tage:
+            ueberbucht.append(typ)
+    return ueberbucht
+
+
+def belege(db: Session, vermietung: Vermietung, pruefen: bool = True) -> List[str]:
+    """
+    Belegung der Vermietung eintragen (nach Anlegen bzw. nach einer Änderung)
+
+    Returns:
+        Überbuchte Typen (nur mit pruefen) - dann Transaktion zurückrollen
+    """
+    if not belegt_raeder(vermietung):
+        return []
+    anteile = belegungsanteile(vermietung)
+    if pruefen:
+        return reserviere_kapazitaet(db, anteile, vermietung.von_datum, vermietung.bis_datum)
+    aendere_belegung(db, anteile, vermietung.von_datum, vermietung.bis_datum, 1)
+    return []
+
+
+def gib_frei(db: Session, vermietung: Vermietung) -> None:
+    """Belegung der Vermietung austragen (vor einer Änderung bzw. vor dem Löschen)"""
+    if belegt_raeder(vermietung):
+        aendere_belegung(db, belegungsanteile(vermietung), vermietung.von_datum, vermietung.bis_datum, -1)
+
+
+def ist_doppelbuchung(fehler: IntegrityError) -> bool:
+    """IntegrityError durch den Exclusion-Constraint (Rad im Zeitraum schon gebucht)?"""
+    return DOPPELBUCHUNG_CONSTRAINT in str(fehler.orig)
+
+
+def neu_aufbauen(db: Session) -> int:
+    """
+    Baut die Tagesbelegung komplett aus den Vermietungen neu auf (2 Queries)
+
+    Returns:
+        Anzahl geschriebener Tageszeilen
+    """
+    typ_basiert = (
+        db.query(Vermietung.von_datum, Vermietung.bis_datum, VermietungPosition.rad_typ, VermietungPosition.anzahl)
+        .join(VermietungPosition, VermietungPosition.vermietung_id == Vermietung.id)
+        .filter(Vermietung.status.in_(BELEGENDE_STATUS))
+    )
+    hat_positionen = select(VermietungPosition.id).where(VermietungPosition.vermietung_id == Vermietung.id).exists()
+    einzelrad = (
+        db.query(Vermietung.von_datum, Vermietung.bis_datum, Leihrad.typ, func.coalesce(Vermietung.anzahl_raeder, 1))
+        .join(Leihrad, Leihrad.id == Vermietung.leihrad_id)
+        .filter(Vermietung.status.in_(BELEGENDE_STATUS), Leihrad.typ.isnot(None), ~hat_positionen)
+    )
+
+    belegung: Dict[tuple, int] = defaultdict(int)
+    for von, bis, typ, anzahl in typ_basiert.union_all(einzelrad):
+        for tag in _tage(von, bis):
+            belegung[(tag, typ)] += anzahl or 0
+
+    db.query(LeihradTagesbelegung).delete(synchronize_session=False)
+    zeilen = [{"datum": tag, "rad_typ": typ, "belegt": anzahl} for (tag, typ), anzahl in belegung.items() if anzahl]
+    if zeilen:
+        db.execute(LeihradTagesbelegung.__table__.insert(), zeilen)
+    return len(zeilen)
+
+
+# ============================================================================
+# Abfragen
+# ============================================================================
+
+def spitzenbelegung_pro_typ(von: date, bis: date):
+    """Subquery: rad_typ, belegt = höchste Tagesbelegung im Zeitraum"""
+    t = LeihradTagesbelegung
+    return (
+        select(t.rad_typ, func.max(t.belegt).label("belegt"))
+        .where(t.datum >= von, t.datum <= bis)
+        .group_by(t.rad_typ)
+        .subquery()
+    )
+
+
+def verfuegbarkeit_pro_typ(db: Session, von: Optional[date] = None, bis: Optional[date] = None) -> List[Any]:
+    """
+    Pro Rad-Typ: gesamt (alle Räder), vermietbar (nicht in Wartung/defekt), davon
+    einsatzbereit (ohne fällige Wartung), Min-Preise und belegt im Zeitraum - eine Query
+
+    Ohne Zeitraum ist belegt = 0.
+    """
+    query = db.query(
+        Leihrad.typ,
+        func.count(Leihrad.id).label("gesamt"),
+        func.count(Leihrad.id).filter(vermietbar()).label("vermietbar"),
+        func.count(Leihrad.id).filter(vermietbar(), einsatzbereit()).label("einsatzbereit"),
+        func.min(Leihrad.preis_1tag).label("preis_1tag"),
+        func.min(Leihrad.preis_3tage).label("preis_3tage"),
+        func.min(Leihrad.preis_5tage).label("preis_5tage"),
+    )
+    if von is None or bis is None:
+        query = query.add_columns(literal(0).label("belegt"))
+    else:
+        spitze = spitzenbelegung_pro_typ(von, bis)
+        query = (
+            query.add_columns(func.coalesce(func.max(spitze.c.belegt), 0).label("belegt"))
+            .outerjoin(spitze, spitze.c.rad_typ == Leihrad.typ)
+        )
+    return query.filter(Leihrad.typ.isnot(None)).group_by(Leihrad.typ).all()
+
+
+def verfuegbarkeit_gesamt(db: Session, von: date, bis: date) -> Dict[str, int]:
+    """
+    Alle Räder mit Typ, davon vermietbar (nicht in Wartung/defekt), davon ohne fällige
+    Wartung, und höchste Gesamtbelegung (Summe aller Typen) eines Tages im Zeitraum
+    """
+    t = LeihradTagesbelegung
+    pro_tag = (
+        select(func.sum(t.belegt).label("belegt"))
+        .where(t.datum >= von, t.datum <= bis)
+        .group_by(t.datum)
+        .subquery()
+    )
+    gesamt, mietbar, bereit, belegt = db.execute(
+        select(
+            select(func.count(Leihrad.id)).where(Leihrad.typ.isnot(None)).scalar_subquery(),
+            select(func.count(Leihrad.id)).where(Leihrad.typ.isnot(None), vermietbar()).scalar_subquery(),
+            select(func.count(Leihrad.id)).where(Leihrad.typ.isnot(None), vermietbar(), einsatzbereit()).scalar_subquery(),
+            select(func.coalesce(func.max(pro_tag.c.belegt), 0)).scalar_subquery(),
+        )
+    ).one()
+    return {"gesamt": int(gesamt), "vermietbar": int(mietbar), "einsatzbereit": int(bereit), "belegt": int(belegt)}
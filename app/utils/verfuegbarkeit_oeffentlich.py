@@ -0,0 +1,161 @@
+"""
+Öffentliche Verfügbarkeit für das Website-Widget
+Freie Räder pro Typ und Tag für die nächsten OEFFENTLICH_VERFUEGBARKEIT_TAGE Tage als
+fertig serialisierter Snapshot (JSON-Bytes + ETag) - Anfragen von außen lesen nur
+den Speicher, die Datenbank wird nur beim Neuaufbau gelesen (zwei Queries).
+
+Der Snapshot wird nie beim öffentlichen Abruf gebaut, sondern vorab:
+beim App-Start, nach Buchungs-/Leihrad-Änderungen und periodisch per Job
+(OEFFENTLICH_SNAPSHOT_INTERVALL_MINUTEN, Tageswechsel und Änderungen an der API
+vorbei). Schreibende Requests markieren ihn nur als veraltet (aktualisiere_snapshot
+nach dem Commit); ein Hintergrund-Thread baut gebündelt neu, mehrere Änderungen
+kurz hintereinander ergeben einen Neuaufbau. Enthält keine Kunden- oder
+Buchungsdaten, nur Zahlen pro Typ.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.leihrad import Leihrad
+from app.models.leihrad_belegung import LeihradTagesbelegung
+from app.utils import tarife
+from app.utils.verfuegbarkeit import vermietbar
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()  # schützt _aktuell
+_bau_lock = threading.Lock()  # nur ein Neuaufbau gleichzeitig
+_aktuell: Optional[Dict[str, Any]] = None
+
+# Wartezeit nach der ersten Änderung, um weitere Änderungen in denselben Neuaufbau
+# zu bündeln
+NEUAUFBAU_VERZOEGERUNG_SEKUNDEN = 0.5
+
+_veraltet = threading.Event()
+_neuaufbau_thread: Optional[threading.Thread] = None
+_neuaufbau_lock = threading.Lock()  # schützt _neuaufbau_thread
+
+
+def _ausgeblendet() -> set:
+    return {t.strip().lower() for t in settings.OEFFENTLICH_AUSGEBLENDETE_TYPEN.split(",") if t.strip()}
+
+
+def _berechne(heute: date, tage: int) -> Dict[str, Any]:
+    bis = heute + timedelta(days=tage - 1)
+    t = LeihradTagesbelegung
+    db = SessionLocal()
+    try:
+        raeder = dict(db.execute(
+            select(Leihrad.typ, func.count(Leihrad.id).filter(vermietbar()))
+            .where(Leihrad.typ.isnot(None))
+            .group_by(Leihrad.typ)
+        ).all())
+        belegt: Dict[str, Dict[date, int]] = defaultdict(dict)
+        for typ, datum, anzahl in db.execute(
+            select(t.rad_typ, t.datum, t.belegt).where(t.datum >= heute, t.datum <= bis, t.belegt > 0)
+        ):
+            belegt[typ][datum] = anzahl
+        tariftabelle = tarife.tariftabelle(db)
+    finally:
+        db.close()
+
+    ausgeblendet = _ausgeblendet()
+    tage_liste = [heute + timedelta(days=i) for i in range(tage)]
+    daten = {
+        "von": heute.isoformat(),
+        "bis": bis.isoformat(),
+        "typen": [
+            {
+                "typ": typ,
+                "preis_1tag": float(tariftabelle[typ]["preis_1tag"]) if typ in tariftabelle else None,
+                "frei": [max(0, anzahl - belegt[typ].get(tag, 0)) for tag in tage_liste],
+            }
+            for typ, anzahl in sorted(raeder.items())
+            if typ.lower() not in ausgeblendet
+        ],
+    }
+    inhalt = json.dumps(daten, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return {"inhalt": inhalt, "etag": f'"{hashlib.sha1(inhalt).hexdigest()[:20]}"'}
+
+
+def _baue(heute: Optional[date]) -> Dict[str, Any]:
+    global _aktuell
+    neu = _berechne(heute or date.today(), settings.OEFFENTLICH_VERFUEGBARKEIT_TAGE)
+    with _lock:
+        _aktuell = neu
+    return neu
+
+
+def baue_snapshot(heute: Optional[date] = None) -> Dict[str, Any]:
+    """Berechnet den Snapshot neu und veröffentlicht ihn (eigene DB-Session)"""
+    with _bau_lock:
+        return _baue(heute)
+
+
+def snapshot() -> Dict[str, Any]:
+    """
+    {"inhalt": JSON-Bytes, "etag"} - der zuletzt gebaute Snapshot aus dem Speicher
+
+    Nur falls noch keiner existiert (Start fehlgeschlagen) wird einmalig gebaut;
+    parallele Anfragen warten auf diesen einen Aufbau.
+    """
+    with _lock:
+        aktuell = _aktuell
+    if aktuell is not None:
+        return aktuell
+    with _bau_lock:
+        with _lock:
+            aktuell = _aktuell
+        return aktuell if aktuell is not None else _baue(None)
+
+
+def _neuaufbau_loop() -> None:
+    while True:
+        _veraltet.wait()
+        time.sleep(NEUAUFBAU_VERZOEGERUNG_SEKUNDEN)
+        # Änderungen ab hier lösen einen weiteren Durchlauf aus
+        _veraltet.clear()
+        try:
+            baue_snapshot()
+        except Exception:
+            # Alter Snapshot bleibt gültig, der Job baut beim nächsten Lauf neu
+            logger.exception("Öffentlicher Verfügbarkeits-Snapshot konnte nicht neu gebaut werden")
+
+
+def aktualisiere_snapshot() -> None:
+    """
+    Nach Änderungen an Vermietungen oder Leihrädern aufrufen (nach dem Commit)
+
+    Blockiert nicht: markiert den Snapshot als veraltet und weckt den
+    Hintergrund-Thread (wird beim ersten Aufruf gestartet).
+    """
+    global _neuaufbau_thread
+    _veraltet.set()
+    with _neuaufbau_lock:
+        if _neuaufbau_thread is None:
+            _neuaufbau_thread = threading.Thread(
+                target=_neuaufbau_loop, name="oeffentlich-snapshot", daemon=True
+            )
+            _neuaufbau_thread.start()
+
+
+def initialisiere_snapshot() -> None:
+    """Beim App-Start: Snapshot sofort bauen (schlägt das fehl, baut snapshot() bei Bedarf)"""
+    try:
+        baue_snapshot()
+    except Exception:
+        logger.exception("Öffentlicher Verfügbarkeits-Snapshot konnte beim Start nicht gebaut werden")
+
+
+def oeffentlich_snapshot_job() -> None:
+    """Periodischer Job: Snapshot neu bauen (Tageswechsel, Änderungen an der API vorbei)"""
+    baue_snapshot()
@@ -0,0 +1,336 @@
+"""
+Werkstattplanung - realistische Fertig-Termine für offene Reparaturen
+Schätzt die Arbeitsdauer aus der Historie (Positionen typ='arbeit' = Stunden),
+verteilt den offenen Bestand per Prioritäts-Heap auf die Mechaniker und rechnet
+die Arbeitsstunden in Kalenderzeit um (Arbeitstage/-zeiten aus den Settings).
+
+Eine Planung des gesamten offenen Bestands = 1 Query + O(n log n) in Python,
+die Historie wird einmal pro Tag berechnet.
+"""
+import heapq
+import logging
+import statistics
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.reparatur import Reparatur, ReparaturPosition
+from app.utils import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_NAMENSRAUM = "werkstattplanung"
+
+# Werden eingeplant; wartet_auf_teile ist blockiert und läuft nicht in die Kapazität
+PLAN_STATUS = ("angenommen", "in_arbeit")
+OFFENE_STATUS = PLAN_STATUS + ("wartet_auf_teile",)
+
+HISTORIE_TAGE = 365
+MIN_STICHPROBE = 5  # Ab so vielen Aufträgen gilt der Median eines Mechanikers
+OHNE_MECHANIKER = "Werkstatt"  # Wenn weder Settings noch Zuweisungen Mechaniker liefern
+
+
+# ============================================================================
+# Arbeitskalender
+# ============================================================================
+
+WOCHENTAGE = frozenset(range(7))  # 0 = Montag ... 6 = Sonntag
+
+# Fallback bei ungültigen Settings (wie die Defaults in config.py)
+STANDARD_ARBEITSTAGE = frozenset(range(6))
+STANDARD_STUNDEN_PRO_TAG = 8.0
+STANDARD_BEGINN_STUNDE = 9
+
+
+@lru_cache(maxsize=8)
+def _kalender(arbeitstage: str, stunden_pro_tag: float, beginn_stunde: int) -> Tuple[frozenset, float, int]:
+    """
+    Prüft die Werkstatt-Settings einmal pro Wertekombination → (Wochentage, Stunden, Beginn)
+
+    Ungültige Werte (keine/falsche Wochentage, Stunden ≤ 0, Beginn außerhalb 0..23)
+    würden die Kalender-Schleifen nie beenden - dann gelten die Standardwerte.
+    """
+    try:
+        tage = frozenset(int(t) for t in arbeitstage.split(",") if t.strip())
+    except ValueError:
+        tage = frozenset()
+    if not tage or not tage <= WOCHENTAGE:
+        logger.warning("WERKSTATT_ARBEITSTAGE=%r ungültig (0..6 erwartet) - Montag bis Samstag", arbeitstage)
+        tage = STANDARD_ARBEITSTAGE
+    if not 0 < stunden_pro_tag <= 24:
+        logger.warning("WERKSTATT_STUNDEN_PRO_TAG=%r ungültig - %s Stunden", stunden_pro_tag, STANDARD_STUNDEN_PRO_TAG)
+        stunden_pro_tag = STANDARD_STUNDEN_PRO_TAG
+    if not 0 <= beginn_stunde <= 23:
+        logger.warning("WERKSTATT_BEGINN_STUNDE=%r ungültig - %s Uhr", beginn_stunde, STANDARD_BEGINN_STUNDE)
+        beginn_stunde = STANDARD_BEGINN_STUNDE
+    return tage, float(stunden_pro_tag), beginn_stunde
+
+
+def _einstellungen() -> Tuple[frozenset, float, int]:
+    return _kalender(
+        settings.WERKSTATT_ARBEITSTAGE, settings.WERKSTATT_STUNDEN_PRO_TAG, settings.WERKSTATT_BEGINN_STUNDE
+    )
+
+
+def _tagesbeginn(tag: date) -> datetime:
+    return datetime.combine(tag, datetime.min.time()) + timedelta(hours=_einstellungen()[2])
+
+
+def naechste_arbeitszeit(zeitpunkt: datetime) -> datetime:
+    """Frühester Zeitpunkt ≥ zeitpunkt, an dem gearbeitet wird"""
+    tage, stunden_pro_tag, _ = _einstellungen()
+    tag = zeitpunkt.date()
+    # Spätestens nach einer Woche kommt ein Arbeitstag (mind. ein Wochentag 0..6)
+    for _ in range(8):
+        beginn = _tagesbeginn(tag)
+        ende = beginn + timedelta(hours=stunden_pro_tag)
+        if tag.weekday() in tage and zeitpunkt < ende:
+            return max(zeitpunkt, beginn)
+        tag += timedelta(days=1)
+    raise RuntimeError(f"Keine Arbeitszeit nach {zeitpunkt} gefunden (Arbeitstage {sorted(tage)})")
+
+
+def plus_arbeitsstunden(start: datetime, stunden: float) -> datetime:
+    """start + stunden Arbeitszeit (überspringt Feierabend und freie Tage)"""
+    _, stunden_pro_tag, _ = _einstellungen()
+    zeitpunkt = naechste_arbeitszeit(start)
+    rest = max(0.0, stunden)
+    # Jeder Durchlauf verbraucht einen ganzen Arbeitstag (bis auf den ersten)
+    for _ in range(int(rest // stunden_pro_tag) + 2):
+        tagesende = _tagesbeginn(zeitpunkt.date()) + timedelta(hours=stunden_pro_tag)
+        verfuegbar = (tagesende - zeitpunkt).total_seconds() / 3600
+        if rest <= verfuegbar:
+            return zeitpunkt + timedelta(hours=rest)
+        rest -= verfuegbar
+        zeitpunkt = naechste_arbeitszeit(tagesende)
+    raise RuntimeError(f"Arbeitszeit ab {start} + {stunden} h nicht berechenbar")
+
+
+# ============================================================================
+# Dauer-Schätzung aus der Historie
+# ============================================================================
+
+def _berechne_dauer_historie(db: Session) -> Dict[str, Any]:
+    """Median der Arbeitsstunden abgeschlossener Aufträge, gesamt und pro Mechaniker"""
+    seit = datetime.now() - timedelta(days=HISTORIE_TAGE)
+    zeilen = (
+        db.query(Reparatur.meister_zugewiesen, func.sum(ReparaturPosition.menge))
+        .join(ReparaturPosition, ReparaturPosition.reparatur_id == Reparatur.id)
+        .filter(
+            ReparaturPosition.typ == "arbeit",
+            Reparatur.fertig_am.isnot(None),
+            Reparatur.fertig_am >= seit,
+        )
+        .group_by(Reparatur.id, Reparatur.meister_zugewiesen)
+        .all()
+    )
+
+    alle: List[float] = []
+    pro_mechaniker: Dict[str, List[float]] = {}
+    for meister, stunden in zeilen:
+        if stunden is None or stunden <= 0:
+            continue
+        alle.append(float(stunden))
+        if meister:
+            pro_mechaniker.setdefault(meister, []).append(float(stunden))
+
+    return {
+        "gesamt": statistics.median(alle) if alle else settings.WERKSTATT_STANDARD_STUNDEN,
+        "anzahl": len(alle),
+        "pro_mechaniker": {
+            meister: statistics.median(werte)
+            for meister, werte in pro_mechaniker.items()
+            if len(werte) >= MIN_STICHPROBE
+        },
+    }
+
+
+def dauer_historie(db: Session) -> Dict[str, Any]:
+    """Historische Auftragsdauer (gecacht pro Tag, nur der aktuelle Tag bleibt im Speicher)"""
+    return cache.hole(CACHE_NAMENSRAUM, date.today(), lambda: _berechne_dauer_historie(db), max_eintraege=1)
+
+
+def schaetze_stunden(historie: Dict[str, Any], meister: Optional[str], erfasste_stunden: Optional[float]) -> float:
+    """Erfasste Arbeitspositionen, sonst Median des Mechanikers, sonst Gesamt-Median"""
+    if erfasste_stunden and erfasste_stunden > 0:
+        return float(erfasste_stunden)
+    if meister and meister in historie["pro_mechaniker"]:
+        return historie["pro_mechaniker"][meister]
+    return historie["gesamt"]
+
+
+# ============================================================================
+# Planung
+# ============================================================================
+
+def _lade_offene_auftraege(db: Session) -> List[Any]:
+    """Offene Aufträge inkl. Summe der erfassten Arbeitsstunden (eine Query)"""
+    arbeit = (
+        db.query(
+            ReparaturPosition.reparatur_id.label("reparatur_id"),
+            func.sum(ReparaturPosition.menge).label("stunden"),
+        )
+        .filter(ReparaturPosition.typ == "arbeit")
+        .group_by(ReparaturPosition.reparatur_id)
+        .subquery()
+    )
+    return (
+        db.query(
+            Reparatur.id,
+            Reparatur.auftragsnummer,
+            Reparatur.status,
+            Reparatur.prioritaet,
+            Reparatur.meister_zugewiesen,
+            Reparatur.reparaturdatum,
+            Reparatur.fertig_bis,
+            arbeit.c.stunden,
+        )
+        .outerjoin(arbeit, arbeit.c.reparatur_id == Reparatur.id)
+        .filter(Reparatur.status.in_(OFFENE_STATUS))
+        .all()
+    )
+
+
+def _mechaniker(auftraege: List[Any]) -> List[str]:
+    namen = [m.strip() for m in settings.WERKSTATT_MECHANIKER.split(",") if m.strip()]
+    for auftrag in auftraege:
+        if auftrag.meister_zugewiesen and auftrag.meister_zugewiesen not in namen:
+            namen.append(auftrag.meister_zugewiesen)
+    return namen or [OHNE_MECHANIKER]
+
+
+def _prioritaet_schluessel(auftrag: Any) -> Tuple:
+    """Angefangene zuerst, dann Priorität (1 = sehr dringend), zugesagter Termin, Eingang"""
+    return (
+        0 if auftrag.status == "in_arbeit" else 1,
+        auftrag.prioritaet if auftrag.prioritaet is not None else 3,
+        auftrag.fertig_bis or datetime.max,
+        auftrag.reparaturdatum or datetime.max,
+        auftrag.id if auftrag.id is not None else float("inf"),
+    )
+
+
+def plane(
+    db: Session,
+    jetzt: Optional[datetime] = None,
+    neuer_auftrag: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Plant alle offenen Aufträge (angenommen, in_arbeit) auf die Mechaniker
+
+    - Aufträge werden nach Priorität aus einem Heap genommen
+    - Zugewiesene Aufträge bleiben beim Mechaniker, sonst der, der am frühesten frei ist
+    - nicht_haltbar: zugesagtes fertig_bis liegt vor dem geplanten Ende
+
+    Args:
+        neuer_auftrag: Optionaler virtueller Auftrag (id=None) für Termin-Vorschläge
+
+    Returns:
+        {"auftraege": [...], "mechaniker": [...], "wartet_auf_teile": int, "nicht_haltbar": int}
+    """
+    jetzt = jetzt or datetime.now()
+    historie = dauer_historie(db)
+    offene = _lade_offene_auftraege(db)
+
+    geplant = [a for a in offene if a.status in PLAN_STATUS]
+    if neuer_auftrag is not None:
+        geplant.append(neuer_auftrag)
+
+    heap = [(_prioritaet_schluessel(a), index) for index, a in enumerate(geplant)]
+    heapq.heapify(heap)
+
+    start = naechste_arbeitszeit(jetzt)
+    frei_ab = {name: start for name in _mechaniker(geplant)}
+    last = {name: {"auftraege": 0, "stunden": 0.0} for name in frei_ab}
+
+    ergebnis = []
+    while heap:
+        _, index = heapq.heappop(heap)
+        auftrag = geplant[index]
+
+        mechaniker = auftrag.meister_zugewiesen or min(frei_ab, key=lambda name: (frei_ab[name], name))
+        stunden = schaetze_stunden(historie, auftrag.meister_zugewiesen, auftrag.stunden)
+
+        beginn = naechste_arbeitszeit(frei_ab[mechaniker])
+        ende = plus_arbeitsstunden(beginn, stunden)
+        frei_ab[mechaniker] = ende
+        last[mechaniker]["auftraege"] += 1
+        last[mechaniker]["stunden"] += stunden
+
+        nicht_haltbar = auftrag.fertig_bis is not None and auftrag.fertig_bis < ende
+        ergebnis.append({
+            "reparatur_id": auftrag.id,
+            "auftragsnummer": auftrag.auftragsnummer,
+            "status": auftrag.status,
+            "prioritaet": auftrag.prioritaet,
+            "mechaniker": mechaniker,
+            "geschaetzte_stunden": round(stunden, 2),
+            "geplant_beginn": beginn,
+            "geplant_fertig": ende,
+            "zugesagt_fertig_bis": auftrag.fertig_bis,
+            "nicht_haltbar": nicht_haltbar,
+            "verzug_stunden": (
+                round((ende - auftrag.fertig_bis).total_seconds() / 3600, 1) if nicht_haltbar else 0.0
+            ),
+        })
+
+    return {
+        "erstellt_am": jetzt,
+        "auftraege": ergebnis,
+        "mechaniker": [
+            {
+                "name": name,
+                "auftraege": last[name]["auftraege"],
+                "stunden": round(last[name]["stunden"], 2),
+                "frei_ab": frei_ab[name],
+            }
+            for name in frei_ab
+        ],
+        "wartet_auf_teile": sum(1 for a in offene if a.status == "wartet_auf_teile"),
+        "nicht_haltbar": sum(1 for e in ergebnis if e["nicht_haltbar"]),
+    }
+
+
+def fertig_bis_vorschlag(
+    db: Session,
+    prioritaet: int = 3,
+    meister: Optional[str] = None,
+    stunden: Optional[float] = None,
+    jetzt: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Realistischer fertig_bis-Termin für einen neuen Auftrag (bei der Annahme)
+
+    Plant den gesamten offenen Bestand plus den neuen Auftrag neu.
+    """
+    jetzt = jetzt or datetime.now()
+    neu = _NeuerAuftrag(prioritaet=prioritaet, meister_zugewiesen=meister, stunden=stunden, reparaturdatum=jetzt)
+    plan = plane(db, jetzt=jetzt, neuer_auftrag=neu)
+    eintrag = next(e for e in plan["auftraege"] if e["reparatur_id"] is None)
+    return {
+        "fertig_bis": eintrag["geplant_fertig"],
+        "mechaniker": eintrag["mechaniker"],
+        "geschaetzte_stunden": eintrag["geschaetzte_stunden"],
+        "auftraege_davor": sum(
+            1 for e in plan["auftraege"]
+            if e["mechaniker"] == eintrag["mechaniker"] and e["geplant_fertig"] <= eintrag["geplant_beginn"]
+        ),
+    }
+
+
+class _NeuerAuftrag:
+    """Virtueller Auftrag für fertig_bis_vorschlag (gleiche Attribute wie eine Query-Zeile)"""
+
+    def __init__(self, prioritaet: int, meister_zugewiesen: Optional[str], stunden: Optional[float], reparaturdatum: datetime):
+        self.id = None
+        self.auftragsnummer = None
+        self.status = "angenommen"
+        self.prioritaet = prioritaet
+        self.meister_zugewiesen = meister_zugewiesen
+        self.reparaturdatum = reparaturdatum
+        self.fertig_bis = None
+        self.stunden = stunden
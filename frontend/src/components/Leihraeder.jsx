@@ -8,7 +8,7 @@ import VermietungModal from './VermietungModal'
 export default function Leihraeder({ showToast }) {
   const [activeTab, setActiveTab] = useState('timeline') // ✅ Timeline als Default
   const [leihraeder, setLeihraeder] = useState([])
-  const [vermietungen, setVermietungen] = useState([])
+  const [belegung, setBelegung] = useState(null) // Belegungsmatrix für den Jahreskalender
   const [loading, setLoading] = useState(true)
   const [showVermietungModal, setShowVermietungModal] = useState(false)
   const [selectedLeihrad, setSelectedLeihrad] = useState(null)
@@ -28,16 +28,22 @@ export default function Leihraeder({ showToast }) {
 
   const loadData = async () => {
     try {
-      const [raederRes, vermietungenRes] = await Promise.all([
+      // Kalender: 365 Tage ab heute als Belegungsmatrix (statt aller Vermietungen)
+      const heute = new Date()
+      const bis = new Date(heute)
+      bis.setDate(heute.getDate() + 364)
+      const isoDatum = (d) => `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`
+
+      const [raederRes, belegungRes] = await Promise.all([
         fetch('/api/leihraeder/'),
-        fetch('/api/vermietungen/')
+        fetch(`/api/vermietungen/belegung?von=${isoDatum(heute)}&bis=${isoDatum(bis)}`)
       ])
       
       const raederData = await raederRes.json()
-      const vermietungenData = await vermietungenRes.json()
+      const belegungData = await belegungRes.json()
       
       setLeihraeder(raederData.items || [])
-      setVermietungen(vermietungenData.items || [])
+      setBelegung(belegungRes.ok ? belegungData : null)
     } catch (error) {
       showToast?.('Fehler beim Laden', 'error')
     } finally {
@@ -179,7 +185,7 @@ export default function Leihraeder({ showToast }) {
       {activeTab === 'kalender' && (
         <LeihraederKalender
           leihraeder={leihraeder}
-          vermietungen={vermietungen}
+          belegung={belegung}
           onVermietungClick={handleVermietungClick}
           onDateClick={handleDateClick}
         />
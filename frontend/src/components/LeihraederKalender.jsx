@@ -1,6 +1,6 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useMemo } from 'react'
 
-function LeihraederKalender({ leihraeder, vermietungen, onVermietungClick, onDateClick }) {
+function LeihraederKalender({ leihraeder, belegung, onVermietungClick, onDateClick }) {
   const [scrollDate, setScrollDate] = useState(new Date())
   const [visibleMonths, setVisibleMonths] = useState(3)
 
@@ -20,22 +20,24 @@ function LeihraederKalender({ leihraeder, vermietungen, onVermietungClick, onDat
 
   const days = generateDays()
 
-  // Prüfen ob Rad an einem Tag vermietet ist
-  const getVermietungForDate = (leihradId, date) => {
-    if (!vermietungen) return null
-    
-    return vermietungen.find(v => {
-      const von = new Date(v.von_datum)
-      const bis = new Date(v.bis_datum)
-      von.setHours(0, 0, 0, 0)
-      bis.setHours(0, 0, 0, 0)
-      
-      return v.leihrad_id === leihradId && 
-             date >= von && 
-             date <= bis &&
-             v.status !== 'storniert'
+  // Rad-ID → Buchung pro Tag-Index, einmal aus den Segmenten der Belegungsmatrix
+  const zellen = useMemo(() => {
+    const proRad = {}
+    if (!belegung) return proRad
+    const buchungen = {}
+    belegung.buchungen.forEach(b => { buchungen[b.id] = b })
+    belegung.raeder.forEach(rad => {
+      const tage = new Array(belegung.tage).fill(null)
+      rad.segmente.forEach(([start, anzahl, buchungId]) => {
+        for (let d = start; d < start + anzahl; d++) tage[d] = buchungen[buchungId]
+      })
+      proRad[rad.id] = tage
     })
-  }
+    return proRad
+  }, [belegung])
+
+  // Prüfen ob Rad an einem Tag vermietet ist (Tag-Index ab heute = ab belegung.von)
+  const getVermietungForDate = (leihradId, idx) => zellen[leihradId]?.[idx] || null
 
   // Monat Header generieren
   const getMonthHeaders = () => {
@@ -84,7 +86,7 @@ function LeihraederKalender({ leihraeder, vermietungen, onVermietungClick, onDat
     if (!vermietung) {
       return `${leihrad.inventarnummer}\n${date.toLocaleDateString('de-DE')}\nVerfügbar - Klicken zum Vermieten`
     }
-    return `${leihrad.inventarnummer}\n${vermietung.kunde_name}\n${date.toLocaleDateString('de-DE')}\n${vermietung.status}`
+    return `${leihrad.inventarnummer}\n${vermietung.kunde}\n${date.toLocaleDateString('de-DE')}\n${vermietung.status}`
   }
 
   return (
@@ -196,7 +198,7 @@ function LeihraederKalender({ leihraeder, vermietungen, onVermietungClick, onDat
                 {/* Kalender Zellen */}
                 <div className="flex">
                   {days.map((day, idx) => {
-                    const vermietung = getVermietungForDate(leihrad.id, day)
+                    const vermietung = getVermietungForDate(leihrad.id, idx)
                     const isWeekend = day.getDay() === 0 || day.getDay() === 6
                     
                     return (
@@ -38,32 +38,34 @@ const LeihraederTimeline = ({ onNewBuchung, onEditBuchung, onDetailsClick, refre
     setError(null);
 
     try {
-      const response = await fetch('/api/vermietungen/?limit=500');
+      // Belegungsmatrix für den sichtbaren Zeitraum (nur Anzeige-Felder, kein Limit)
+      const heute = new Date();
+      const vonKey = format(heute, 'yyyy-MM-dd');
+      const bisKey = format(addDays(heute, tageAnzahl - 1), 'yyyy-MM-dd');
+      const response = await fetch(`/api/vermietungen/belegung?von=${vonKey}&bis=${bisKey}`);
       if (!response.ok) throw new Error('Fehler beim Laden der Buchungen');
       
-      const data = await response.json();
-      const vermietungen = data.items || [];
+      const matrix = await response.json();
 
-      const aktiveBuchungen = vermietungen.filter(v => 
+      const aktiveBuchungen = matrix.buchungen.filter(v => 
         v.status === 'aktiv' || v.status === 'reserviert'
       );
 
-      // Gesamt-Räder dynamisch laden
-      const heute = new Date();
-      const verfResponse = await fetch(
-        `/api/vermietungen/verfuegbarkeit/?von_datum=${format(heute, 'yyyy-MM-dd')}&bis_datum=${format(heute, 'yyyy-MM-dd')}`
-      );
-      if (verfResponse.ok) {
-        const verfData = await verfResponse.json();
-        setGesamtRaeder(verfData.gesamt || 0);
-      }
+      // Gesamt-Räder = alle Räder mit Typ, Belegung pro Tag aus den Typ-Segmenten
+      const gesamt = matrix.typen.reduce((sum, t) => sum + t.gesamt, 0);
+      setGesamtRaeder(gesamt);
+      const belegtProTag = new Array(matrix.tage).fill(0);
+      matrix.typen.forEach(t => {
+        t.segmente.forEach(([start, tage, belegt]) => {
+          for (let d = start; d < start + tage; d++) belegtProTag[d] += belegt;
+        });
+      });
 
-      // Typ-Verfügbarkeit laden - ✅ MIT HEUTE-DATUM!
+      // Typ-Verfügbarkeit (Preise, Labels) - ✅ MIT HEUTE-DATUM!
       let typVerfuegbarkeit = null;
       try {
-        const heuteDatum = format(heute, 'yyyy-MM-dd');
         const typResponse = await fetch(
-          `/api/vermietungen/verfuegbarkeit-pro-typ/?von_datum=${heuteDatum}&bis_datum=${heuteDatum}`
+          `/api/vermietungen/verfuegbarkeit-pro-typ/?von_datum=${vonKey}&bis_datum=${vonKey}`
         );
         if (typResponse.ok) {
           typVerfuegbarkeit = await typResponse.json();
@@ -104,16 +106,9 @@ const LeihraederTimeline = ({ onNewBuchung, onEditBuchung, onDetailsClick, refre
           }
         });
 
-        // Verfügbarkeit - ✅ FIX: Positionen berücksichtigen
-        let belegtAnzahl = 0;
-        buchungenLaufenAmTag.forEach(v => {
-          if (v.positionen && v.positionen.length > 0) {
-            belegtAnzahl += v.positionen.reduce((sum, p) => sum + p.anzahl, 0);
-          } else {
-            belegtAnzahl += v.anzahl_raeder || 1;
-          }
-        });
-        const verfuegbar = Math.max(0, gesamtRaeder - belegtAnzahl);
+        // Verfügbarkeit aus der Belegungsmatrix
+        const belegtAnzahl = belegtProTag[i] || 0;
+        const verfuegbar = Math.max(0, gesamt - belegtAnzahl);
 
         // Sortierung
         const sortByTime = (a, b) => {
@@ -127,7 +122,7 @@ const LeihraederTimeline = ({ onNewBuchung, onEditBuchung, onDetailsClick, refre
           datumKey: tagKey,
           verfuegbar,
           belegt: belegtAnzahl,
-          gesamt: gesamtRaeder,
+          gesamt,
           buchungenStart: buchungenStart.sort(sortByTime),
           buchungenLaufend: buchungenLaufend.sort(sortByTime),
           buchungenEnde: buchungenEnde.sort(sortByTime),
@@ -195,25 +190,24 @@ const LeihraederTimeline = ({ onNewBuchung, onEditBuchung, onDetailsClick, refre
     );
   };
 
-  const getRadAnzeige = (buchung) => {
-    const hatPositionen = buchung.positionen && buchung.positionen.length > 0;
-    const anzahlRaeder = buchung.anzahl_raeder || 1;
-    
-    if (hatPositionen) {
-      return buchung.positionen.map(p => `${p.anzahl}× ${p.rad_typ}`).join(', ');
-    } else if (buchung.leihrad?.typ) {
-      return `${anzahlRaeder}× ${buchung.leihrad.typ}`;
-    } else {
-      return `${anzahlRaeder} Räder`;
-    }
-  };
+  // Buchungen kommen aus der Belegungsmatrix: raeder/kunde sind fertige Labels
+  const getRadAnzeige = (buchung) => buchung.raeder || `${buchung.anzahl_raeder || 1} Räder`;
+
+  const getKundenName = (buchung) => buchung.kunde || 'Unbekannt';
 
-  const getKundenName = (buchung) => {
-    if (buchung.kunde?.vorname && buchung.kunde?.nachname) {
-      return `${buchung.kunde.vorname} ${buchung.kunde.nachname}`;
+  // Bearbeiten/Details brauchen die vollständige Vermietung (Positionen, Kaution, ...)
+  const mitDetails = (callback) => async (buchung) => {
+    if (!callback) return;
+    try {
+      const response = await fetch(`/api/vermietungen/${buchung.id}`);
+      if (!response.ok) throw new Error('Fehler beim Laden der Buchung');
+      callback(await response.json());
+    } catch (err) {
+      alert(err.message);
     }
-    return buchung.kunde_name || 'Unbekannt';
   };
+  const handleDetails = mitDetails(onDetailsClick);
+  const handleBearbeiten = mitDetails(onEditBuchung);
 
   // 🎯 HAUPTBUCHUNG (Start-Tag)
   const BuchungsCardStart = ({ buchung }) => {
@@ -234,8 +228,8 @@ const LeihraederTimeline = ({ onNewBuchung, onEditBuchung, onDetailsClick, refre
             <div className="flex-1 min-w-0">
               <div className="flex items-center gap-2">
                 <span className="font-semibold text-gray-900 truncate">{kundenName}</span>
-                {buchung.kunde?.kundennummer && (
-                  <span className="text-xs text-gray-500">({buchung.kunde.kundennummer})</span>
+                {buchung.kundennummer && (
+                  <span className="text-xs text-gray-500">({buchung.kundennummer})</span>
                 )}
               </div>
               <div className="flex items-center gap-3 text-xs text-gray-600 mt-0.5">
@@ -273,14 +267,14 @@ const LeihraederTimeline = ({ onNewBuchung, onEditBuchung, onDetailsClick, refre
               
               {/* Details, Edit, Löschen - immer sichtbar */}
               <button
-                onClick={() => onDetailsClick?.(buchung)}
+                onClick={() => handleDetails(buchung)}
                 className="p-1.5 text-gray-600 hover:bg-gray-100 rounded transition-colors"
                 title="Details"
               >
                 <Info size={14} />
               </button>
               <button
-                onClick={() => onEditBuchung?.(buchung)}
+                onClick={() => handleBearbeiten(buchung)}
                 className="p-1.5 text-blue-600 hover:bg-blue-50 rounded transition-colors"
                 title="Bearbeiten"
               >
@@ -348,14 +342,14 @@ const LeihraederTimeline = ({ onNewBuchung, onEditBuchung, onDetailsClick, refre
             </div>
             <div className="flex gap-1">
               <button
-                onClick={(e) => { e.stopPropagation(); onDetailsClick?.(buchung); }}
+                onClick={(e) => { e.stopPropagation(); handleDetails(buchung); }}
                 className="p-1 text-gray-600 hover:bg-white rounded"
                 title="Details"
               >
                 <Info size={12} />
               </button>
               <button
-                onClick={(e) => { e.stopPropagation(); onEditBuchung?.(buchung); }}
+                onClick={(e) => { e.stopPropagation(); handleBearbeiten(buchung); }}
                 className="p-1 text-blue-600 hover:bg-white rounded"
                 title="Bearbeiten"
               >
@@ -402,14 +396,14 @@ const LeihraederTimeline = ({ onNewBuchung, onEditBuchung, onDetailsClick, refre
             </button>
             <div className="flex gap-1">
               <button
-                onClick={() => onDetailsClick?.(buchung)}
+                onClick={() => handleDetails(buchung)}
                 className="p-1 text-gray-600 hover:bg-white rounded"
                 title="Details"
               >
                 <Info size={12} />
               </button>
               <button
-                onClick={() => onEditBuchung?.(buchung)}
+                onClick={() => handleBearbeiten(buchung)}
                 className="p-1 text-blue-600 hover:bg-white rounded"
                 title="Bearbeiten"
               >
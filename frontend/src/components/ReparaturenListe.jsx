@@ -4,29 +4,16 @@ import ReparaturBearbeitenModal from './ReparaturBearbeitenModal'
 import Toast from './Toast'
 
 // ===== HELPER FUNCTIONS =====
-// Kunden-Name aus DB oder Legacy
-const getKundenName = (rep) => {
-  if (rep.kunde) {
-    return `${rep.kunde.vorname || ''} ${rep.kunde.nachname || ''}`.trim()
-  }
-  return rep.kunde_name_legacy || rep.kunde_name || null
-}
+// Listen-API liefert Kunde bereits aufgelöst (DB-Kunde, sonst Legacy-Freitext)
+const getKundenName = (rep) => rep.kunde_name || null
 
-// Kunden-Telefon aus DB oder Legacy
-const getKundenTelefon = (rep) => {
-  if (rep.kunde?.telefon) return rep.kunde.telefon
-  return rep.kunde_telefon_legacy || rep.kunde_telefon || null
-}
+const getKundenTelefon = (rep) => rep.kunde_telefon || null
 
 // Kundennummer (nur bei DB-Kunden)
-const getKundennummer = (rep) => {
-  return rep.kunde?.kundennummer || null
-}
+const getKundennummer = (rep) => rep.kundennummer || null
 
 // Ist Kunde aus Datenbank?
-const hasDBKunde = (rep) => {
-  return !!rep.kunde_id && !!rep.kunde
-}
+const hasDBKunde = (rep) => !!rep.kunde_id
 
 export default function ReparaturenListe() {
   const [reparaturen, setReparaturen] = useState([])
@@ -307,8 +294,8 @@ export default function ReparaturenListe() {
 
                       {/* Mängel */}
                       <td className="px-4 py-3">
-                        <div className="text-sm max-w-xs truncate" title={rep.maengelbeschreibung}>
-                          {rep.maengelbeschreibung}
+                        <div className="text-sm max-w-xs truncate" title={rep.maengel_kurz}>
+                          {rep.maengel_kurz}
                         </div>
                       </td>
 
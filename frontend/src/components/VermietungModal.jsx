@@ -75,12 +75,12 @@ function VermietungModalTyp({ onClose, onSave, vorauswahl, vermietung }) {
     loadKunden()
   }, [])
 
-  // Preis neu berechnen wenn sich was ändert
+  // Preis neu berechnen wenn sich was ändert (kurz entprellt, z.B. beim Datum-Ziehen)
   useEffect(() => {
-    if (formData.von_datum && formData.bis_datum) {
-      berechnePreis()
-    }
-  }, [formData.von_datum, formData.bis_datum, typPositionen])
+    if (!formData.von_datum || !formData.bis_datum) return
+    const timer = setTimeout(berechnePreis, 150)
+    return () => clearTimeout(timer)
+  }, [formData.von_datum, formData.bis_datum, typPositionen, typVerfuegbarkeit])
 
   // ✨ NEU: Bestehende Vermietungs-Daten laden (Edit-Modus)
   useEffect(() => {
@@ -206,66 +206,67 @@ function VermietungModalTyp({ onClose, onSave, vorauswahl, vermietung }) {
     })
   }
 
-  // ✅ BUGFIX: Korrekte Staffelpreis-Ermittlung
-  const getStaffelpreis = (typInfo, tage) => {
-    // Für Normal-Räder und Lastenrad: immer gleicher Preis
-    if (typInfo.preis_1tag === typInfo.preis_3tage && typInfo.preis_3tage === typInfo.preis_5tage) {
-      return typInfo.preis_1tag
-    }
-    
-    // Für E-Bikes: Staffelung
-    // 1-2 Tage → preis_1tag (25€)
-    // 3-4 Tage → preis_3tage (22€)
-    // 5+ Tage → preis_5tage (20€)
-    if (tage >= 5) return typInfo.preis_5tage
-    if (tage >= 3) return typInfo.preis_3tage
-    return typInfo.preis_1tag
-  }
-
-  // Preis berechnen
-  const berechnePreis = () => {
+  // Preise vom Backend (POST /api/vermietungen/angebot, dieselbe Tariftabelle wie
+  // beim Buchen) - ein Aufruf für alle Typen, damit jede Zeile ihren Staffelpreis zeigt
+  const berechnePreis = async () => {
     if (!formData.von_datum || !formData.bis_datum || !typVerfuegbarkeit) {
       setPreisInfo(null)
       return
     }
-
-    const von = new Date(formData.von_datum)
-    const bis = new Date(formData.bis_datum)
-    const diffTime = Math.abs(bis - von)
-    const tage = Math.ceil(diffTime / (1000 * 60 * 60 * 24)) + 1
-
-    if (tage < 1) {
+    if (formData.bis_datum < formData.von_datum) {
       setPreisInfo({ error: 'Ungültiger Zeitraum' })
       return
     }
 
-    let gesamtpreis = 0
-    const positionen = []
-
-    Object.entries(typPositionen).forEach(([typ, anzahl]) => {
-      const typInfo = typVerfuegbarkeit[typ]
-      if (!typInfo) return
-
-      // ✅ BUGFIX: Verwende korrekte Staffelpreis-Funktion
-      const tagespreis = getStaffelpreis(typInfo, tage)
-      const subtotal = tagespreis * tage * anzahl
+    const typen = Object.keys(typVerfuegbarkeit)
+    if (typen.length === 0) {
+      setPreisInfo(null)
+      return
+    }
 
-      positionen.push({
-        typ,
-        anzahl,
-        tagespreis,
-        tage,
-        subtotal
+    try {
+      const response = await fetch('/api/vermietungen/angebot', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          positionen: typen.map(typ => ({
+            rad_typ: typ,
+            anzahl: typPositionen[typ] || 1,
+            von_datum: formData.von_datum,
+            bis_datum: formData.bis_datum
+          }))
+        })
+      })
+      if (!response.ok) {
+        setPreisInfo({ error: 'Preisberechnung fehlgeschlagen' })
+        return
+      }
+      const { angebote } = await response.json()
+
+      let tage = 1
+      let gesamtpreis = 0
+      const tagespreise = {}
+      const positionen = []
+
+      angebote.forEach(angebot => {
+        if (angebot.fehler) return
+        const tagespreis = Number(angebot.tagespreis)
+        tage = angebot.anzahl_tage
+        tagespreise[angebot.rad_typ] = tagespreis
+
+        const anzahl = typPositionen[angebot.rad_typ] || 0
+        if (anzahl > 0) {
+          const subtotal = Number(angebot.gesamtpreis)
+          positionen.push({ typ: angebot.rad_typ, anzahl, tagespreis, tage, subtotal })
+          gesamtpreis += subtotal
+        }
       })
 
-      gesamtpreis += subtotal
-    })
-
-    setPreisInfo({
-      tage,
-      positionen,
-      gesamtpreis
-    })
+      setPreisInfo({ tage, tagespreise, positionen, gesamtpreis })
+    } catch (err) {
+      console.error('Fehler bei der Preisberechnung:', err)
+      setPreisInfo({ error: 'Preisberechnung fehlgeschlagen' })
+    }
   }
 
   const handleSubmit = async (e) => {
@@ -627,8 +628,8 @@ function VermietungModalTyp({ onClose, onSave, vorauswahl, vermietung }) {
                   if (prozent < 30) colorClass = 'border-red-200 bg-red-50'
                   else if (prozent < 60) colorClass = 'border-yellow-200 bg-yellow-50'
 
-                  // ✅ BUGFIX: Korrekte Staffelpreis-Anzeige
-                  const aktuellerPreis = preisInfo ? getStaffelpreis(info, preisInfo.tage) : info.preis_1tag
+                  // Staffelpreis für den gewählten Zeitraum (aus dem Angebot)
+                  const aktuellerPreis = preisInfo?.tagespreise?.[typ] ?? info.preis_1tag
 
                   return (
                     <div key={typ} className={`border rounded-lg p-4 ${colorClass}`}>
@@ -668,7 +669,7 @@ function VermietungModalTyp({ onClose, onSave, vorauswahl, vermietung }) {
                       </div>
 
                       {/* ✅ BUGFIX: Preis-Preview mit KORREKTEM Staffelpreis */}
-                      {anzahl > 0 && preisInfo && (
+                      {anzahl > 0 && preisInfo && !preisInfo.error && (
                         <div className="text-sm text-gray-700 mt-2 pt-2 border-t border-gray-300">
                           {anzahl} × {aktuellerPreis.toFixed(0)}€ × {preisInfo.tage} Tag{preisInfo.tage > 1 ? 'e' : ''} = 
                           <span className="font-bold ml-1">
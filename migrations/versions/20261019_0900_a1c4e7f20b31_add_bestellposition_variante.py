@@ -0,0 +1,35 @@
+"""add_bestellposition_variante
+
+Revision ID: a1c4e7f20b31
+Revises: 13376bf44874
+Create Date: 2026-10-19 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a1c4e7f20b31'
+down_revision = '13376bf44874'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Bestellpositionen können auf eine Artikel-Variante zeigen (Nachbestellung)
+    op.add_column('bestellpositionen', sa.Column('variante_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'fk_bestellpositionen_variante_id', 'bestellpositionen', 'artikel_varianten',
+        ['variante_id'], ['id']
+    )
+    op.create_index('ix_bestellpositionen_variante_id', 'bestellpositionen', ['variante_id'])
+    
+    # Offene Mengen pro Artikel werden bei jeder Nachbestellung aggregiert
+    op.create_index('ix_bestellpositionen_artikel_id', 'bestellpositionen', ['artikel_id'])
+
+
+def downgrade():
+    op.drop_index('ix_bestellpositionen_artikel_id', table_name='bestellpositionen')
+    op.drop_index('ix_bestellpositionen_variante_id', table_name='bestellpositionen')
+    op.drop_constraint('fk_bestellpositionen_variante_id', 'bestellpositionen', type_='foreignkey')
+    op.drop_column('bestellpositionen', 'variante_id')
@@ -0,0 +1,93 @@
+"""add_reparatur_suchvektor
+
+Revision ID: b7e2d5a9c4f1
+Revises: a1c4e7f20b31
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2d5a9c4f1'
+down_revision = 'a1c4e7f20b31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Suchdokument pro Reparatur
+    op.add_column('reparaturen', sa.Column('suchvektor', postgresql.TSVECTOR(), nullable=True))
+    op.create_index(
+        'ix_reparaturen_suchvektor', 'reparaturen', ['suchvektor'],
+        postgresql_using='gin'
+    )
+
+    # Gewichtung: A = Auftrags-/Rahmennummer, B = Kunde, C = Fahrrad, D = Mängeltext
+    # Telefon zusätzlich ohne Leer-/Sonderzeichen, Mängeltext gestemmt (german) + wörtlich (simple)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION reparaturen_suchvektor_aktualisieren() RETURNS trigger AS $$
+        DECLARE
+            k_name text := '';
+            k_telefon text := '';
+        BEGIN
+            IF NEW.kunde_id IS NOT NULL THEN
+                SELECT concat_ws(' ', vorname, nachname), coalesce(telefon, '')
+                  INTO k_name, k_telefon
+                  FROM kunden
+                 WHERE id = NEW.kunde_id;
+            END IF;
+
+            NEW.suchvektor :=
+                setweight(to_tsvector('simple', concat_ws(' ', NEW.auftragsnummer, NEW.rahmennummer)), 'A') ||
+                setweight(to_tsvector('simple', concat_ws(' ',
+                    k_name, NEW.kunde_name_legacy,
+                    k_telefon, regexp_replace(k_telefon, '[^0-9]', '', 'g'),
+                    NEW.kunde_telefon_legacy, regexp_replace(coalesce(NEW.kunde_telefon_legacy, ''), '[^0-9]', '', 'g')
+                )), 'B') ||
+                setweight(to_tsvector('simple', concat_ws(' ', NEW.fahrradmarke, NEW.fahrradmodell)), 'C') ||
+                setweight(to_tsvector('german', coalesce(NEW.maengelbeschreibung, '')), 'D') ||
+                setweight(to_tsvector('simple', coalesce(NEW.maengelbeschreibung, '')), 'D');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER reparaturen_suchvektor_trigger
+        BEFORE INSERT OR UPDATE OF auftragsnummer, rahmennummer, kunde_id, kunde_name_legacy,
+            kunde_telefon_legacy, fahrradmarke, fahrradmodell, maengelbeschreibung
+        ON reparaturen
+        FOR EACH ROW EXECUTE FUNCTION reparaturen_suchvektor_aktualisieren();
+    """)
+
+    # Kunde geändert → Suchdokumente seiner Reparaturen neu aufbauen
+    op.execute("""
+        CREATE OR REPLACE FUNCTION kunden_reparatur_suche_aktualisieren() RETURNS trigger AS $$
+        BEGIN
+            UPDATE reparaturen SET kunde_id = kunde_id WHERE kunde_id = NEW.id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER kunden_reparatur_suche_trigger
+        AFTER UPDATE OF vorname, nachname, telefon ON kunden
+        FOR EACH ROW
+        WHEN (OLD.vorname IS DISTINCT FROM NEW.vorname
+              OR OLD.nachname IS DISTINCT FROM NEW.nachname
+              OR OLD.telefon IS DISTINCT FROM NEW.telefon)
+        EXECUTE FUNCTION kunden_reparatur_suche_aktualisieren();
+    """)
+
+    # Bestehende Reparaturen füllen (löst den Trigger aus)
+    op.execute("UPDATE reparaturen SET kunde_id = kunde_id")
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS kunden_reparatur_suche_trigger ON kunden")
+    op.execute("DROP FUNCTION IF EXISTS kunden_reparatur_suche_aktualisieren()")
+    op.execute("DROP TRIGGER IF EXISTS reparaturen_suchvektor_trigger ON reparaturen")
+    op.execute("DROP FUNCTION IF EXISTS reparaturen_suchvektor_aktualisieren()")
+    op.drop_index('ix_reparaturen_suchvektor', table_name='reparaturen')
+    op.drop_column('reparaturen', 'suchvektor')
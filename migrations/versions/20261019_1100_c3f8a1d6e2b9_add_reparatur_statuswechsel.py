@@ -0,0 +1,76 @@
+"""add_reparatur_statuswechsel
+
+Revision ID: c3f8a1d6e2b9
+Revises: b7e2d5a9c4f1
+Create Date: 2026-10-19 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8a1d6e2b9'
+down_revision = 'b7e2d5a9c4f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'reparatur_statuswechsel',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('reparatur_id', sa.Integer(), nullable=False),
+        sa.Column('von_status', sa.String(length=50), nullable=True),
+        sa.Column('nach_status', sa.String(length=50), nullable=False),
+        sa.Column('zeitpunkt', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('meister', sa.String(length=100), nullable=True),
+        sa.ForeignKeyConstraint(['reparatur_id'], ['reparaturen.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_reparatur_statuswechsel_id', 'reparatur_statuswechsel', ['id'])
+    op.create_index(
+        'ix_reparatur_statuswechsel_reparatur_zeitpunkt', 'reparatur_statuswechsel',
+        ['reparatur_id', 'zeitpunkt']
+    )
+    op.create_index('ix_reparatur_statuswechsel_zeitpunkt', 'reparatur_statuswechsel', ['zeitpunkt'])
+
+    # Append-only: Einträge dürfen nicht geändert werden (Löschen nur per CASCADE mit der Reparatur)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION reparatur_statuswechsel_unveraenderlich() RETURNS trigger AS $$
+        BEGIN
+            RAISE EXCEPTION 'reparatur_statuswechsel ist append-only';
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER reparatur_statuswechsel_kein_update
+        BEFORE UPDATE ON reparatur_statuswechsel
+        FOR EACH ROW EXECUTE FUNCTION reparatur_statuswechsel_unveraenderlich();
+    """)
+
+    # Bestehende Reparaturen: Verlauf aus den vorhandenen Zeitstempeln rekonstruieren
+    op.execute("""
+        INSERT INTO reparatur_statuswechsel (reparatur_id, von_status, nach_status, zeitpunkt, meister)
+        SELECT id, NULL, 'angenommen', reparaturdatum, meister_zugewiesen
+          FROM reparaturen WHERE reparaturdatum IS NOT NULL
+        UNION ALL
+        SELECT id, 'angenommen', 'in_arbeit', begonnen_am, meister_zugewiesen
+          FROM reparaturen WHERE begonnen_am IS NOT NULL
+        UNION ALL
+        SELECT id, CASE WHEN begonnen_am IS NOT NULL THEN 'in_arbeit' ELSE 'angenommen' END,
+               'fertig', fertig_am, meister_zugewiesen
+          FROM reparaturen WHERE fertig_am IS NOT NULL
+        UNION ALL
+        SELECT id, CASE WHEN fertig_am IS NOT NULL THEN 'fertig' ELSE NULL END,
+               'abgeholt', abgeholt_am, meister_zugewiesen
+          FROM reparaturen WHERE abgeholt_am IS NOT NULL
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS reparatur_statuswechsel_kein_update ON reparatur_statuswechsel")
+    op.execute("DROP FUNCTION IF EXISTS reparatur_statuswechsel_unveraenderlich()")
+    op.drop_index('ix_reparatur_statuswechsel_zeitpunkt', table_name='reparatur_statuswechsel')
+    op.drop_index('ix_reparatur_statuswechsel_reparatur_zeitpunkt', table_name='reparatur_statuswechsel')
+    op.drop_index('ix_reparatur_statuswechsel_id', table_name='reparatur_statuswechsel')
+    op.drop_table('reparatur_statuswechsel')
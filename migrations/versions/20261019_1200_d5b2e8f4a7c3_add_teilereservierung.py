@@ -0,0 +1,45 @@
+"""add_teilereservierung
+
+Revision ID: d5b2e8f4a7c3
+Revises: c3f8a1d6e2b9
+Create Date: 2026-10-19 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd5b2e8f4a7c3'
+down_revision = 'c3f8a1d6e2b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Reservierter Bestand pro Artikel (verfügbar = lager + werkstatt - reserviert)
+    op.add_column(
+        'artikel',
+        sa.Column('bestand_reserviert', sa.Integer(), server_default='0', nullable=False)
+    )
+    op.add_column('reparatur_positionen', sa.Column('lager_status', sa.String(length=20), nullable=True))
+
+    # Bisherige Teile-Positionen haben den Bestand bereits beim Anlegen abgezogen
+    op.execute("""
+        UPDATE reparatur_positionen
+           SET lager_status = 'verbraucht'
+         WHERE typ = 'teil' AND artikel_id IS NOT NULL
+    """)
+
+    # Offene Reservierungen pro Artikel
+    op.create_index(
+        'ix_reparatur_positionen_reserviert', 'reparatur_positionen', ['artikel_id'],
+        postgresql_where=sa.text("lager_status = 'reserviert'")
+    )
+    op.create_index('ix_reparatur_positionen_reparatur_id', 'reparatur_positionen', ['reparatur_id'])
+
+
+def downgrade():
+    op.drop_index('ix_reparatur_positionen_reparatur_id', table_name='reparatur_positionen')
+    op.drop_index('ix_reparatur_positionen_reserviert', table_name='reparatur_positionen')
+    op.drop_column('reparatur_positionen', 'lager_status')
+    op.drop_column('artikel', 'bestand_reserviert')
@@ -0,0 +1,53 @@
+"""add_leihrad_tagesbelegung
+
+Revision ID: e8c4a2f6b1d9
+Revises: d5b2e8f4a7c3
+Create Date: 2026-10-19 13:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e8c4a2f6b1d9'
+down_revision = 'd5b2e8f4a7c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Belegte Räder pro Tag und Rad-Typ (inkrementell von der API gepflegt)
+    op.create_table(
+        'leihrad_tagesbelegung',
+        sa.Column('datum', sa.Date(), nullable=False),
+        sa.Column('rad_typ', sa.String(length=50), nullable=False),
+        sa.Column('belegt', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('datum', 'rad_typ'),
+    )
+
+    # Aus bestehenden aktiven/reservierten Vermietungen füllen:
+    # typ-basiert über die Positionen, sonst anzahl_raeder auf den Typ des Rads
+    op.execute("""
+        INSERT INTO leihrad_tagesbelegung (datum, rad_typ, belegt)
+        SELECT tag::date, a.rad_typ, SUM(a.anzahl)
+          FROM (
+                SELECT v.von_datum, v.bis_datum, p.rad_typ, p.anzahl
+                  FROM vermietungen v
+                  JOIN vermietung_positionen p ON p.vermietung_id = v.id
+                 WHERE v.status::text IN ('aktiv', 'reserviert')
+                UNION ALL
+                SELECT v.von_datum, v.bis_datum, l.typ, COALESCE(v.anzahl_raeder, 1)
+                  FROM vermietungen v
+                  JOIN leihraeder l ON l.id = v.leihrad_id
+                 WHERE v.status::text IN ('aktiv', 'reserviert')
+                   AND l.typ IS NOT NULL
+                   AND NOT EXISTS (SELECT 1 FROM vermietung_positionen p WHERE p.vermietung_id = v.id)
+               ) a
+         CROSS JOIN generate_series(a.von_datum, a.bis_datum, interval '1 day') AS tag
+         GROUP BY tag::date, a.rad_typ
+        HAVING SUM(a.anzahl) <> 0
+    """)
+
+
+def downgrade():
+    op.drop_table('leihrad_tagesbelegung')
@@ -0,0 +1,52 @@
+"""add_vermietung_doppelbuchung_constraint
+
+Revision ID: f2a9d4c7e1b5
+Revises: e8c4a2f6b1d9
+Create Date: 2026-10-19 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f2a9d4c7e1b5'
+down_revision = 'e8c4a2f6b1d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Gleichheit auf leihrad_id im GiST-Index
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    # Bestehende Doppelbuchungen müssen vorher aufgelöst werden
+    konflikte = op.get_bind().execute(sa.text("""
+        SELECT a.id, b.id, a.leihrad_id
+          FROM vermietungen a
+          JOIN vermietungen b
+            ON b.leihrad_id = a.leihrad_id
+           AND b.id > a.id
+           AND daterange(a.von_datum, a.bis_datum, '[]') && daterange(b.von_datum, b.bis_datum, '[]')
+         WHERE a.status IN ('aktiv', 'reserviert')
+           AND b.status IN ('aktiv', 'reserviert')
+    """)).fetchall()
+    if konflikte:
+        liste = ", ".join(f"#{a}/#{b} (Rad {rad})" for a, b, rad in konflikte[:20])
+        raise RuntimeError(
+            f"{len(konflikte)} überlappende Buchungen desselben Rads - bitte zuerst auflösen: {liste}"
+        )
+
+    # Ein Rad kann im selben Zeitraum (inkl. Rückgabetag) nur einmal gebucht sein
+    op.execute("""
+        ALTER TABLE vermietungen
+          ADD CONSTRAINT vermietungen_leihrad_zeitraum_excl
+          EXCLUDE USING gist (
+              leihrad_id WITH =,
+              daterange(von_datum, bis_datum, '[]') WITH &&
+          )
+          WHERE (leihrad_id IS NOT NULL AND status IN ('aktiv', 'reserviert'))
+    """)
+
+
+def downgrade():
+    op.execute("ALTER TABLE vermietungen DROP CONSTRAINT IF EXISTS vermietungen_leihrad_zeitraum_excl")
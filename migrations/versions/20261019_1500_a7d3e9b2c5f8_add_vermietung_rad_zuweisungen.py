@@ -0,0 +1,50 @@
+"""add_vermietung_rad_zuweisungen
+
+Revision ID: a7d3e9b2c5f8
+Revises: f2a9d4c7e1b5
+Create Date: 2026-10-19 15:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e9b2c5f8'
+down_revision = 'f2a9d4c7e1b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Konkretes Rad pro Einheit typ-basierter Buchungen (von der API gepflegt).
+    # Bestehende Buchungen: einmal POST /api/vermietungen/zuweisung/neu-planen
+    op.create_table(
+        'vermietung_rad_zuweisungen',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('vermietung_id', sa.Integer(), nullable=False),
+        sa.Column('position_id', sa.Integer(), nullable=False),
+        sa.Column('leihrad_id', sa.Integer(), nullable=False),
+        sa.Column('rad_typ', sa.String(length=50), nullable=False),
+        sa.Column('von_datum', sa.Date(), nullable=False),
+        sa.Column('bis_datum', sa.Date(), nullable=False),
+        sa.ForeignKeyConstraint(['vermietung_id'], ['vermietungen.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['position_id'], ['vermietung_positionen.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['leihrad_id'], ['leihraeder.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_vermietung_rad_zuweisungen_id', 'vermietung_rad_zuweisungen', ['id'])
+    op.create_index('ix_vermietung_rad_zuweisungen_vermietung_id', 'vermietung_rad_zuweisungen', ['vermietung_id'])
+    op.create_index(
+        'ix_vermietung_rad_zuweisungen_rad_zeitraum', 'vermietung_rad_zuweisungen', ['leihrad_id', 'von_datum']
+    )
+    op.create_index(
+        'ix_vermietung_rad_zuweisungen_typ_zeitraum', 'vermietung_rad_zuweisungen', ['rad_typ', 'von_datum']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_vermietung_rad_zuweisungen_typ_zeitraum', table_name='vermietung_rad_zuweisungen')
+    op.drop_index('ix_vermietung_rad_zuweisungen_rad_zeitraum', table_name='vermietung_rad_zuweisungen')
+    op.drop_index('ix_vermietung_rad_zuweisungen_vermietung_id', table_name='vermietung_rad_zuweisungen')
+    op.drop_index('ix_vermietung_rad_zuweisungen_id', table_name='vermietung_rad_zuweisungen')
+    op.drop_table('vermietung_rad_zuweisungen')
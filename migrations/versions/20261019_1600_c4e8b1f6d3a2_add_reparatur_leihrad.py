@@ -0,0 +1,34 @@
+"""add_reparatur_leihrad
+
+Revision ID: c4e8b1f6d3a2
+Revises: a7d3e9b2c5f8
+Create Date: 2026-10-19 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8b1f6d3a2'
+down_revision = 'a7d3e9b2c5f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Wartungsaufträge für Leihräder (angelegt von der Wartungsprüfung)
+    op.add_column('reparaturen', sa.Column('leihrad_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'reparaturen_leihrad_id_fkey', 'reparaturen', 'leihraeder',
+        ['leihrad_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index(
+        'ix_reparaturen_leihrad_id', 'reparaturen', ['leihrad_id'],
+        postgresql_where=sa.text("leihrad_id IS NOT NULL")
+    )
+
+
+def downgrade():
+    op.drop_index('ix_reparaturen_leihrad_id', table_name='reparaturen')
+    op.drop_constraint('reparaturen_leihrad_id_fkey', 'reparaturen', type_='foreignkey')
+    op.drop_column('reparaturen', 'leihrad_id')
@@ -0,0 +1,35 @@
+"""
+Baut die Tagesbelegung der Leihräder (leihrad_tagesbelegung) neu auf
+Die Belegung wird bei jeder Vermietungs-Änderung inkrementell gepflegt - dieses
+Skript ist für Daten, die an der API vorbei geändert wurden (Import, manuelles SQL).
+
+Aufruf:
+    python scripts/belegung_neu_aufbauen.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.utils.verfuegbarkeit import neu_aufbauen
+
+
+def belegung_neu_aufbauen() -> int:
+    session = SessionLocal()
+
+    try:
+        zeilen = neu_aufbauen(session)
+        session.commit()
+        print(f"✅ Tagesbelegung neu aufgebaut: {zeilen} Zeilen (Tag × Rad-Typ).")
+        return zeilen
+
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Fehler: {e}")
+        raise
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    belegung_neu_aufbauen()
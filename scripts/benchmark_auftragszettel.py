@@ -0,0 +1,68 @@
+"""
+Micro-Benchmark: Render-Zeit pro Auftragszettel
+Vergleicht direktes Zeichnen mit dem Stempeln der Werte auf die vorgerenderte Vorlage
+Braucht keine Datenbank.
+
+Aufruf:
+    python scripts/benchmark_auftragszettel.py          # 500 Dokumente
+    python scripts/benchmark_auftragszettel.py 2000     # eigene Anzahl
+"""
+import sys
+import os
+import timeit
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.utils.pdf_generator import render_auftragszettel
+
+
+def beispiel_daten() -> SimpleNamespace:
+    """Typischer Auftrag (wie auftragszettel_daten() ihn liefert)"""
+    return SimpleNamespace(
+        id=1,
+        auftragsnummer="8272",
+        reparaturdatum=datetime(2026, 4, 14, 9, 31, 12),
+        schluesselnummer="47",
+        fahrrad_anwesend=True,
+        bezahlt=False,
+        maengelbeschreibung="Bremse hinten schleift\nLicht vorne ohne Funktion\nKette verschlissen",
+        status="angenommen",
+        fahrradmarke="Gazelle",
+        fahrradmodell="Orange C7",
+        abholtermin="anrufen",
+        kunde_name="Mustermann, Erika",
+        kunde_telefon="0151 2345678",
+    )
+
+
+def messe(vorlage: bool, anzahl: int) -> float:
+    """Beste von 5 Messreihen, in Millisekunden pro Dokument"""
+    daten = beispiel_daten()
+    render_auftragszettel(daten, vorlage=vorlage)  # Aufwärmen (Fonts, Vorlage)
+    zeiten = timeit.repeat(
+        lambda: render_auftragszettel(daten, vorlage=vorlage),
+        number=anzahl,
+        repeat=5,
+    )
+    return min(zeiten) / anzahl * 1000
+
+
+def benchmark(anzahl: int = 500):
+    print("=" * 60)
+    print(f"Auftragszettel-Benchmark ({anzahl} Dokumente pro Messreihe)")
+    print("=" * 60)
+
+    vorher = messe(vorlage=False, anzahl=anzahl)
+    nachher = messe(vorlage=True, anzahl=anzahl)
+
+    print(f"   Direkt gezeichnet:     {vorher:6.2f} ms / Dokument")
+    print(f"   Auf Vorlage gestempelt: {nachher:5.2f} ms / Dokument")
+    print(f"   Ersparnis:             {(1 - nachher / vorher) * 100:5.1f} %")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    anzahl = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    benchmark(anzahl)
@@ -0,0 +1,98 @@
+"""
+Benchmark: Rad-Zuweisung für eine ganze Saison
+Plant eine synthetische Saison (April-Oktober) typ-basierter Buchungen auf die
+Räder eines Typs - einmal komplett, einmal inkrementell (eine neue Buchung in
+eine fast volle Saison). Prüft danach, dass kein Rad doppelt vergeben ist.
+Braucht keine Datenbank.
+
+Aufruf:
+    python scripts/benchmark_radzuweisung.py            # 3000 Einheiten, 25 Räder
+    python scripts/benchmark_radzuweisung.py 6000 40
+"""
+import sys
+import os
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.radzuweisung import plane
+
+SAISON_START = date(2026, 4, 1)
+SAISON_TAGE = 214
+
+
+def saison(einheiten: int, raeder: int):
+    """Zufällige Buchungen (1-7 Tage), grob auf Auslastung unter Kapazität gedrosselt"""
+    random.seed(7)
+    belegt = defaultdict(int)
+    liste = []
+    position_id = 0
+    while len(liste) < einheiten and position_id < einheiten * 20:
+        position_id += 1
+        von = SAISON_START + timedelta(days=random.randrange(SAISON_TAGE))
+        bis = von + timedelta(days=random.randint(0, 6))
+        tage = [von + timedelta(days=i) for i in range((bis - von).days + 1)]
+        if any(belegt[t] >= raeder for t in tage):
+            continue
+        for t in tage:
+            belegt[t] += 1
+        liste.append((von, bis, position_id, position_id))
+    return liste
+
+
+def pruefe(zuweisungen, einheiten) -> int:
+    """Anzahl Überschneidungen auf demselben Rad"""
+    zeitraum = {(e[2], e[3]): (e[0], e[1]) for e in einheiten}
+    pro_rad = defaultdict(list)
+    for z in zuweisungen:
+        pro_rad[z["leihrad_id"]].append(zeitraum[(z["vermietung_id"], z["position_id"])])
+    fehler = 0
+    for zeitraeume in pro_rad.values():
+        zeitraeume.sort()
+        fehler += sum(1 for a, b in zip(zeitraeume, zeitraeume[1:]) if b[0] <= a[1])
+    return fehler
+
+
+def benchmark(anzahl: int = 3000, raeder: int = 25):
+    einheiten = saison(anzahl, raeder)
+    verschleiss = {rad_id: random.randint(0, 50) for rad_id in range(1, raeder + 1)}
+
+    print("=" * 60)
+    print(f"Rad-Zuweisung ({len(einheiten)} Einheiten, {raeder} Räder, {SAISON_TAGE} Tage)")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    zuweisungen, offen = plane(einheiten, verschleiss, {})
+    komplett = time.perf_counter() - start
+
+    # Inkrementell: alles außer der letzten Einheit ist fest, nur sie wird geplant
+    belegung = defaultdict(list)
+    zeitraum = {(e[2], e[3]): (e[0], e[1]) for e in einheiten}
+    for z in zuweisungen[:-1]:
+        belegung[z["leihrad_id"]].append(zeitraum[(z["vermietung_id"], z["position_id"])])
+    letzte = [e for e in einheiten if (e[2], e[3]) == (zuweisungen[-1]["vermietung_id"], zuweisungen[-1]["position_id"])]
+    start = time.perf_counter()
+    plane(letzte, verschleiss, belegung)
+    inkrementell = time.perf_counter() - start
+
+    tage = defaultdict(int)
+    for z in zuweisungen:
+        von, bis = zeitraum[(z["vermietung_id"], z["position_id"])]
+        tage[z["leihrad_id"]] += (bis - von).days + 1
+    fehler = pruefe(zuweisungen, einheiten)
+
+    print(f"   Komplett geplant:      {komplett * 1000:8.1f} ms")
+    print(f"   Eine Buchung dazu:     {inkrementell * 1000:8.3f} ms")
+    print(f"   Ohne Rad:              {len(offen):8d}")
+    print(f"   Miettage pro Rad:      {min(tage.values())} - {max(tage.values())}")
+    print(f"   Doppelt vergeben:      {fehler:8d}")
+    print("=" * 60)
+    return fehler
+
+
+if __name__ == "__main__":
+    anzahl = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    raeder = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    sys.exit(1 if benchmark(anzahl, raeder) else 0)
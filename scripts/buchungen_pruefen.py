@@ -0,0 +1,59 @@
+"""
+Konsistenzprüfung der Vermietungen (z.B. nächtlich per cron)
+Überschneidungen pro Rad, Überbuchungen pro Typ, Rad-Status und Tagesbelegung -
+derselbe Bericht wie GET /api/vermietungen/audit. Exit-Code 1 bei Befunden.
+
+Aufruf:
+    python scripts/buchungen_pruefen.py
+    python scripts/buchungen_pruefen.py -v     # alle Befunde statt der ersten 10
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.utils.buchungspruefung import pruefe_buchungen
+
+
+def ausgabe(titel: str, befunde: list, zeile, alle: bool) -> None:
+    print(f"   {titel:<26} {len(befunde)}")
+    for b in befunde if alle else befunde[:10]:
+        print(f"      {zeile(b)}")
+    if not alle and len(befunde) > 10:
+        print(f"      ... {len(befunde) - 10} weitere")
+
+
+def buchungen_pruefen(alle: bool = False) -> bool:
+    session = SessionLocal()
+    try:
+        start = time.perf_counter()
+        bericht = pruefe_buchungen(session)
+        dauer = time.perf_counter() - start
+
+        print("=" * 70)
+        print(f"Konsistenzprüfung Vermietungen (Stichtag {bericht['stichtag']})")
+        print("=" * 70)
+        print(f"   Buchungen / Räder          {bericht['buchungen']} / {bericht['raeder']}  ({dauer:.2f} s)")
+        ausgabe("Überschneidungen", bericht["ueberschneidungen"], lambda u: (
+            f"{u['inventarnummer']}: #{u['vermietung_id']} / #{u['andere_vermietung_id']} "
+            f"{u['von']}..{u['bis']}{' (überfällig)' if u['ueberfaellig'] else ''}"
+        ), alle)
+        ausgabe("Überbuchungen", bericht["ueberbuchungen"], lambda u: (
+            f"{u['rad_typ']}: {u['von']}..{u['bis']} belegt {u['belegt']} / {u['kapazitaet']}"
+        ), alle)
+        ausgabe("Status-Abweichungen", bericht["status_abweichungen"], lambda s: (
+            f"{s['inventarnummer']}: {s['status'].value} statt {s['erwartet'].value}"
+        ), alle)
+        ausgabe("Tagesbelegung abweichend", bericht["belegung_abweichungen"], lambda b: (
+            f"{b['rad_typ']} {b['datum']}: gespeichert {b['gespeichert']}, erwartet {b['erwartet']}"
+        ), alle)
+        print("=" * 70)
+        print("✅ Keine Befunde." if bericht["ok"] else "❌ Inkonsistenzen gefunden!")
+        return bericht["ok"]
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    sys.exit(0 if buchungen_pruefen("-v" in sys.argv[1:]) else 1)
@@ -0,0 +1,58 @@
+"""
+Prüft die Gesamtsummen aller Bestellungen gegen ihre Positionen
+Summen werden inkrementell gepflegt - dieses Skript findet (und korrigiert) Abweichungen
+
+Aufruf:
+    python scripts/pruefe_bestellsummen.py              # nur prüfen
+    python scripts/pruefe_bestellsummen.py korrigieren  # Abweichungen korrigieren
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.utils.bestellsummen import finde_summen_abweichungen, korrigiere_summen
+
+
+def pruefe_bestellsummen(korrigieren: bool = False) -> int:
+    """
+    Gibt die Anzahl abweichender Bestellungen zurück
+    """
+    session = SessionLocal()
+
+    try:
+        abweichungen = finde_summen_abweichungen(session)
+
+        if not abweichungen:
+            print("✅ Alle Bestellsummen stimmen mit den Positionen überein.")
+            return 0
+
+        print(f"⚠️  {len(abweichungen)} Bestellungen mit abweichenden Summen:\n")
+        for a in abweichungen:
+            print(
+                f"   {a['bestellnummer']}: "
+                f"EK {a['ist_ek']} (soll {a['soll_ek']}), "
+                f"VK {a['ist_vk']} (soll {a['soll_vk']})"
+            )
+
+        if korrigieren:
+            anzahl = korrigiere_summen(session, abweichungen)
+            session.commit()
+            print(f"\n🔧 {anzahl} Bestellungen korrigiert.")
+        else:
+            print("\nKorrigieren mit: python scripts/pruefe_bestellsummen.py korrigieren")
+
+        return len(abweichungen)
+
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Fehler: {e}")
+        raise
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    korrigieren = len(sys.argv) > 1 and sys.argv[1] == "korrigieren"
+    abweichend = pruefe_bestellsummen(korrigieren)
+    sys.exit(1 if abweichend and not korrigieren else 0)
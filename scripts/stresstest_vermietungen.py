@@ -0,0 +1,192 @@
+"""
+Stresstest: parallele Buchungen gegen den Überbuchungsschutz
+Viele gleichzeitige Buchungen (eigene Sessions/Threads, echter Code-Pfad
+create_vermietung) auf wenige Räder - danach darf kein Tag eines Typs über der
+Kapazität liegen und kein Rad doppelt gebucht sein.
+
+Misst außerdem gleicher Typ vs. verschiedene Typen: Buchungen verschiedener Typen
+sperren disjunkte Zeilen und sollten nicht langsamer als ein Typ allein sein.
+
+Braucht PostgreSQL (Migrationen bis f2a9d4c7e1b5). Legt eigene Test-Räder,
+einen Test-Kunden und Buchungen an und räumt sie danach wieder ab.
+
+Aufruf:
+    python scripts/stresstest_vermietungen.py          # 200 Buchungen, 16 Threads
+    python scripts/stresstest_vermietungen.py 500 32
+"""
+import sys
+import os
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+
+from app.database import SessionLocal
+from app.models import Kunde, Leihrad, LeihradTagesbelegung, Vermietung
+from app.routers.leihraeder import create_vermietung
+from app.schemas.leihrad import VermietungCreate, VermietungPositionCreate
+from app.utils.verfuegbarkeit import BELEGENDE_STATUS, belegungsanteile
+
+TYPEN = ["Stresstest-A", "Stresstest-B"]
+RAEDER_PRO_TYP = 5
+START = date.today() + timedelta(days=400)  # weit weg von echten Buchungen
+
+
+def anlegen() -> dict:
+    session = SessionLocal()
+    try:
+        kunde = Kunde(kundennummer="STRESSTEST", vorname="Stress", nachname="Test")
+        session.add(kunde)
+        raeder = {typ: [] for typ in TYPEN}
+        for typ in TYPEN:
+            for i in range(RAEDER_PRO_TYP):
+                rad = Leihrad(inventarnummer=f"{typ}-{i}", marke="Test", typ=typ, preis_1tag=10)
+                session.add(rad)
+                raeder[typ].append(rad)
+        session.commit()
+        return {"kunde_id": kunde.id, "raeder": {typ: [r.id for r in liste] for typ, liste in raeder.items()}}
+    finally:
+        session.close()
+
+
+def aufraeumen():
+    session = SessionLocal()
+    try:
+        rad_ids = [r.id for r in session.query(Leihrad.id).filter(Leihrad.typ.in_(TYPEN))]
+        kunde = session.query(Kunde).filter(Kunde.kundennummer == "STRESSTEST").first()
+        if kunde:
+            for v in session.query(Vermietung).filter(Vermietung.kunde_id == kunde.id):
+                session.delete(v)
+        session.query(Leihrad).filter(Leihrad.id.in_(rad_ids)).delete(synchronize_session=False)
+        session.query(LeihradTagesbelegung).filter(
+            LeihradTagesbelegung.rad_typ.in_(TYPEN)
+        ).delete(synchronize_session=False)
+        if kunde:
+            session.delete(kunde)
+        session.commit()
+    finally:
+        session.close()
+
+
+def buche(auftrag: dict) -> str:
+    """Eine Buchung in eigener Session - 'ok', 'voll' (409) oder Fehlertext"""
+    session = SessionLocal()
+    try:
+        create_vermietung(VermietungCreate(**auftrag), session)
+        return "ok"
+    except HTTPException as e:
+        return "voll" if e.status_code == 409 else f"HTTP {e.status_code}: {e.detail}"
+    except Exception as e:
+        return f"Fehler: {e}"
+    finally:
+        session.close()
+
+
+def auftraege(anzahl: int, typen: list, testdaten: dict, mit_rad: bool, beginn: date) -> list:
+    """Zufällige Buchungen in 3 Wochen ab beginn (je Lauf eigener Zeitraum)"""
+    ergebnis = []
+    for _ in range(anzahl):
+        von = beginn + timedelta(days=random.randint(0, 20))
+        auftrag = {
+            "kunde_id": testdaten["kunde_id"],
+            "von_datum": von,
+            "bis_datum": von + timedelta(days=random.randint(0, 4)),
+            "tagespreis": 0,
+            "anzahl_tage": 1,
+            "gesamtpreis": 0,
+        }
+        typ = random.choice(typen)
+        if mit_rad:
+            auftrag["leihrad_id"] = random.choice(testdaten["raeder"][typ])
+        else:
+            auftrag["positionen"] = [VermietungPositionCreate(rad_typ=typ, anzahl=random.randint(1, 2))]
+        ergebnis.append(auftrag)
+    return ergebnis
+
+
+def lauf(name: str, liste: list, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        ergebnisse = list(pool.map(buche, liste))
+    dauer = time.perf_counter() - start
+    zaehler = defaultdict(int)
+    for e in ergebnisse:
+        zaehler[e if e in ("ok", "voll") else "fehler"] += 1
+    print(f"   {name:<28} {dauer:6.2f} s  gebucht {zaehler['ok']:4d}  voll {zaehler['voll']:4d}  fehler {zaehler['fehler']}")
+    for e in sorted({e for e in ergebnisse if e not in ('ok', 'voll')})[:5]:
+        print(f"      {e}")
+    return dauer
+
+
+def pruefe() -> int:
+    """Anzahl Verstöße: Tage über Kapazität + doppelt gebuchte Räder"""
+    session = SessionLocal()
+    try:
+        vermietungen = (
+            session.query(Vermietung)
+            .join(Kunde, Kunde.id == Vermietung.kunde_id)
+            .filter(Kunde.kundennummer == "STRESSTEST", Vermietung.status.in_(BELEGENDE_STATUS))
+            .all()
+        )
+        belegung = defaultdict(int)
+        pro_rad = defaultdict(list)
+        for v in vermietungen:
+            for typ, anzahl in belegungsanteile(v).items():
+                tag = v.von_datum
+                while tag <= v.bis_datum:
+                    belegung[(typ, tag)] += anzahl
+                    tag += timedelta(days=1)
+            if v.leihrad_id:
+                pro_rad[v.leihrad_id].append((v.von_datum, v.bis_datum))
+
+        verstoesse = sum(1 for anzahl in belegung.values() if anzahl > RAEDER_PRO_TYP)
+        for zeitraeume in pro_rad.values():
+            zeitraeume.sort()
+            verstoesse += sum(1 for a, b in zip(zeitraeume, zeitraeume[1:]) if b[0] <= a[1])
+
+        tabelle = {
+            (z.rad_typ, z.datum): z.belegt
+            for z in session.query(LeihradTagesbelegung).filter(LeihradTagesbelegung.rad_typ.in_(TYPEN))
+            if z.belegt
+        }
+        abweichend = sum(1 for k in set(tabelle) | set(belegung) if tabelle.get(k, 0) != belegung.get(k, 0))
+
+        print(f"   Buchungen aktiv/reserviert: {len(vermietungen)}")
+        print(f"   Überbuchungen:              {verstoesse}")
+        print(f"   Tagesbelegung abweichend:   {abweichend}")
+        return verstoesse + abweichend
+    finally:
+        session.close()
+
+
+def stresstest(anzahl: int = 200, threads: int = 16) -> int:
+    random.seed(42)
+    aufraeumen()
+    testdaten = anlegen()
+    try:
+        print("=" * 70)
+        print(f"Stresstest Vermietungen ({anzahl} Buchungen pro Lauf, {threads} Threads)")
+        print("=" * 70)
+        ein_typ = lauf("Typ-basiert, ein Typ", auftraege(anzahl, TYPEN[:1], testdaten, False, START), threads)
+        zwei_typen = lauf(
+            "Typ-basiert, zwei Typen", auftraege(anzahl, TYPEN, testdaten, False, START + timedelta(days=30)), threads
+        )
+        lauf("Einzel-Rad", auftraege(anzahl, TYPEN, testdaten, True, START + timedelta(days=60)), threads)
+        print(f"   Zwei Typen / ein Typ:       {zwei_typen / ein_typ:5.2f}×")
+        print("-" * 70)
+        verstoesse = pruefe()
+        print("=" * 70)
+        print("✅ Keine Überbuchung." if not verstoesse else "❌ Überbuchung gefunden!")
+        return verstoesse
+    finally:
+        aufraeumen()
+
+
+if __name__ == "__main__":
+    anzahl = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    sys.exit(1 if stresstest(anzahl, threads) else 0)